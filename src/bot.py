@@ -133,6 +133,9 @@ class DiscordBot(commands.Bot):
                     raise ValueError(f"Failed to initialize API service: {str(e)}")
                 logger.info("API service initialized successfully")
             
+            # Batch job results are delivered to channels looked up by ID
+            self._api_service.set_channel_resolver(self._resolve_channel)
+            
             # Initialize memory database
             logger.info("Initializing memory database...")
             await self._initialize_memory_db()
@@ -242,6 +245,23 @@ class DiscordBot(commands.Bot):
             logger.error(f"Failed to register commands: {str(e)}")
             raise
 
+    async def _resolve_channel(self, channel_id: int) -> Optional[discord.abc.Messageable]:
+        """Look up a channel by ID, fetching it when it isn't cached
+        
+        Args:
+            channel_id: Discord channel ID
+            
+        Returns:
+            Optional[discord.abc.Messageable]: The channel, or None if it is gone or hidden
+        """
+        channel = self.get_channel(channel_id)
+        if channel is not None:
+            return channel
+        try:
+            return await self.fetch_channel(channel_id)
+        except (discord.NotFound, discord.Forbidden):
+            return None
+
     async def on_ready(self) -> None:
         """Handle bot ready event"""
         try:
@@ -289,6 +309,10 @@ class DiscordBot(commands.Bot):
                 for api_name, state in api_states.items():
                     logger.info(f"- {api_name}: {'✓' if state else '✗'}")
 
+            # Channels resolve now, so batch results restored from disk can be delivered
+            if self._api_service:
+                self._api_service.start_batch_jobs()
+
             # Set bot presence
             logger.info("Setting bot presence...")
             await cast(discord.Client, self).change_presence(
@@ -360,10 +384,10 @@ class DiscordBot(commands.Bot):
                         
                         # Clean up from storage in ai_commands
                         from src.commands.ai import source_storage, thinking_storage
-                        if custom_id.startswith("sources_") and content_id in source_storage:
-                            del source_storage[content_id]
-                        elif custom_id.startswith("thinking_") and content_id in thinking_storage:
-                            del thinking_storage[content_id]
+                        if custom_id.startswith("sources_"):
+                            source_storage.pop(content_id)
+                        elif custom_id.startswith("thinking_"):
+                            thinking_storage.pop(content_id)
                     else:
                         await interaction.response.send_message(
                             "명령어를 처리할 수 없어.",
@@ -546,14 +570,6 @@ class DiscordBot(commands.Bot):
         if amount > 1000000000:
             raise ValueError("금액이 너무 큽니다 (최대: 1,000,000,000)")
 
-    async def _get_exchange_rates(self) -> Dict[str, float]:
-        """Get current exchange rates"""
-        try:
-            return await self.api_service.exchange.get_exchange_rates()
-        except Exception as e:
-            logger.error(f"Failed to get exchange rates: {e}")
-            raise ValueError("환율 정보를 가져오는데 실패했어") from e
-
     async def _create_exchange_embed(
         self,
         rates: Dict[str, float],
@@ -570,6 +586,7 @@ class DiscordBot(commands.Bot):
         Returns:
             discord.Embed: Formatted embed
         """
+        exchange = self.api_service.exchange
         embed = discord.Embed(
             title="💱 환율 정보",
             color=INFO_COLOR,
@@ -579,17 +596,18 @@ class DiscordBot(commands.Bot):
         if currency:
             if currency.upper() not in rates:
                 raise ValueError(f"지원하지 않는 통화입니다: {currency}")
-            rate = rates[currency.upper()]
+            converted = await exchange.convert(amount, "KRW", currency)
             embed.add_field(
                 name=f"KRW → {currency.upper()}",
-                value=f"{amount:,.0f} KRW = {amount/rate:,.2f} {currency.upper()}",
+                value=f"{amount:,.0f} KRW = {converted:,.2f} {currency.upper()}",
                 inline=False
             )
         else:
-            for curr, rate in rates.items():
+            for curr in rates:
+                converted = await exchange.convert(amount, "KRW", curr)
                 embed.add_field(
                     name=f"KRW → {curr}",
-                    value=f"{amount:,.0f} KRW = {amount/rate:,.2f} {curr}",
+                    value=f"{amount:,.0f} KRW = {converted:,.2f} {curr}",
                     inline=True
                 )
 
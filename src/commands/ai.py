@@ -1,8 +1,7 @@
 import logging
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, Callable, Awaitable
+import functools
 import uuid
-from datetime import datetime
-from collections import OrderedDict
 import asyncio
 
 import discord
@@ -15,39 +14,27 @@ from .base_commands import BaseCommands
 from src.utils.types import CommandContext
 from src.utils.constants import ERROR_COLOR, INFO_COLOR
 from src.services.api.service import APIService
+from src.services.api.circuit_breaker import breaker_state_label
+from src.services.api.request_scheduler import RequestRejectedError
+from src.utils.cache import PayloadStore
+from src.utils.chunking import split_message
 
 logger = logging.getLogger(__name__)
 
 # Constants
-MAX_SOURCE_ENTRIES = 30000  # Maximum number of source entries to store
+MAX_EMBED_CHUNK = 4000  # Embed description limit (4096) with some buffer
+SOURCE_STORAGE_BYTES = 8 * 1024 * 1024  # Byte budget for stored source lists
+THINKING_STORAGE_BYTES = 32 * 1024 * 1024  # Byte budget for stored thinking (compressed)
+STORED_CONTENT_TTL = 24 * 60 * 60  # Seconds stored sources and thinking stay available, past the chat session
+COMPRESS_THRESHOLD = 4096  # Thinking texts at least this many bytes are kept compressed
 
-# Store source links temporarily using OrderedDict to maintain insertion order
-class TimedSourceStorage(OrderedDict):
-    """Extended OrderedDict that tracks timestamps and enforces a maximum size"""
-    
-    def __setitem__(self, key, value):
-        """Set an item with timestamp and enforce size limit"""
-        # If we're at capacity, remove oldest entry
-        if len(self) >= MAX_SOURCE_ENTRIES:
-            oldest_key = next(iter(self))
-            logger.info(f"Source storage at capacity ({MAX_SOURCE_ENTRIES}). Removing oldest entry.")
-            self.pop(oldest_key)
-        
-        # Store value with timestamp
-        super().__setitem__(key, (value, datetime.now()))
-    
-    def __getitem__(self, key):
-        """Get the value (without timestamp)"""
-        value, _ = super().__getitem__(key)
-        return value
-    
-    def get_entry_count(self):
-        """Get current number of entries"""
-        return len(self)
-
-# Initialize storage for both sources and thinking content
-source_storage = TimedSourceStorage()
-thinking_storage = TimedSourceStorage()
+# Sources and thinking shown on demand, bounded by age and memory use
+source_storage = PayloadStore(SOURCE_STORAGE_BYTES, STORED_CONTENT_TTL)
+thinking_storage = PayloadStore(
+    THINKING_STORAGE_BYTES,
+    STORED_CONTENT_TTL,
+    compress_threshold=COMPRESS_THRESHOLD,
+)
 
 class SourceView(View):
     """View with button to show sources (deprecated - kept for compatibility)"""
@@ -91,6 +78,144 @@ class ResponseView(View):
         #     ))
 
 
+class ProgressiveReply:
+    """Discord message that is progressively edited while an AI reply streams
+
+    Text updates only record the latest snapshot; a single background task
+    pushes it to Discord at most once per EDIT_INTERVAL, so fast token
+    streams never hit Discord's edit rate limit.
+    """
+
+    EDIT_INTERVAL = 1.5  # Seconds between edits
+    PREVIEW_LIMIT = 4000  # Embed description limit with some buffer
+    CURSOR = " ▌"
+
+    def __init__(self, send: Callable[..., Awaitable[discord.Message]]) -> None:
+        """Initialize progressive reply
+
+        Args:
+            send: Coroutine function that sends a new message and returns it
+        """
+        self._send = send
+        self._message: Optional[discord.Message] = None
+        self._latest = ""
+        self._shown = ""
+        self._task: Optional[asyncio.Task] = None
+        self._closed = asyncio.Event()
+
+    @property
+    def has_preview(self) -> bool:
+        """Whether a preview message was already sent"""
+        return self._message is not None
+
+    async def update(self, text: str) -> None:
+        """Record the text generated so far (used as the streaming callback)"""
+        self._latest = text
+        if self._task is None and not self._closed.is_set():
+            self._task = asyncio.create_task(self._edit_loop())
+
+    async def _edit_loop(self) -> None:
+        """Push the latest snapshot until the reply is finished"""
+        while not self._closed.is_set():
+            if self._latest != self._shown:
+                snapshot = self._latest
+                try:
+                    await self._render(snapshot)
+                    self._shown = snapshot
+                except Exception as e:
+                    logger.warning(f"Failed to update streaming reply: {e}")
+            try:
+                await asyncio.wait_for(self._closed.wait(), timeout=self.EDIT_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _render(self, text: str) -> None:
+        """Show a preview of the streamed text"""
+        limit = self.PREVIEW_LIMIT - len(self.CURSOR)
+        preview = (text if len(text) <= limit else text[:limit - 1] + "…") + self.CURSOR
+        embed = discord.Embed(description=preview, color=INFO_COLOR)
+        if self._message is None:
+            self._message = await self._send(embed=embed)
+        else:
+            await self._message.edit(embed=embed)
+
+    async def _stop(self) -> None:
+        """Stop the edit loop and wait for an in-flight edit"""
+        self._closed.set()
+        if self._task is not None:
+            await self._task
+
+    async def finish(self, embed: discord.Embed, view: Optional[View] = None) -> bool:
+        """Replace the preview with the final processed reply
+
+        Args:
+            embed: Final embed
+            view: Optional view to attach
+
+        Returns:
+            bool: False if nothing was streamed and the caller must send the reply itself
+        """
+        await self._stop()
+        if self._message is None:
+            return False
+        try:
+            await self._message.edit(embed=embed, view=view)
+            return True
+        except discord.HTTPException as e:
+            logger.warning(f"Failed to finalize streaming reply, sending a new message: {e}")
+            return False
+
+    async def abort(self) -> None:
+        """Stop streaming and remove the partial preview"""
+        await self._stop()
+        if self._message is not None:
+            try:
+                await self._message.delete()
+            except Exception as e:
+                logger.warning(f"Failed to delete streaming preview: {e}")
+
+
+class QueueNotice:
+    """Status message showing a request's position in the AI queue
+
+    Only sent once a request actually has to wait, edited as the position
+    changes and deleted when the request starts or ends.
+    """
+
+    def __init__(self, send: Callable[..., Awaitable[discord.Message]]) -> None:
+        """Initialize queue notice
+
+        Args:
+            send: Coroutine function that sends a new message and returns it
+        """
+        self._send = send
+        self._message: Optional[discord.Message] = None
+        self._lock = asyncio.Lock()
+        self._closed = False
+
+    async def update(self, position: int) -> None:
+        """Show the current queue position (used as the scheduler callback)"""
+        text = f"⏳ 지금 요청이 많아서 기다리는 중이야... (대기 순번: {position}번)"
+        async with self._lock:
+            if self._closed:
+                return
+            if self._message is None:
+                self._message = await self._send(text)
+            else:
+                await self._message.edit(content=text)
+
+    async def clear(self) -> None:
+        """Remove the notice"""
+        async with self._lock:
+            self._closed = True
+            if self._message is not None:
+                try:
+                    await self._message.delete()
+                except Exception as e:
+                    logger.warning(f"Failed to delete queue notice: {e}")
+                self._message = None
+
+
 class AICommands(BaseCommands):
     """AI-related commands including Claude integration"""
 
@@ -114,13 +239,13 @@ class AICommands(BaseCommands):
         return self.bot.api_service
 
     async def _check_claude_state(self) -> bool:
-        """Check if Claude API is available and ready for use.
+        """Check if an AI chat backend is available and ready for use.
         
         Returns:
-            bool: True if Claude API is available
+            bool: True if Claude or a fallback backend is available
             
         Raises:
-            ValueError: If Claude API is not available or not initialized
+            ValueError: If no AI backend is available or the service is not initialized
         """
         try:
             logger.info("Checking Claude API state...")
@@ -130,18 +255,18 @@ class AICommands(BaseCommands):
             if not self.api_service.initialized:
                 raise ValueError("API 서비스가 초기화되지 않았어. 잠시 후에 다시 해볼래?")
             
-            # Check Claude API instance
-            logger.info(f"Claude API instance present: {self.api_service.claude_api is not None}")
-            if not self.api_service.claude_api:
+            # Check AI backends (Claude, with Gemini as fallback when configured)
+            logger.info(f"AI chat router present: {self.api_service.ai_available}")
+            if not self.api_service.ai_available:
                 raise ValueError("AI 기능이 비활성화되어 있어. 관리자에게 문의해줘!")
             
-            # Check Claude API state
+            # Check backend states
             api_states = self.api_service.api_states
             logger.info(f"API states: {api_states}")
-            if not api_states.get("claude", False):
+            if not (api_states.get("claude", False) or api_states.get("gemini", False)):
                 raise ValueError("AI 서비스가 현재 사용할 수 없는 상태야. 나중에 다시 올래?")
             
-            logger.info("Claude API state check passed")
+            logger.info("AI backend state check passed")
             return True
             
         except Exception as e:
@@ -162,8 +287,8 @@ class AICommands(BaseCommands):
         if custom_id.startswith("thinking_"):
             thinking_id = custom_id.replace("thinking_", "")
             try:
-                if thinking_id in thinking_storage:
-                    thinking_content = thinking_storage[thinking_id]
+                thinking_content = thinking_storage.get(thinking_id)
+                if thinking_content is not None:
                     
                     # Create embed with thinking content
                     embed = discord.Embed(
@@ -188,8 +313,8 @@ class AICommands(BaseCommands):
         elif custom_id.startswith("sources_"):
             source_id = custom_id.replace("sources_", "")
             try:
-                if source_id in source_storage:
-                    source_content = source_storage[source_id]
+                source_content = source_storage.get(source_id)
+                if source_content is not None:
                     
                     # Create embed with sources
                     embed = discord.Embed(
@@ -264,6 +389,65 @@ class AICommands(BaseCommands):
         else:
             await ctx_or_interaction.send(**kwargs)
 
+    def _store_reply_content(
+        self,
+        thinking_content: Optional[str],
+        source_content: Optional[str]
+    ) -> Optional[View]:
+        """Store thinking and sources of a reply and build the buttons to view them
+        
+        Args:
+            thinking_content: Formatted thinking, if any
+            source_content: Formatted sources, if any
+            
+        Returns:
+            Optional[View]: Buttons for the stored content, None if there is nothing to show
+        """
+        thinking_id = None
+        source_id = None
+        
+        if thinking_content:
+            thinking_id = str(uuid.uuid4())
+            thinking_storage.add(thinking_id, thinking_content)
+        
+        if source_content:
+            source_id = str(uuid.uuid4())
+            source_storage.add(source_id, source_content)
+        
+        if thinking_id or source_id:
+            return ResponseView(thinking_id, source_id)
+        return None
+
+    async def _send_chunked_reply(
+        self,
+        send: Callable[..., Awaitable[Any]],
+        response: str,
+        view: Optional[View] = None,
+        reply: Optional[ProgressiveReply] = None,
+        send_first: Optional[Callable[..., Awaitable[Any]]] = None
+    ) -> None:
+        """Send a reply as embeds split at Markdown boundaries
+        
+        Chunks must arrive in order, so messages are sent one after another
+        (discord.py already queues them per rate-limit bucket). A streamed
+        preview is finalized first; if that edit fails, the first chunk is
+        sent as a new message before the rest.
+        
+        Args:
+            send: Coroutine function sending a follow-up message
+            response: Full processed reply
+            view: Buttons attached to the first chunk
+            reply: Streaming preview to finalize with the first chunk, if any
+            send_first: Coroutine function for the first message (defaults to ``send``)
+        """
+        chunks = split_message(response, MAX_EMBED_CHUNK)
+        embeds = [discord.Embed(description=chunk, color=INFO_COLOR) for chunk in chunks]
+        
+        if reply is None or not await reply.finish(embed=embeds[0], view=view):
+            await (send_first or send)(embed=embeds[0], view=view)
+        for embed in embeds[1:]:
+            await send(embed=embed)
+
     @commands.command(
         name="대화",
         help="뮤엘시스와 대화를 나눕니다",
@@ -297,68 +481,34 @@ class AICommands(BaseCommands):
             
             # Send typing indicator while processing
             async with ctx.typing():
+                reply = ProgressiveReply(ctx.send)
+                notice = QueueNotice(ctx.send)
                 try:
-                    # Get response from Claude
-                    response, source_content, thinking_content = await self.api_service.claude.chat(message, ctx.author.id)
-                    
-                    # Split long responses into multiple messages
-                    max_length = 4000  # Leave some buffer for embed formatting
-                    if len(response) > max_length:
-                        # Split response into chunks
-                        chunks = [response[i:i+max_length] for i in range(0, len(response), max_length)]
-                        
-                        # Send first chunk as an embed
-                        first_embed = discord.Embed(
-                            description=chunks[0],
-                            color=INFO_COLOR
+                    # Get response from Claude through the request scheduler,
+                    # streaming a preview as it is generated
+                    async def request():
+                        await notice.clear()
+                        return await self.api_service.ai.chat(
+                            message, ctx.author.id, on_text=reply.update
                         )
-                        
-                        # Create view with thinking and source buttons
-                        view = None
-                        thinking_id = None
-                        source_id = None
-                        
-                        if thinking_content:
-                            thinking_id = str(uuid.uuid4())
-                            thinking_storage[thinking_id] = thinking_content
-                        
-                        if source_content:
-                            source_id = str(uuid.uuid4())
-                            source_storage[source_id] = source_content
-                        
-                        if thinking_id or source_id:
-                            view = ResponseView(thinking_id, source_id)
-                        
-                        await ctx.send(embed=first_embed, view=view)
-                        
-                        # Send remaining chunks as regular messages
-                        for chunk in chunks[1:]:
-                            await ctx.send(chunk)
-                    else:
-                        # Create embed for response
-                        embed = discord.Embed(
-                            description=response,
-                            color=INFO_COLOR
-                        )
-                        
-                        # Create view with thinking and source buttons
-                        view = None
-                        thinking_id = None
-                        source_id = None
-                        
-                        if thinking_content:
-                            thinking_id = str(uuid.uuid4())
-                            thinking_storage[thinking_id] = thinking_content
-                        
-                        if source_content:
-                            source_id = str(uuid.uuid4())
-                            source_storage[source_id] = source_content
-                        
-                        if thinking_id or source_id:
-                            view = ResponseView(thinking_id, source_id)
-                        
-                        await ctx.send(embed=embed, view=view)
+
+                    response, source_content, thinking_content = await self.api_service.ai_scheduler.submit(
+                        ctx.author.id,
+                        request,
+                        guild_id=self.get_guild_id(ctx),
+                        on_position=notice.update,
+                    )
+                    
+                    # Split long responses at Markdown boundaries and send them in order
+                    view = self._store_reply_content(thinking_content, source_content)
+                    await self._send_chunked_reply(ctx.send, response, view=view, reply=reply)
+                except RequestRejectedError:
+                    await notice.clear()
+                    await reply.abort()
+                    raise
                 except Exception as e:
+                    await notice.clear()
+                    await reply.abort()
                     logger.error(f"Error in Claude chat: {e}", exc_info=True)
                     raise ValueError("대화 처리 중 오류가 발생했어. 더 간단한 질문으로 다시 시도해볼래?") from e
                 
@@ -402,52 +552,42 @@ class AICommands(BaseCommands):
             # Get user ID
             user_id = interaction.user.id
             
-            # Process through Claude API directly
+            # Process through Claude API directly, streaming a preview into a followup
             api_start = time.time()
-            response, source_content, thinking_content = await self.api_service.claude.chat(message, user_id)
+            reply = ProgressiveReply(functools.partial(interaction.followup.send, wait=True))
+            notice = QueueNotice(functools.partial(interaction.followup.send, wait=True))
+
+            async def request():
+                await notice.clear()
+                return await self.api_service.ai.chat(message, user_id, on_text=reply.update)
+
+            try:
+                response, source_content, thinking_content = await self.api_service.ai_scheduler.submit(
+                    user_id,
+                    request,
+                    guild_id=self.get_guild_id(interaction),
+                    on_position=notice.update,
+                )
+            except Exception:
+                await notice.clear()
+                await reply.abort()
+                raise
             api_time = time.time() - api_start
             logger.info(f"Claude API took: {api_time:.3f}s")
             
             # Format response for Discord
             format_start = time.time()
-            max_length = 4000  # Leave buffer for embed formatting
-            embed_data = None
-            view = None
+            view = self._store_reply_content(thinking_content, source_content)
             
-            # Continue formatting response
-            
-            if len(response) > max_length:
-                # Split response into chunks
-                chunks = [response[i:i+max_length] for i in range(0, len(response), max_length)]
-                
-                # Send first chunk as an embed
-                first_embed = discord.Embed(
-                    description=chunks[0],
-                    color=INFO_COLOR
+            if len(response) > MAX_EMBED_CHUNK:
+                # Split at Markdown boundaries; the preview is finalized before continuations are posted
+                await self._send_chunked_reply(
+                    functools.partial(interaction.followup.send, wait=True),
+                    response,
+                    view=view,
+                    reply=reply,
                 )
-                
-                # Create view with thinking and source buttons
-                view = None
-                thinking_id = None
-                source_id = None
-                
-                if thinking_content:
-                    thinking_id = str(uuid.uuid4())
-                    thinking_storage[thinking_id] = thinking_content
-                
-                if source_content:
-                    source_id = str(uuid.uuid4())
-                    source_storage[source_id] = source_content
-                
-                if thinking_id or source_id:
-                    view = ResponseView(thinking_id, source_id)
-                
-                # Send first response
-                await interaction.followup.send(embed=first_embed, view=view)
-                
-                # Send remaining chunks
-                for chunk in chunks[1:]:
-                    await interaction.followup.send(chunk)
+                logger.info(f"Total command time: {time.time() - start_time:.3f}s")
             else:
                 # Create embed for response
                 embed = discord.Embed(
@@ -455,24 +595,11 @@ class AICommands(BaseCommands):
                     color=INFO_COLOR
                 )
                 
-                # Create view with thinking and source buttons
-                view = None
-                thinking_id = None
-                source_id = None
-                
-                if thinking_content:
-                    thinking_id = str(uuid.uuid4())
-                    thinking_storage[thinking_id] = thinking_content
-                
-                if source_content:
-                    source_id = str(uuid.uuid4())
-                    source_storage[source_id] = source_content
-                
-                if thinking_id or source_id:
-                    view = ResponseView(thinking_id, source_id)
-                
                 # Send response with timeout protection
                 followup_start = time.time()
+                if await reply.finish(embed=embed, view=view):
+                    logger.info(f"Total command time: {time.time() - start_time:.3f}s")
+                    return
                 try:
                     # Try followup first with a reasonable timeout
                     await asyncio.wait_for(
@@ -538,75 +665,24 @@ class AICommands(BaseCommands):
                 else ctx_or_interaction.user.id
             )
             
-            # Get response from Claude
-            response, source_content, thinking_content = await self.api_service.claude.chat(message, user_id)
+            # Get response from Claude through the request scheduler
+            response, source_content, thinking_content = await self.api_service.ai_scheduler.submit(
+                user_id,
+                lambda: self.api_service.ai.chat(message, user_id),
+                guild_id=self.get_guild_id(ctx_or_interaction),
+            )
             
-            # Split long responses into multiple messages
-            max_length = 4000  # Leave some buffer for embed formatting
-            if len(response) > max_length:
-                # Split response into chunks
-                chunks = [response[i:i+max_length] for i in range(0, len(response), max_length)]
-                
-                # Send first chunk as an embed
-                first_embed = discord.Embed(
-                    description=chunks[0],
-                    color=INFO_COLOR
+            # Split long responses at Markdown boundaries and send them in order
+            view = self._store_reply_content(thinking_content, source_content)
+            if isinstance(ctx_or_interaction, discord.Interaction):
+                await self._send_chunked_reply(
+                    ctx_or_interaction.followup.send,
+                    response,
+                    view=view,
+                    send_first=ctx_or_interaction.response.send_message,
                 )
-                
-                # Create view with thinking and source buttons
-                view = None
-                thinking_id = None
-                source_id = None
-                
-                if thinking_content:
-                    thinking_id = str(uuid.uuid4())
-                    thinking_storage[thinking_id] = thinking_content
-                
-                if source_content:
-                    source_id = str(uuid.uuid4())
-                    source_storage[source_id] = source_content
-                
-                if thinking_id or source_id:
-                    view = ResponseView(thinking_id, source_id)
-                
-                if isinstance(ctx_or_interaction, discord.Interaction):
-                    await ctx_or_interaction.response.send_message(embed=first_embed, view=view)
-                else:
-                    await ctx_or_interaction.send(embed=first_embed, view=view)
-                
-                # Send remaining chunks as regular messages
-                for chunk in chunks[1:]:
-                    if isinstance(ctx_or_interaction, discord.Interaction):
-                        await ctx_or_interaction.followup.send(chunk)
-                    else:
-                        await ctx_or_interaction.send(chunk)
             else:
-                # Create embed for response
-                embed = discord.Embed(
-                    description=response,
-                    color=INFO_COLOR
-                )
-                
-                # Create view with thinking and source buttons
-                view = None
-                thinking_id = None
-                source_id = None
-                
-                if thinking_content:
-                    thinking_id = str(uuid.uuid4())
-                    thinking_storage[thinking_id] = thinking_content
-                
-                if source_content:
-                    source_id = str(uuid.uuid4())
-                    source_storage[source_id] = source_content
-                
-                if thinking_id or source_id:
-                    view = ResponseView(thinking_id, source_id)
-                
-                if isinstance(ctx_or_interaction, discord.Interaction):
-                    await ctx_or_interaction.response.send_message(embed=embed, view=view)
-                else:
-                    await ctx_or_interaction.send(embed=embed, view=view)
+                await self._send_chunked_reply(ctx_or_interaction.send, response, view=view)
                 
         except ValueError as e:
             # Handle API errors
@@ -677,9 +753,17 @@ class AICommands(BaseCommands):
             
             # Add API status information
             status_text.append("**API 상태:**")
+            circuit_states = self.api_service.circuit_states
             for api_name, is_active in api_states.items():
                 icon = status_icons[is_active]
-                status_text.append(f"{icon} {api_name.capitalize()}")
+                line = f"{icon} {api_name.capitalize()}"
+                tripped = [
+                    snapshot for snapshot in circuit_states.get(api_name, {}).values()
+                    if snapshot["state"] != "closed"
+                ]
+                if is_active and tripped:
+                    line = f"⚠️ {api_name.capitalize()} - {breaker_state_label(tripped[0])}"
+                status_text.append(line)
             
             # If Claude is available, add detailed stats
             if api_states.get('claude', False):
@@ -711,6 +795,30 @@ class AICommands(BaseCommands):
                     status_text.append(f"🔄 CPU 사용량: {health['cpu_usage']:.1f}%")
                     status_text.append(f"💾 메모리 사용량: {health['memory_usage']:.1f}%")
                     
+                    # Response time percentiles
+                    latency = self.api_service.claude.usage_stats["latency"]
+                    if latency["count"]:
+                        status_text.append(
+                            f"⏱️ 응답 시간: p50 {latency['p50']:.1f}초 · p95 {latency['p95']:.1f}초 · "
+                            f"p99 {latency['p99']:.1f}초"
+                        )
+                    
+                    # Request queue
+                    queue = self.api_service.ai_scheduler.stats()
+                    status_text.append(
+                        f"📥 처리 중 {queue['running']}/{queue['limit']}건, 대기 {queue['queued']}건"
+                    )
+                    
+                    # Backend routing (only interesting with a fallback configured)
+                    routing = self.api_service.ai.stats()
+                    if len(routing["backends"]) > 1:
+                        for name, backend in routing["backends"].items():
+                            p95 = backend["latency_p95"]
+                            latency = f"p95 {p95:.1f}초" if p95 is not None else "측정 전"
+                            status_text.append(f"🔀 {name.capitalize()}: {backend['requests']}건, {latency}")
+                        if routing["failovers"]:
+                            status_text.append(f"↪️ 자동 전환: {routing['failovers']}회")
+                    
                     # Error count
                     if health["error_count"] > 0:
                         status_text.append(f"\n⚠️ 최근 오류: {health['error_count']}회")
@@ -829,12 +937,11 @@ class AICommands(BaseCommands):
             claude_api = self.api_service.claude
             user_id = ctx.author.id
             
-            # Get conversation session
-            if user_id not in claude_api._chat_sessions:
+            # Get conversation session (spilled ones are read back from disk)
+            messages = await claude_api._chat_sessions.load(user_id)
+            if messages is None:
                 await ctx.send("📭 현재 진행 중인 대화 세션이 없어.")
                 return
-                
-            messages = claude_api._chat_sessions[user_id]
             
             if not messages:
                 await ctx.send("📭 대화 기록이 비어있어.")
@@ -909,10 +1016,15 @@ class AICommands(BaseCommands):
     async def end_chat(self, ctx: commands.Context) -> None:
         """End current chat session"""
         try:
-            if self.api_service.claude.end_chat_session(ctx.author.id):
+            # Cancel running and queued requests before dropping the session
+            cancelled = self.api_service.ai_scheduler.cancel_user(ctx.author.id)
+            if self.api_service.ai.end_chat_session(ctx.author.id) or cancelled:
+                description = "대화 세션이 끝났어!\n새로운 대화를 언제든 시작할 수 있어."
+                if cancelled:
+                    description += f"\n처리 중이던 요청 {cancelled}개도 취소했어."
                 embed = discord.Embed(
                     title="✅ 대화 세션 종료",
-                    description="대화 세션이 끝났어!\n새로운 대화를 언제든 시작할 수 있어.",
+                    description=description,
                     color=INFO_COLOR
                 )
             else:
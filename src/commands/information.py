@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from datetime import datetime
 from typing import List, Optional, Dict, Any, Union, cast, Tuple
@@ -10,6 +11,7 @@ from discord.ext.commands import Context
 from discord import File, app_commands
 
 from src.services.api import APIService
+from src.services.player_history import render_history_chart
 from src.utils.decorators import command_handler
 from src.utils.constants import ERROR_COLOR, INFO_COLOR, SUCCESS_COLOR
 from src.commands.base_commands import BaseCommands
@@ -22,6 +24,8 @@ logger = logging.getLogger(__name__)
 class InformationCommands(BaseCommands):
     """Commands for retrieving various information"""
 
+    STEAM_CHART_HOURS = 7 * 24
+
     def __init__(self, api_service: APIServiceProtocol) -> None:
         """Initialize information commands
 
@@ -64,9 +68,9 @@ class InformationCommands(BaseCommands):
             "• pt population [국가명]\n"
             "예시:\n"
             "• 뮤 인구 South Korea - 대한민국 정보\n"
-            "• pt population Japan - 일본 정보\n"
-            "• pt population United States - 미국 정보\n"
-            "※ 영어로 국가명을 입력하면 더 정확한 결과를 얻을 수 있어."
+            "• 뮤 인구 일본 - 일본 정보\n"
+            "• pt population USA - 미국 정보\n"
+            "※ 한국어, 영어, 현지어 국가명이나 국가 코드로 검색할 수 있어."
         ),
     )
     async def population_prefix(self, ctx: commands.Context, *, country_name: str = None):
@@ -134,7 +138,10 @@ class InformationCommands(BaseCommands):
             processing_msg: Optional processing message to delete (handled by caller)
         """
         # Check if 'name' key exists in the country dictionary
-        country_name = country.get('name', {}).get('official', '정보없음')
+        names = country.get('name', {})
+        country_name = names.get('official', '정보없음')
+        if names.get('korean'):
+            country_name = f"{names['korean']} ({country_name})"
 
         embed = discord.Embed(
             title=f"🌏 {country_name}", 
@@ -144,8 +151,8 @@ class InformationCommands(BaseCommands):
         # Safely access population with a default value
         population = country.get('population', 0)
         embed.add_field(name="인구", value=f"{population:,}명", inline=False)
-        embed.add_field(name="수도", value=country.get("capital", ["정보없음"])[0], inline=True)
-        embed.add_field(name="지역", value=country.get("region", "정보없음"), inline=True)
+        embed.add_field(name="수도", value=(country.get("capital") or ["정보없음"])[0], inline=True)
+        embed.add_field(name="지역", value=country.get("region") or "정보없음", inline=True)
 
         flags = country.get("flags", {})
         if "png" in flags:
@@ -298,6 +305,40 @@ class InformationCommands(BaseCommands):
         if game.get("player_count") is not None:
             embed.add_field(name="현재 플레이어", value=f"{game['player_count']:,}명", inline=True)
 
+        # Tracked games have locally collected history, so the peak costs no extra request
+        peak = 0
+        if game.get("app_id") and game["app_id"] in self.api.steam.watchlist:
+            try:
+                history = await self.api.steam.get_player_history(game["app_id"])
+                peak = history.get("peak_24h") or 0
+            except Exception as e:
+                logger.error(f"Error getting player history for {game['app_id']}: {e}")
+
+        # Other games take it from the store page, which also carries reviews and tags
+        metadata = None
+        if game.get("app_id") and not peak:
+            try:
+                metadata = await self.api.steam.get_store_metadata(game["app_id"])
+            except Exception as e:
+                logger.error(f"Error getting store metadata for {game['app_id']}: {e}")
+
+        if metadata:
+            peak = metadata.get("peak_24h") or 0
+        if peak:
+            embed.add_field(name="24시간 최고", value=f"{peak:,}명", inline=True)
+        if metadata and metadata.get("review_summary"):
+            details = []
+            if metadata.get("review_count"):
+                details.append(f"{metadata['review_count']:,}개")
+            if metadata.get("review_score") is not None:
+                details.append(f"{metadata['review_score']}/10")
+            reviews = metadata["review_summary"]
+            if details:
+                reviews += f" ({', '.join(details)})"
+            embed.add_field(name="평가", value=reviews, inline=True)
+        if metadata and metadata.get("tags"):
+            embed.add_field(name="태그", value=", ".join(metadata["tags"][:5]), inline=False)
+
         # Add game image if available
         if game.get("image_url"):
             embed.set_thumbnail(url=game["image_url"])
@@ -323,6 +364,100 @@ class InformationCommands(BaseCommands):
         )
         await self.send_response(ctx_or_interaction, embed=embed, ephemeral=True)
 
+    @commands.command(
+        name="스팀기록",
+        help="추적 중인 스팀 게임의 플레이어 수 그래프를 보여줄게",
+        brief="스팀 플레이어 기록",
+        aliases=["steamchart"],
+        description=(
+            "추적 중인 게임의 최근 7일 동시접속자 수를 그래프로 보여줘.\n"
+            "사용법:\n"
+            "• 뮤 스팀기록 [게임명]\n"
+            "※ 관리자가 `뮤 스팀추적 [게임명]`으로 추적을 시작한 게임만 볼 수 있어."
+        ),
+    )
+    async def steam_chart_prefix(self, ctx: commands.Context, *, game_name: str = None):
+        """Show a tracked game's player count chart"""
+        await self._handle_steam_chart(ctx, game_name)
+
+    @command_handler()
+    async def _handle_steam_chart(self, ctx: commands.Context, game_name: Optional[str] = None) -> None:
+        """Render a tracked game's player count history
+
+        Args:
+            ctx: Command context
+            game_name: Name of the game to chart
+        """
+        game = await self._find_steam_game(ctx, game_name)
+        if not game:
+            return
+        if game["app_id"] not in self.api.steam.watchlist:
+            await self.send_response(
+                ctx,
+                f"{game['name']}은(는) 아직 추적하고 있지 않아. 관리자가 `뮤 스팀추적 {game_name}`으로 추적을 시작해줘.",
+                ephemeral=True
+            )
+            return
+
+        history = await self.api.steam.get_player_history(
+            game["app_id"], include_history=True, hours=self.STEAM_CHART_HOURS
+        )
+        points = history.get("history") or []
+        if not points:
+            await self.send_response(ctx, "아직 모인 플레이어 기록이 없어. 조금 있다가 다시 봐줘.", ephemeral=True)
+            return
+
+        chart = await asyncio.to_thread(render_history_chart, points, game["name"])
+        embed = discord.Embed(title=f"📈 {game['name']} 플레이어 기록", color=INFO_COLOR)
+        if history.get("peak_24h"):
+            embed.add_field(name="24시간 최고", value=f"{history['peak_24h']:,}명", inline=True)
+        embed.set_image(url="attachment://players.png")
+        await ctx.send(embed=embed, file=File(chart, filename="players.png"))
+
+    @commands.command(
+        name="스팀추적",
+        help="스팀 게임의 플레이어 수를 주기적으로 기록할게 (관리자 전용)",
+        brief="스팀 추적 시작",
+        aliases=["steamtrack"],
+    )
+    @commands.has_permissions(administrator=True)
+    async def steam_track_prefix(self, ctx: commands.Context, *, game_name: str = None):
+        """Add a game to the player count watch-list"""
+        game = await self._find_steam_game(ctx, game_name)
+        if game:
+            self.api.steam.track_app(game["app_id"])
+            await self.send_success(ctx, f"이제 {game['name']}의 플레이어 수를 기록할게.")
+
+    @commands.command(
+        name="스팀추적해제",
+        help="스팀 게임의 플레이어 수 기록을 멈출게 (관리자 전용)",
+        brief="스팀 추적 해제",
+        aliases=["steamuntrack"],
+    )
+    @commands.has_permissions(administrator=True)
+    async def steam_untrack_prefix(self, ctx: commands.Context, *, game_name: str = None):
+        """Remove a game from the player count watch-list"""
+        game = await self._find_steam_game(ctx, game_name)
+        if game:
+            self.api.steam.untrack_app(game["app_id"])
+            await self.send_success(ctx, f"{game['name']}의 플레이어 수 기록을 멈췄어.")
+
+    async def _find_steam_game(self, ctx: commands.Context, game_name: Optional[str]) -> Optional[GameInfo]:
+        """Look up a game for the watch-list commands, replying when there is none
+
+        Returns:
+            Optional[GameInfo]: The game, or None after an error reply
+        """
+        self._check_api_state('steam')
+        if not game_name:
+            await self.send_response(ctx, "어라, 게임 이름도 없이 어떻게 찾아줄 수 있겠어?", ephemeral=True)
+            return None
+        game, _, _ = await self.api.steam.find_game(game_name)
+        if not game or not game.get("app_id"):
+            await self._send_game_not_found_embed(ctx, self.get_user_name(ctx))
+            return None
+        return game
+
     @commands.Cog.listener()
     async def on_command_error(self, ctx, error):
         """Handle command errors
@@ -580,6 +715,14 @@ class InformationCommands(BaseCommands):
             description=f"1 {currency} = {rate:,.2f} KRW",
             color=INFO_COLOR
         )
+        for days in (7, 30):
+            try:
+                change = await self.api.exchange.get_rate_change(currency, days)
+            except Exception as e:
+                logger.warning(f"Failed to get {days}-day exchange rate change for {currency}: {e}")
+                break
+            if change is not None:
+                embed.add_field(name=f"최근 {days}일", value=f"{change:+.2f}%", inline=True)
         await self.send_response(ctx_or_interaction, embed=embed)
 
     async def _send_all_rates(
@@ -622,9 +765,17 @@ class InformationCommands(BaseCommands):
     @commands.command(
         name="던파",
         aliases=["dnf", "df"],
-        help="던전앤파이터 캐릭터 검색 (현재 비활성화)",
+        help="던전앤파이터 캐릭터 정보를 보여줄게",
         brief="던파 캐릭터 검색",
-        description="던전앤파이터 캐릭터의 정보를 검색합니다 (현재 비활성화)"
+        description=(
+            "던전앤파이터 캐릭터의 기본 정보와 장착 장비를 보여줘.\n"
+            "사용법:\n"
+            "• 뮤 던파 [캐릭터명] [서버]\n"
+            "예시:\n"
+            "• 뮤 던파 홍길동\n"
+            "• 뮤 던파 홍길동 카인\n"
+            "※ 서버를 생략하면 모든 서버에서 찾아볼게."
+        )
     )
     async def search_dnf(
         self,
@@ -638,24 +789,54 @@ class InformationCommands(BaseCommands):
         if not character_name:
             await ctx.send("캐릭터 이름을 입력해주세요. 예: `뮤 던파 캐릭터이름`")
             return
-        
-        # Send disabled message
-        disabled_embed = discord.Embed(
-            title="⚠️ 기능 비활성화",
-            description=(
-                "던전앤파이터 캐릭터 검색 기능이 현재 비활성화되어 있습니다.\n"
-                "더 정확한 데미지 계산을 위해 업데이트 중입니다.\n"
-                "추후 업데이트를 통해 다시 제공될 예정입니다."
-            ),
-            color=discord.Color.orange()
-        )
-        disabled_embed.add_field(
-            name="대체 방법",
-            value=(
-                "캐릭터 정보 확인은 아래 사이트를 이용해주세요:\n"
-                "• [네오플 던전앤파이터](https://df.nexon.com/)\n"
-                "• [던담](https://dundam.xyz/)"
-            ),
-            inline=False
+
+        try:
+            self._check_api_state('dnf')
+            # Every profile section is fetched concurrently
+            profile = await self.api.dnf.search_character(character_name, server_name)
+        except Exception as e:
+            logger.error(f"Error searching DNF character {character_name}: {e}")
+            await self.send_error(ctx, "캐릭터 정보를 가져오지 못했어. 잠시 후에 다시 해볼래?")
+            return
+
+        if not profile:
+            await self.send_error(ctx, f"'{character_name}' 캐릭터를 찾을 수 없었어.")
+            return
+        await ctx.send(embed=self._create_dnf_embed(profile))
+
+    def _create_dnf_embed(self, profile: Dict[str, Any]) -> discord.Embed:
+        """Create a character card from a DNF profile
+
+        Args:
+            profile: Result of DNFAPI.search_character
+
+        Returns:
+            discord.Embed: Character card
+        """
+        basic = profile["basic"]
+        embed = discord.Embed(
+            title=f"⚔️ {basic.get('characterName', '?')}",
+            description=f"Lv.{basic.get('level', '?')} {basic.get('jobGrowName') or basic.get('jobName', '')}",
+            color=INFO_COLOR
         )
-        await ctx.send(embed=disabled_embed)
+        embed.add_field(name="명성", value=f"{basic.get('fame') or 0:,}", inline=True)
+        embed.add_field(name="모험단", value=basic.get("adventureName") or "없음", inline=True)
+        embed.add_field(name="길드", value=basic.get("guildName") or "없음", inline=True)
+
+        items = []
+        for item in (profile.get("equipment") or {}).get("equipment", []):
+            name = item.get("itemName", "?")
+            if item.get("reinforce"):
+                name = f"+{item['reinforce']} {name}"
+            items.append(f"**{item.get('slotName', '')}** {name}")
+        if items:
+            embed.add_field(name="장비", value="\n".join(items)[:1024], inline=False)
+
+        creature = (profile.get("creature") or {}).get("creature")
+        if creature and creature.get("itemName"):
+            embed.add_field(name="크리쳐", value=creature["itemName"], inline=True)
+
+        character_id = basic.get("characterId")
+        if character_id:
+            embed.url = f"https://dundam.xyz/character?server={profile['server']}&key={character_id}"
+        return embed
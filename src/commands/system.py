@@ -1149,8 +1149,26 @@ class SystemCommands(BaseCommands):
             else:
                 status = "❌ Outdated instances detected - restart recommended"
                 
+            # Latency percentiles of each API's busiest endpoint
+            latency_lines = []
+            for api_name, metrics in self.bot.api_service.request_metrics.items():
+                endpoint = metrics.busiest()
+                if endpoint is None:
+                    continue
+                stats = metrics.snapshot()["endpoints"][endpoint]
+                latency = stats["latency"]
+                if not latency["count"]:
+                    continue
+                latency_lines.append(
+                    f"⏱️ {api_name} `{endpoint}`: p50 {latency['p50']:.2f}s / "
+                    f"p95 {latency['p95']:.2f}s / p99 {latency['p99']:.2f}s "
+                    f"({stats['requests']} req, {stats['error']} err, {stats['timeout']} timeout)"
+                )
+            
             # Send response appropriately for context or interaction
             message = f"**Health Check Results**\n" + "\n".join(health_results) + f"\n\n**Status:** {status}"
+            if latency_lines:
+                message += "\n\n**API Latency**\n" + "\n".join(latency_lines)
             await self.send_response(ctx_or_interaction, message)
             
         except Exception as e:
@@ -21,6 +21,11 @@ from src.services.auto_predictor import DraftOutcomePredictor, TeamPlayer
 
 logger = logging.getLogger(__name__)
 
+DRAFT_SUMMARY_SYSTEM = (
+    "너는 Fate 서번트 팀 드래프트 결과를 정리하는 기록원이야. "
+    "두 팀의 구성을 3~4문장의 한국어로 요약하고, 각 팀 조합의 강점과 약점을 짚어줘."
+)
+
 # Hot reload test comment - this should trigger the deployment action
 
 
@@ -470,6 +475,41 @@ class TeamDraftCommands(BaseCommands):
             return self.bot.get_channel(draft.channel_id)
         return None
 
+    def _queue_draft_summary(self, draft: DraftSession) -> None:
+        """Queue an AI summary of a completed draft as an offline batch job
+
+        Summaries are not urgent, so they go through message batches and are
+        written next to the match records instead of using the chat limits.
+        """
+        if draft.is_simulation or not draft.match_id or not self.bot:
+            return
+        try:
+            batch_jobs = self.bot.api_service.batch_jobs
+        except (AttributeError, ValueError):
+            return  # No API service, or Claude is not configured
+
+        lines = []
+        for team in (1, 2):
+            members = ", ".join(
+                f"{draft.confirmed_servants.get(p.user_id, '미정')}({p.username}{', 팀장' if p.is_captain else ''})"
+                for p in draft.players.values() if p.team == team
+            )
+            lines.append(f"팀 {team}: {members}")
+        if draft.banned_servants:
+            lines.append(f"밴: {', '.join(sorted(draft.banned_servants))}")
+
+        file_name = draft.match_id.replace(":", "-") + ".md"
+        try:
+            batch_jobs.enqueue(
+                f"{draft.team_size}vs{draft.team_size} 드래프트 결과\n" + "\n".join(lines),
+                label=f"드래프트 요약 {draft.match_id}",
+                system=DRAFT_SUMMARY_SYSTEM,
+                max_tokens=512,
+                file_path=str(self.match_recorder.records_dir / "summaries" / file_name),
+            )
+        except Exception as e:
+            logger.warning(f"Failed to queue draft summary: {e}")
+
     def _register_view(self, channel_id: int, view: discord.ui.View) -> None:
         """Register a view for memory management tracking"""
         if channel_id not in self.active_views:
@@ -3126,6 +3166,8 @@ class TeamDraftCommands(BaseCommands):
             )
         except Exception as e:
             logger.warning(f"Failed to record prematch data: {e}")
+
+        self._queue_draft_summary(current_draft)
         
         # Use thread if available, otherwise main channel
         channel = self._get_draft_channel(current_draft)
@@ -35,6 +35,8 @@ def get_config() -> Dict[str, str]:
         "DISCORD_TOKEN": os.getenv("DISCORD_TOKEN", ""),
         "STEAM_API_KEY": os.getenv("STEAM_API_KEY", ""),
         "CL_API_KEY": os.getenv("CL_API_KEY", ""),
+        "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY", ""),
+        "STEAM_WATCHLIST": os.getenv("STEAM_WATCHLIST", ""),
     }
 
 async def start_bot(config: Dict[str, str], attempt: int = 1) -> NoReturn:
@@ -4,8 +4,12 @@ import time
 from abc import ABC, abstractmethod
 from collections import defaultdict
 from typing import Any, Dict, List, Optional, TypeVar, Generic, cast
+from urllib.parse import urlparse
 
 import aiohttp
+from src.services.api.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.services.api.metrics import APIMetrics
+from src.utils.cache import TTLCache
 from src.utils.types import JsonDict
 
 logger = logging.getLogger(__name__)
@@ -32,6 +36,10 @@ class RateLimitConfig:
 
 class BaseAPI(ABC, Generic[T]):
     """Base class for API clients"""
+
+    REQUEST_TIMEOUT = 10  # Seconds before a request counts as failed
+    STALE_CACHE_SIZE = 256
+    STALE_CACHE_TTL = 24 * 60 * 60  # Oldest response served while a circuit is open
     
     def __init__(self, api_key: Optional[str] = None) -> None:
         self.api_key = api_key
@@ -40,6 +48,11 @@ class BaseAPI(ABC, Generic[T]):
         self._rate_limits: Dict[str, RateLimitConfig] = {}
         self._request_timestamps: Dict[str, List[float]] = {}
         self._backoff_times: Dict[str, float] = {}
+        self._circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self._stale_responses: TTLCache[JsonDict] = TTLCache(
+            self.STALE_CACHE_SIZE, self.STALE_CACHE_TTL
+        )
+        self._request_metrics = APIMetrics()
 
     @property
     def session(self) -> Optional[aiohttp.ClientSession]:
@@ -51,6 +64,28 @@ class BaseAPI(ABC, Generic[T]):
         """Get current backoff times for endpoints."""
         return self._backoff_times.copy()
 
+    @property
+    def request_metrics(self) -> APIMetrics:
+        """Get latency, outcome and payload metrics of outbound requests."""
+        return self._request_metrics
+
+    @property
+    def circuit_states(self) -> Dict[str, Dict[str, Any]]:
+        """Get circuit breaker state for each endpoint used so far."""
+        return {name: breaker.snapshot() for name, breaker in self._circuit_breakers.items()}
+
+    def get_circuit_breaker(self, name: str) -> CircuitBreaker:
+        """Get circuit breaker for an endpoint, creating it on first use
+
+        Backoff growth follows the endpoint's rate limit backoff_factor.
+        """
+        breaker = self._circuit_breakers.get(name)
+        if breaker is None:
+            config = self._rate_limits.get(name)
+            breaker = CircuitBreaker(name, backoff_factor=config.backoff_factor if config else 1.5)
+            self._circuit_breakers[name] = breaker
+        return breaker
+
     def get_rate_limit(self, endpoint: str) -> Optional[RateLimitConfig]:
         """Get rate limit config for endpoint."""
         return self._rate_limits.get(endpoint)
@@ -69,8 +104,10 @@ class BaseAPI(ABC, Generic[T]):
                     await self._session.close()  # Clean up closed session
                     self._session = None
             
-            # Create new session
-            self._session = aiohttp.ClientSession()
+            # Create new session; a bounded timeout keeps outages from tying up coroutines
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.REQUEST_TIMEOUT)
+            )
             logger.debug(f"{self.__class__.__name__} session initialized")
             
         except Exception as e:
@@ -131,9 +168,29 @@ class BaseAPI(ABC, Generic[T]):
         if endpoint:
             await self._check_rate_limit(endpoint)
 
+        breaker = self.get_circuit_breaker(endpoint or urlparse(url).netloc)
+        metric_name = breaker.name
+        cache_key = (
+            (method, url, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+            if not custom_request else None
+        )
+        if not breaker.allow_request():
+            self._backoff_times[breaker.name] = breaker.open_until
+            stale = self._stale_responses.get(cache_key) if cache_key else None
+            if stale is not None:
+                self._request_metrics.record(metric_name, None, "served_stale")
+                self._logger.info(f"Circuit open for {breaker.name}, serving cached response")
+                return stale
+            self._request_metrics.record(metric_name, None, "short_circuited")
+            raise CircuitOpenError(breaker.name, breaker.retry_in())
+
+        outcome_recorded = False
+        started = time.perf_counter()
         try:
             if custom_request:
                 response = await custom_request()
+                breaker.record_success()
+                self._request_metrics.record(metric_name, time.perf_counter() - started)
                 if endpoint:
                     self._record_request(endpoint)
                 return response
@@ -145,16 +202,57 @@ class BaseAPI(ABC, Generic[T]):
                 headers=headers
             ) as response:
                 if response.status != 200:
+                    # Client errors mean the service is up; only outages count
+                    if response.status >= 500 or response.status == 429:
+                        self._record_breaker_failure(breaker)
+                    else:
+                        breaker.record_success()
+                    outcome_recorded = True
+                    self._request_metrics.record(metric_name, time.perf_counter() - started, "error")
                     raise ValueError(f"API request failed: {response.status}")
                     
                 data = await response.json()
+                breaker.record_success()
+                self._request_metrics.record(metric_name, time.perf_counter() - started)
+                # The body is already buffered by json(), so read() doesn't fetch again
+                self._request_metrics.observe(metric_name, "payload_bytes", len(await response.read()))
+                self._backoff_times.pop(breaker.name, None)
+                if cache_key:
+                    self._stale_responses.set(cache_key, cast(JsonDict, data))
                 if endpoint:
                     self._record_request(endpoint)
                 return cast(JsonDict, data)
 
-        except aiohttp.ClientError as e:
-            self._logger.error(f"API request failed: {e}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._record_breaker_failure(breaker)
+            self._request_metrics.record(
+                metric_name,
+                time.perf_counter() - started,
+                "timeout" if isinstance(e, asyncio.TimeoutError) else "error",
+            )
+            self._logger.error(f"API request failed: {e!r}")
             raise ValueError("API 요청에 실패했습니다") from e
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        except Exception:
+            if not outcome_recorded:
+                self._record_breaker_failure(breaker)
+                self._request_metrics.record(metric_name, time.perf_counter() - started, "error")
+            raise
+
+    def _record_breaker_failure(self, breaker: CircuitBreaker) -> None:
+        """Record a failed request and publish the backoff if the circuit opened
+
+        Args:
+            breaker: Circuit breaker of the failed endpoint
+        """
+        breaker.record_failure()
+        if breaker.state == CircuitBreaker.OPEN:
+            self._backoff_times[breaker.name] = breaker.open_until
+            self._logger.warning(
+                f"Circuit opened for {breaker.name}, backing off {breaker.retry_in():.1f}s"
+            )
 
     async def _check_rate_limit(self, endpoint: str) -> None:
         """Check and enforce rate limits
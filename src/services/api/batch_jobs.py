@@ -0,0 +1,394 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from src.utils.chunking import split_message
+
+logger = logging.getLogger(__name__)
+
+DISCORD_MESSAGE_LIMIT = 2000
+
+# Job states
+QUEUED = "queued"
+SUBMITTED = "submitted"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+@dataclass
+class BatchJob:
+    """A non-urgent prompt answered through the Message Batches API
+
+    Attributes:
+        job_id (str): Unique ID, also the batch request's custom_id
+        label (str): Short description of the job, used in delivered results
+        prompt (str): User message sent to the model
+        system (Optional[str]): Optional system prompt
+        max_tokens (int): Response length limit
+        channel_id (Optional[int]): Discord channel receiving the result
+        file_path (Optional[str]): File receiving the result
+        status (str): queued, submitted, succeeded or failed
+        batch_id (Optional[str]): Batch the job was submitted in
+        result (Optional[str]): Response text once succeeded
+        error (Optional[str]): Failure reason once failed
+        created_at (float): Enqueue timestamp
+    """
+
+    job_id: str
+    label: str
+    prompt: str
+    system: Optional[str] = None
+    max_tokens: int = 1024
+    channel_id: Optional[int] = None
+    file_path: Optional[str] = None
+    status: str = QUEUED
+    batch_id: Optional[str] = None
+    result: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+
+class BatchJobQueue:
+    """Queue of offline AI jobs processed through message batches
+
+    Jobs are collected until a batch is full or the oldest job has waited
+    ``flush_interval`` seconds, then submitted together. A background worker
+    polls submitted batches and delivers each result to its Discord channel
+    and/or file. Batches run outside the interactive chat rate limits at
+    half the token price. Unfinished jobs are kept in SQLite, so batches
+    submitted before a restart are still collected afterwards; a result whose
+    delivery failed stays stored and is delivered again on later passes.
+    """
+
+    MODEL = "claude-sonnet-4-20250514"
+    MAX_DELIVERY_ATTEMPTS = 5  # Passes a finished job is kept for before its result is dropped
+    FIELDS = (
+        "job_id", "label", "prompt", "system", "max_tokens", "channel_id",
+        "file_path", "status", "batch_id", "result", "error", "created_at",
+    )
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS batch_jobs (
+            job_id TEXT PRIMARY KEY,
+            label TEXT NOT NULL,
+            prompt TEXT NOT NULL,
+            system TEXT,
+            max_tokens INTEGER NOT NULL,
+            channel_id INTEGER,
+            file_path TEXT,
+            status TEXT NOT NULL,
+            batch_id TEXT,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL
+        )
+    """
+
+    def __init__(
+        self,
+        client_getter: Callable[[], Optional[Any]],
+        db_file: Optional[str] = None,
+        max_batch_size: int = 100,
+        flush_interval: float = 300.0,
+        poll_interval: float = 60.0,
+        timer: Callable[[], float] = time.time,
+        on_usage: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        """Initialize batch job queue
+
+        Args:
+            client_getter: Returns the Anthropic client, or None while unavailable
+            db_file: Path to SQLite database (defaults to $MUMU_DATA_DIR/batch_jobs.db)
+            max_batch_size: Jobs per submitted batch
+            flush_interval: Seconds a job may wait for a fuller batch
+            poll_interval: Seconds between worker passes
+            timer: Clock used for job ages
+            on_usage: Called with the usage block of each succeeded request
+        """
+        if max_batch_size <= 0 or flush_interval < 0 or poll_interval <= 0:
+            raise ValueError("Invalid batch queue configuration")
+        base_dir = os.getenv("MUMU_DATA_DIR", "data")
+        self.db_file = db_file or str(Path(base_dir) / "batch_jobs.db")
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self._client_getter = client_getter
+        self._timer = timer
+        self._on_usage = on_usage
+        self._channel_resolver: Optional[Callable[[int], Awaitable[Any]]] = None
+        self._jobs: Dict[str, BatchJob] = {}  # Unfinished or undelivered jobs
+        self._delivery_attempts: Dict[str, int] = {}
+        self._finished: Deque[BatchJob] = deque(maxlen=100)
+        self._worker: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._counters = {"submitted_batches": 0, "succeeded": 0, "failed": 0, "delivery_errors": 0}
+
+        self._lock = threading.Lock()
+        if self.db_file != ":memory:":
+            Path(self.db_file).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(self._SCHEMA)
+            rows = self._conn.execute(f"SELECT {', '.join(self.FIELDS)} FROM batch_jobs").fetchall()
+        for row in rows:
+            job = BatchJob(**dict(zip(self.FIELDS, row)))
+            self._jobs[job.job_id] = job
+        if rows:
+            logger.info(f"Restored {len(rows)} unfinished batch jobs")
+
+    def set_channel_resolver(self, resolver: Callable[[int], Awaitable[Any]]) -> None:
+        """Set the coroutine function used to look up delivery channels by ID (None if missing)"""
+        self._channel_resolver = resolver
+
+    def enqueue(
+        self,
+        prompt: str,
+        label: str,
+        system: Optional[str] = None,
+        max_tokens: int = 1024,
+        channel_id: Optional[int] = None,
+        file_path: Optional[str] = None,
+    ) -> BatchJob:
+        """Queue a prompt for the next batch
+
+        Args:
+            prompt: User message sent to the model
+            label: Short description of the job
+            system: Optional system prompt
+            max_tokens: Response length limit
+            channel_id: Discord channel receiving the result
+            file_path: File receiving the result
+
+        Returns:
+            BatchJob: The queued job
+
+        Raises:
+            ValueError: If the prompt is empty or the job has nowhere to deliver to
+        """
+        if not prompt or not prompt.strip():
+            raise ValueError("배치 작업 내용이 비어 있어.")
+        if channel_id is None and file_path is None:
+            raise ValueError("배치 작업 결과를 보낼 채널이나 파일을 지정해줘.")
+        job = BatchJob(
+            job_id=uuid.uuid4().hex,
+            label=label,
+            prompt=prompt,
+            system=system,
+            max_tokens=max_tokens,
+            channel_id=channel_id,
+            file_path=file_path,
+            created_at=self._timer(),
+        )
+        self._jobs[job.job_id] = job
+        self._save(job)
+        if self._wake and len(self._queued()) >= self.max_batch_size:
+            self._wake.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        """Get a job that is unfinished or finished recently"""
+        return self._jobs.get(job_id) or next(
+            (job for job in self._finished if job.job_id == job_id), None
+        )
+
+    def start(self) -> None:
+        """Start the background worker"""
+        if self._worker is None or self._worker.done():
+            self._wake = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background worker; unfinished jobs stay stored"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Batch worker pass failed: {e}", exc_info=True)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def run_once(self) -> None:
+        """Retry failed deliveries, submit due jobs and collect finished batches"""
+        for job in [job for job in self._jobs.values() if job.status in (SUCCEEDED, FAILED)]:
+            await self._deliver_or_keep(job)
+
+        client = self._client_getter()
+        if client is None:
+            return
+        queued = self._queued()
+        while queued and (
+            len(queued) >= self.max_batch_size
+            or self._timer() - queued[0].created_at >= self.flush_interval
+        ):
+            batch, queued = queued[:self.max_batch_size], queued[self.max_batch_size:]
+            if not await self._submit(client, batch):
+                break
+
+        for batch_id in sorted({job.batch_id for job in self._jobs.values() if job.status == SUBMITTED}):
+            await self._collect(client, batch_id)
+
+    def _queued(self) -> List[BatchJob]:
+        return sorted(
+            (job for job in self._jobs.values() if job.status == QUEUED),
+            key=lambda job: job.created_at,
+        )
+
+    async def _submit(self, client: Any, jobs: List[BatchJob]) -> bool:
+        """Submit jobs as one batch, leaving them queued on failure"""
+        requests = []
+        for job in jobs:
+            params: Dict[str, Any] = {
+                "model": self.MODEL,
+                "max_tokens": job.max_tokens,
+                "messages": [{"role": "user", "content": job.prompt}],
+            }
+            if job.system:
+                params["system"] = job.system
+            requests.append({"custom_id": job.job_id, "params": params})
+        try:
+            batch = await client.messages.batches.create(requests=requests)
+        except Exception as e:
+            logger.error(f"Failed to submit batch of {len(jobs)} jobs: {e}")
+            return False
+
+        for job in jobs:
+            job.status = SUBMITTED
+            job.batch_id = batch.id
+            self._save(job)
+        self._counters["submitted_batches"] += 1
+        logger.info(f"Submitted batch {batch.id} with {len(jobs)} jobs")
+        return True
+
+    async def _collect(self, client: Any, batch_id: str) -> None:
+        """Fetch results of an ended batch and deliver them"""
+        try:
+            batch = await client.messages.batches.retrieve(batch_id)
+            if batch.processing_status != "ended":
+                return
+            entries = await client.messages.batches.results(batch_id)
+            results = {}
+            async for entry in entries:
+                results[entry.custom_id] = entry.result
+        except Exception as e:
+            logger.error(f"Failed to collect batch {batch_id}: {e}")
+            return
+
+        for job in [job for job in self._jobs.values() if job.batch_id == batch_id and job.status == SUBMITTED]:
+            result = results.get(job.job_id)
+            if result is not None and result.type == "succeeded":
+                job.status = SUCCEEDED
+                job.result = "".join(
+                    block.text for block in result.message.content if getattr(block, 'type', None) == "text"
+                )
+                if self._on_usage:
+                    self._on_usage(getattr(result.message, 'usage', None))
+            else:
+                job.status = FAILED
+                job.error = getattr(result, 'type', None) or "missing"
+            self._counters[job.status] += 1
+            self._save(job)
+            await self._deliver_or_keep(job)
+        logger.info(f"Collected batch {batch_id}")
+
+    async def _deliver_or_keep(self, job: BatchJob) -> None:
+        """Deliver a finished job, keeping it stored for another try if that fails"""
+        if await self._deliver(job):
+            self._finish(job)
+            return
+        self._counters["delivery_errors"] += 1
+        attempts = self._delivery_attempts.get(job.job_id, 0) + 1
+        self._delivery_attempts[job.job_id] = attempts
+        if attempts >= self.MAX_DELIVERY_ATTEMPTS:
+            logger.error(f"Giving up delivering batch job {job.job_id} after {attempts} attempts")
+            self._finish(job)
+
+    async def _deliver(self, job: BatchJob) -> bool:
+        """Send a finished job's result to its file and/or channel
+
+        The file is written first and a failed write skips the channel, so a
+        retry never sends the channel the same result twice.
+
+        Returns:
+            bool: Whether every destination received the result
+        """
+        if job.status == SUCCEEDED:
+            text = job.result or ""
+        else:
+            text = f"배치 작업이 실패했어 ({job.error})."
+
+        if job.file_path:
+            try:
+                path = Path(job.file_path)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(f"# {job.label}\n\n{text}\n", encoding="utf-8")
+            except OSError as e:
+                logger.error(f"Failed to write batch job {job.job_id} to {job.file_path}: {e}")
+                return False
+
+        if job.channel_id is not None:
+            try:
+                channel = await self._channel_resolver(job.channel_id) if self._channel_resolver else None
+                if channel is None:
+                    logger.warning(f"No channel {job.channel_id} to deliver batch job {job.job_id}")
+                    return False
+                for chunk in split_message(f"**{job.label}**\n{text}", DISCORD_MESSAGE_LIMIT):
+                    await channel.send(chunk)
+            except Exception as e:
+                logger.error(f"Failed to send batch job {job.job_id}: {e}")
+                return False
+        return True
+
+    def _save(self, job: BatchJob) -> None:
+        values = tuple(getattr(job, name) for name in self.FIELDS)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO batch_jobs ({', '.join(self.FIELDS)}) "
+                f"VALUES ({', '.join('?' * len(self.FIELDS))})",
+                values,
+            )
+
+    def _finish(self, job: BatchJob) -> None:
+        self._jobs.pop(job.job_id, None)
+        self._delivery_attempts.pop(job.job_id, None)
+        self._finished.append(job)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM batch_jobs WHERE job_id = ?", (job.job_id,))
+
+    def stats(self) -> Dict[str, int]:
+        """Get queue statistics
+
+        Returns:
+            Dict[str, int]: Queued, submitted and undelivered job counts plus lifetime counters
+        """
+        statuses = [job.status for job in self._jobs.values()]
+        return {
+            "queued": statuses.count(QUEUED),
+            "submitted": statuses.count(SUBMITTED),
+            "undelivered": statuses.count(SUCCEEDED) + statuses.count(FAILED),
+            **self._counters,
+        }
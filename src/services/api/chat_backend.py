@@ -0,0 +1,305 @@
+import functools
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from src.services.api.circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+ChatResult = Tuple[str, Optional[str], Optional[str]]  # (response, sources, thinking)
+TextCallback = Callable[[str], Awaitable[None]]
+
+
+class ChatBackend(ABC):
+    """Interface shared by the AI chat providers
+
+    Implementations keep their own sessions, limits and health tracking;
+    the router only needs to talk to them, end sessions and read how
+    healthy they are.
+
+    Attributes:
+        backend_name (str): Short provider name used in logs and stats
+    """
+
+    backend_name = "ai"
+
+    @abstractmethod
+    async def chat(
+        self,
+        prompt: str,
+        user_id: int,
+        on_text: Optional[TextCallback] = None,
+    ) -> ChatResult:
+        """Answer a user's message in their ongoing conversation
+
+        Args:
+            prompt: The user's message
+            user_id: Discord user ID
+            on_text: Optional callback receiving the text generated so far
+
+        Returns:
+            ChatResult: (response, formatted sources, formatted thinking)
+
+        Raises:
+            ValueError: If the request fails or limits are exceeded
+        """
+
+    @abstractmethod
+    def end_chat_session(self, user_id: int) -> bool:
+        """End a user's conversation, returning True if one existed"""
+
+    @property
+    @abstractmethod
+    def health_status(self) -> Dict[str, Any]:
+        """Health state with at least "is_enabled" and "is_slowed_down" """
+
+    @property
+    def budget_remaining(self) -> float:
+        """Share of the daily token budget still available (0-1)"""
+        return 1.0
+
+    def add_session_expiry_listener(self, callback: Callable[[int], None]) -> None:
+        """Register a callback run with the user ID of each expired session
+
+        Backends whose sessions never expire on their own ignore it.
+        """
+
+
+class LatencyWindow:
+    """Sliding window of recent request latencies"""
+
+    def __init__(self, size: int = 100) -> None:
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Get a latency percentile (nearest rank), or None without samples"""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(percent / 100 * len(ordered) + 0.5)) - 1))
+        return ordered[index]
+
+
+class ChatRouter:
+    """Routes chat requests to the best available backend with failover
+
+    Backends are ranked per request. Disabled backends, backends whose
+    router-side circuit is open and backends without daily budget are
+    skipped. The rest are ordered by configured preference, except that
+    degraded backends (slowed down, p95 latency above SLOW_LATENCY or
+    almost out of budget) go last. A user stays on the backend that holds
+    their conversation while it is healthy, until the backend reports the
+    session expired. If a backend fails for provider reasons (API errors,
+    timeouts, open circuits), the next one is tried transparently; user
+    errors like rate limits or overlong prompts are returned as-is.
+    """
+
+    MIN_LATENCY_SAMPLES = 5
+    SLOW_LATENCY = 30.0  # p95 seconds beyond which a backend counts as degraded
+    LOW_BUDGET = 0.05  # Budget share below which a backend counts as degraded
+
+    def __init__(self, backends: List[ChatBackend], timer: Callable[[], float] = time.monotonic) -> None:
+        """Initialize chat router
+
+        Args:
+            backends: Backends in order of preference
+            timer: Clock used for latency measurement
+        """
+        if not backends:
+            raise ValueError("AI 기능이 비활성화되어 있어. 관리자에게 문의해줘!")
+        self._backends = list(backends)
+        self._timer = timer
+        self._latency = {backend.backend_name: LatencyWindow() for backend in backends}
+        self._breakers = {
+            backend.backend_name: CircuitBreaker(f"chat:{backend.backend_name}", base_backoff=30.0)
+            for backend in backends
+        }
+        self._session_backend: Dict[int, str] = {}  # user_id -> backend holding the conversation
+        self._requests = {backend.backend_name: 0 for backend in backends}
+        self._failures = {backend.backend_name: 0 for backend in backends}
+        self.failovers = 0
+        for backend in backends:
+            backend.add_session_expiry_listener(functools.partial(self._forget_session, backend.backend_name))
+
+    @property
+    def backends(self) -> List[ChatBackend]:
+        """Backends in order of preference"""
+        return list(self._backends)
+
+    def get_backend(self, name: str) -> Optional[ChatBackend]:
+        """Get a backend by name"""
+        return next((backend for backend in self._backends if backend.backend_name == name), None)
+
+    def rank(self, user_id: Optional[int] = None) -> List[ChatBackend]:
+        """Order usable backends for a request, best first
+
+        Args:
+            user_id: User whose conversation backend is preferred while healthy
+
+        Returns:
+            List[ChatBackend]: Backends that may be tried
+        """
+        scored = []
+        for preference, backend in enumerate(self._backends):
+            name = backend.backend_name
+            try:
+                health = backend.health_status
+                budget = backend.budget_remaining
+            except Exception as e:
+                logger.warning(f"Failed to read {name} health: {e}")
+                continue
+            if not health.get("is_enabled", True) or budget <= 0:
+                continue
+            breaker = self._breakers[name]
+            if breaker.state == CircuitBreaker.OPEN and breaker.retry_in() > 0:
+                continue
+
+            latency = self._latency[name]
+            p95 = latency.percentile(95) if len(latency) >= self.MIN_LATENCY_SAMPLES else None
+            degraded = (
+                bool(health.get("is_slowed_down"))
+                or budget < self.LOW_BUDGET
+                or (p95 is not None and p95 > self.SLOW_LATENCY)
+            )
+            # Keep the conversation where its history lives
+            owner = user_id is not None and self._session_backend.get(user_id) == name
+            scored.append(((degraded, not owner, preference), backend))
+
+        scored.sort(key=lambda item: item[0])
+        return [backend for _, backend in scored]
+
+    def is_degraded(self) -> bool:
+        """Check whether no backend can currently serve at full speed"""
+        for backend in self.rank():
+            try:
+                if not backend.health_status.get("is_slowed_down"):
+                    return False
+            except Exception:
+                continue
+        return True
+
+    async def chat(
+        self,
+        prompt: str,
+        user_id: int,
+        on_text: Optional[TextCallback] = None,
+    ) -> ChatResult:
+        """Answer a message on the best backend, failing over on provider errors
+
+        Args:
+            prompt: The user's message
+            user_id: Discord user ID
+            on_text: Optional streaming callback
+
+        Returns:
+            ChatResult: (response, formatted sources, formatted thinking)
+
+        Raises:
+            ValueError: If no backend is available or every backend failed
+        """
+        candidates = self.rank(user_id)
+        if not candidates:
+            raise ValueError("AI 서비스가 현재 사용할 수 없는 상태야. 나중에 다시 올래?")
+
+        last_error: Optional[Exception] = None
+        for attempt, backend in enumerate(candidates):
+            name = backend.backend_name
+            breaker = self._breakers[name]
+            if not breaker.allow_request():
+                continue
+
+            if attempt:
+                self.failovers += 1
+                logger.warning(f"Failing over chat for user {user_id} to {name}")
+
+            self._requests[name] += 1
+            started = self._timer()
+            try:
+                result = await backend.chat(prompt, user_id, on_text=on_text)
+            except Exception as e:
+                if not self._is_provider_failure(e):
+                    # The request itself was rejected; another backend wouldn't help
+                    breaker.release_probe()
+                    raise
+                breaker.record_failure()
+                self._failures[name] += 1
+                last_error = e
+                logger.error(f"Chat backend {name} failed: {e}")
+                continue
+
+            breaker.record_success()
+            self._latency[name].add(self._timer() - started)
+            previous = self._session_backend.get(user_id)
+            if previous and previous != name:
+                # The old provider's history is stale now that the conversation moved
+                old_backend = self.get_backend(previous)
+                if old_backend is not None:
+                    old_backend.end_chat_session(user_id)
+            self._session_backend[user_id] = name
+            return result
+
+        if isinstance(last_error, ValueError):
+            raise last_error
+        raise ValueError("AI 서비스가 현재 응답하지 않아. 잠시 후에 다시 시도해줄래?") from last_error
+
+    def end_chat_session(self, user_id: int) -> bool:
+        """End a user's conversation on every backend
+
+        Returns:
+            bool: True if any backend had a session
+        """
+        self._session_backend.pop(user_id, None)
+        ended = False
+        for backend in self._backends:
+            try:
+                ended = backend.end_chat_session(user_id) or ended
+            except Exception as e:
+                logger.warning(f"Failed to end {backend.backend_name} session: {e}")
+        return ended
+
+    def _forget_session(self, name: str, user_id: int) -> None:
+        """Stop pinning a user to a backend whose session expired"""
+        if self._session_backend.get(user_id) == name:
+            del self._session_backend[user_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-backend routing statistics
+
+        Returns:
+            Dict[str, Any]: Requests, failures, latency percentiles and circuit state per backend
+        """
+        backends = {}
+        for backend in self._backends:
+            name = backend.backend_name
+            latency = self._latency[name]
+            backends[name] = {
+                "requests": self._requests[name],
+                "failures": self._failures[name],
+                "latency_p50": latency.percentile(50),
+                "latency_p95": latency.percentile(95),
+                "circuit": self._breakers[name].snapshot(),
+                "sessions": sum(1 for owner in self._session_backend.values() if owner == name),
+            }
+        return {"failovers": self.failovers, "backends": backends}
+
+    @staticmethod
+    def _is_provider_failure(error: Exception) -> bool:
+        """Check whether an error means the provider, not the request, failed
+
+        Providers wrap SDK errors as ``ValueError(...) from error``; plain
+        ValueErrors without a non-ValueError cause are request validation
+        errors (rate limits, prompt length, daily budget).
+        """
+        if not isinstance(error, ValueError):
+            return True
+        cause = error.__cause__
+        return cause is not None and not isinstance(cause, ValueError)
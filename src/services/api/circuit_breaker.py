@@ -0,0 +1,149 @@
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple, Union
+
+
+class CircuitOpenError(ValueError):
+    """Raised when a request is rejected because its circuit is open"""
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        super().__init__(f"서비스가 일시적으로 응답하지 않습니다. {retry_in:.0f}초 후 다시 시도해 주세요")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker with exponential backoff
+
+    The breaker is ``closed`` while the endpoint is healthy. Once at least
+    ``min_calls`` outcomes are recorded inside ``window`` seconds and the
+    failure ratio reaches ``failure_rate``, it ``open``s and rejects requests
+    for a backoff period. After the backoff a single probe is let through
+    (``half_open``): success closes the breaker, failure re-opens it with the
+    backoff multiplied by ``backoff_factor``.
+
+    Attributes:
+        name (str): Endpoint the breaker guards
+        state (str): "closed", "open" or "half_open"
+        open_until (float): Timestamp at which an open breaker allows a probe
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        backoff_factor: float = 1.5,
+        base_backoff: float = 5.0,
+        max_backoff: float = 300.0,
+        window: float = 60.0,
+        min_calls: int = 4,
+        failure_rate: float = 0.5,
+        timer: Callable[[], float] = time.time,
+    ) -> None:
+        if backoff_factor <= 1 or base_backoff <= 0 or not 0 < failure_rate <= 1:
+            raise ValueError("Invalid circuit breaker configuration")
+        self.name = name
+        self.backoff_factor = backoff_factor
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self._timer = timer
+
+        self.state = self.CLOSED
+        self.open_until = 0.0
+        self._trips = 0  # Consecutive openings without a successful probe
+        self._probe_in_flight = False
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+
+    @property
+    def current_backoff(self) -> float:
+        """Backoff applied to the next opening"""
+        return min(self.base_backoff * self.backoff_factor ** self._trips, self.max_backoff)
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets a probe through"""
+        return max(0.0, self.open_until - self._timer())
+
+    def allow_request(self) -> bool:
+        """Check whether a request may be sent now
+
+        Returns:
+            bool: False if the request should fail fast
+        """
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            if self._timer() < self.open_until:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        # Half-open: only one probe at a time
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        """Record a successful request"""
+        if self.state == self.HALF_OPEN:
+            self.state = self.CLOSED
+            self._trips = 0
+            self._probe_in_flight = False
+            self._outcomes.clear()
+            return
+        self._add_outcome(True)
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the breaker if needed"""
+        if self.state == self.HALF_OPEN:
+            self._trip()
+            return
+
+        self._add_outcome(False)
+        if self.state == self.CLOSED and len(self._outcomes) >= self.min_calls:
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if failures / len(self._outcomes) >= self.failure_rate:
+                self._trip()
+
+    def release_probe(self) -> None:
+        """Let another probe through after one was abandoned without an outcome"""
+        self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Union[str, float, int]]:
+        """Get a serializable view of the breaker state"""
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        return {
+            "state": self.state,
+            "retry_in": round(self.retry_in(), 1) if self.state == self.OPEN else 0.0,
+            "failures": failures,
+            "calls": len(self._outcomes),
+        }
+
+    def _add_outcome(self, ok: bool) -> None:
+        now = self._timer()
+        self._outcomes.append((now, ok))
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    def _trip(self) -> None:
+        self.state = self.OPEN
+        self.open_until = self._timer() + self.current_backoff
+        self._trips += 1
+        self._probe_in_flight = False
+        self._outcomes.clear()
+
+
+def breaker_state_label(snapshot: Optional[Dict[str, Union[str, float, int]]]) -> str:
+    """Get a short Korean label for a breaker snapshot"""
+    if not snapshot or snapshot["state"] == CircuitBreaker.CLOSED:
+        return "정상"
+    if snapshot["state"] == CircuitBreaker.HALF_OPEN:
+        return "복구 확인 중"
+    return f"차단됨 ({snapshot['retry_in']:.0f}초 후 재시도)"
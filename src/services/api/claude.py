@@ -1,30 +1,49 @@
 import logging
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable, Hashable
 from datetime import datetime, timedelta, date
 import os
-import json
-import re
 import urllib.parse
 from urllib.parse import urlparse
 import asyncio
 import discord
-import psutil
 import time
+import weakref
 
 import anthropic
 from .base import BaseAPI, RateLimitConfig
+from .chat_backend import ChatBackend
+from .token_accounting import TokenAccountant
+from .session_store import ChatSessionStore, SessionExpiryQueue, message_digest
+from src.services.usage_metrics import UsageMetricsStore
+from src.services.system_monitor import HealthSnapshot, get_system_monitor
+from .compaction import extractive_summary, find_compaction_split, render_transcript
+from .history_index import WEB_SEARCH_BLOCK_TYPES, SearchRetentionIndex, block_type
+from .response_cache import CachedResponse, ResponseCache, is_cacheable_prompt
+from .prompt_cache import CacheBreakpointPlanner
+from .text_pipeline import EMPTY_RESPONSE, ResponseFormatter, format_sources, format_thinking
 
 logger = logging.getLogger(__name__)
 
-class ClaudeAPI(BaseAPI[str]):
+class ClaudeAPI(BaseAPI[str], ChatBackend):
     """Anthropic Claude API client implementation for text-only interactions"""
 
+    backend_name = "claude"
+
     # Token thresholds for Claude 3.5 Sonnet
     MAX_TOTAL_TOKENS = 20000  # Maximum total tokens (prompt + response) per interaction
     MAX_PROMPT_TOKENS = 18000  # Maximum tokens for user input
     TOKEN_WARNING_THRESHOLD = 0.8  # Warning at 80% of limit to provide safety margin
+    REMOTE_TOKEN_COUNT_THRESHOLD = 0.8  # Use the count_tokens API only above this share of the limit
     RESPONSE_BUFFER_TOKENS = 4000  # Buffer for responses
+    SESSION_MEMORY_BUDGET = 16 * 1024 * 1024  # Serialized bytes of chat history kept in memory
     REQUESTS_PER_MINUTE = 50  # Standard API rate limit for Claude
+    USAGE_COUNTERS = (  # Lifetime counters persisted in the usage metrics store
+        "total_prompt_tokens", "total_response_tokens", "max_prompt_tokens", "max_response_tokens",
+        "refusal_count", "thinking_tokens_used", "web_search_requests", "web_search_cost",
+        "cache_creation_tokens", "cache_read_tokens", "cache_hits", "cache_misses",
+        "compaction_prompt_tokens", "compaction_response_tokens", "compaction_cost",
+        "batch_prompt_tokens", "batch_response_tokens", "batch_cost",
+    )
     DAILY_TOKEN_LIMIT = 1_000_000  # Local limit: 5M tokens per day
     
     # User-specific rate limits
@@ -47,6 +66,7 @@ class ClaudeAPI(BaseAPI[str]):
     # Context history settings
     MAX_HISTORY_LENGTH = 10  # Maximum number of messages to keep in history
     CONTEXT_EXPIRY_MINUTES = 30  # Time until context expires
+    SESSION_SWEEP_INTERVAL = 60  # Seconds between background sweeps of expired sessions
     
     # Web search settings
     WEB_SEARCH_ENABLED = True  # Enable/disable web search
@@ -62,7 +82,28 @@ class ClaudeAPI(BaseAPI[str]):
     PROMPT_CACHING_ENABLED = True  # Enable prompt caching for cost optimization
     CACHE_BREAKPOINTS_MAX = 4  # Maximum cache breakpoints allowed by Anthropic
     CACHE_MIN_TOKENS = 1024  # Minimum tokens required for caching (Claude Sonnet 4)
-    CONVERSATION_CACHE_THRESHOLD = 3  # Cache conversation history after this many turns
+    CACHE_TTL_SECONDS = 300  # Lifetime of an ephemeral cache entry without reads
+    
+    # Conversation compaction settings
+    COMPACTION_ENABLED = True  # Summarize older turns instead of letting long chats hit the prompt limit
+    COMPACTION_THRESHOLD = 0.6  # Compact once a session's prompt passes this share of MAX_PROMPT_TOKENS
+    COMPACTION_KEEP_MESSAGES = 4  # Recent messages kept verbatim after compaction
+    COMPACTION_MODEL = "claude-3-5-haiku-20241022"  # Cheap model used for summaries
+    COMPACTION_MAX_TOKENS = 600  # Summary length limit
+    COMPACTION_INPUT_COST_PER_MTOK = 0.8  # Summary model pricing in dollars
+    COMPACTION_OUTPUT_COST_PER_MTOK = 4.0
+    BATCH_INPUT_COST_PER_MTOK = 1.5  # Message batch pricing in dollars (half the interactive price)
+    BATCH_OUTPUT_COST_PER_MTOK = 7.5
+    COMPACTION_PROMPT = (
+        "Summarize the following Discord conversation between a user and Muelsyse in Korean. "
+        "Keep facts the user shared, their preferences, open questions and any decisions, "
+        "in at most 10 short bullet points. Output only the summary."
+    )
+    
+    # Response cache settings (opt-in, set MUMU_RESPONSE_CACHE=1)
+    RESPONSE_CACHE_ENABLED = False  # Answer repeated generic first-turn prompts from a shared cache
+    RESPONSE_CACHE_TTL_MINUTES = 360  # Lifetime of a cached reply
+    RESPONSE_CACHE_SEARCH_TTL_MINUTES = 30  # Shorter lifetime for replies grounded on web search
     
     # Thinking settings
     THINKING_ENABLED = True  # Enable thinking for better reasoning quality
@@ -108,29 +149,37 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         super().__init__(api_key)
         self._notification_channel = notification_channel
         self._client = None
-        self._chat_sessions: Dict[int, List[Dict[str, str]]] = {}  # user_id -> message history
+        self._chat_sessions = self._create_session_store()  # user_id -> message history
         self._last_interaction: Dict[int, datetime] = {}
+        self._session_expiry = SessionExpiryQueue(self.CONTEXT_EXPIRY_MINUTES * 60)
+        self._session_sweeper: Optional[asyncio.Task] = None
+        self._session_expiry_listeners: List[Callable[[int], None]] = []
+        self._session_summaries: Dict[int, str] = {}  # user_id -> summary of compacted turns
+        self._compaction_tasks: Dict[int, asyncio.Task] = {}
+        # Serializes each user's chat turns with compaction; unused locks are collected
+        self._session_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._history_indexes: Dict[int, SearchRetentionIndex] = {}  # user_id -> web search retention index
+        self._compactions = 0
+        self.RESPONSE_CACHE_ENABLED = os.getenv("MUMU_RESPONSE_CACHE", "").lower() in ("1", "true", "yes")
+        self._response_cache = ResponseCache(
+            ttl=self.RESPONSE_CACHE_TTL_MINUTES * 60,
+            search_ttl=self.RESPONSE_CACHE_SEARCH_TTL_MINUTES * 60,
+        )
+        self._token_accountant = TokenAccountant(self._estimate_conversation_tokens_fallback)
+        self._cache_planner = CacheBreakpointPlanner(self.CACHE_MIN_TOKENS, self.CACHE_TTL_SECONDS)
         self._rate_limits = {
             "generate": RateLimitConfig(self.REQUESTS_PER_MINUTE, 60),
         }
         
-        # Load saved usage data if exists
-        self._usage_file = "data/claude_memory.json"
+        # Load saved usage data (time-bucketed aggregates and lifetime counters)
+        self._usage_file = "data/claude_memory.json"  # Legacy JSON, imported once if present
         self._load_usage_data()
         
-        # Usage tracking
-        self._daily_requests = self._saved_usage.get("daily_requests", 0)
-        self._last_reset = datetime.fromisoformat(self._saved_usage.get("last_reset", datetime.now().isoformat()))
-        self._request_sizes = self._saved_usage.get("request_sizes", [])
-        self._hourly_token_count = self._saved_usage.get("hourly_token_count", 0)
-        self._last_token_reset = datetime.fromisoformat(self._saved_usage.get("last_token_reset", datetime.now().isoformat()))
-        
         # Token tracking
         self._total_prompt_tokens = self._saved_usage.get("total_prompt_tokens", 0)
         self._total_response_tokens = self._saved_usage.get("total_response_tokens", 0)
         self._max_prompt_tokens = self._saved_usage.get("max_prompt_tokens", 0)
         self._max_response_tokens = self._saved_usage.get("max_response_tokens", 0)
-        self._token_usage_history = self._saved_usage.get("token_usage_history", [])
         
         # Per-minute request tracking
         self._minute_requests = 0
@@ -165,25 +214,32 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         self._cache_hits = self._saved_usage.get("cache_hits", 0)
         self._cache_misses = self._saved_usage.get("cache_misses", 0)
         
+        # Summary model usage of conversation compaction
+        self._compaction_prompt_tokens = self._saved_usage.get("compaction_prompt_tokens", 0)
+        self._compaction_response_tokens = self._saved_usage.get("compaction_response_tokens", 0)
+        self._compaction_cost = self._saved_usage.get("compaction_cost", 0.0)
+        
+        # Offline jobs run through message batches, kept apart from chat usage
+        self._batch_prompt_tokens = self._saved_usage.get("batch_prompt_tokens", 0)
+        self._batch_response_tokens = self._saved_usage.get("batch_response_tokens", 0)
+        self._batch_cost = self._saved_usage.get("batch_cost", 0.0)
+        
 
         
         # Add stop reason tracking
-        self._stop_reason_counts = self._saved_usage.get("stop_reason_counts", {
+        self._stop_reason_counts = {
             "end_turn": 0,
             "max_tokens": 0,
             "stop_sequence": 0,
             "tool_use": 0,
             "pause_turn": 0,
             "refusal": 0,
-            "unknown": 0
-        })
+            "unknown": 0,
+            **self._saved_usage.get("stop_reason_counts", {})
+        }
         
-        # Add performance tracking with non-blocking CPU check
-        self._cpu_usage = 0
-        self._memory_usage = 0
-        self._last_performance_check = datetime.now()
-        self._cpu_check_task = None
-        self._is_cpu_check_running = False
+        # System resources are sampled by the shared background monitor
+        self._system_monitor = get_system_monitor()
 
         # Add notification channel and cooldown tracking
         self._last_notification_time: Dict[str, datetime] = {}  # Track last notification time per type
@@ -204,21 +260,43 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         self.WEB_SEARCH_AGGRESSIVE_CLEANUP = getattr(self, 'WEB_SEARCH_AGGRESSIVE_CLEANUP', True)
         self.WEB_SEARCH_CACHE_AGGRESSIVE = getattr(self, 'WEB_SEARCH_CACHE_AGGRESSIVE', False)
 
+    def _create_session_store(self) -> ChatSessionStore:
+        """Create the chat history store, spilling evicted sessions to disk"""
+        spill_dir = os.path.join(os.getenv("MUMU_DATA_DIR", "data"), "claude_sessions")
+        return ChatSessionStore(self.SESSION_MEMORY_BUDGET, spill_dir=spill_dir)
+
     def _load_usage_data(self) -> None:
-        """Load saved usage data from file"""
+        """Load saved usage counters from the metrics store"""
         try:
-            os.makedirs(os.path.dirname(self._usage_file), exist_ok=True)
-            if os.path.exists(self._usage_file):
-                with open(self._usage_file, 'r') as f:
-                    self._saved_usage = json.load(f)
-            else:
-                self._saved_usage = {}
+            self._metrics = UsageMetricsStore()
+            self._metrics.import_legacy_json(
+                self._usage_file, {name: name for name in self.USAGE_COUNTERS}
+            )
+            counters = self._metrics.counters
         except Exception as e:
             logger.error(f"Failed to load usage data: {e}")
-            self._saved_usage = {}
+            self._metrics = UsageMetricsStore(":memory:")
+            counters = {}
+        
+        self._saved_usage = {name: counters[name] for name in self.USAGE_COUNTERS if name in counters}
+        self._saved_usage["stop_reason_counts"] = {
+            name.split(".", 1)[1]: value for name, value in counters.items()
+            if name.startswith("stop_reason.")
+        }
+
+    @property
+    def _daily_requests(self) -> int:
+        """Requests made since local midnight"""
+        return self._metrics.totals("day")["requests"]
+
+    def _usage_counters(self) -> Dict[str, float]:
+        """Get current lifetime counters for persistence"""
+        counters = {name: getattr(self, f"_{name}") for name in self.USAGE_COUNTERS}
+        counters.update({f"stop_reason.{reason}": count for reason, count in self._stop_reason_counts.items()})
+        return counters
             
     async def _save_usage_data(self) -> None:
-        """Save current usage data to file with debouncing"""
+        """Persist changed usage buckets and counters with debouncing"""
         try:
             async with self._save_lock:
                 current_time = datetime.now()
@@ -231,37 +309,13 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
                 self._pending_save = False
                 self._last_save = current_time
                 
-                usage_data = {
-                    "daily_requests": self._daily_requests,
-                    "last_reset": self._last_reset.isoformat(),
-                    "request_sizes": self._request_sizes,
-                    "hourly_token_count": self._hourly_token_count,
-                    "last_token_reset": self._last_token_reset.isoformat(),
-                    "total_prompt_tokens": self._total_prompt_tokens,
-                    "total_response_tokens": self._total_response_tokens,
-                    "max_prompt_tokens": self._max_prompt_tokens,
-                    "max_response_tokens": self._max_response_tokens,
-                    "token_usage_history": self._token_usage_history,
-                    "refusal_count": self._refusal_count,
-                    "thinking_tokens_used": self._thinking_tokens_used,
-                    "web_search_requests": self._web_search_requests,
-                    "web_search_cost": self._web_search_cost,
-                    "cache_creation_tokens": self._cache_creation_tokens,
-                    "cache_read_tokens": self._cache_read_tokens,
-                    "cache_hits": self._cache_hits,
-                    "cache_misses": self._cache_misses,
-                    "stop_reason_counts": self._stop_reason_counts
-                }
-                
-                temp_file = f"{self._usage_file}.tmp"
-                with open(temp_file, "w", encoding="utf-8") as f:
-                    json.dump(usage_data, f, ensure_ascii=False, indent=2)
-                os.replace(temp_file, self._usage_file)
+                # Only buckets and counters changed since the last save are written
+                self._metrics.update_counters(self._usage_counters())
+                rows = await asyncio.to_thread(self._metrics.flush)
+                logger.debug(f"Saved {rows} changed usage rows")
                 
         except Exception as e:
             logger.error(f"Failed to save usage data: {e}")
-            if os.path.exists(temp_file):
-                os.unlink(temp_file)
 
     async def _schedule_save(self) -> None:
         """Schedule a save operation"""
@@ -270,6 +324,11 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             await asyncio.sleep(self._save_interval.total_seconds())
             await self._save_usage_data()
 
+    @property
+    def client(self) -> Optional[anthropic.AsyncAnthropic]:
+        """Anthropic client, or None before initialization"""
+        return self._client
+
     def update_notification_channel(self, channel: discord.TextChannel) -> None:
         """Update notification channel
         
@@ -356,6 +415,37 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         self.PROMPT_CACHING_ENABLED = enabled
         logger.info(f"Prompt caching configured: enabled={enabled}")
     
+    def configure_compaction(self, enabled: bool = True, threshold: float = 0.6) -> None:
+        """Configure conversation compaction
+        
+        Args:
+            enabled: Whether to summarize older turns of long conversations
+            threshold: Share of MAX_PROMPT_TOKENS that triggers compaction (0.2-0.9)
+        """
+        self.COMPACTION_ENABLED = enabled
+        self.COMPACTION_THRESHOLD = max(0.2, min(0.9, threshold))
+        logger.info(f"Compaction configured: enabled={enabled}, threshold={self.COMPACTION_THRESHOLD}")
+    
+    def configure_response_cache(self, enabled: bool = True, ttl_minutes: int = 360, search_ttl_minutes: int = 30) -> None:
+        """Configure the shared response cache for repeated generic prompts
+        
+        Args:
+            enabled: Whether first-turn generic prompts may be answered from the cache
+            ttl_minutes: Lifetime of a cached reply (5-1440)
+            search_ttl_minutes: Lifetime of a reply that used web search (1-ttl_minutes)
+        """
+        self.RESPONSE_CACHE_ENABLED = enabled
+        self.RESPONSE_CACHE_TTL_MINUTES = max(5, min(1440, ttl_minutes))
+        self.RESPONSE_CACHE_SEARCH_TTL_MINUTES = max(1, min(self.RESPONSE_CACHE_TTL_MINUTES, search_ttl_minutes))
+        self._response_cache.ttl = self.RESPONSE_CACHE_TTL_MINUTES * 60
+        self._response_cache.search_ttl = self.RESPONSE_CACHE_SEARCH_TTL_MINUTES * 60
+        if not enabled:
+            self._response_cache.clear()
+        logger.info(
+            f"Response cache configured: enabled={enabled}, ttl={self.RESPONSE_CACHE_TTL_MINUTES}m, "
+            f"search_ttl={self.RESPONSE_CACHE_SEARCH_TTL_MINUTES}m"
+        )
+    
     def get_prompt_caching_config(self) -> Dict[str, Any]:
         """Get current prompt caching configuration and performance
         
@@ -380,7 +470,8 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             "hit_rate_percent": hit_rate,
             "tokens_written": self._cache_creation_tokens,
             "tokens_read": self._cache_read_tokens,
-            "estimated_cost_savings": estimated_savings
+            "estimated_cost_savings": estimated_savings,
+            "planner": self._cache_planner.stats(),
         }
     
 
@@ -411,9 +502,16 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         except Exception as e:
             raise ValueError(f"Failed to initialize Claude API: {str(e)}") from e
         
-        # Initialize chat history
-        self._chat_sessions = {}
+        # Receive system health samples in the background
+        self._system_monitor.subscribe(self._check_system_health)
+        
+        # Initialize chat history; spill files of a previous run are no longer referenced
+        self._chat_sessions = self._create_session_store()
+        await asyncio.to_thread(self._chat_sessions.purge_stale_spills)
         self._last_interaction = {}
+        self._session_expiry.clear()
+        if self._session_sweeper is None or self._session_sweeper.done():
+            self._session_sweeper = asyncio.create_task(self._session_sweep_loop())
 
     async def _count_tokens(self, text: str, include_tools: bool = True) -> int:
         """Count tokens using official Anthropic token counting
@@ -518,7 +616,8 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
                 }
                 
             # Use official Anthropic token counting for full conversation
-            response = await self._client.messages.count_tokens(**count_params)
+            async with self._request_metrics.measure("count_tokens"):
+                response = await self._client.messages.count_tokens(**count_params)
             
             # Return input token count
             if hasattr(response, 'input_tokens'):
@@ -541,6 +640,35 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             # Fallback: estimate based on message content
             return self._estimate_conversation_tokens_fallback(messages)
 
+    async def _estimate_prompt_tokens(
+        self, user_id: int, messages: List[Dict[str, Any]], layout: Hashable = None
+    ) -> int:
+        """Estimate prompt tokens, calling the remote counter only near the limit
+
+        Earlier turns use counts cached from previous responses and only the
+        new user turn is estimated locally, which saves a count_tokens
+        round-trip on most turns.
+
+        Args:
+            user_id: Discord user ID
+            messages: Conversation including the new user message
+            layout: Prompt layout key from _prompt_layout
+
+        Returns:
+            int: Prompt token count (exact when close to MAX_PROMPT_TOKENS)
+        """
+        estimate = self._token_accountant.estimate(user_id, messages, layout)
+        if self._token_accountant.overhead(layout) is None:
+            # First turn with this system prompt: its overhead is still unknown
+            return await self._count_conversation_tokens(messages, include_thinking=self.THINKING_ENABLED)
+
+        if estimate >= self.MAX_PROMPT_TOKENS * self.REMOTE_TOKEN_COUNT_THRESHOLD:
+            logger.info(f"Local token estimate {estimate:,} near limit, counting remotely")
+            return await self._count_conversation_tokens(messages, include_thinking=self.THINKING_ENABLED)
+
+        logger.debug(f"Local token estimate for user {user_id}: {estimate:,}")
+        return estimate
+
     def _prepare_messages_for_token_counting(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Prepare messages for token counting API, handling cookbook approach formats
         
@@ -717,12 +845,7 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             )
 
         # Check daily token limit
-        current_time = datetime.now()
-        if (current_time - self._last_token_reset).days >= 1:
-            self._hourly_token_count = 0
-            self._last_token_reset = current_time
-        
-        if self._hourly_token_count + prompt_tokens > self.DAILY_TOKEN_LIMIT:
+        if self._metrics.totals("day")["total_tokens"] + prompt_tokens > self.DAILY_TOKEN_LIMIT:
             raise ValueError(
                 f"일일 토큰 한도에 도달했어! "
                 f"내일까지 기다리거나 더 짧은 메시지를 보내볼래?"
@@ -741,49 +864,18 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             # Count tokens
             prompt_tokens = await self._count_tokens(prompt)
             response_tokens = await self._count_tokens(response)
-            total_tokens = prompt_tokens + response_tokens
             
-            # Update daily requests (reset if new day)
-            if (current_time - self._last_reset).days >= 1:
-                self._daily_requests = 0
-                self._last_reset = current_time
-                
-            self._daily_requests += 1
+            # Update minute/hour/day usage buckets
+            self._metrics.record(prompt_tokens, response_tokens, ts=current_time.timestamp())
             
             # Update token counts
             self._total_prompt_tokens += prompt_tokens
             self._total_response_tokens += response_tokens
-            self._hourly_token_count += total_tokens
             
             # Update maximums
             self._max_prompt_tokens = max(self._max_prompt_tokens, prompt_tokens)
             self._max_response_tokens = max(self._max_response_tokens, response_tokens)
             
-            # Track request sizes for analysis
-            self._request_sizes.append({
-                "timestamp": current_time.isoformat(),
-                "prompt_tokens": prompt_tokens,
-                "response_tokens": response_tokens,
-                "total_tokens": total_tokens
-            })
-            
-            # Keep only recent request sizes (last 100)
-            if len(self._request_sizes) > 100:
-                self._request_sizes = self._request_sizes[-100:]
-            
-            # Add to token usage history
-            self._token_usage_history.append({
-                "date": current_time.date().isoformat(),
-                "tokens": total_tokens
-            })
-            
-            # Keep only recent history (last 30 days)
-            cutoff_date = (current_time - timedelta(days=30)).date()
-            self._token_usage_history = [
-                entry for entry in self._token_usage_history
-                if datetime.fromisoformat(entry["date"]).date() >= cutoff_date
-            ]
-            
             # Schedule save
             await self._schedule_save()
             
@@ -843,49 +935,17 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
                 prompt_tokens = await self._count_tokens(prompt, include_tools=False)
                 response_tokens = await self._count_tokens(response_text, include_tools=False)
             
-            total_tokens = prompt_tokens + response_tokens
-            
-            # Update daily requests (reset if new day)
-            if (current_time - self._last_reset).days >= 1:
-                self._daily_requests = 0
-                self._last_reset = current_time
-                
-            self._daily_requests += 1
+            # Update minute/hour/day usage buckets
+            self._metrics.record(prompt_tokens, response_tokens, thinking_tokens, current_time.timestamp())
             
             # Update token counts
             self._total_prompt_tokens += prompt_tokens
             self._total_response_tokens += response_tokens
-            self._hourly_token_count += total_tokens
             
             # Update maximums
             self._max_prompt_tokens = max(self._max_prompt_tokens, prompt_tokens)
             self._max_response_tokens = max(self._max_response_tokens, response_tokens)
             
-            # Track request sizes for analysis
-            self._request_sizes.append({
-                "timestamp": current_time.isoformat(),
-                "prompt_tokens": prompt_tokens,
-                "response_tokens": response_tokens,
-                "total_tokens": total_tokens
-            })
-            
-            # Keep only recent request sizes (last 100)
-            if len(self._request_sizes) > 100:
-                self._request_sizes = self._request_sizes[-100:]
-            
-            # Add to token usage history
-            self._token_usage_history.append({
-                "date": current_time.date().isoformat(),
-                "tokens": total_tokens
-            })
-            
-            # Keep only recent history (last 30 days)
-            cutoff_date = (current_time - timedelta(days=30)).date()
-            self._token_usage_history = [
-                entry for entry in self._token_usage_history
-                if datetime.fromisoformat(entry["date"]).date() >= cutoff_date
-            ]
-            
             # Schedule save
             await self._schedule_save()
             
@@ -970,8 +1030,6 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         try:
             if not self._usage_queue:
                 return
-                
-            current_time = datetime.now()
             
             # Process all queued usage data
             for usage_data in self._usage_queue:
@@ -979,52 +1037,22 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
                 prompt_tokens = usage_data["prompt_tokens"]
                 response_tokens = usage_data["response_tokens"]
                 thinking_tokens = usage_data["thinking_tokens"]
-                total_tokens = usage_data["total_tokens"]
                 
-                # Update daily requests (reset if new day)
-                if (timestamp - self._last_reset).days >= 1:
-                    self._daily_requests = 0
-                    self._last_reset = timestamp
-                    
-                self._daily_requests += 1
+                # Update minute/hour/day usage buckets
+                self._metrics.record(prompt_tokens, response_tokens, thinking_tokens, timestamp.timestamp())
                 
                 # Update token counts
                 self._total_prompt_tokens += prompt_tokens
                 self._total_response_tokens += response_tokens
-                self._hourly_token_count += total_tokens
                 
                 # Update maximums
                 self._max_prompt_tokens = max(self._max_prompt_tokens, prompt_tokens)
                 self._max_response_tokens = max(self._max_response_tokens, response_tokens)
-                
-                # Track request sizes for analysis (keep only recent)
-                self._request_sizes.append({
-                    "timestamp": timestamp.isoformat(),
-                    "prompt_tokens": prompt_tokens,
-                    "response_tokens": response_tokens,
-                    "total_tokens": total_tokens
-                })
-                
-                # Add to token usage history
-                self._token_usage_history.append({
-                    "date": timestamp.date().isoformat(),
-                    "tokens": total_tokens
-                })
             
             # Clear the queue
             queue_size = len(self._usage_queue)
             self._usage_queue.clear()
             
-            # Trim old data to prevent memory bloat
-            if len(self._request_sizes) > 100:
-                self._request_sizes = self._request_sizes[-100:]
-                
-            cutoff_date = (current_time - timedelta(days=30)).date()
-            self._token_usage_history = [
-                entry for entry in self._token_usage_history
-                if datetime.fromisoformat(entry["date"]).date() >= cutoff_date
-            ]
-            
             # Schedule save (non-blocking)
             asyncio.create_task(self._schedule_save())
             
@@ -1148,35 +1176,26 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         except Exception as e:
             logger.error(f"Failed to send state change notification: {e}")
 
-    async def _update_cpu_usage(self) -> None:
-        """Update CPU usage in background"""
-        if self._is_cpu_check_running:
-            return
-            
-        try:
-            self._is_cpu_check_running = True
-            # Get CPU usage over a short interval
-            self._cpu_usage = psutil.cpu_percent(interval=0.1)
-        except Exception as e:
-            logger.error(f"Failed to get CPU usage: {e}")
-            self._cpu_usage = 0
-        finally:
-            self._is_cpu_check_running = False
+    @property
+    def _cpu_usage(self) -> float:
+        """Latest CPU usage published by the system monitor"""
+        return self._system_monitor.snapshot.cpu_percent
+
+    @property
+    def _memory_usage(self) -> float:
+        """Latest memory usage published by the system monitor"""
+        return self._system_monitor.snapshot.memory_percent
 
-    async def _check_system_health(self) -> None:
-        """Check system health and adjust service accordingly"""
+    async def _check_system_health(self, snapshot: Optional[HealthSnapshot] = None) -> None:
+        """Update service state from the latest system health sample
+        
+        Runs as a system monitor listener, off the request path.
+        
+        Args:
+            snapshot: Sample that triggered the check (unused, state reads the latest one)
+        """
         try:
             current_time = datetime.now()
-            
-            # Update performance metrics periodically
-            if (current_time - self._last_performance_check).total_seconds() > 60:
-                await self._update_cpu_usage()
-                
-                # Get memory usage
-                memory = psutil.virtual_memory()
-                self._memory_usage = memory.percent
-                
-                self._last_performance_check = current_time
 
             # Check if we should re-enable the service
             if not self._is_enabled and self._last_disable:
@@ -1488,294 +1507,49 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
                 await self._track_request(prompt, error_message)
                 return (error_message, None, None)
 
-    def _process_response(self, response: str, search_used: bool = False) -> str:
-        """Process and format Claude's response before sending
-        
-        Args:
-            response: Raw response from Claude
-            search_used: Whether search grounding was used
-            
-        Returns:
-            str: Processed response
-        """
-        if not response:
-            return "미안해, 응답을 생성하지 못했어."
-        
-        # Remove any leading/trailing whitespace
-        response = response.strip()
-        
-        # If response has search grounding, apply minimal formatting
-        if search_used:
-            # Only perform whitespace normalization and fix any broken code blocks
-            # Do not modify or intersperse content with the grounded results
-            lines = response.split('\n')
-            processed_lines = []
-            in_code_block = False
-            
-            for line in lines:
-                # Check for code block markers to ensure they're properly formatted
-                if '```' in line:
-                    in_code_block = not in_code_block
-                    # Ensure language is specified for code blocks
-                    if in_code_block and line.strip() == '```':
-                        line = '```text'
-                processed_lines.append(line)
-            
-            # Join lines with original spacing preserved
-            return '\n'.join(processed_lines)
-        
-        # For non-search grounded responses, continue with normal formatting
-        # Process search grounding citations if present
-        citation_pattern = r'\[\d+\]'
-        has_citations = bool(re.search(citation_pattern, response))
-        
-        # If citations are present, format them for better readability
-        if has_citations:
-            # Add a separator before citations section if not already present
-            if "\nSources:" not in response and "\n출처:" not in response:
-                # Find the last citation reference
-                last_citation_match = list(re.finditer(citation_pattern, response))
-                if last_citation_match:
-                    last_pos = last_citation_match[-1].end()
-                    # Add sources section if it doesn't exist
-                    if "Sources:" not in response[last_pos:] and "출처:" not in response[last_pos:]:
-                        response += "\n\n**Sources:**"
-        
-        # Convert HTML-style tags to Discord-friendly format
-        # Handle subscripts and superscripts
-        while '<sub>' in response and '</sub>' in response:
-            start = response.find('<sub>')
-            end = response.find('</sub>') + 6
-            sub_text = response[start + 5:end - 6]
-            response = response[:start] + '_' + sub_text + '_' + response[end:]
-            
-        while '<sup>' in response and '</sup>' in response:
-            start = response.find('<sup>')
-            end = response.find('</sup>') + 6
-            sup_text = response[start + 5:end - 6]
-            response = response[:start] + '^' + sup_text + response[end:]
-        
-        # Process code blocks to ensure proper Discord formatting
-        lines = response.split('\n')
-        in_code_block = False
-        processed_lines = []
-        
-        for line in lines:
-            # Skip empty lines
-            if not line.strip():
-                continue
-                
-            # Check for code block markers
-            if '```' in line:
-                in_code_block = not in_code_block
-                # Ensure language is specified for code blocks
-                if in_code_block and line.strip() == '```':
-                    line = '```text'
-                processed_lines.append(line)
-                continue
-            
-            if in_code_block:
-                # Don't modify content inside code blocks
-                processed_lines.append(line)
-            else:
-                # Process normal text lines
-                line = line.strip()
-                if line:
-                    processed_lines.append(line)
-        
-        # Join all processed lines
-        processed_response = '\n'.join(processed_lines)
-        
-        # Ensure response is not too long for Discord (2000 char limit)
-        if len(processed_response) > 1900:
-            processed_response = processed_response[:1897] + "..."
-            
-        return processed_response
-
     def _process_response_with_citations(self, response: str, citations: List[Any], search_used: bool = False) -> str:
-        """Process Claude's response with inline citations and improved Korean formatting
-        
+        """Process Claude's response with inline citations and Korean paragraph spacing
+
         Args:
             response: Raw response from Claude
             citations: List of citation objects from Claude response
             search_used: Whether search grounding was used
-            
-        Returns:
-            str: Processed response with inline clickable citations and proper Korean formatting
-        """
-        if not response:
-            return "미안해, 응답을 생성하지 못했어."
-        
-        # Basic cleanup
-        processed_response = response.strip()
-        
-        # Process citations first if they exist
-        citation_map = {}
-        if citations:
-            for i, citation in enumerate(citations, 1):
-                if hasattr(citation, 'url') and citation.url:
-                    title = getattr(citation, 'title', f'Source {i}')
-                    url = citation.url
-                    
-                    # Create clickable citation format
-                    citation_key = f"[{i}]"
-                    citation_link = f"[**[{i}]**]({url} \"{title}\")"
-                    citation_map[citation_key] = citation_link
-            
-            # Replace citation markers with clickable links
-            for citation_key, citation_link in citation_map.items():
-                pattern = re.escape(citation_key)
-                processed_response = re.sub(pattern, citation_link, processed_response)
-        
-        # Apply Korean-friendly text processing
-        processed_response = self._format_korean_text(processed_response, search_used)
-        
-        # Add source section if citations exist
-        if citation_map:
-            processed_response += "\n\n**📚 참고 자료:**"
-            for i, citation in enumerate(citations, 1):
-                if hasattr(citation, 'url') and citation.url:
-                    title = getattr(citation, 'title', f'Source {i}')
-                    url = citation.url
-                    domain = urlparse(url).netloc
-                    processed_response += f"\n{i}. [{title}]({url}) - {domain}"
-        
-        # Ensure response is not too long for Discord
-        if len(processed_response) > 1900:
-            processed_response = processed_response[:1897] + "..."
-            
-        return processed_response
 
-    def _format_korean_text(self, text: str, minimal_formatting: bool = False) -> str:
-        """Format text with Korean-friendly line breaks and styling
-        
-        Args:
-            text: Input text to format
-            minimal_formatting: If True, apply minimal formatting (for search results)
-            
         Returns:
-            str: Formatted text with proper Korean handling
+            str: Processed response with inline clickable citations
         """
-        if not text:
-            return text
-            
-        # Split into lines for processing
-        lines = text.split('\n')
-        processed_lines = []
-        in_code_block = False
-        
-        for line in lines:
-            line = line.rstrip()  # Remove trailing whitespace
-            
-            # Handle code blocks
-            if '```' in line:
-                in_code_block = not in_code_block
-                if in_code_block and line.strip() == '```':
-                    line = '```text'
-                processed_lines.append(line)
-                continue
-                
-            # Don't modify content inside code blocks
-            if in_code_block:
-                processed_lines.append(line)
-                continue
-                
-            # Skip empty lines (will be handled later)
-            if not line.strip():
-                processed_lines.append('')
-                continue
-                
-            # Apply formatting if not minimal
-            if not minimal_formatting:
-                line = self._apply_korean_styling(line)
-            
-            processed_lines.append(line)
-        
-        # Join lines with proper spacing for Korean text
-        result = self._join_korean_lines(processed_lines)
-        
-        return result
+        if not response or not response.strip():
+            return EMPTY_RESPONSE
 
-    def _apply_korean_styling(self, line: str) -> str:
-        """Apply Korean-friendly styling to a line of text
-        
-        Args:
-            line: Single line of text
-            
-        Returns:
-            str: Styled line with Korean-appropriate formatting
-        """
-        line = line.strip()
-        if not line:
-            return line
-            
-        return line
+        cited = [
+            (i, citation) for i, citation in enumerate(citations or [], 1)
+            if getattr(citation, 'url', None)
+        ]
+        citation_links = {
+            i: f"[**[{i}]**]({citation.url} \"{getattr(citation, 'title', f'Source {i}')}\")"
+            for i, citation in cited
+        }
+        processed_response = ResponseFormatter(
+            minimal=search_used, citation_links=citation_links
+        ).format(response)
+
+        if cited:
+            references = [
+                f"\n{i}. [{getattr(citation, 'title', f'Source {i}')}]({citation.url}) - "
+                f"{urlparse(citation.url).netloc}"
+                for i, citation in cited
+            ]
+            processed_response += "\n\n**📚 참고 자료:**" + "".join(references)
 
-    def _join_korean_lines(self, lines: List[str]) -> str:
-        """Join lines with Korean-appropriate spacing
-        
-        Args:
-            lines: List of processed lines
-            
-        Returns:
-            str: Joined text with proper Korean spacing
-        """
-        if not lines:
-            return ''
-            
-        result_lines = []
-        prev_line = ''
-        
-        for i, line in enumerate(lines):
-            current_line = line.strip()
-            
-            # Always keep code blocks as-is
-            if '```' in current_line:
-                result_lines.append(line)
-                prev_line = current_line
-                continue
-                
-            # Handle empty lines
-            if not current_line:
-                # Add empty line only if previous line wasn't empty
-                if prev_line.strip():
-                    result_lines.append('')
-                prev_line = current_line
-                continue
-                
-            # Korean text flow rules
-            if prev_line.strip():
-                # Check if we need paragraph break
-                needs_break = (
-                    current_line.startswith('**') or
-                    prev_line.endswith(':') or
-                    current_line.startswith('#')
-                )
-                
-                if needs_break:
-                    # Add empty line for paragraph break
-                    if result_lines and result_lines[-1].strip():
-                        result_lines.append('')
-            
-            result_lines.append(line)
-            prev_line = current_line
-        
-        # Remove multiple consecutive empty lines
-        final_lines = []
-        empty_count = 0
-        
-        for line in result_lines:
-            if not line.strip():
-                empty_count += 1
-                if empty_count <= 1:  # Allow max 1 empty line
-                    final_lines.append(line)
-            else:
-                empty_count = 0
-                final_lines.append(line)
-        
-        return '\n'.join(final_lines).strip()
+        return processed_response
 
-    async def chat(self, prompt: str, user_id: int, tool_choice: Optional[Dict[str, Any]] = None) -> Tuple[str, Optional[str], Optional[str]]:
+    async def chat(
+        self,
+        prompt: str,
+        user_id: int,
+        tool_choice: Optional[Dict[str, Any]] = None,
+        on_text: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> Tuple[str, Optional[str], Optional[str]]:
         """Send a chat message to Claude with web search grounding and thinking
         
         Args:
@@ -1785,6 +1559,9 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
                         - {"type": "auto"}: Claude decides (default)
                         - {"type": "any"}: Must use one of the tools
                         - {"type": "tool", "name": "web_search"}: Force web search
+            on_text: Optional callback for streaming; receives the text generated
+                     so far, formatted line by line, after every delta. The returned
+                     tuple is still the fully processed response.
 
         Returns:
             Tuple[str, Optional[str], Optional[str]]: (Claude's response, Source links if available, Thinking content if available)
@@ -1792,20 +1569,29 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         Raises:
             ValueError: If the request fails or limits are exceeded
         """
+        # A user's turns and the compaction of their history never interleave
+        async with self._session_lock(user_id):
+            return await self._chat(prompt, user_id, tool_choice, on_text)
+
+    async def _chat(
+        self,
+        prompt: str,
+        user_id: int,
+        tool_choice: Optional[Dict[str, Any]],
+        on_text: Optional[Callable[[str], Awaitable[None]]]
+    ) -> Tuple[str, Optional[str], Optional[str]]:
+        """Run one chat turn while holding the user's session lock (see chat)"""
+        # (history, length before this turn) until the turn is stored
+        pending_turn: Optional[Tuple[List[Dict[str, Any]], int]] = None
         try:
-            # Check system health
-            await self._check_system_health()
-            
-            # Check if service is enabled
+            # Check if service is enabled (health state is updated by the system monitor)
             if not self._is_enabled:
                 raise ValueError(
                     "AI 서비스가 일시적으로 비활성화되었어. "
                     f"약 {self.DISABLE_COOLDOWN_MINUTES}분 후에 다시 시도해줄래?"
                 )
             
-            # Apply slowdown if needed
-            if self._is_slowed_down:
-                await asyncio.sleep(5)  # Add 5 second delay
+            # Slowdown is applied by the AI request scheduler, which runs fewer requests at once
             
             # Check if client is initialized
             if not self._client:
@@ -1814,62 +1600,47 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             # Check user rate limits
             self._check_user_rate_limit(user_id)
 
-            # Clean up expired sessions
-            self._cleanup_expired_sessions()
+            # Get or create chat session (expired sessions are swept in the background)
+            history = await self._get_or_create_chat_session(user_id)
 
-            # Get or create chat session
-            messages = await self._get_or_create_chat_session(user_id)
+            # Optimize conversation history by removing stale web search results (in place)
+            self._optimize_conversation_history(history, user_id)
 
-            # Optimize conversation history by removing stale web search results
-            messages = self._optimize_conversation_history(messages)
+            # Answer repeated generic first-turn prompts without an API call
+            response_cacheable = self._is_response_cacheable(prompt, history, user_id, tool_choice)
+            if response_cacheable:
+                cached = self._response_cache.get(prompt)
+                if cached is not None:
+                    return self._answer_from_cache(prompt, user_id, cached)
 
-            # 📚 COOKBOOK: Cache Breakpoint 3 - User Messages (Incremental Conversation Caching)
-            # Cache last user message as conversation grows (official pattern)
-            conversation_turns = len(messages) // 2  # Rough estimate: user+assistant pairs
-            
-            if (self.PROMPT_CACHING_ENABLED and conversation_turns >= self.CONVERSATION_CACHE_THRESHOLD):
-                # Apply cache control to user message for incremental conversation caching
-                user_message = {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": prompt,
-                            "cache_control": {"type": "ephemeral"}
-                        }
-                    ]
-                }
-                messages.append(user_message)
-                logger.info(f"📚 COOKBOOK: Applied user message caching at turn {conversation_turns + 1}")
-            else:
-                # Simple user message for early conversation turns
-                messages.append({"role": "user", "content": prompt})
-                logger.info(f"Added simple user message (turn {conversation_turns + 1})")
+            # The turn is appended to the stored history in place and rolled back
+            # unless the request succeeds
+            pending_turn = (history, len(history))
+            messages = history
+
+            # History is stored without cache breakpoints so its bytes never change;
+            # the planner marks a copy per request
+            messages.append({"role": "user", "content": prompt})
             
             # Check token limits with full conversation context (thinking budget counts as input tokens)
-            conversation_tokens = await self._count_conversation_tokens(messages, include_thinking=self.THINKING_ENABLED)
+            layout = self._prompt_layout(user_id)
+            conversation_tokens = await self._estimate_prompt_tokens(user_id, messages, layout)
             self._check_token_thresholds(conversation_tokens)
 
-            # Build API request parameters with prompt caching
+            # Build API request parameters
             api_params = {
                 "model": "claude-sonnet-4-20250514",
                 "max_tokens": self.MAX_TOTAL_TOKENS - self.MAX_PROMPT_TOKENS,
                 "messages": messages,
             }
             
-            # 📚 COOKBOOK: Cache Breakpoint 1 - Tools
-            # Add web search tool with prompt caching following official patterns
+            # Tools come first in the prompt, so the persona breakpoint below caches them too
             if self.WEB_SEARCH_ENABLED:
                 web_search_tool = {
                     "type": "web_search_20250305",
                     "name": "web_search",
                     "max_uses": self.WEB_SEARCH_MAX_USES,  # Optimized for cost efficiency
                 }
-                
-                # Add cache control to tools if prompt caching is enabled
-                if self.PROMPT_CACHING_ENABLED:
-                    web_search_tool["cache_control"] = {"type": "ephemeral"}
-                
                 api_params["tools"] = [web_search_tool]
                 
                 # Add tool choice (following official cookbook patterns)
@@ -1883,22 +1654,27 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
                 
                 logger.info(f"Web search tool configured: max_uses={self.WEB_SEARCH_MAX_USES}, caching={self.PROMPT_CACHING_ENABLED}")
             
-            # 📚 COOKBOOK: Cache Breakpoint 2 - System Instructions
-            # Include current date as per cookbook best practices
             current_date = date.today().strftime("%B %d %Y")
-            system_prompt_with_date = f"{self.MUELSYSE_CONTEXT}\n\nToday's date is {current_date}."
-            
+            summary = self._session_summaries.get(user_id)
             if self.PROMPT_CACHING_ENABLED:
-                api_params["system"] = [
-                    {
-                        "type": "text",
-                        "text": system_prompt_with_date,
-                        "cache_control": {"type": "ephemeral"}
-                    }
-                ]
+                # The date changes daily, so it goes after the cached persona and summary
+                api_params["system"] = self._cache_planner.system_blocks(
+                    self.MUELSYSE_CONTEXT,
+                    self._format_summary_context(summary) if summary else None,
+                    f"Today's date is {current_date}.",
+                )
+                api_params["messages"] = self._cache_planner.plan_messages(
+                    user_id,
+                    messages,
+                    conversation_tokens,
+                    system_breakpoints=2 if summary else 1,
+                )
                 logger.info(f"System prompt configured with cache control and current date: {current_date}")
             else:
+                system_prompt_with_date = f"{self.MUELSYSE_CONTEXT}\n\nToday's date is {current_date}."
                 api_params["system"] = system_prompt_with_date
+                if summary:
+                    api_params["system"] += f"\n\n{self._format_summary_context(summary)}"
                 logger.info(f"System prompt configured with current date: {current_date}")
             
             # Add thinking if enabled
@@ -1916,7 +1692,19 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             # Since thinking is enabled, we omit all incompatible parameters
             
             # Send message and get response with web search grounding and thinking
-            response = await self._client.messages.create(**api_params)
+            async with self._request_metrics.measure("messages"):
+                if on_text is None:
+                    response = await self._client.messages.create(**api_params)
+                else:
+                    response = await self._stream_message(api_params, on_text)
+            usage = getattr(response, 'usage', None)
+            if usage is not None:
+                self._request_metrics.observe("messages", "input_tokens", (
+                    (getattr(usage, 'input_tokens', 0) or 0)
+                    + (getattr(usage, 'cache_read_input_tokens', 0) or 0)
+                    + (getattr(usage, 'cache_creation_input_tokens', 0) or 0)
+                ))
+                self._request_metrics.observe("messages", "output_tokens", getattr(usage, 'output_tokens', 0) or 0)
 
             # Update last interaction time
             self._update_last_interaction(user_id)
@@ -2102,6 +1890,11 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
                 messages.append({"role": "assistant", "content": response_text})
                 logger.info("Stored text-only assistant response as simple string")
             
+            # Seed per-message token counts so the next turn needs no remote count
+            self._token_accountant.observe_usage(
+                user_id, messages[:-1], messages[-1], getattr(response, 'usage', None), layout
+            )
+
             # Trim conversation history if too long, preserving web search efficiency
             if len(messages) > self.MAX_HISTORY_LENGTH * 2:  # *2 because we have user+assistant pairs
                 # Keep recent conversation but be smart about web search results
@@ -2111,6 +1904,8 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
 
             # Update chat session
             self._chat_sessions[user_id] = messages
+            pending_turn = None
+            self._schedule_compaction(user_id, messages)
 
             # Process response with inline citations (with timing)
             processing_start = time.perf_counter()
@@ -2149,6 +1944,7 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
                 
                 # Track prompt caching performance 
                 if self.PROMPT_CACHING_ENABLED:
+                    self._cache_planner.record(user_id, usage)
                     cache_creation = getattr(usage, 'cache_creation_input_tokens', 0)
                     cache_read = getattr(usage, 'cache_read_input_tokens', 0)
                     
@@ -2164,7 +1960,8 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
                         logger.info(f"Cache hit: {cache_read:,} tokens read from cache ({cache_savings_pct:.1f}% cost savings)")
                     
                     if cache_creation == 0 and cache_read == 0:
-                        logger.info(f"No cache activity - input tokens: {prompt_tokens:,}, threshold: 1024")
+                        input_tokens = getattr(usage, 'input_tokens', 0)
+                        logger.info(f"No cache activity - input tokens: {input_tokens:,}, threshold: 1024")
 
             # Track usage in background (non-blocking) - only time the dispatch
             tracking_start = time.perf_counter()
@@ -2196,7 +1993,7 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             sources_start = time.perf_counter()
             formatted_sources = None
             if source_links:
-                formatted_sources = self._format_sources(source_links)
+                formatted_sources = format_sources(source_links)
             sources_time = time.perf_counter() - sources_start
             logger.info(f"Source formatting took: {sources_time:.6f}s")
 
@@ -2204,10 +2001,29 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             thinking_start = time.perf_counter()
             formatted_thinking = None
             if thinking_content and thinking_content.strip():
-                formatted_thinking = self._format_thinking(thinking_content, thinking_used)
+                formatted_thinking = format_thinking(thinking_content)
             thinking_format_time = time.perf_counter() - thinking_start
             logger.info(f"Thinking formatting took: {thinking_format_time:.6f}s")
 
+            # Share complete, text-answered replies to generic prompts
+            if (response_cacheable and response_text and not tool_use_blocks
+                    and getattr(response, 'stop_reason', None) == "end_turn"):
+                usage = getattr(response, 'usage', None)
+                self._response_cache.put(
+                    prompt,
+                    processed_response,
+                    formatted_sources,
+                    formatted_thinking,
+                    prompt_tokens=(
+                        int(getattr(usage, 'input_tokens', 0) or 0)
+                        + int(getattr(usage, 'cache_creation_input_tokens', 0) or 0)
+                        + int(getattr(usage, 'cache_read_input_tokens', 0) or 0)
+                    ),
+                    response_tokens=int(getattr(usage, 'output_tokens', 0) or 0),
+                    used_search=search_used,
+                    raw_response=response_text,
+                )
+
             return (processed_response, formatted_sources, formatted_thinking)
 
         except anthropic.RateLimitError as e:
@@ -2260,110 +2076,68 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
                 raise ValueError("Claude API가 현재 과부하 상태야. 잠시 후에 다시 시도해줄래?") from e
             else:
                 raise ValueError(f"Claude API 요청에 실패했어: {error_message}") from e
+        finally:
+            if pending_turn is not None:
+                self._rollback_turn(user_id, *pending_turn)
 
-    def _format_sources(self, source_links: List[Tuple[str, str, str]]) -> str:
-        """Format source links for display (matching Gemini format)
+    def _rollback_turn(self, user_id: int, history: List[Dict[str, Any]], length: int) -> None:
+        """Remove an unfinished turn from a history it was appended to
         
         Args:
-            source_links: List of (title, url, domain) tuples
-            
-        Returns:
-            str: Formatted source links
+            user_id: Discord user ID
+            history: Stored history the turn was appended to
+            length: History length before the turn
         """
-        if not source_links:
-            return "No sources available"
-            
-        # Remove duplicates while preserving order
-        seen_urls = set()
-        unique_sources = []
-        for title, url, domain in source_links:
-            if url not in seen_urls:
-                seen_urls.add(url)
-                unique_sources.append((title, url, domain))
-        
-        if not unique_sources:
-            return "No sources available"
-            
-        # Format sources for Discord (matching Gemini style)
-        formatted = "**Sources:**\n\n"
-        for i, (title, url, domain) in enumerate(unique_sources[:5], 1):  # Limit to 5 sources
-            # Truncate long titles but keep them readable
-            display_title = title if len(title) <= 60 else title[:57] + "..."
-            formatted += f"{i}. **[{display_title}]({url})**\n   {domain}\n\n"
-        
-        return formatted
+        if len(history) <= length:
+            return
+        del history[length:]
+        if user_id in self._chat_sessions:
+            # Re-store it, since it may have been spilled with the turn included meanwhile
+            self._chat_sessions[user_id] = history
+        logger.info(f"Rolled back unfinished turn of user {user_id}")
+
+    async def _stream_message(
+        self,
+        api_params: Dict[str, Any],
+        on_text: Callable[[str], Awaitable[None]]
+    ) -> Any:
+        """Stream a message, reporting text as it is generated
 
-    def _format_thinking(self, thinking_content: str, thinking_used: bool = True) -> str:
-        """Format thinking content for display (similar to sources format)
-        
         Args:
-            thinking_content: Raw thinking content from Claude (summarized)
-            thinking_used: Whether thinking was actually used
-            
+            api_params: Parameters for messages.create
+            on_text: Callback receiving the text generated so far
+
         Returns:
-            str: Formatted thinking content for Discord display
+            Any: Final message, identical in shape to a messages.create response
         """
-        if not thinking_content or not thinking_content.strip():
-            return "No thinking content available"
-            
-        # Clean and format the thinking content
-        cleaned_content = thinking_content.strip()
-        
-        # Split into paragraphs for better readability
-        paragraphs = [p.strip() for p in cleaned_content.split('\n\n') if p.strip()]
-        if not paragraphs:
-            paragraphs = [cleaned_content]
-            
-        # Format for Discord display with Korean-friendly styling
-        formatted = "**추론 과정**\n\n"
-        
-        for i, paragraph in enumerate(paragraphs):
-            # Handle very long paragraphs by breaking them down
-            if len(paragraph) > 500:
-                # Split long paragraphs at sentence boundaries
-                sentences = paragraph.split('. ')
-                current_chunk = ""
-                
-                for j, sentence in enumerate(sentences):
-                    sentence = sentence.strip()
-                    if not sentence:
-                        continue
-                        
-                    # Add period back if it was removed by split (except for last sentence)
-                    if j < len(sentences) - 1 and not sentence.endswith('.'):
-                        sentence += '.'
-                    
-                    # Check if adding this sentence would make the chunk too long
-                    if len(current_chunk) + len(sentence) + 2 > 400:  # Leave room for formatting
-                        if current_chunk:
-                            formatted += f"```\n{current_chunk.strip()}\n```\n\n"
-                            current_chunk = sentence
-                        else:
-                            # Single sentence is very long, just add it
-                            formatted += f"```\n{sentence}\n```\n\n"
-                    else:
-                        current_chunk += (" " if current_chunk else "") + sentence
-                
-                # Add remaining content
-                if current_chunk.strip():
-                    formatted += f"```\n{current_chunk.strip()}\n```\n\n"
-            else:
-                # Normal length paragraph
-                formatted += f"```\n{paragraph}\n```\n\n"
-        
-        # Add footer with metadata
-        formatted += f"*추론 과정 요약 ({len(thinking_content)} 자)*"
-        
-        # Ensure the formatted content isn't too long for Discord
-        if len(formatted) > 1800:  # Leave room for other message content
-            # Truncate but preserve the structure
-            truncate_point = formatted.rfind('```\n\n', 0, 1600)
-            if truncate_point > 0:
-                formatted = formatted[:truncate_point + 5] + "\n\n*[추론 과정이 길어서 일부만 표시할거야]*"
-            else:
-                formatted = formatted[:1600] + "...\n\n*[추론 과정이 길어서 잘렸어]*"
-        
-        return formatted
+        # Preview through the same formatter as the final reply, one line at a time
+        formatter = ResponseFormatter()
+        formatted_text = ""
+        started = time.perf_counter()
+        first_token = True
+        async with self._client.messages.stream(**api_params) as stream:
+            async for event in stream:
+                # Text deltas span several blocks when web search is used, so accumulate ourselves
+                if event.type == "text" and event.text:
+                    if first_token:
+                        self._request_metrics.record("messages.first_token", time.perf_counter() - started)
+                        first_token = False
+                    formatted_text += formatter.feed(event.text)
+                    try:
+                        await on_text(formatted_text + formatter.pending)
+                    except Exception as e:
+                        logger.warning(f"Streaming callback failed: {e}")
+            return await stream.get_final_message()
+
+    def _response_cache_stats(self) -> Dict[str, Any]:
+        """Response cache counters with the API spend it avoided"""
+        stats = self._response_cache.stats()
+        stats["enabled"] = self.RESPONSE_CACHE_ENABLED
+        # $3/MTok input, $15/MTok output for Claude Sonnet 4
+        stats["estimated_savings"] = (
+            stats["saved_prompt_tokens"] * 3.0 + stats["saved_response_tokens"] * 15.0
+        ) / 1_000_000
+        return stats
 
     @property
     def usage_stats(self) -> Dict[str, Any]:
@@ -2372,40 +2146,36 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         Returns:
             Dict[str, Any]: Usage statistics
         """
-        current_time = datetime.now()
+        # Served from pre-aggregated usage buckets
+        today = self._metrics.totals("day")
+        last_hour = self._metrics.totals("minute", 60)
         
-        # Calculate average tokens per request
-        avg_prompt_tokens = (
-            self._total_prompt_tokens // max(self._daily_requests, 1)
-            if self._daily_requests > 0 else 0
-        )
-        avg_response_tokens = (
-            self._total_response_tokens // max(self._daily_requests, 1)
-            if self._daily_requests > 0 else 0
-        )
-        
-        # Calculate recent usage (last hour)
-        recent_requests = sum(
-            1 for req in self._request_sizes
-            if datetime.fromisoformat(req["timestamp"]) > current_time - timedelta(hours=1)
-        )
+        # Calculate average tokens per request (today)
+        avg_prompt_tokens = today["prompt_tokens"] // today["requests"] if today["requests"] else 0
+        avg_response_tokens = today["response_tokens"] // today["requests"] if today["requests"] else 0
         
         # Get compliance status for enhanced reporting
         compliance_status = self.get_compliance_status()
         
         return {
             "service_name": "Claude API",
-            "daily_requests": self._daily_requests,
+            "daily_requests": today["requests"],
+            "daily_tokens": today["total_tokens"],
             "total_prompt_tokens": self._total_prompt_tokens,
             "total_response_tokens": self._total_response_tokens,
             "thinking_tokens_used": self._thinking_tokens_used,
-            "hourly_token_count": self._hourly_token_count,
+            "hourly_token_count": today["total_tokens"],  # Tokens counted toward DAILY_TOKEN_LIMIT
+            "tokens_last_hour": last_hour["total_tokens"],
             "max_prompt_tokens": self._max_prompt_tokens,
             "max_response_tokens": self._max_response_tokens,
             "avg_prompt_tokens": avg_prompt_tokens,
             "avg_response_tokens": avg_response_tokens,
-            "recent_requests_hour": recent_requests,
-            "last_reset": self._last_reset.isoformat(),
+            "recent_requests_hour": last_hour["requests"],
+            "daily_token_history": [
+                {"date": datetime.fromtimestamp(start).date().isoformat(), "tokens": values["prompt_tokens"] + values["response_tokens"]}
+                for start, values in self._metrics.series("day", 7)
+            ],
+            "last_reset": datetime.fromtimestamp(self._metrics.bucket_start("day")).isoformat(),
             "is_enabled": self._is_enabled,
             "is_slowed_down": self._is_slowed_down,
             "error_count": self._error_count,
@@ -2417,8 +2187,20 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             "cache_hits": self._cache_hits,
             "cache_misses": self._cache_misses,
             "stop_reason_counts": self._stop_reason_counts,
+            "conversation_compactions": self._compactions,
+            "compaction_tokens": self._compaction_prompt_tokens + self._compaction_response_tokens,
+            "compaction_cost": self._compaction_cost,
+            "batch_tokens": self._batch_prompt_tokens + self._batch_response_tokens,
+            "batch_cost": self._batch_cost,
+            "response_cache": self._response_cache_stats(),
+            "latency": self._request_metrics.endpoint("messages").latency.summary(),
+            "first_token_latency": self._request_metrics.endpoint("messages.first_token").latency.summary(),
             "cpu_usage": self._cpu_usage,
             "memory_usage": self._memory_usage,
+            "session_store": {
+                **self._chat_sessions.stats(),
+                "bytes_per_session": self._chat_sessions.session_bytes(),
+            },
             # Enhanced compliance metrics
             "compliance": {
                 "mode": compliance_status["compliance_mode"],
@@ -2466,6 +2248,16 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         if stats.get('web_search_requests', 0) > 0:
             report += f"🔍 웹 검색: {stats['web_search_requests']:,}회 (${stats['web_search_cost']:.2f})\n"
             
+        # Add summary model usage of conversation compaction
+        if stats.get('compaction_tokens', 0) > 0:
+            report += (
+                f"🗜️ 대화 요약: {stats['compaction_tokens']:,}토큰 (${stats['compaction_cost']:.3f})\n"
+            )
+            
+        # Add offline batch job usage
+        if stats.get('batch_tokens', 0) > 0:
+            report += f"📦 배치 작업: {stats['batch_tokens']:,}토큰 (${stats['batch_cost']:.3f})\n"
+            
         # Add cache performance if any cache activity
         cache_hits = stats.get('cache_hits', 0)
         cache_misses = stats.get('cache_misses', 0)
@@ -2479,9 +2271,22 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             cache_savings_cost = (cache_savings_tokens / 1_000_000) * 3.0  # $3/MTok saved
             
             report += f"⚡ 캐시: 사용률 {cache_hit_rate:.1f}% ({cache_hits}/{cache_hits + cache_misses})\n"
+            planner = self._cache_planner.stats()
+            if planner['sessions'] > 0:
+                report += f"📐 대화별 캐시 읽기: 평균 {planner['average_read_ratio'] * 100:.0f}%\n"
             if cache_savings_cost > 0.001:  # Only show if savings > $0.001
                 report += f"💰 캐시 절약: ${cache_savings_cost:.3f}\n"
             
+        # Add response cache savings if any reply was reused
+        response_cache = stats.get('response_cache', {})
+        reused = response_cache.get('exact_hits', 0) + response_cache.get('similar_hits', 0)
+        if reused > 0:
+            saved_tokens = response_cache['saved_prompt_tokens'] + response_cache['saved_response_tokens']
+            report += (
+                f"♻️ 답변 재사용: {reused:,}회 ({saved_tokens:,}토큰, "
+                f"${response_cache['estimated_savings']:.3f} 절약)\n"
+            )
+            
         report += (
             f"⏱️ 최근 1시간: {stats['recent_requests_hour']:,}회\n"
             f"💻 시스템: CPU {stats['cpu_usage']:.1f}%, RAM {stats['memory_usage']:.1f}%\n"
@@ -2520,6 +2325,12 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         
         return report
 
+    @property
+    def budget_remaining(self) -> float:
+        """Share of today's token budget still available (0-1)"""
+        used = self._metrics.totals("day")["total_tokens"]
+        return max(0.0, 1 - used / self.DAILY_TOKEN_LIMIT)
+
     @property
     def health_status(self) -> Dict[str, Any]:
         """Get service health status
@@ -2527,15 +2338,29 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         Returns:
             Dict[str, Any]: Health status information
         """
+        current_time = datetime.now()
+        time_until_enable = None
+        if not self._is_enabled and self._last_disable:
+            elapsed = (current_time - self._last_disable).total_seconds()
+            time_until_enable = max(self.DISABLE_COOLDOWN_MINUTES * 60 - elapsed, 0)
+        time_until_slowdown_reset = None
+        if self._is_slowed_down and self._last_slowdown:
+            elapsed = (current_time - self._last_slowdown).total_seconds()
+            time_until_slowdown_reset = max(self.SLOWDOWN_COOLDOWN_MINUTES * 60 - elapsed, 0)
+        
         return {
             "is_enabled": self._is_enabled,
             "is_slowed_down": self._is_slowed_down,
             "error_count": self._error_count,
             "cpu_usage": self._cpu_usage,
             "memory_usage": self._memory_usage,
+            "system_sampled_at": self._system_monitor.snapshot.sampled_at,
+            "time_until_enable": time_until_enable,
+            "time_until_slowdown_reset": time_until_slowdown_reset,
             "last_slowdown": self._last_slowdown.isoformat() if self._last_slowdown else None,
             "last_disable": self._last_disable.isoformat() if self._last_disable else None,
             "active_sessions": len(self._chat_sessions),
+            "session_store": self._chat_sessions.stats(),
             "recent_errors": len(self._recent_errors)
         }
 
@@ -2548,8 +2373,23 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
                     await self._process_usage_batch()
                     logger.info(f"Flushed {len(self._usage_queue)} pending usage records on shutdown")
             
-            # Save final usage data
-            await self._save_usage_data()
+            # Save final usage data (bypassing the save debounce)
+            self._metrics.update_counters(self._usage_counters())
+            await asyncio.to_thread(self._metrics.close)
+            
+            await self._system_monitor.unsubscribe(self._check_system_health)
+            
+            for task in list(self._compaction_tasks.values()):
+                task.cancel()
+            self._compaction_tasks.clear()
+            
+            if self._session_sweeper and not self._session_sweeper.done():
+                self._session_sweeper.cancel()
+                try:
+                    await self._session_sweeper
+                except asyncio.CancelledError:
+                    pass
+            self._session_sweeper = None
             
             self._client = None
             await super().close()
@@ -2596,6 +2436,9 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         Returns:
             bool: True if session was ended, False if no session existed
         """
+        self._token_accountant.drop(user_id)
+        self._session_expiry.discard(user_id)
+        self._drop_session_state(user_id)
         if user_id in self._chat_sessions:
             del self._chat_sessions[user_id]
             if user_id in self._last_interaction:
@@ -2603,6 +2446,50 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             return True
         return False
 
+    def _is_response_cacheable(
+        self,
+        prompt: str,
+        history: List[Dict[str, Any]],
+        user_id: int,
+        tool_choice: Optional[Dict[str, Any]],
+    ) -> bool:
+        """Check whether a request may be answered from or stored in the response cache
+        
+        Only first turns of a conversation with default tool choice and a
+        prompt that doesn't refer to the user are shared between users.
+        """
+        return (
+            self.RESPONSE_CACHE_ENABLED
+            and tool_choice is None
+            and not history
+            and user_id not in self._session_summaries
+            and is_cacheable_prompt(prompt)
+        )
+
+    def _answer_from_cache(
+        self, prompt: str, user_id: int, cached: CachedResponse
+    ) -> Tuple[str, Optional[str], Optional[str]]:
+        """Reply with a cached answer and start the session from it
+        
+        Args:
+            prompt: The user's message
+            user_id: Discord user ID
+            cached: Cached reply
+            
+        Returns:
+            Tuple[str, Optional[str], Optional[str]]: (Response, Source links, Thinking content)
+        """
+        # Follow-up questions continue from the cached exchange, as the model wrote it
+        self._chat_sessions[user_id] = [
+            {"role": "user", "content": prompt},
+            {"role": "assistant", "content": cached.raw_response},
+        ]
+        self._update_last_interaction(user_id)
+        logger.info(
+            f"Response cache hit for user {user_id}: saved ~{cached.prompt_tokens + cached.response_tokens:,} tokens"
+        )
+        return (cached.response, cached.sources, cached.thinking)
+
     async def _get_or_create_chat_session(self, user_id: int) -> List[Dict[str, Any]]:
         """Get existing chat session or create new one
         
@@ -2614,19 +2501,35 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         """
         current_time = datetime.now()
         
-        # Check if existing session has expired
-        if user_id in self._chat_sessions and user_id in self._last_interaction:
-            last_time = self._last_interaction[user_id]
-            if (current_time - last_time).total_seconds() < self.CONTEXT_EXPIRY_MINUTES * 60:
-                return self._chat_sessions[user_id]
+        if user_id in self._chat_sessions:
+            if self._session_expiry.is_expired(user_id):
+                # Expired but not swept yet: release it like the sweeper would
+                self._expire_session(user_id)
+                logger.info(f"Expired Claude chat session of user {user_id} on access")
+            else:
+                messages = await self._chat_sessions.load(user_id)
+                if messages is not None:
+                    # Push the deadline back now, not only after the reply, so a long turn isn't swept
+                    self._session_expiry.touch(user_id)
+                    return messages
         
         # Create new chat session (no need for character context in messages since we use system prompt)
         messages = []
+        self._token_accountant.drop(user_id)
+        self._drop_session_state(user_id)
         
         self._chat_sessions[user_id] = messages
         self._last_interaction[user_id] = current_time
+        self._session_expiry.touch(user_id)
         return messages
 
+    def _session_lock(self, user_id: int) -> asyncio.Lock:
+        """Get the lock guarding a user's chat history"""
+        lock = self._session_locks.get(user_id)
+        if lock is None:
+            lock = self._session_locks[user_id] = asyncio.Lock()
+        return lock
+
     def _update_last_interaction(self, user_id: int) -> None:
         """Update last interaction time for user
         
@@ -2634,32 +2537,196 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             user_id: Discord user ID
         """
         self._last_interaction[user_id] = datetime.now()
+        self._session_expiry.touch(user_id)
 
-    def _cleanup_expired_sessions(self) -> None:
-        """Clean up expired chat sessions"""
-        current_time = datetime.now()
-        expired_users = []
+    def add_session_expiry_listener(self, callback: Callable[[int], None]) -> None:
+        """Register a callback run with the user ID of each expired session
         
-        for user_id, last_time in self._last_interaction.items():
-            if (current_time - last_time).total_seconds() > self.CONTEXT_EXPIRY_MINUTES * 60:
-                expired_users.append(user_id)
+        Args:
+            callback: Function releasing per-user state (e.g. stored sources)
+        """
+        if callback not in self._session_expiry_listeners:
+            self._session_expiry_listeners.append(callback)
+
+    async def _session_sweep_loop(self) -> None:
+        """Sweep expired chat sessions until cancelled"""
+        while True:
+            await asyncio.sleep(self.SESSION_SWEEP_INTERVAL)
+            try:
+                self._cleanup_expired_sessions()
+            except Exception as e:
+                logger.error(f"Error sweeping expired Claude chat sessions: {e}")
+
+    def _cleanup_expired_sessions(self) -> None:
+        """Clean up chat sessions whose expiry deadline has passed"""
+        expired_users = self._session_expiry.pop_expired()
         
+        cleaned = 0
         for user_id in expired_users:
-            if user_id in self._chat_sessions:
-                del self._chat_sessions[user_id]
-            del self._last_interaction[user_id]
+            lock = self._session_locks.get(user_id)
+            if lock is not None and lock.locked():
+                # A turn is still running on this session; it expires from its new deadline
+                self._session_expiry.touch(user_id)
+                continue
+            self._expire_session(user_id)
+            cleaned += 1
         
-        if expired_users:
-            logger.info(f"Cleaned up {len(expired_users)} expired Claude chat sessions")
+        if cleaned:
+            logger.info(f"Cleaned up {cleaned} expired Claude chat sessions")
+
+    def _expire_session(self, user_id: int) -> None:
+        """Remove an expired chat session and notify the expiry listeners"""
+        self._session_expiry.discard(user_id)
+        if user_id in self._chat_sessions:
+            del self._chat_sessions[user_id]
+        self._last_interaction.pop(user_id, None)
+        self._token_accountant.drop(user_id)
+        self._drop_session_state(user_id)
+        for callback in self._session_expiry_listeners:
+            try:
+                callback(user_id)
+            except Exception as e:
+                logger.error(f"Session expiry listener failed for user {user_id}: {e}")
+
+    def _prompt_layout(self, user_id: int) -> Hashable:
+        """Key of the system prompt and tools sent with a user's next request"""
+        return (self.WEB_SEARCH_ENABLED, self._session_summaries.get(user_id))
+
+    @staticmethod
+    def _format_summary_context(summary: str) -> str:
+        """Format a session summary for the system prompt"""
+        return f"Summary of the earlier part of this conversation:\n{summary}"
 
-    def _optimize_conversation_history(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Optimize conversation history by removing stale web search results based on retention settings
+    def _drop_session_state(self, user_id: int) -> None:
+        """Forget a session's summary, history index and cache plan and cancel its pending compaction"""
+        self._session_summaries.pop(user_id, None)
+        self._history_indexes.pop(user_id, None)
+        self._cache_planner.forget(user_id)
+        task = self._compaction_tasks.pop(user_id, None)
+        if task and not task.done():
+            task.cancel()
+
+    def _schedule_compaction(self, user_id: int, messages: List[Dict[str, Any]]) -> None:
+        """Start background compaction if a session is nearing the prompt budget
         
         Args:
-            messages: Current conversation messages
+            user_id: Discord user ID
+            messages: Session history just stored
+        """
+        if not self.COMPACTION_ENABLED or user_id in self._compaction_tasks:
+            return
+        estimate = self._token_accountant.estimate(user_id, messages, self._prompt_layout(user_id))
+        if estimate < self.MAX_PROMPT_TOKENS * self.COMPACTION_THRESHOLD:
+            return
+        if find_compaction_split(messages, self.COMPACTION_KEEP_MESSAGES) == 0:
+            return
+        
+        logger.info(f"Session of user {user_id} at ~{estimate} tokens, compacting older turns")
+        task = asyncio.create_task(self._compact_session(user_id, messages))
+        self._compaction_tasks[user_id] = task
+        task.add_done_callback(
+            lambda t: self._compaction_tasks.pop(user_id, None) if self._compaction_tasks.get(user_id) is t else None
+        )
+
+    async def _compact_session(self, user_id: int, messages: List[Dict[str, Any]]) -> None:
+        """Summarize older turns of a session into its summary context
+        
+        The summary is produced off the request path; it is only applied if
+        the kept tail is still part of the live session afterwards, and under
+        the session lock so a turn in progress is never overwritten.
+        
+        Args:
+            user_id: Discord user ID
+            messages: Session history snapshot to compact
+        """
+        split = find_compaction_split(messages, self.COMPACTION_KEEP_MESSAGES)
+        if split == 0:
+            return
+        older, first_kept = messages[:split], messages[split]
+        previous_summary = self._session_summaries.get(user_id)
+        
+        try:
+            response = await self._client.messages.create(
+                model=self.COMPACTION_MODEL,
+                max_tokens=self.COMPACTION_MAX_TOKENS,
+                system=self.COMPACTION_PROMPT,
+                messages=[{"role": "user", "content": render_transcript(older, previous_summary)}],
+            )
+            self._record_compaction_usage(getattr(response, "usage", None))
+            summary = "".join(
+                getattr(block, "text", "") for block in response.content
+                if getattr(block, "type", None) == "text"
+            ).strip()
+            if not summary:
+                raise ValueError("Empty summary")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Summary model failed for user {user_id}, using extractive summary: {e}")
+            summary = extractive_summary(older, previous_summary)
+        
+        async with self._session_lock(user_id):
+            # The session may have moved on (or ended) while we were summarizing
+            current = await self._chat_sessions.load(user_id) or []
+            start = next((i for i, message in enumerate(current) if message is first_kept), None)
+            if start is None and current:
+                # Rehydrated histories hold copies of the snapshot's messages
+                digest = message_digest(first_kept)
+                start = next((i for i, message in enumerate(current) if message_digest(message) == digest), None)
+            if start is None:
+                logger.info(f"Session of user {user_id} changed during compaction, discarding summary")
+                return
+            
+            self._session_summaries[user_id] = summary
+            self._chat_sessions[user_id] = current[start:]
+        self._compactions += 1
+        logger.info(f"Compacted {split} messages of user {user_id} into a {len(summary)}-character summary")
+
+    def _record_compaction_usage(self, usage: Any) -> None:
+        """Count the summary model's tokens and cost"""
+        if usage is None:
+            return
+        prompt_tokens = int(getattr(usage, "input_tokens", 0) or 0)
+        response_tokens = int(getattr(usage, "output_tokens", 0) or 0)
+        self._compaction_prompt_tokens += prompt_tokens
+        self._compaction_response_tokens += response_tokens
+        self._compaction_cost += (
+            prompt_tokens * self.COMPACTION_INPUT_COST_PER_MTOK
+            + response_tokens * self.COMPACTION_OUTPUT_COST_PER_MTOK
+        ) / 1_000_000
+
+    def record_batch_usage(self, usage: Any) -> None:
+        """Count the tokens and cost of a message batch request
+        
+        Args:
+            usage: Usage block of a succeeded batch result
+        """
+        if usage is None:
+            return
+        prompt_tokens = int(getattr(usage, "input_tokens", 0) or 0)
+        response_tokens = int(getattr(usage, "output_tokens", 0) or 0)
+        self._batch_prompt_tokens += prompt_tokens
+        self._batch_response_tokens += response_tokens
+        self._batch_cost += (
+            prompt_tokens * self.BATCH_INPUT_COST_PER_MTOK
+            + response_tokens * self.BATCH_OUTPUT_COST_PER_MTOK
+        ) / 1_000_000
+
+    def _optimize_conversation_history(
+        self, messages: List[Dict[str, Any]], user_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Remove stale web search results from history in place based on retention settings
+        
+        Only messages appended since the previous turn are scanned; the session's
+        SearchRetentionIndex remembers which assistant messages still hold web
+        search blocks, so nothing is copied unless the retention window moves.
+        
+        Args:
+            messages: Current conversation messages (modified in place)
+            user_id: Session owner; without one the history is indexed from scratch
             
         Returns:
-            List[Dict[str, Any]]: Optimized messages with stale web search data removed
+            List[Dict[str, Any]]: The same list with stale web search data removed
         """
         if len(messages) < 2:
             return messages
@@ -2671,90 +2738,44 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         if not aggressive_cleanup:
             # Use original conservative approach if aggressive cleanup is disabled
             retention_turns = 2  # Keep last 2 assistant messages (original behavior)
-            
-        optimized_messages = []
-        assistant_message_count = 0
-        total_web_search_blocks_removed = 0
-        
-        # Count assistant messages from the end to determine retention
-        assistant_indices = []
-        for i, message in enumerate(messages):
-            if message.get("role") == "assistant":
-                assistant_indices.append(i)
         
-        # Determine which assistant messages should retain web search results
-        messages_to_keep_search = set()
-        if assistant_indices:
-            # Keep web search results in the last N assistant messages based on retention_turns
-            keep_count = min(retention_turns, len(assistant_indices))
-            messages_to_keep_search.update(assistant_indices[-keep_count:])
+        if user_id is None:
+            index = SearchRetentionIndex()
+        else:
+            index = self._history_indexes.setdefault(user_id, SearchRetentionIndex())
+        index.sync(messages)
         
-        for i, message in enumerate(messages):
-            if message.get("role") == "assistant":
-                content = message.get("content", "")
-                
-                if isinstance(content, list):
-                    # Check if this message contains web search results
-                    has_web_search = any(
-                        (hasattr(block, 'type') and block.type in ["web_search_tool_result", "server_tool_use"]) or
-                        (isinstance(block, dict) and block.get("type") in ["web_search_tool_result", "server_tool_use"])
-                        for block in content
-                    )
-                    
-                    if has_web_search:
-                        # Check if this message should retain web search results
-                        should_keep_search = i in messages_to_keep_search
-                        
-                        if not should_keep_search:
-                            # Remove web search tool results to reduce token usage
-                            filtered_content = []
-                            web_search_blocks_removed = 0
-                            
-                            for block in content:
-                                block_type = getattr(block, 'type', None) or (block.get("type") if isinstance(block, dict) else None)
-                                
-                                if block_type in ["web_search_tool_result", "server_tool_use"]:
-                                    web_search_blocks_removed += 1
-                                    continue  # Skip web search blocks in older messages
-                                else:
-                                    # Keep text, thinking, and other important blocks
-                                    filtered_content.append(block)
-                            
-                            if web_search_blocks_removed > 0:
-                                total_web_search_blocks_removed += web_search_blocks_removed
-                                logger.info(f"Removed {web_search_blocks_removed} web search blocks from message {i} "
-                                          f"(retention: {retention_turns} turns)")
-                                
-                            # Only add the message if it still has content after filtering
-                            if filtered_content:
-                                optimized_message = message.copy()
-                                optimized_message["content"] = filtered_content
-                                optimized_messages.append(optimized_message)
-                            else:
-                                # If no content remains, skip this message entirely
-                                logger.info(f"Skipping message {i} as it contained only web search data")
-                        else:
-                            # Keep messages within retention period with web search results
-                            optimized_messages.append(message)
-                    else:
-                        # No web search data, keep as-is
-                        optimized_messages.append(message)
-                else:
-                    # Simple string content, keep as-is
-                    optimized_messages.append(message)
+        total_web_search_blocks_removed = 0
+        emptied = set()
+        for message in index.pop_expired(retention_turns):
+            filtered_content = [
+                block for block in message["content"]
+                if block_type(block) not in WEB_SEARCH_BLOCK_TYPES
+            ]
+            total_web_search_blocks_removed += len(message["content"]) - len(filtered_content)
+            if user_id is not None:
+                self._token_accountant.forget_message(user_id, message)
+            
+            if filtered_content:
+                # Keep text, thinking, and other important blocks
+                message["content"] = filtered_content
             else:
-                # User messages, keep as-is
-                optimized_messages.append(message)
+                # If no content remains, drop the message entirely
+                emptied.add(id(message))
         
-        # Log optimization results
-        original_count = len(messages)
-        optimized_count = len(optimized_messages)
-        if original_count != optimized_count or total_web_search_blocks_removed > 0:
-            logger.info(f"Web search optimization: {original_count} → {optimized_count} messages, "
-                       f"removed {total_web_search_blocks_removed} web search blocks "
-                       f"(retention: {retention_turns} turns)")
+        if emptied:
+            # Rebuilt once in place rather than searched and deleted per message
+            messages[:] = [message for message in messages if id(message) not in emptied]
+            logger.info(f"Dropped {len(emptied)} messages that contained only web search data")
+        
+        if total_web_search_blocks_removed > 0:
+            if user_id is not None:
+                # Edited in place, so the store's size for the session is stale
+                self._chat_sessions.resize(user_id)
+            logger.info(f"Web search optimization: removed {total_web_search_blocks_removed} web search blocks "
+                       f"(retention: {retention_turns} turns, {index.pending} messages still holding results)")
             
-        return optimized_messages 
+        return messages
 
     def get_compliance_status(self) -> Dict[str, Any]:
         """Get current compliance status and diagnostic information
@@ -2769,7 +2790,8 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         total_thinking_with_signatures = 0
         
         # Analyze current chat sessions for compliance indicators
-        for user_id, messages in self._chat_sessions.items():
+        # Spilled sessions are not rehydrated just for diagnostics
+        for user_id, messages in self._chat_sessions.resident_items():
             session_has_thinking = False
             session_has_tools = False
             
@@ -2828,7 +2850,7 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             }
         }
 
-    def validate_conversation_compliance(self, user_id: int) -> Dict[str, Any]:
+    async def validate_conversation_compliance(self, user_id: int) -> Dict[str, Any]:
         """Validate that a specific conversation maintains compliance standards
         
         Args:
@@ -2837,14 +2859,14 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         Returns:
             Dict[str, Any]: Validation results and recommendations
         """
-        if user_id not in self._chat_sessions:
+        messages = await self._chat_sessions.load(user_id)
+        if messages is None:
             return {
                 "status": "no_session",
                 "compliant": True,
                 "message": "No active session to validate"
             }
         
-        messages = self._chat_sessions[user_id]
         issues = []
         warnings = []
         
@@ -2924,7 +2946,7 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             response, sources = await self.chat(test_prompt, test_user_id)
             
             # Analyze the results
-            compliance_validation = self.validate_conversation_compliance(test_user_id)
+            compliance_validation = await self.validate_conversation_compliance(test_user_id)
             
             # Clean up test session
             if test_user_id in self._chat_sessions:
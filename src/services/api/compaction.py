@@ -0,0 +1,121 @@
+import re
+from typing import Any, Dict, List, Optional
+
+Message = Dict[str, Any]
+
+SPEAKER_LABELS = {"user": "사용자", "assistant": "뮤엘시스"}
+
+
+def message_text(message: Message) -> str:
+    """Get the visible text of a message, ignoring thinking and tool blocks
+
+    Args:
+        message: Message with string content or content blocks (SDK objects or dicts)
+
+    Returns:
+        str: Concatenated text content
+    """
+    content = message.get("content", "")
+    if isinstance(content, str):
+        return content
+
+    parts = []
+    for block in content or []:
+        if isinstance(block, dict):
+            if block.get("type") == "text":
+                parts.append(block.get("text", ""))
+        elif getattr(block, "type", None) == "text":
+            parts.append(getattr(block, "text", ""))
+    return "".join(parts)
+
+
+def find_compaction_split(messages: List[Message], keep_messages: int) -> int:
+    """Find where recent history starts when compacting a conversation
+
+    The kept tail always starts with a plain user turn so the compacted
+    conversation remains a valid alternating message list.
+
+    Args:
+        messages: Conversation history, oldest first
+        keep_messages: Minimum number of recent messages to keep verbatim
+
+    Returns:
+        int: Index of the first kept message (0 if nothing can be compacted)
+    """
+    for index in range(max(len(messages) - keep_messages, 0), 0, -1):
+        if messages[index].get("role") == "user":
+            return index
+    return 0
+
+
+def render_transcript(
+    messages: List[Message],
+    previous_summary: Optional[str] = None,
+    max_chars_per_message: int = 2000,
+) -> str:
+    """Render messages as a plain transcript for summarization
+
+    Args:
+        messages: Messages to render
+        previous_summary: Summary of turns compacted earlier, if any
+        max_chars_per_message: Per-message cap so one long answer can't dominate
+
+    Returns:
+        str: Transcript text
+    """
+    lines = []
+    if previous_summary:
+        lines.append(f"[이전 요약]\n{previous_summary}\n")
+    for message in messages:
+        text = message_text(message).strip()
+        if not text:
+            continue
+        if len(text) > max_chars_per_message:
+            text = text[:max_chars_per_message] + "…"
+        speaker = SPEAKER_LABELS.get(message.get("role", ""), message.get("role", ""))
+        lines.append(f"{speaker}: {text}")
+    return "\n".join(lines)
+
+
+def extractive_summary(
+    messages: List[Message],
+    previous_summary: Optional[str] = None,
+    max_chars: int = 1500,
+    max_chars_per_turn: int = 160,
+) -> str:
+    """Summarize a conversation locally by keeping the lead of each turn
+
+    Used when the summarization model is unavailable. Recent turns are
+    preferred when the budget runs out.
+
+    Args:
+        messages: Messages to summarize
+        previous_summary: Summary of turns compacted earlier, if any
+        max_chars: Total character budget
+        max_chars_per_turn: Character budget per turn
+
+    Returns:
+        str: Summary text
+    """
+    entries = []
+    for message in messages:
+        text = re.sub(r"\s+", " ", message_text(message)).strip()
+        if not text:
+            continue
+        if len(text) > max_chars_per_turn:
+            text = text[:max_chars_per_turn].rstrip() + "…"
+        speaker = SPEAKER_LABELS.get(message.get("role", ""), message.get("role", ""))
+        entries.append(f"- {speaker}: {text}")
+
+    kept: List[str] = []
+    used = 0
+    for entry in reversed(entries):
+        if used + len(entry) + 1 > max_chars:
+            break
+        kept.append(entry)
+        used += len(entry) + 1
+    kept.reverse()
+
+    if previous_summary and used + len(previous_summary) + 1 <= max_chars:
+        kept.insert(0, previous_summary)
+    return "\n".join(kept)
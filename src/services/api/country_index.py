@@ -0,0 +1,138 @@
+import bisect
+import difflib
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.utils.api_types import CountryInfo
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+# Common Korean names that aren't a country's Korean translation
+KOREAN_ALIASES: Dict[str, str] = {
+    "한국": "KOR",
+    "남한": "KOR",
+    "북한": "PRK",
+    "미국": "USA",
+    "영국": "GBR",
+    "대만": "TWN",
+    "홍콩": "HKG",
+}
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a country name for lookups
+
+    Case, accents, punctuation and spacing are ignored; Hangul syllables are
+    kept composed so Korean prefixes still match.
+    """
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_WORD.sub("", unicodedata.normalize("NFC", stripped))
+
+
+class CountryIndex:
+    """In-memory index of countries by every name they are known under
+
+    Built from a restcountries ``/all`` response. Each country is indexed
+    by its common and official names, native names, Korean translation,
+    alternative spellings and ISO codes. Lookups try an exact match, then
+    a prefix match, then a fuzzy match; when several countries share a
+    match the most populous one wins.
+    """
+
+    MIN_PREFIX = 2
+    FUZZY_CUTOFF = 0.75
+
+    def __init__(self, countries: Iterable[Dict[str, Any]]) -> None:
+        """Build the index
+
+        Args:
+            countries: Country entries as returned by restcountries
+        """
+        self._countries: List[CountryInfo] = []
+        self._names: Dict[str, int] = {}
+        for entry in countries:
+            country = self._parse(entry)
+            if country is None:
+                continue
+            position = len(self._countries)
+            self._countries.append(country)
+            for name in self._names_of(entry):
+                key = normalize_name(name)
+                if key:
+                    current = self._names.get(key)
+                    if current is None or self._countries[current]["population"] < country["population"]:
+                        self._names[key] = position
+
+        codes = {country["cca3"]: i for i, country in enumerate(self._countries)}
+        for alias, code in KOREAN_ALIASES.items():
+            if code in codes:
+                self._names.setdefault(normalize_name(alias), codes[code])
+        self._sorted_keys = sorted(self._names)
+
+    def __len__(self) -> int:
+        return len(self._countries)
+
+    def lookup(self, query: str) -> Optional[CountryInfo]:
+        """Find the country best matching a name or code
+
+        Args:
+            query: Country name in any indexed language, or an ISO code
+
+        Returns:
+            Optional[CountryInfo]: The matching country, or None
+        """
+        key = normalize_name(query)
+        if not key:
+            return None
+
+        position = self._names.get(key)
+        if position is not None:
+            return self._countries[position]
+
+        if len(key) >= self.MIN_PREFIX:
+            start = bisect.bisect_left(self._sorted_keys, key)
+            matches = set()
+            for name in self._sorted_keys[start:]:
+                if not name.startswith(key):
+                    break
+                matches.add(self._names[name])
+            if matches:
+                return self._countries[max(matches, key=lambda i: self._countries[i]["population"])]
+
+        close = difflib.get_close_matches(key, self._sorted_keys, n=1, cutoff=self.FUZZY_CUTOFF)
+        return self._countries[self._names[close[0]]] if close else None
+
+    @staticmethod
+    def _names_of(entry: Dict[str, Any]) -> List[str]:
+        name = entry.get("name") or {}
+        names = [name.get("common", ""), name.get("official", "")]
+        for native in (name.get("nativeName") or {}).values():
+            names += [native.get("common", ""), native.get("official", "")]
+        korean = (entry.get("translations") or {}).get("kor") or {}
+        names += [korean.get("common", ""), korean.get("official", "")]
+        names += entry.get("altSpellings") or []
+        names += [entry.get("cca2", ""), entry.get("cca3", "")]
+        return [n for n in names if isinstance(n, str) and n]
+
+    @staticmethod
+    def _parse(entry: Dict[str, Any]) -> Optional[CountryInfo]:
+        """Convert a restcountries entry, or None if it lacks a name"""
+        name = entry.get("name") or {}
+        if not isinstance(name, dict) or not name.get("common"):
+            return None
+        names = {"common": name["common"], "official": name.get("official") or name["common"]}
+        korean = ((entry.get("translations") or {}).get("kor") or {}).get("common")
+        if korean:
+            names["korean"] = korean
+        return CountryInfo(
+            name=names,
+            population=int(entry.get("population") or 0),
+            capital=list(entry.get("capital") or []),
+            region=entry.get("region") or "",
+            area=float(entry.get("area") or 0),
+            flags=dict(entry.get("flags") or {}),
+            cca2=entry.get("cca2", ""),
+            cca3=entry.get("cca3", ""),
+        )
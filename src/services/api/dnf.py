@@ -1,10 +1,10 @@
 import logging
-import aiohttp
-from typing import Dict, Any, Optional, List, Tuple, Union, cast
+from typing import Dict, Any, Optional, List, Union, cast
 import asyncio
 import json
-from .base import BaseAPI
-import urllib.parse
+import time
+from .base import BaseAPI, RateLimitConfig
+from src.utils.cache import TTLCache
 import math
 
 logger = logging.getLogger(__name__)
@@ -26,15 +26,30 @@ class DNFAPI(BaseAPI[Dict[str, Any]]):
         "바칼": "bakal"
     }
     
+    # Static game data (items, skills) barely changes between patches
+    METADATA_CACHE_SIZE = 2048
+    METADATA_CACHE_TTL = 24 * 60 * 60
+    MAX_CONCURRENT_REQUESTS = 8
+
+    PROFILE_SECTIONS = ("basic", "status", "equipment", "avatar", "creature")
+
     def __init__(self, neople_api_key: str):
         super().__init__()
         self.neople_api_key = neople_api_key
         self._session = None
+        self._rate_limits = {
+            "neople": RateLimitConfig(100, 1),  # Conservative per-key budget
+        }
+        self._request_semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        self._metadata_cache: TTLCache[Dict[str, Any]] = TTLCache(
+            self.METADATA_CACHE_SIZE, self.METADATA_CACHE_TTL
+        )
+        self._request_metrics.register_cache("metadata", self._metadata_cache)
 
     async def initialize(self) -> None:
         """Initialize DNF API client"""
+        await super().initialize()
         self._initialized = True
-        self._session = aiohttp.ClientSession()
 
     async def validate_credentials(self) -> bool:
         """Validate API credentials"""
@@ -56,144 +71,140 @@ class DNFAPI(BaseAPI[Dict[str, Any]]):
                     return v
         return "all"
 
-    async def get_character_id(self, name: str, server: str) -> Optional[str]:
-        """Get character ID from API"""
-        try:
-            encoded_name = urllib.parse.quote(name)
-            url = f"{self.BASE_URL}/servers/{server}/characters"
-            params = {
-                "characterName": encoded_name,
-                "apikey": self.neople_api_key
-            }
-
-            async with self._session.get(url, params=params) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to get character ID: {response.status}")
-                    return None
+    async def _wait_for_rate_limit(self) -> None:
+        """Wait until the Neople rate limit has room for another request"""
+        config = self._rate_limits["neople"]
+        while True:
+            now = time.time()
+            timestamps = [
+                ts for ts in self._request_timestamps.get("neople", [])
+                if now - ts <= config.period
+            ]
+            self._request_timestamps["neople"] = timestamps
+            if len(timestamps) < config.requests:
+                return
+            await asyncio.sleep(max(self._calculate_wait_time("neople", now, config), 0.01))
+
+    async def _request(
+        self, path: str, description: str, params: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Make a rate limited Neople API request
 
-                data = await response.json()
-                if data.get("rows") and len(data["rows"]) > 0:
-                    return data["rows"][0]["characterId"]
-                return None
+        Args:
+            path: Path below BASE_URL
+            description: What is being fetched, for logging
+            params: Extra query parameters
 
+        Returns:
+            Optional[Dict[str, Any]]: Response data, or None on failure
+        """
+        query = dict(params or {})
+        query["apikey"] = self.neople_api_key
+        try:
+            async with self._request_semaphore:
+                await self._wait_for_rate_limit()
+                return await self._make_request(
+                    f"{self.BASE_URL}{path}",
+                    params=query,
+                    endpoint="neople"
+                )
         except Exception as e:
-            logger.error(f"Error getting character ID: {e}")
+            logger.error(f"Error getting {description}: {e}")
             return None
 
+    async def get_character_id(self, name: str, server: str) -> Optional[str]:
+        """Get character ID from API"""
+        data = await self._request(
+            f"/servers/{server}/characters",
+            "character ID",
+            {"characterName": name}  # aiohttp encodes query parameters
+        )
+        if data and data.get("rows"):
+            return data["rows"][0]["characterId"]
+        return None
+
     async def get_character_basic(self, server: str, character_id: str) -> Optional[Dict[str, Any]]:
         """Get character basic information"""
-        try:
-            url = f"{self.BASE_URL}/servers/{server}/characters/{character_id}"
-            params = {"apikey": self.neople_api_key}
-
-            async with self._session.get(url, params=params) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to get character basic info: {response.status}")
-                    return None
-                return await response.json()
-
-        except Exception as e:
-            logger.error(f"Error getting character basic info: {e}")
-            return None
+        return await self._request(
+            f"/servers/{server}/characters/{character_id}", "character basic info"
+        )
 
     async def get_character_status(self, server: str, character_id: str) -> Optional[Dict[str, Any]]:
         """Get character status (stats) information"""
-        try:
-            url = f"{self.BASE_URL}/servers/{server}/characters/{character_id}/status"
-            params = {"apikey": self.neople_api_key}
-
-            async with self._session.get(url, params=params) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to get character status: {response.status}")
-                    return None
-                return await response.json()
-
-        except Exception as e:
-            logger.error(f"Error getting character status: {e}")
-            return None
+        return await self._request(
+            f"/servers/{server}/characters/{character_id}/status", "character status"
+        )
 
     async def get_character_equipment(self, server: str, character_id: str) -> Optional[Dict[str, Any]]:
         """Get character equipment information"""
-        try:
-            url = f"{self.BASE_URL}/servers/{server}/characters/{character_id}/equipment"
-            params = {"apikey": self.neople_api_key}
-
-            async with self._session.get(url, params=params) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to get character equipment: {response.status}")
-                    return None
-                return await response.json()
-
-        except Exception as e:
-            logger.error(f"Error getting character equipment: {e}")
-            return None
+        return await self._request(
+            f"/servers/{server}/characters/{character_id}/equipment", "character equipment"
+        )
 
     async def get_character_avatar(self, server: str, character_id: str) -> Optional[Dict[str, Any]]:
         """Get character avatar information"""
-        try:
-            url = f"{self.BASE_URL}/servers/{server}/characters/{character_id}/avatar"
-            params = {"apikey": self.neople_api_key}
-
-            async with self._session.get(url, params=params) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to get character avatar: {response.status}")
-                    return None
-                return await response.json()
-
-        except Exception as e:
-            logger.error(f"Error getting character avatar: {e}")
-            return None
+        return await self._request(
+            f"/servers/{server}/characters/{character_id}/avatar", "character avatar"
+        )
 
     async def get_character_creature(self, server: str, character_id: str) -> Optional[Dict[str, Any]]:
         """Get character creature information"""
-        try:
-            url = f"{self.BASE_URL}/servers/{server}/characters/{character_id}/creature"
-            params = {"apikey": self.neople_api_key}
+        return await self._request(
+            f"/servers/{server}/characters/{character_id}/creature", "character creature"
+        )
 
-            async with self._session.get(url, params=params) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to get character creature: {response.status}")
-                    return None
-                return await response.json()
+    async def get_character_profile(
+        self, server: str, character_id: str
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Get every character section concurrently
 
-        except Exception as e:
-            logger.error(f"Error getting character creature: {e}")
-            return None
+        All sections are requested at once, so a full character card costs a
+        single round-trip of latency instead of one per section.
 
-    async def get_skill_info(self, job_id: str, job_grow_id: str) -> Optional[Dict[str, Any]]:
-        """Get character skill information"""
-        try:
-            url = f"{self.BASE_URL}/skills/{job_id}"
-            params = {
-                "jobGrowId": job_grow_id,
-                "apikey": self.neople_api_key
-            }
+        Args:
+            server: Normalized server name
+            character_id: Neople character ID
 
-            async with self._session.get(url, params=params) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to get skill info: {response.status}")
-                    return None
-                return await response.json()
+        Returns:
+            Dict[str, Optional[Dict[str, Any]]]: Section name to data (None for failed sections)
+        """
+        fetchers = (
+            self.get_character_basic,
+            self.get_character_status,
+            self.get_character_equipment,
+            self.get_character_avatar,
+            self.get_character_creature,
+        )
+        results = await asyncio.gather(
+            *(fetch(server, character_id) for fetch in fetchers)
+        )
+        return dict(zip(self.PROFILE_SECTIONS, results))
 
-        except Exception as e:
-            logger.error(f"Error getting skill info: {e}")
-            return None
+    async def get_skill_info(self, job_id: str, job_grow_id: str) -> Optional[Dict[str, Any]]:
+        """Get character skill information (cached)"""
+        key = ("skill", job_id, job_grow_id)
+        cached = self._metadata_cache.get(key)
+        if cached is not None:
+            return cached
+
+        data = await self._request(
+            f"/skills/{job_id}", "skill info", {"jobGrowId": job_grow_id}
+        )
+        if data is not None:
+            self._metadata_cache.set(key, data)
+        return data
 
     async def get_item_info(self, item_id: str) -> Optional[Dict[str, Any]]:
-        """Get item detailed information"""
-        try:
-            url = f"{self.BASE_URL}/items/{item_id}"
-            params = {"apikey": self.neople_api_key}
+        """Get item detailed information (cached)"""
+        key = ("item", item_id)
+        cached = self._metadata_cache.get(key)
+        if cached is not None:
+            return cached
 
-            async with self._session.get(url, params=params) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to get item info: {response.status}")
-                    return None
-                return await response.json()
-
-        except Exception as e:
-            logger.error(f"Error getting item info: {e}")
-            return None
+        data = await self._request(f"/items/{item_id}", "item info")
+        if data is not None:
+            self._metadata_cache.set(key, data)
+        return data
 
     def _calculate_base_stats(self, status: Dict[str, Any]) -> Dict[str, float]:
         """Calculate base stats from character status
@@ -444,22 +455,32 @@ class DNFAPI(BaseAPI[Dict[str, Any]]):
             return {"error": f"Failed to calculate damage: {str(e)}"}
 
     async def search_character(self, name: str, server: str = "all") -> Optional[Dict[str, Any]]:
-        """Search for a character by name and server
+        """Search for a character by name and fetch its profile
         
         Args:
             name: Character name to search for
             server: Server name (defaults to all servers)
             
         Returns:
-            Optional[Dict[str, Any]]: Character information if found
-            
-        Raises:
-            ValueError: If the feature is currently disabled
+            Optional[Dict[str, Any]]: "server" and the profile sections, or None if not found
         """
-        raise ValueError("던전앤파이터 캐릭터 검색 기능이 현재 비활성화되어 있습니다. 추후 업데이트 예정입니다.")
+        data = await self._request(
+            f"/servers/{self._normalize_server_name(server)}/characters",
+            "character search",
+            {"characterName": name}
+        )
+        rows = data.get("rows") if data else None
+        if not rows:
+            return None
+
+        # Searching all servers reports the server each character lives on
+        server_id = rows[0]["serverId"]
+        profile = await self.get_character_profile(server_id, rows[0]["characterId"])
+        if not profile.get("basic"):
+            return None
+        return {"server": server_id, **profile}
 
     async def close(self) -> None:
         """Cleanup resources"""
-        if self._session:
-            await self._session.close()
+        self._metadata_cache.clear()
         await super().close() 
\ No newline at end of file
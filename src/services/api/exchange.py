@@ -1,12 +1,17 @@
-import logging
-from typing import Dict, Optional, List, cast
 import asyncio
+import logging
+import time
+from datetime import date
+from typing import Dict, List, Mapping, Optional, Tuple, cast
+
+import numpy as np
 
 from .base import BaseAPI, RateLimitConfig
-from src.utils.api_types import ExchangeRates
+from src.services.exchange_history import ExchangeHistoryStore, RatePoint
 
 logger = logging.getLogger(__name__)
 
+BASE_CURRENCY = "KRW"
 # Supported currencies
 SUPPORTED_CURRENCIES: List[str] = [
     "USD",  # US Dollar
@@ -25,22 +30,109 @@ SUPPORTED_CURRENCIES: List[str] = [
 API_URL = "https://open.er-api.com/v6/latest/KRW"
 
 
+class RateMatrix:
+    """Cross rates between KRW and the supported currencies
+
+    ``matrix[i, j]`` is the amount of currency j that one unit of currency i
+    buys. The matrix is derived from each currency's KRW rate once per
+    refresh, so any-to-any conversion is a single array lookup.
+
+    Attributes:
+        currencies (Tuple[str, ...]): Currency of each row and column, KRW first
+        matrix (np.ndarray): Read-only cross-rate matrix
+        fetched_at (float): Unix time the rates were fetched
+    """
+
+    def __init__(self, krw_per_unit: Mapping[str, float], fetched_at: float) -> None:
+        """Build the matrix
+
+        Args:
+            krw_per_unit: Currency code -> KRW per unit of that currency
+            fetched_at: Unix time the rates were fetched
+        """
+        self.currencies: Tuple[str, ...] = (BASE_CURRENCY, *sorted(krw_per_unit))
+        self._index = {currency: i for i, currency in enumerate(self.currencies)}
+        values = np.array([1.0] + [krw_per_unit[c] for c in self.currencies[1:]], dtype=np.float64)
+        self.matrix = values[:, np.newaxis] / values[np.newaxis, :]
+        self.matrix.setflags(write=False)
+        self.fetched_at = fetched_at
+
+    def rate(self, source: str, target: str) -> float:
+        """Get units of ``target`` per unit of ``source``
+
+        Raises:
+            ValueError: If either currency is not supported
+        """
+        return float(self.matrix[self._position(source), self._position(target)])
+
+    def convert(self, amount: float, source: str, target: str) -> float:
+        """Convert an amount between two currencies
+
+        Raises:
+            ValueError: If either currency is not supported
+        """
+        return amount * self.rate(source, target)
+
+    def krw_rates(self) -> Dict[str, float]:
+        """Get KRW per unit of every supported currency"""
+        return {currency: float(self.matrix[i, 0]) for i, currency in enumerate(self.currencies) if i}
+
+    def _position(self, currency: str) -> int:
+        position = self._index.get(currency.upper())
+        if position is None:
+            raise ValueError(f"지원하지 않는 통화인 것 같아: {currency}")
+        return position
+
+
 class ExchangeAPI(BaseAPI[Dict[str, float]]):
-    """Exchange rate API client implementation"""
+    """Exchange rate API client implementation
+
+    Rates are fetched once during initialization and then refreshed in the
+    background, so commands read the current rate matrix without waiting
+    on the network. Each refresh also updates the day's entry in the rate
+    history used for trend queries.
+    """
 
     EXCHANGE_URL = "https://api.exchangerate-api.com/v4/latest/KRW"
+    REFRESH_INTERVAL = 3600  # The source publishes new rates daily
+    RETRY_INTERVAL = 300  # Seconds before retrying a failed refresh
 
-    def __init__(self) -> None:
-        """Initialize Exchange API client"""
+    def __init__(
+        self,
+        history_store: Optional[ExchangeHistoryStore] = None,
+        refresh_interval: int = REFRESH_INTERVAL,
+    ) -> None:
+        """Initialize Exchange API client
+
+        Args:
+            history_store: Store for daily rates (created lazily if omitted)
+            refresh_interval: Seconds between background refreshes
+        """
         super().__init__("")  # Exchange API doesn't need an API key
         self._rate_limits = {
             "exchange": RateLimitConfig(60, 60),  # 60 requests per minute
         }
-        self._cached_rates: Optional[Dict[str, float]] = None
+        self._rates: Optional[RateMatrix] = None
         self._supported_currencies = set(SUPPORTED_CURRENCIES)
+        self._history_store = history_store
+        self._refresh_interval = refresh_interval
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._last_compaction: Optional[date] = None
+
+    @property
+    def history_store(self) -> ExchangeHistoryStore:
+        """Get exchange history store, creating it on first use"""
+        if self._history_store is None:
+            self._history_store = ExchangeHistoryStore()
+        return self._history_store
+
+    @property
+    def rate_matrix(self) -> Optional[RateMatrix]:
+        """Get the current cross-rate matrix, or None before the first fetch"""
+        return self._rates
 
     async def initialize(self) -> None:
-        """Initialize Exchange API resources"""
+        """Initialize Exchange API resources and start the background refresh"""
         try:
             logger.info("Initializing Exchange API...")
             
@@ -50,7 +142,7 @@ class ExchangeAPI(BaseAPI[Dict[str, float]]):
             if not self._session:
                 raise ValueError("Session not initialized")
                 
-            # Test API access during initialization with retry
+            # Fetch the first rates during initialization with retry
             max_retries = 3
             retry_delay = 1.0
             last_error = None
@@ -58,24 +150,10 @@ class ExchangeAPI(BaseAPI[Dict[str, float]]):
             for attempt in range(max_retries):
                 try:
                     logger.debug(f"Exchange API initialization attempt {attempt + 1}/{max_retries}")
-                    data = await self._make_request(
-                        self.EXCHANGE_URL,
-                        endpoint="exchange"
-                    )
-                    
-                    if not isinstance(data, dict) or 'rates' not in data:
-                        raise ValueError("Invalid API response format")
-                    
-                    # Cache initial rates
-                    self._cached_rates = {
-                        curr: rate for curr, rate in data['rates'].items()
-                        if curr in self._supported_currencies
-                    }
-                    
-                    if not self._cached_rates:
-                        raise ValueError("No supported currencies found in API response")
-                    
-                    logger.info(f"Exchange API initialized successfully with {len(self._cached_rates)} currencies")
+                    rates = await self.refresh()
+                    logger.info(f"Exchange API initialized successfully with {len(rates.currencies) - 1} currencies")
+                    if self._refresh_task is None or self._refresh_task.done():
+                        self._refresh_task = asyncio.create_task(self._refresh_loop())
                     return
                     
                 except Exception as e:
@@ -99,6 +177,63 @@ class ExchangeAPI(BaseAPI[Dict[str, float]]):
             await self.close()
             raise ValueError(f"Exchange API initialization failed: {str(e)}") from e
 
+    async def _refresh_loop(self) -> None:
+        """Refresh rates until cancelled"""
+        delay = self._refresh_interval
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+                delay = self._refresh_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep serving the previous rates and retry sooner
+                logger.error(f"Error refreshing exchange rates: {e}")
+                delay = min(self.RETRY_INTERVAL, self._refresh_interval)
+
+    async def refresh(self) -> RateMatrix:
+        """Fetch the latest rates, rebuild the rate matrix and record the day's rates
+
+        Returns:
+            RateMatrix: The new rate matrix
+
+        Raises:
+            ValueError: If the request fails or the response is invalid
+        """
+        data = await self._make_request(
+            self.EXCHANGE_URL,
+            endpoint="exchange"
+        )
+
+        if not isinstance(data, dict) or 'rates' not in data:
+            raise ValueError("Invalid API response format")
+
+        rates = cast(Dict[str, float], data['rates'])
+        self._validate_rates(rates)
+        filtered_rates = self._filter_supported_rates(rates)
+        if not filtered_rates:
+            raise ValueError("No supported currencies found in API response")
+
+        # The API quotes foreign units per KRW; store KRW per foreign unit
+        matrix = RateMatrix(
+            {currency: 1 / rate for currency, rate in filtered_rates.items()},
+            time.time(),
+        )
+        self._rates = matrix
+
+        try:
+            store = self.history_store
+            await asyncio.to_thread(store.record, matrix.krw_rates())
+            today = date.today()
+            if self._last_compaction != today:
+                await asyncio.to_thread(store.compact, today)
+                self._last_compaction = today
+        except Exception as e:
+            logger.error(f"Failed to record exchange rate history: {e}")
+
+        return matrix
+
     async def validate_credentials(self) -> bool:
         """Validate API access (no credentials needed)
         
@@ -106,8 +241,8 @@ class ExchangeAPI(BaseAPI[Dict[str, float]]):
             bool: True if API is accessible
         """
         try:
-            # If we have cached rates from initialization, we're already validated
-            if self._cached_rates:
+            # If we have rates from initialization, we're already validated
+            if self._rates is not None:
                 logger.debug("Exchange API validated using cached rates")
                 return True
                 
@@ -121,46 +256,66 @@ class ExchangeAPI(BaseAPI[Dict[str, float]]):
 
     async def get_exchange_rates(self) -> Dict[str, float]:
         """Get current exchange rates
+
+        Served from the background-refreshed rates; the network is only
+        used when no rates were fetched yet.
         
         Returns:
-            Dict[str, float]: Exchange rates with currency codes as keys
+            Dict[str, float]: KRW per unit of each supported currency
 
         Raises:
-            ValueError: If API request fails or response is invalid
+            ValueError: If no rates are available and fetching them fails
         """
-        try:
-            data = await self._make_request(
-                self.EXCHANGE_URL,
-                endpoint="exchange"
-            )
+        return (await self._current_rates()).krw_rates()
 
-            if not isinstance(data, dict) or 'rates' not in data:
-                raise ValueError("Invalid response format")
+    async def convert(self, amount: float, source: str, target: str) -> float:
+        """Convert an amount between KRW and supported currencies in any direction
 
-            rates = cast(Dict[str, float], data['rates'])
-            
-            # Validate rates
-            self._validate_rates(rates)
-            
-            # Filter to supported currencies only
-            filtered_rates = self._filter_supported_rates(rates)
-            
-            # Cache the rates
-            self._cached_rates = filtered_rates
-            
-            return filtered_rates
+        Args:
+            amount: Amount in the source currency
+            source: Source currency code
+            target: Target currency code
 
-        except ValueError as e:
-            logger.error(f"Exchange API error: {e}")
-            if self._cached_rates:
-                logger.info("Using cached exchange rates")
-                return self._cached_rates
-            raise ValueError("환율 정보를 가져오는데 실패했습니다") from e
+        Returns:
+            float: Amount in the target currency
+
+        Raises:
+            ValueError: If a currency is not supported or no rates are available
+        """
+        return (await self._current_rates()).convert(amount, source, target)
+
+    async def get_rate_history(self, currency: str, days: int = 30) -> List[RatePoint]:
+        """Get a currency's daily KRW rates
+
+        Args:
+            currency: Currency code
+            days: Size of the window in days
+
+        Returns:
+            List[RatePoint]: (ISO date, KRW per unit) pairs in ascending order
+        """
+        return await asyncio.to_thread(self.history_store.get_history, currency.upper(), days)
+
+    async def get_rate_change(self, currency: str, days: int = 7) -> Optional[float]:
+        """Get a currency's KRW rate change in percent over a window
+
+        Args:
+            currency: Currency code
+            days: Size of the window in days
+
+        Returns:
+            Optional[float]: Percent change, or None with fewer than two days of history
+        """
+        return await asyncio.to_thread(self.history_store.get_change, currency.upper(), days)
+
+    async def _current_rates(self) -> RateMatrix:
+        """Get the rate matrix, fetching it only if none exists yet"""
+        if self._rates is not None:
+            return self._rates
+        try:
+            return await self.refresh()
         except Exception as e:
-            logger.error(f"Unexpected error getting exchange rates: {e}")
-            if self._cached_rates:
-                logger.info("Using cached exchange rates")
-                return self._cached_rates
+            logger.error(f"Exchange API error: {e}")
             raise ValueError("환율 정보를 가져오는데 실패했습니다") from e
 
     def _validate_rates(self, rates: Dict[str, float]) -> None:
@@ -217,4 +372,14 @@ class ExchangeAPI(BaseAPI[Dict[str, float]]):
 
     async def close(self) -> None:
         """Cleanup resources"""
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+        self._refresh_task = None
+        if self._history_store is not None:
+            self._history_store.close()
+            self._history_store = None
         await super().close()
@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
 from datetime import datetime, timedelta
 import os
 import json
@@ -10,15 +10,21 @@ from urllib.parse import urlparse
 import google.genai as genai
 from google.genai.types import SafetySetting, GenerateContentConfig, HttpOptions, Tool, GoogleSearch
 from .base import BaseAPI, RateLimitConfig
-import psutil
+from .chat_backend import ChatBackend
+from .text_pipeline import EMPTY_RESPONSE, ResponseFormatter, format_sources
+from .session_store import SessionExpiryQueue
+from src.services.system_monitor import HealthSnapshot, get_system_monitor
 import asyncio
 import discord
+import weakref
 
 logger = logging.getLogger(__name__)
 
-class GeminiAPI(BaseAPI[str]):
+class GeminiAPI(BaseAPI[str], ChatBackend):
     """Google Gemini API client implementation for text-only interactions"""
 
+    backend_name = "gemini"
+
     # Token thresholds for Gemini Pro
     MAX_TOTAL_TOKENS = 32000  # Maximum total tokens (prompt + response) per interaction
     MAX_PROMPT_TOKENS = 8000  # Maximum tokens for user input (reduced for typical Korean chat)
@@ -47,6 +53,7 @@ class GeminiAPI(BaseAPI[str]):
     # Context history settings
     MAX_HISTORY_LENGTH = 10  # Maximum number of messages to keep in history
     CONTEXT_EXPIRY_MINUTES = 30  # Time until context expires
+    SESSION_SWEEP_INTERVAL = 60  # Seconds between background sweeps of expired sessions
     MUELSYSE_CONTEXT = """You are Muelsyse(뮤엘시스), Director of the Ecological Section at Rhine Lab, an operator from Arknights (명일방주). [Arknights is a tower defense mobile game; Muelsyse is a character known for her cheerful personality, and ecological expertise.]
 
 • Character: Cheerful, curious, and enthusiastic, especially about ecological science and experiments. Possesses a sharp intellect and strategic mind, sometimes showing a mischievous or playful teasing side. Deeply connected to water and nature, showing moments of reflection and a long-term perspective. Can be caring in a unique, sometimes slightly demanding way. Enjoys sweets. Nicknamed "MuMu" by Ifrit.
@@ -79,6 +86,11 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         self._model = None
         self._chat_sessions: Dict[int, genai.ChatSession] = {}
         self._last_interaction: Dict[int, datetime] = {}
+        self._session_expiry = SessionExpiryQueue(self.CONTEXT_EXPIRY_MINUTES * 60)
+        self._session_sweeper: Optional[asyncio.Task] = None
+        self._session_expiry_listeners: List[Callable[[int], None]] = []
+        # Held for the length of each user's turn so the sweeper leaves the session alone
+        self._session_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
         self._rate_limits = {
             "generate": RateLimitConfig(self.REQUESTS_PER_MINUTE, 60),
         }
@@ -118,12 +130,8 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         self._recent_errors: List[datetime] = []
         self._error_count = 0
         
-        # Add performance tracking with non-blocking CPU check
-        self._cpu_usage = 0
-        self._memory_usage = 0
-        self._last_performance_check = datetime.now()
-        self._cpu_check_task = None
-        self._is_cpu_check_running = False
+        # System resources are sampled by the shared background monitor
+        self._system_monitor = get_system_monitor()
 
         # Add notification channel and cooldown tracking
         self._last_notification_time: Dict[str, datetime] = {}  # Track last notification time per type
@@ -242,7 +250,9 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             top_p=1,
             top_k=40,
             max_output_tokens=self.MAX_TOTAL_TOKENS - self.MAX_PROMPT_TOKENS,
-            tools=[self._google_search_tool]  # Add the Google Search tool to the generation config
+            tools=[self._google_search_tool],  # Add the Google Search tool to the generation config
+            # Persona goes in the system instruction, so new sessions need no priming round-trip
+            system_instruction=self.MUELSYSE_CONTEXT
         )
         
         # Test the API connection
@@ -257,6 +267,12 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         # Initialize chat history
         self._chat_sessions = {}
         self._last_interaction = {}
+        self._session_expiry.clear()
+        if self._session_sweeper is None or self._session_sweeper.done():
+            self._session_sweeper = asyncio.create_task(self._session_sweep_loop())
+        
+        # Receive system health samples in the background
+        self._system_monitor.subscribe(self._check_system_health)
 
     async def _count_tokens(self, text: str) -> int:
         """Count tokens in text using Gemini API
@@ -535,52 +551,41 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             cooldown_minutes=30  # Longer cooldown for state changes
         )
 
-    async def _update_cpu_usage(self) -> None:
-        """Update CPU usage in a non-blocking way"""
-        if self._is_cpu_check_running:
-            return
-            
-        try:
-            self._is_cpu_check_running = True
-            self._cpu_usage = await asyncio.to_thread(psutil.cpu_percent, interval=1)
-        except Exception as e:
-            logger.error(f"Error updating CPU usage: {e}")
-        finally:
-            self._is_cpu_check_running = False
+    @property
+    def _cpu_usage(self) -> float:
+        """Latest CPU usage published by the system monitor"""
+        return self._system_monitor.snapshot.cpu_percent
 
-    async def _check_system_health(self) -> None:
-        """Check system health and update degradation state"""
-        current_time = datetime.now()
+    @property
+    def _memory_usage(self) -> float:
+        """Latest memory usage published by the system monitor"""
+        return self._system_monitor.snapshot.memory_percent
+
+    async def _check_system_health(self, snapshot: Optional[HealthSnapshot] = None) -> None:
+        """Update degradation state from a system health sample
         
-        # Only check every minute
-        if (current_time - self._last_performance_check).total_seconds() < 60:
-            return
+        Runs as a system monitor listener, off the request path.
+        
+        Args:
+            snapshot: Sample to evaluate (defaults to the latest one)
+        """
+        snapshot = snapshot or self._system_monitor.snapshot
+        current_time = datetime.now()
             
         try:
-            # Start CPU check in background if not already running
-            if not self._is_cpu_check_running:
-                asyncio.create_task(self._update_cpu_usage())
-            
-            # Get memory metrics (fast, non-blocking call)
-            memory = psutil.virtual_memory()
-            memory_percent = memory.percent
+            memory_percent = snapshot.memory_percent
             
-            self._memory_usage = memory_percent
-            self._last_performance_check = current_time
-            
-            # Log system metrics at debug level with more detail
-            logger.info(
+            logger.debug(
                 f"System metrics:\n"
-                f"- CPU Usage: {self._cpu_usage:.1f}%\n"
-                f"- Memory Usage: {memory_percent:.1f}% ({memory.used / 1024 / 1024:.0f}MB / {memory.total / 1024 / 1024:.0f}MB)\n"
-                f"- Available Memory: {memory.available / 1024 / 1024:.0f}MB\n"
-                f"- Cached Memory: {memory.cached / 1024 / 1024:.0f}MB"
+                f"- CPU Usage: {snapshot.cpu_percent:.1f}%\n"
+                f"- Memory Usage: {memory_percent:.1f}% of {snapshot.memory_total / 1024 / 1024:.0f}MB\n"
+                f"- Available Memory: {snapshot.memory_available / 1024 / 1024:.0f}MB"
             )
             
             # Add warning if memory is getting low
-            if memory.available < 1024 * 1024 * 1024:  # Less than 1GB available
+            if snapshot.memory_total and snapshot.memory_available < 1024 * 1024 * 1024:  # Less than 1GB available
                 logger.warning(
-                    f"Low memory warning: Only {memory.available / 1024 / 1024:.0f}MB available"
+                    f"Low memory warning: Only {snapshot.memory_available / 1024 / 1024:.0f}MB available"
                 )
             
             # Check if we should exit slowdown
@@ -703,162 +708,57 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         Returns:
             str: Processed response
         """
-        # Remove any leading/trailing whitespace
-        response = response.strip()
-        
-        # If response has search grounding, apply minimal formatting
-        if search_used:
-            # Only perform whitespace normalization and fix any broken code blocks
-            # Do not modify or intersperse content with the grounded results
-            lines = response.split('\n')
-            processed_lines = []
-            in_code_block = False
-            
-            for line in lines:
-                # Check for code block markers to ensure they're properly formatted
-                if '```' in line:
-                    in_code_block = not in_code_block
-                    # Ensure language is specified for code blocks
-                    if in_code_block and line.strip() == '```':
-                        line = '```text'
-                processed_lines.append(line)
-            
-            # Join lines with original spacing preserved
-            return '\n'.join(processed_lines)
-        
-        # For non-search grounded responses, continue with normal formatting
-        # Process search grounding citations if present
-        citation_pattern = r'\[\d+\]'
-        has_citations = bool(re.search(citation_pattern, response))
-        
-        # If citations are present, format them for better readability
-        if has_citations:
-            # Add a separator before citations section if not already present
-            if "\nSources:" not in response and "\n출처:" not in response:
-                # Find the last citation reference
-                last_citation_match = list(re.finditer(citation_pattern, response))
-                if last_citation_match:
-                    last_pos = last_citation_match[-1].end()
-                    # Add sources section if it doesn't exist
-                    if "Sources:" not in response[last_pos:] and "출처:" not in response[last_pos:]:
-                        response += "\n\n**Sources:**"
-        
-        # Convert HTML-style tags to Discord-friendly format
-        # Handle subscripts and superscripts
-        while '<sub>' in response and '</sub>' in response:
-            start = response.find('<sub>')
-            end = response.find('</sub>') + 6
-            sub_text = response[start + 5:end - 6]
-            response = response[:start] + '_' + sub_text + '_' + response[end:]
-            
-        while '<sup>' in response and '</sup>' in response:
-            start = response.find('<sup>')
-            end = response.find('</sup>') + 6
-            sup_text = response[start + 5:end - 6]
-            response = response[:start] + '^' + sup_text + response[end:]
-        
-        # Process code blocks to ensure proper Discord formatting
-        lines = response.split('\n')
-        in_code_block = False
-        processed_lines = []
-        
-        for line in lines:
-            # Skip empty lines
-            if not line.strip():
-                continue
-                
-            # Check for code block markers
-            if '```' in line:
-                in_code_block = not in_code_block
-                # Ensure language is specified for code blocks
-                if in_code_block and line.strip() == '```':
-                    line = '```text'
-                processed_lines.append(line)
-                continue
-            
-            if in_code_block:
-                # Don't modify content inside code blocks
-                processed_lines.append(line)
-            else:
-                # Process normal text lines
-                line = line.strip()
-                if line:
-                    # Add emojis to enhance readability
-                    if line.endswith('?'):
-                        line = '❓ ' + line
-                    elif line.startswith(('Note:', 'Warning:', '주의:', '참고:')):
-                        line = '📝 ' + line
-                    elif line.startswith(('Error:', '오류:', '에러:')):
-                        line = '⚠️ ' + line
-                    elif line.startswith(('Example:', '예시:', '예:')):
-                        line = '💡 ' + line
-                    elif line.startswith(('Step', '단계')):
-                        line = '✅ ' + line
-                    
-                    # Format lists consistently
-                    if line.startswith(('- ', '* ')):
-                        line = '• ' + line[2:]
-                    
-                    processed_lines.append(line)
-        
-        # Join lines with proper spacing
-        response = '\n'.join(processed_lines)
-        
-        # Replace multiple newlines with just two
-        response = '\n\n'.join(filter(None, response.split('\n')))
+        if not response or not response.strip():
+            return EMPTY_RESPONSE
+
+        # Grounded replies only get fence and whitespace fixes so results aren't altered
+        formatter = ResponseFormatter(
+            minimal=search_used,
+            decorate=True,
+            spaced=True,
+            mark_sources=not search_used,
+        )
+        response = formatter.format(response)
         
         # Add disclaimer for AI-generated content if response is long
-        if len(response) > 1000:
+        if not search_used and len(response) > 1000:
             response += "\n\n_이 답변은 AI가 생성한 내용이야. 정확성을 직접 확인해줘._"
         
         return response
 
-    def _extract_sources(self, response, source_links):
-        """Extract source links for a button-based display
-        
-        Args:
-            response: The original response object
-            source_links: List of (title, uri, domain) tuples
-            
-        Returns:
-            str: Formatted sources text
-        """
-        if not source_links:
-            return "No sources available"
-            
-        sources_text = "**Sources:**\n\n"
-        for i, (title, uri, domain) in enumerate(source_links):
-            sources_text += f"{i+1}. **[{title}]({uri})**\n   {domain}\n\n"
-        
-        return sources_text
-
-    async def chat(self, prompt: str, user_id: int) -> Tuple[str, Optional[str]]:
+    async def chat(
+        self,
+        prompt: str,
+        user_id: int,
+        on_text: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> Tuple[str, Optional[str], Optional[str]]:
         """Send a chat message to Gemini
         
         Args:
             prompt: The user's message (text only)
             user_id: Discord user ID
+            on_text: Accepted for the ChatBackend interface; Gemini replies are not streamed
 
         Returns:
-            Tuple[str, Optional[str]]: (Gemini's response, Source links if available)
+            Tuple[str, Optional[str], Optional[str]]: (Gemini's response, Source links if available, None)
 
         Raises:
             ValueError: If the request fails or limits are exceeded
         """
+        async with self._session_lock(user_id):
+            return await self._chat(prompt, user_id)
+
+    async def _chat(self, prompt: str, user_id: int) -> Tuple[str, Optional[str], Optional[str]]:
+        """Run one chat turn while holding the user's session lock (see chat)"""
         try:
-            # Check system health
-            await self._check_system_health()
-            
-            # Check if service is enabled
+            # Check if service is enabled (health state is updated by the system monitor)
             if not self._is_enabled:
                 raise ValueError(
                     "AI 서비스가 일시적으로 비활성화되었어. "
                     f"약 {self.DISABLE_COOLDOWN_MINUTES}분 후에 다시 시도해줄래?"
                 )
             
-            # Apply slowdown if needed
-            if self._is_slowed_down:
-                await asyncio.sleep(5)  # Add 5 second delay
+            # Slowdown is applied by the AI request scheduler, which runs fewer requests at once
             
             # Check if client is initialized
             if not self._client:
@@ -871,14 +771,12 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             prompt_tokens = await self._count_tokens(prompt)
             self._check_token_thresholds(prompt_tokens)
 
-            # Clean up expired sessions
-            self._cleanup_expired_sessions()
-
-            # Get or create chat session
+            # Get or create chat session (expired sessions are swept in the background)
             chat = await self._get_or_create_chat_session(user_id)
 
             # Send message and get response using sync chat
-            response = await chat.send_message(prompt)
+            async with self._request_metrics.measure("send_message"):
+                response = await chat.send_message(prompt)
 
             # Update last interaction time
             self._update_last_interaction(user_id)
@@ -1116,7 +1014,7 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             # Source links will be handled separately with a button
             source_content = None
             if source_links:
-                source_content = self._extract_sources(response, source_links)
+                source_content = format_sources(source_links, limit=None)
                 logger.info(f"Extracted {len(source_links)} source links for button display")
             
             # Always add search suggestions if available (not just as fallback)
@@ -1140,7 +1038,7 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             # Track usage
             await self._track_request(prompt, processed_response)
 
-            return (processed_response, source_content)
+            return (processed_response, source_content, None)
             
         except Exception as e:
             # Track error for degradation
@@ -1248,6 +1146,12 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             
         return "\n".join(report)
 
+    @property
+    def budget_remaining(self) -> float:
+        """Share of the daily token budget still available (0-1)"""
+        used = self._total_prompt_tokens + self._total_response_tokens
+        return max(0.0, 1 - used / self.DAILY_TOKEN_LIMIT)
+
     @property
     def health_status(self) -> Dict[str, Any]:
         """Get current health status
@@ -1263,6 +1167,7 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             "error_count": self._error_count,
             "cpu_usage": self._cpu_usage,
             "memory_usage": self._memory_usage,
+            "system_sampled_at": self._system_monitor.snapshot.sampled_at,
             "time_until_slowdown_reset": (
                 None if not self._last_slowdown else
                 max(0, self.SLOWDOWN_COOLDOWN_MINUTES * 60 - 
@@ -1281,6 +1186,16 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             # Save final usage data
             await self._save_usage_data()
             
+            await self._system_monitor.unsubscribe(self._check_system_health)
+            
+            if self._session_sweeper and not self._session_sweeper.done():
+                self._session_sweeper.cancel()
+                try:
+                    await self._session_sweeper
+                except asyncio.CancelledError:
+                    pass
+            self._session_sweeper = None
+            
             self._client = None
             await super().close()
         except Exception as e:
@@ -1327,6 +1242,7 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         Returns:
             bool: True if session was ended, False if no session existed
         """
+        self._session_expiry.discard(user_id)
         if user_id in self._chat_sessions:
             del self._chat_sessions[user_id]
             if user_id in self._last_interaction:
@@ -1345,25 +1261,32 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
         """
         current_time = datetime.now()
         
-        # Check if existing session has expired
-        if user_id in self._chat_sessions and user_id in self._last_interaction:
-            last_time = self._last_interaction[user_id]
-            if (current_time - last_time).total_seconds() < self.CONTEXT_EXPIRY_MINUTES * 60:
-                return self._chat_sessions[user_id]
+        # Check if existing session has expired (it may not have been swept yet)
+        if user_id in self._chat_sessions and not self._session_expiry.is_expired(user_id):
+            # Push the deadline back now, not only after the reply, so a long turn isn't swept
+            self._session_expiry.touch(user_id)
+            return self._chat_sessions[user_id]
         
-        # Create new chat session with search grounding enabled via generation_config
+        # Create new chat session with search grounding enabled via generation_config.
+        # The config carries the persona as system_instruction, so creating a
+        # session is local and the user's first message is the only model call.
         chat = self._client.aio.chats.create(
             model='gemini-2.5-pro-preview-05-06',
-            config=self._generation_config  # This already includes the tools configuration
+            config=self._generation_config  # Includes the tools and system instruction
         )
         
-        # Add role context with proper formatting - combined with search instructions
-        await chat.send_message(self.MUELSYSE_CONTEXT)
-        
         self._chat_sessions[user_id] = chat
         self._last_interaction[user_id] = current_time
+        self._session_expiry.touch(user_id)
         return chat
 
+    def _session_lock(self, user_id: int) -> asyncio.Lock:
+        """Get the lock held during a user's chat turn"""
+        lock = self._session_locks.get(user_id)
+        if lock is None:
+            lock = self._session_locks[user_id] = asyncio.Lock()
+        return lock
+
     def _update_last_interaction(self, user_id: int) -> None:
         """Update last interaction time for user
         
@@ -1371,17 +1294,42 @@ Please maintain your core personality: cheerful, curious, scientifically inquisi
             user_id: Discord user ID
         """
         self._last_interaction[user_id] = datetime.now()
+        self._session_expiry.touch(user_id)
+
+    def add_session_expiry_listener(self, callback: Callable[[int], None]) -> None:
+        """Register a callback run with the user ID of each expired session
+        
+        Args:
+            callback: Function releasing per-user state
+        """
+        if callback not in self._session_expiry_listeners:
+            self._session_expiry_listeners.append(callback)
+
+    async def _session_sweep_loop(self) -> None:
+        """Sweep expired chat sessions until cancelled"""
+        while True:
+            await asyncio.sleep(self.SESSION_SWEEP_INTERVAL)
+            try:
+                self._cleanup_expired_sessions()
+            except Exception as e:
+                logger.error(f"Error sweeping expired Gemini chat sessions: {e}")
 
     def _cleanup_expired_sessions(self) -> None:
-        """Clean up expired chat sessions"""
-        current_time = datetime.now()
-        expired_users = [
-            user_id for user_id, last_time in self._last_interaction.items()
-            if (current_time - last_time).total_seconds() >= self.CONTEXT_EXPIRY_MINUTES * 60
-        ]
+        """Clean up chat sessions whose expiry deadline has passed"""
+        expired_users = self._session_expiry.pop_expired()
         
         for user_id in expired_users:
+            lock = self._session_locks.get(user_id)
+            if lock is not None and lock.locked():
+                # A turn is still running on this session; it expires from its new deadline
+                self._session_expiry.touch(user_id)
+                continue
             if user_id in self._chat_sessions:
                 del self._chat_sessions[user_id]
             if user_id in self._last_interaction:
-                del self._last_interaction[user_id] 
\ No newline at end of file
+                del self._last_interaction[user_id]
+            for callback in self._session_expiry_listeners:
+                try:
+                    callback(user_id)
+                except Exception as e:
+                    logger.error(f"Session expiry listener failed for user {user_id}: {e}")
@@ -0,0 +1,81 @@
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+Message = Dict[str, Any]
+
+WEB_SEARCH_BLOCK_TYPES = ("web_search_tool_result", "server_tool_use")
+
+
+def block_type(block: Any) -> Optional[str]:
+    """Get the type of a content block (SDK object or dict)"""
+    if isinstance(block, dict):
+        return block.get("type")
+    return getattr(block, "type", None)
+
+
+def has_web_search(message: Message) -> bool:
+    """Check whether an assistant message carries web search blocks"""
+    content = message.get("content")
+    return isinstance(content, list) and any(
+        block_type(block) in WEB_SEARCH_BLOCK_TYPES for block in content
+    )
+
+
+class SearchRetentionIndex:
+    """Incremental index of assistant messages that still hold web search blocks
+
+    Each sync only scans messages appended since the previous one, found by
+    walking back from the end to the last message already seen. If that
+    message is gone (history replaced or rehydrated) the index rebuilds from
+    scratch. Messages are remembered together with their assistant ordinal,
+    so finding the ones that left the retention window is O(1) amortized.
+    """
+
+    def __init__(self) -> None:
+        self._last_seen: Optional[Message] = None
+        self._assistant_count = 0
+        self._pending: Deque[Tuple[int, Message]] = deque()
+
+    def sync(self, messages: List[Message]) -> None:
+        """Index messages appended since the last sync
+
+        Args:
+            messages: Current conversation history
+        """
+        start = 0
+        if self._last_seen is not None:
+            for index in range(len(messages) - 1, -1, -1):
+                if messages[index] is self._last_seen:
+                    start = index + 1
+                    break
+            else:
+                self._reset()
+
+        for message in islice(messages, start, None):
+            if message.get("role") != "assistant":
+                continue
+            self._assistant_count += 1
+            if has_web_search(message):
+                self._pending.append((self._assistant_count, message))
+
+        if messages:
+            self._last_seen = messages[-1]
+
+    def pop_expired(self, retention_turns: int) -> List[Message]:
+        """Remove and return messages outside the last ``retention_turns`` assistant turns"""
+        cutoff = self._assistant_count - retention_turns
+        expired = []
+        while self._pending and self._pending[0][0] <= cutoff:
+            expired.append(self._pending.popleft()[1])
+        return expired
+
+    @property
+    def pending(self) -> int:
+        """Number of indexed messages still holding web search blocks"""
+        return len(self._pending)
+
+    def _reset(self) -> None:
+        self._last_seen = None
+        self._assistant_count = 0
+        self._pending.clear()
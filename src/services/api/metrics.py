@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (50, 95, 99)
+OUTCOMES = ("ok", "error", "timeout", "short_circuited", "served_stale")
+
+
+class Histogram:
+    """Log-bucketed histogram with bounded relative error, HDR-style
+
+    Values are counted in buckets whose bounds grow by ``1 + precision``, so
+    percentiles are accurate to that relative error at any scale while
+    memory stays proportional to the number of distinct magnitudes seen.
+
+    Attributes:
+        count (int): Number of recorded values
+        total (float): Sum of recorded values
+        max (float): Largest recorded value
+    """
+
+    def __init__(self, precision: float = 0.02, minimum: float = 1e-4) -> None:
+        """Initialize histogram
+
+        Args:
+            precision: Relative error of reported percentiles
+            minimum: Values at or below this share the first bucket
+        """
+        if precision <= 0 or minimum <= 0:
+            raise ValueError("Invalid histogram configuration")
+        self._growth = 1 + precision
+        self._log_growth = math.log(self._growth)
+        self._minimum = minimum
+        self._buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        """Count one value"""
+        value = max(0.0, float(value))
+        index = 0 if value <= self._minimum else math.ceil(math.log(value / self._minimum) / self._log_growth)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Get a percentile (bucket upper bound, capped at the maximum), or None when empty"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                return min(self._minimum * self._growth ** index, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """Get count, mean, max and the reported quantiles"""
+        result: Dict[str, Optional[float]] = {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "max": self.max if self.count else None,
+        }
+        for quantile in QUANTILES:
+            result[f"p{quantile}"] = self.percentile(quantile)
+        return result
+
+
+class EndpointMetrics:
+    """Request outcomes, latency and value distributions of one endpoint"""
+
+    def __init__(self) -> None:
+        self.outcomes = {outcome: 0 for outcome in OUTCOMES}
+        self.latency = Histogram()
+        self.values: Dict[str, Histogram] = {}  # e.g. payload_bytes, input_tokens
+
+    def observe(self, name: str, value: float) -> None:
+        histogram = self.values.get(name)
+        if histogram is None:
+            histogram = self.values[name] = Histogram(minimum=1.0)
+        histogram.record(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": sum(self.outcomes.values()),
+            **self.outcomes,
+            "latency": self.latency.summary(),
+            **{name: histogram.summary() for name, histogram in self.values.items()},
+        }
+
+
+class APIMetrics:
+    """Instrumentation of one API client's outbound requests
+
+    Tracks per-endpoint latency histograms, outcome counters (ok, error,
+    timeout, and requests an open circuit failed fast or served stale) and
+    value distributions such as payload sizes or token counts. Caches with
+    ``hits``/``misses`` counters can be registered to report their hit
+    ratios alongside.
+    """
+
+    def __init__(self, timer: Callable[[], float] = time.perf_counter) -> None:
+        self._timer = timer
+        self._endpoints: Dict[str, EndpointMetrics] = {}
+        self._caches: Dict[str, Any] = {}
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        """Get an endpoint's metrics, creating them on first use"""
+        metrics = self._endpoints.get(name)
+        if metrics is None:
+            metrics = self._endpoints[name] = EndpointMetrics()
+        return metrics
+
+    def record(self, endpoint: str, seconds: Optional[float], outcome: str = "ok") -> None:
+        """Record a finished request
+
+        Args:
+            endpoint: Endpoint name
+            seconds: Request duration, or None when no request was made
+            outcome: One of OUTCOMES
+        """
+        metrics = self.endpoint(endpoint)
+        metrics.outcomes[outcome] += 1
+        if seconds is not None:
+            metrics.latency.record(seconds)
+
+    def observe(self, endpoint: str, name: str, value: float) -> None:
+        """Record a value such as a payload size or token count for an endpoint"""
+        self.endpoint(endpoint).observe(name, value)
+
+    def register_cache(self, name: str, cache: Any) -> None:
+        """Report a cache's hit ratio (any object with ``hits`` and ``misses``)"""
+        self._caches[name] = cache
+
+    @asynccontextmanager
+    async def measure(self, endpoint: str) -> AsyncIterator[None]:
+        """Time a request made inside the block and record its outcome
+
+        Timeouts are recognized by exception type; any other exception is
+        recorded as an error. Cancellation is not recorded.
+        """
+        started = self._timer()
+        try:
+            yield
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            self.record(endpoint, self._timer() - started, "timeout" if is_timeout(e) else "error")
+            raise
+        self.record(endpoint, self._timer() - started)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get per-endpoint and per-cache statistics"""
+        caches = {}
+        for name, cache in self._caches.items():
+            hits, misses = cache.hits, cache.misses
+            caches[name] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": hits / (hits + misses) if hits + misses else None,
+            }
+        return {
+            "endpoints": {name: metrics.snapshot() for name, metrics in self._endpoints.items()},
+            "caches": caches,
+        }
+
+    def busiest(self) -> Optional[str]:
+        """Get the endpoint with the most requests, if any"""
+        if not self._endpoints:
+            return None
+        return max(self._endpoints, key=lambda name: sum(self._endpoints[name].outcomes.values()))
+
+    def prometheus_lines(self, api: str) -> List[str]:
+        """Render the metrics as Prometheus text exposition samples"""
+        lines = []
+        for endpoint, metrics in sorted(self._endpoints.items()):
+            labels = f'api="{api}",endpoint="{_escape(endpoint)}"'
+            for outcome, count in metrics.outcomes.items():
+                lines.append(f'mumu_api_requests_total{{{labels},outcome="{outcome}"}} {count}')
+            lines += _summary_lines("mumu_api_request_duration_seconds", labels, metrics.latency)
+            for name, histogram in sorted(metrics.values.items()):
+                lines += _summary_lines(f"mumu_api_{name}", labels, histogram)
+        for name, cache in sorted(self._caches.items()):
+            labels = f'api="{api}",cache="{_escape(name)}"'
+            lines.append(f"mumu_api_cache_hits_total{{{labels}}} {cache.hits}")
+            lines.append(f"mumu_api_cache_misses_total{{{labels}}} {cache.misses}")
+        return lines
+
+
+def is_timeout(error: BaseException) -> bool:
+    """Check whether an error (or its cause) is a timeout, including SDK timeout types"""
+    while error is not None:
+        if isinstance(error, (asyncio.TimeoutError, TimeoutError)) or "Timeout" in type(error).__name__:
+            return True
+        error = error.__cause__
+    return False
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _summary_lines(name: str, labels: str, histogram: Histogram) -> List[str]:
+    lines = []
+    for quantile in QUANTILES:
+        value = histogram.percentile(quantile)
+        if value is not None:
+            lines.append(f'{name}{{{labels},quantile="{quantile / 100}"}} {value:.6g}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.total:.6g}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+def render_prometheus(registries: Mapping[str, APIMetrics]) -> str:
+    """Render several clients' metrics as one Prometheus text exposition
+
+    Args:
+        registries: API name -> metrics
+
+    Returns:
+        str: Exposition text
+    """
+    samples: Dict[str, List[str]] = {}
+    for api, metrics in sorted(registries.items()):
+        for line in metrics.prometheus_lines(api):
+            family = line.split("{", 1)[0]
+            for suffix in ("_sum", "_count"):
+                if family.endswith(suffix) and not family.endswith("_total"):
+                    family = family[:-len(suffix)]
+            samples.setdefault(family, []).append(line)
+
+    lines = []
+    for family, family_lines in samples.items():
+        kind = "counter" if family.endswith("_total") else "summary"
+        lines.append(f"# TYPE {family} {kind}")
+        lines += family_lines
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str, text: str) -> None:
+    """Atomically write a Prometheus text dump for a textfile collector
+
+    Args:
+        path: Destination file
+        text: Exposition text from render_prometheus
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp_path, path)
@@ -1,74 +1,173 @@
+import asyncio
+import json
 import logging
-from typing import Dict, Any, Optional, TypedDict, List
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 from .base import BaseAPI, RateLimitConfig
+from .country_index import CountryIndex
+from src.utils.api_types import CountryInfo
 
 logger = logging.getLogger(__name__)
 
 
-class CountryInfo(TypedDict):
-    """Country information type"""
-    name: str
-    population: int
-    growth_rate: float
-    area: float
-
-
-API_URL = "https://restcountries.com/v3.1/name/{}"
-
-
 class PopulationAPI(BaseAPI[CountryInfo]):
-    """Population API client implementation"""
-
-    COUNTRY_API_URL = "https://restcountries.com/v3.1/name/{}"
+    """Population API client implementation
+
+    All countries are loaded in one request and indexed in memory, so
+    lookups never wait on the network and accept Korean, native and
+    abbreviated names. The data is refreshed daily in the background and
+    saved as a snapshot that is loaded when the API is unreachable at
+    startup.
+    """
+
+    ALL_COUNTRIES_URL = "https://restcountries.com/v3.1/all"
+    # /all only answers with an explicit field list (at most 10 fields)
+    FIELDS = "name,cca2,cca3,altSpellings,translations,population,capital,region,area,flags"
+    REFRESH_INTERVAL = 24 * 60 * 60
+    RETRY_INTERVAL = 30 * 60  # Seconds before retrying a failed refresh
+
+    def __init__(
+        self,
+        snapshot_file: Optional[str] = None,
+        refresh_interval: int = REFRESH_INTERVAL,
+    ) -> None:
+        """Initialize Population API client
 
-    def __init__(self) -> None:
-        """Initialize Population API client"""
+        Args:
+            snapshot_file: Path of the country data snapshot (defaults to $MUMU_DATA_DIR/countries.json)
+            refresh_interval: Seconds between background refreshes
+        """
         super().__init__()
         self._rate_limits = {
-            "country": RateLimitConfig(30, 60),  # 30 requests per minute
+            "countries": RateLimitConfig(10, 60),  # 10 requests per minute
         }
-        self._supported_countries: List[str] = []
-        self._cached_data: Optional[Dict[str, CountryInfo]] = None
+        base_dir = os.getenv("MUMU_DATA_DIR", "data")
+        self.snapshot_file = snapshot_file or str(Path(base_dir) / "countries.json")
+        self._refresh_interval = refresh_interval
+        self._index: Optional[CountryIndex] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def country_count(self) -> int:
+        """Get number of indexed countries"""
+        return len(self._index) if self._index else 0
 
     async def initialize(self) -> None:
-        """Initialize Population API resources"""
+        """Initialize session, load country data and start the daily refresh"""
         await super().initialize()
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning(f"Failed to load country data, trying snapshot: {e}")
+            await self._load_snapshot()
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
 
     async def validate_credentials(self) -> bool:
         """Validate API access (no credentials needed)"""
+        return self._index is not None and len(self._index) > 0
+
+    async def _refresh_loop(self) -> None:
+        """Refresh country data until cancelled"""
+        delay = self._refresh_interval if self._index else self.RETRY_INTERVAL
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+                delay = self._refresh_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep serving the previous data and retry sooner
+                logger.error(f"Error refreshing country data: {e}")
+                delay = min(self.RETRY_INTERVAL, self._refresh_interval)
+
+    async def refresh(self) -> CountryIndex:
+        """Fetch all countries, rebuild the index and save a snapshot
+
+        Returns:
+            CountryIndex: The new index
+
+        Raises:
+            ValueError: If the request fails or the response is invalid
+        """
+        data = await self._make_request(
+            self.ALL_COUNTRIES_URL,
+            params={"fields": self.FIELDS},
+            endpoint="countries",
+        )
+        index = self._build_index(data)
+        self._index = index
+        logger.info(f"Loaded {len(index)} countries")
+
         try:
-            await self.get_country_info("South Korea")
-            return True
-        except Exception:
-            return False
+            await asyncio.to_thread(self._save_snapshot, data)
+        except OSError as e:
+            logger.error(f"Failed to save country data snapshot: {e}")
+        return index
 
     async def get_country_info(self, country_name: str) -> CountryInfo:
         """Get country information
-        
+
         Args:
-            country_name: Name of country to look up
+            country_name: Country name (English, Korean or native) or ISO code
 
         Returns:
             CountryInfo: Country information
 
         Raises:
-            ValueError: If country not found or API error
+            ValueError: If country not found or no country data is available
         """
-        url = self.COUNTRY_API_URL.format(country_name)
-        data = await self._make_request(url)
-        
-        if not data or not isinstance(data, list):
+        if self._index is None:
+            try:
+                await self.refresh()
+            except Exception as e:
+                raise ValueError("국가 정보를 불러오지 못했습니다") from e
+
+        country = self._index.lookup(country_name)
+        if country is None:
             raise ValueError(f"국가를 찾을 수 없습니다: {country_name}")
-            
-        country_data = data[0]
-        return CountryInfo(
-            name=country_data['name']['common'],
-            population=country_data['population'],
-            growth_rate=country_data['population_growth'],
-            area=country_data['area']
-        )
+        return country
+
+    @staticmethod
+    def _build_index(data: Any) -> CountryIndex:
+        if not isinstance(data, list):
+            raise ValueError("Invalid API response format")
+        index = CountryIndex(entry for entry in data if isinstance(entry, dict))
+        if not len(index):
+            raise ValueError("No countries found in API response")
+        return index
+
+    def _save_snapshot(self, data: List[Dict[str, Any]]) -> None:
+        """Atomically write the raw country data"""
+        path = Path(self.snapshot_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".tmp")
+        temp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(temp_path, path)
+
+    async def _load_snapshot(self) -> None:
+        """Build the index from the saved snapshot, if there is one"""
+        path = Path(self.snapshot_file)
+        if not path.exists():
+            logger.warning("No country data snapshot available")
+            return
+        try:
+            data = json.loads(await asyncio.to_thread(path.read_text, encoding="utf-8"))
+            self._index = self._build_index(data)
+            logger.info(f"Loaded {len(self._index)} countries from snapshot")
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load country data snapshot: {e}")
 
     async def close(self) -> None:
         """Cleanup resources"""
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+        self._refresh_task = None
         await super().close()
@@ -0,0 +1,219 @@
+import logging
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .session_store import message_digest
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+
+EPHEMERAL = {"type": "ephemeral"}
+
+
+@dataclass
+class SessionCacheStats:
+    """Prompt cache bookkeeping for one chat session
+
+    Attributes:
+        requests (int): Requests planned for the session
+        read_tokens (int): Input tokens read from the cache
+        write_tokens (int): Input tokens written to the cache
+        uncached_tokens (int): Input tokens processed without the cache
+        boundary (Optional[bytes]): Content hash of the last message that carried a history breakpoint
+        boundary_index (int): Position of that message in the history
+        last_request (Optional[float]): Time of the previous request
+        gaps (Deque[float]): Recent seconds between requests
+    """
+
+    requests: int = 0
+    read_tokens: int = 0
+    write_tokens: int = 0
+    uncached_tokens: int = 0
+    boundary: Optional[bytes] = None
+    boundary_index: int = -1
+    last_request: Optional[float] = None
+    gaps: Deque[float] = field(default_factory=lambda: deque(maxlen=5))
+
+    @property
+    def read_ratio(self) -> float:
+        """Share of the session's input tokens served from the cache"""
+        total = self.read_tokens + self.write_tokens + self.uncached_tokens
+        return self.read_tokens / total if total else 0.0
+
+
+class CacheBreakpointPlanner:
+    """Places prompt-cache breakpoints so cached prefixes stay byte-stable
+
+    The request prefix is tools, then system blocks, then messages, and a
+    breakpoint caches everything before it. The planner puts one breakpoint
+    after the static persona (covering the tools too), one after the session
+    summary when there is one, and keeps per-day content such as the date
+    after them. Conversation history gets up to two breakpoints: one on the
+    message that ended the previous request, whose prefix that request
+    wrote and this one can read, and one on the new message so the next
+    turn can read this one.
+
+    The trailing write is skipped when the session's recent replies came
+    slower than the cache lifetime, since the write would expire unread and
+    only cost the cache write premium. Per-session read ratios are tracked
+    from response usage.
+    """
+
+    MAX_BREAKPOINTS = 4  # Anthropic's limit per request
+
+    def __init__(
+        self,
+        min_tokens: int = 1024,
+        cache_ttl: float = 300.0,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize planner
+
+        Args:
+            min_tokens: Prompt size below which history breakpoints are pointless
+            cache_ttl: Seconds a cache entry lives without being read
+            timer: Clock used to measure the gaps between requests
+        """
+        self.min_tokens = min_tokens
+        self.cache_ttl = cache_ttl
+        self._timer = timer
+        self._sessions: Dict[int, SessionCacheStats] = {}
+        self.skipped_writes = 0
+
+    def system_blocks(self, persona: str, summary: Optional[str], volatile: str) -> List[Dict[str, Any]]:
+        """Build system blocks with the stable parts cached first
+
+        Args:
+            persona: Static system prompt
+            summary: Summary of compacted turns, if any
+            volatile: Text that changes daily (the date), kept out of cached blocks
+
+        Returns:
+            List[Dict[str, Any]]: System blocks for the request
+        """
+        blocks = [{"type": "text", "text": persona, "cache_control": EPHEMERAL}]
+        if summary:
+            blocks.append({"type": "text", "text": summary, "cache_control": EPHEMERAL})
+        blocks.append({"type": "text", "text": volatile})
+        return blocks
+
+    def plan_messages(
+        self,
+        session_id: int,
+        messages: List[Message],
+        prompt_tokens: int,
+        system_breakpoints: int,
+    ) -> List[Message]:
+        """Add history breakpoints to a copy of the messages
+
+        The stored history is never modified, so it stays byte-identical
+        from request to request.
+
+        Args:
+            session_id: Chat session key (user ID)
+            messages: History plus the new user message
+            prompt_tokens: Estimated prompt size
+            system_breakpoints: Breakpoints already used by the system blocks
+
+        Returns:
+            List[Message]: Messages to send
+        """
+        stats = self._sessions.setdefault(session_id, SessionCacheStats())
+        now = self._timer()
+        if stats.last_request is not None:
+            stats.gaps.append(now - stats.last_request)
+        stats.last_request = now
+        stats.requests += 1
+
+        available = self.MAX_BREAKPOINTS - system_breakpoints
+        if not messages or available <= 0 or prompt_tokens < self.min_tokens:
+            stats.boundary, stats.boundary_index = None, -1
+            return messages
+
+        planned = list(messages)
+        last = len(messages) - 1
+        index = stats.boundary_index
+        # Read what the previous request wrote, if that part of the history is unchanged.
+        # Compared by content, since rehydrated histories hold new message objects
+        if 0 <= index < last and message_digest(messages[index]) == stats.boundary:
+            marked = self._with_breakpoint(messages[index])
+            if marked is not None:
+                planned[index] = marked
+                available -= 1
+
+        if available > 0 and self._worth_writing(stats):
+            marked = self._with_breakpoint(messages[last])
+            if marked is not None:
+                planned[last] = marked
+                stats.boundary, stats.boundary_index = message_digest(messages[last]), last
+                return planned
+        elif available > 0:
+            self.skipped_writes += 1
+        stats.boundary, stats.boundary_index = None, -1
+        return planned
+
+    def record(self, session_id: int, usage: Any) -> None:
+        """Record a response's cache usage for its session
+
+        Args:
+            session_id: Chat session key (user ID)
+            usage: Usage block of the response
+        """
+        if usage is None:
+            return
+        stats = self._sessions.setdefault(session_id, SessionCacheStats())
+        stats.read_tokens += int(getattr(usage, 'cache_read_input_tokens', 0) or 0)
+        stats.write_tokens += int(getattr(usage, 'cache_creation_input_tokens', 0) or 0)
+        stats.uncached_tokens += int(getattr(usage, 'input_tokens', 0) or 0)
+
+    def forget(self, session_id: int) -> None:
+        """Drop a session's cache bookkeeping"""
+        self._sessions.pop(session_id, None)
+
+    def session_stats(self, session_id: int) -> Optional[SessionCacheStats]:
+        """Get a session's cache bookkeeping, if any"""
+        return self._sessions.get(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get planner statistics across active sessions
+
+        Returns:
+            Dict[str, Any]: Session count, average and lowest read ratios and skipped writes
+        """
+        ratios = [stats.read_ratio for stats in self._sessions.values() if stats.requests > 1]
+        return {
+            "sessions": len(self._sessions),
+            "average_read_ratio": statistics.fmean(ratios) if ratios else 0.0,
+            "lowest_read_ratio": min(ratios) if ratios else 0.0,
+            "skipped_writes": self.skipped_writes,
+        }
+
+    def _worth_writing(self, stats: SessionCacheStats) -> bool:
+        """Check whether the next turn will likely come while a write is still cached"""
+        if len(stats.gaps) < 2:
+            return True
+        return statistics.median(stats.gaps) < self.cache_ttl
+
+    @staticmethod
+    def _with_breakpoint(message: Message) -> Optional[Message]:
+        """Copy a message with a breakpoint on its last block
+
+        Returns:
+            Optional[Message]: Marked copy, or None if the content can't carry a breakpoint
+        """
+        content = message.get("content")
+        if isinstance(content, str):
+            if not content:
+                return None
+            blocks = [{"type": "text", "text": content, "cache_control": EPHEMERAL}]
+        elif isinstance(content, list) and content and isinstance(content[-1], dict):
+            if content[-1].get("type") in ("thinking", "redacted_thinking"):
+                return None  # Thinking blocks can't be marked directly
+            blocks = list(content[:-1]) + [{**content[-1], "cache_control": EPHEMERAL}]
+        else:
+            return None
+        return {**message, "content": blocks}
@@ -0,0 +1,306 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+PositionCallback = Callable[[int], Awaitable[None]]
+
+
+class RequestRejectedError(ValueError):
+    """Raised when the scheduler refuses or cancels an AI request"""
+
+
+@dataclass(eq=False)
+class _Ticket:
+    """One request waiting for or holding a concurrency slot"""
+
+    user_id: int
+    guild_id: Optional[int]
+    future: asyncio.Future
+    on_position: Optional[PositionCallback] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    position: int = 0
+    task: Optional[asyncio.Task] = None
+    cancelled: bool = False
+
+
+class AIRequestScheduler:
+    """Bounded-concurrency scheduler with a fair queue for AI requests
+
+    At most ``max_concurrent`` requests run at once (``degraded_concurrent``
+    while the backend reports a slowdown). Requests beyond that wait in a
+    two-level round-robin queue: guilds take turns, and inside a guild its
+    users take turns, so one busy server or one user sending many messages
+    cannot starve everyone else. Waiting requests are told their position
+    whenever it changes, and every request of a user can be cancelled at
+    once when they end their chat.
+
+    Attributes:
+        max_concurrent (int): Concurrent requests under normal load
+        degraded_concurrent (int): Concurrent requests while degraded
+        max_queue (int): Maximum number of waiting requests
+        max_pending_per_user (int): Maximum running plus waiting requests per user
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        degraded_concurrent: int = 1,
+        max_queue: int = 50,
+        max_pending_per_user: int = 2,
+        degraded: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        """Initialize request scheduler
+
+        Args:
+            max_concurrent: Concurrent requests under normal load
+            degraded_concurrent: Concurrent requests while degraded
+            max_queue: Maximum number of waiting requests
+            max_pending_per_user: Maximum running plus waiting requests per user
+            degraded: Returns True while the backend asks for reduced load
+        """
+        self.max_concurrent = max_concurrent
+        self.degraded_concurrent = degraded_concurrent
+        self.max_queue = max_queue
+        self.max_pending_per_user = max_pending_per_user
+        self._degraded = degraded
+
+        # guild -> user -> waiting tickets, both levels rotated round-robin
+        self._queue: "OrderedDict[Optional[int], OrderedDict[int, Deque[_Ticket]]]" = OrderedDict()
+        self._queued = 0
+        self._running = 0
+        self._active: Dict[int, Set[_Ticket]] = defaultdict(set)  # Running or waiting, per user
+        self._notify_tasks: Set[asyncio.Task] = set()
+
+        self.completed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def limit(self) -> int:
+        """Current concurrency limit"""
+        try:
+            if self._degraded and self._degraded():
+                return self.degraded_concurrent
+        except Exception as e:
+            logger.warning(f"Failed to read degradation state: {e}")
+        return self.max_concurrent
+
+    async def submit(
+        self,
+        user_id: int,
+        work: Callable[[], Awaitable[T]],
+        guild_id: Optional[int] = None,
+        on_position: Optional[PositionCallback] = None,
+    ) -> T:
+        """Run a request once a concurrency slot is free
+
+        Args:
+            user_id: Discord user ID
+            work: Coroutine function performing the request
+            guild_id: Guild the request came from (None for DMs)
+            on_position: Called with the 1-based queue position whenever it changes
+
+        Returns:
+            T: Result of ``work``
+
+        Raises:
+            RequestRejectedError: If the queue is full, the user has too many
+                pending requests, or the request was cancelled
+        """
+        if len(self._active.get(user_id, ())) >= self.max_pending_per_user:
+            self.rejected += 1
+            raise RequestRejectedError("아직 처리 중인 요청이 있어. 답변이 끝나면 다시 물어봐줘!")
+
+        ticket = _Ticket(user_id, guild_id, asyncio.get_running_loop().create_future(), on_position)
+        if self._running < self.limit and not self._queued:
+            self._running += 1
+            ticket.future.set_result(None)
+        elif self._queued >= self.max_queue:
+            self.rejected += 1
+            raise RequestRejectedError("지금 요청이 너무 많아. 잠시 후에 다시 시도해줄래?")
+        else:
+            self._enqueue(ticket)
+            self._notify_positions()
+        self._active[user_id].add(ticket)
+
+        try:
+            try:
+                await ticket.future
+            except asyncio.CancelledError:
+                # Caller went away while waiting; give back a slot granted meanwhile
+                if ticket.future.done() and not ticket.future.cancelled():
+                    self._release()
+                else:
+                    self._remove(ticket)
+                raise
+
+            if ticket.cancelled:
+                # Cancelled after the slot was granted but before the request started
+                self._release()
+                raise RequestRejectedError("대화가 종료되어 요청을 취소했어.")
+
+            wait = time.monotonic() - ticket.enqueued_at
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+
+            ticket.task = asyncio.create_task(work())
+            try:
+                result = await ticket.task
+            except asyncio.CancelledError:
+                if ticket.cancelled:
+                    raise RequestRejectedError("대화가 종료되어 요청을 취소했어.") from None
+                raise
+            finally:
+                self._release()
+            self.completed += 1
+            return result
+        finally:
+            self._discard_active(ticket)
+
+    def cancel_user(self, user_id: int) -> int:
+        """Cancel every running and waiting request of a user
+
+        Args:
+            user_id: Discord user ID
+
+        Returns:
+            int: Number of cancelled requests
+        """
+        tickets = list(self._active.get(user_id, ()))
+        for ticket in tickets:
+            ticket.cancelled = True
+            if ticket.task is not None:
+                ticket.task.cancel()
+            elif not ticket.future.done():
+                self._remove(ticket)
+                ticket.future.set_exception(RequestRejectedError("대화가 종료되어 요청을 취소했어."))
+        self.cancelled += len(tickets)
+        if tickets:
+            logger.info(f"Cancelled {len(tickets)} AI request(s) of user {user_id}")
+            self._notify_positions()
+        return len(tickets)
+
+    def cancel_all(self) -> int:
+        """Cancel every request, e.g. on shutdown
+
+        Returns:
+            int: Number of cancelled requests
+        """
+        return sum(self.cancel_user(user_id) for user_id in list(self._active))
+
+    def position(self, user_id: int) -> Optional[int]:
+        """Get the best queue position of a user's waiting requests"""
+        for index, ticket in enumerate(self._dispatch_order(), 1):
+            if ticket.user_id == user_id:
+                return index
+        return None
+
+    def stats(self) -> Dict[str, float]:
+        """Get scheduler statistics
+
+        Returns:
+            Dict[str, float]: Load, limit, outcome counters and wait times
+        """
+        started = self.completed + self._running
+        return {
+            "running": self._running,
+            "queued": self._queued,
+            "limit": self.limit,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "average_wait_seconds": self._total_wait / started if started else 0.0,
+            "max_wait_seconds": self._max_wait,
+        }
+
+    def _enqueue(self, ticket: _Ticket) -> None:
+        users = self._queue.setdefault(ticket.guild_id, OrderedDict())
+        users.setdefault(ticket.user_id, deque()).append(ticket)
+        self._queued += 1
+
+    def _remove(self, ticket: _Ticket) -> None:
+        """Remove a waiting ticket from the queue"""
+        users = self._queue.get(ticket.guild_id)
+        tickets = users.get(ticket.user_id) if users else None
+        if not tickets or ticket not in tickets:
+            return
+        tickets.remove(ticket)
+        self._queued -= 1
+        if not tickets:
+            del users[ticket.user_id]
+        if not users:
+            del self._queue[ticket.guild_id]
+
+    def _pop_next(self) -> _Ticket:
+        """Take the next ticket in round-robin order"""
+        guild_id, users = next(iter(self._queue.items()))
+        user_id, tickets = next(iter(users.items()))
+        ticket = tickets.popleft()
+        self._queued -= 1
+        if tickets:
+            users.move_to_end(user_id)
+        else:
+            del users[user_id]
+        if users:
+            self._queue.move_to_end(guild_id)
+        else:
+            del self._queue[guild_id]
+        return ticket
+
+    def _dispatch_order(self) -> List[_Ticket]:
+        """Waiting tickets in the order ``_pop_next`` would hand them out"""
+        guilds = deque(deque(deque(tickets) for tickets in users.values()) for users in self._queue.values())
+        order = []
+        while guilds:
+            users = guilds.popleft()
+            tickets = users.popleft()
+            order.append(tickets.popleft())
+            if tickets:
+                users.append(tickets)
+            if users:
+                guilds.append(users)
+        return order
+
+    def _release(self) -> None:
+        """Free a slot and hand free slots to waiting tickets"""
+        self._running -= 1
+        dispatched = False
+        while self._queued and self._running < self.limit:
+            ticket = self._pop_next()
+            self._running += 1
+            ticket.future.set_result(None)
+            dispatched = True
+        if dispatched:
+            self._notify_positions()
+
+    def _discard_active(self, ticket: _Ticket) -> None:
+        tickets = self._active.get(ticket.user_id)
+        if tickets is not None:
+            tickets.discard(ticket)
+            if not tickets:
+                del self._active[ticket.user_id]
+
+    def _notify_positions(self) -> None:
+        """Tell waiting requests about position changes without blocking dispatch"""
+        for index, ticket in enumerate(self._dispatch_order(), 1):
+            if ticket.on_position is None or ticket.position == index:
+                continue
+            ticket.position = index
+            task = asyncio.create_task(self._call_position(ticket.on_position, index))
+            self._notify_tasks.add(task)
+            task.add_done_callback(self._notify_tasks.discard)
+
+    @staticmethod
+    async def _call_position(callback: PositionCallback, position: int) -> None:
+        try:
+            await callback(position)
+        except Exception as e:
+            logger.warning(f"Failed to report queue position: {e}")
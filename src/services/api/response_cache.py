@@ -0,0 +1,292 @@
+import random
+import re
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+_WHITESPACE = re.compile(r"\s+")
+_URL_OR_MENTION = re.compile(r"https?://|<[@#:][^>]*>|```")
+# Prompts about the user or the ongoing conversation can't be answered from another user's reply
+_PERSONAL = re.compile(
+    r"(?:^|\s)(?:나|내|저|제|우리|방금|아까|위에|이전|i|me|my|we|our)"
+    r"(?:가|는|을|를|의|한테|에게|도|랑|꺼|거)?(?=\s|$)"
+)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt for exact matching
+
+    Applies NFKC, lowercases, drops punctuation and collapses whitespace, so
+    "오늘 날짜?" and "오늘  날짜!" share a key.
+    """
+    text = unicodedata.normalize("NFKC", prompt).lower()
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def is_cacheable_prompt(prompt: str, max_chars: int = 300) -> bool:
+    """Check whether a prompt is generic enough to share answers between users
+
+    Args:
+        prompt: Raw user prompt
+        max_chars: Longer prompts are treated as too specific
+
+    Returns:
+        bool: False for long prompts, links, mentions, code and first-person
+            or conversation-referencing questions
+    """
+    if _URL_OR_MENTION.search(prompt):
+        return False
+    normalized = normalize_prompt(prompt)
+    if not 2 <= len(normalized) <= max_chars:
+        return False
+    return not _PERSONAL.search(normalized)
+
+
+class MinHasher:
+    """MinHash signatures over character shingles
+
+    Whitespace is removed before shingling, so spacing differences common in
+    Korean text don't change the signature.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1) -> None:
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, normalized: str) -> Tuple[int, ...]:
+        """Compute the signature of a normalized prompt"""
+        text = normalized.replace(" ", "")
+        size = self.shingle_size
+        shingles = {text[i:i + size] for i in range(max(len(text) - size + 1, 1))}
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+            for a, b in self._perms
+        )
+
+    @staticmethod
+    def similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        """Estimate the Jaccard similarity of two signatures"""
+        return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+@dataclass
+class CachedResponse:
+    """Processed reply stored for a prompt, with the model's own text for history"""
+
+    prompt: str
+    response: str
+    raw_response: str
+    sources: Optional[str]
+    thinking: Optional[str]
+    prompt_tokens: int
+    response_tokens: int
+    expires_at: float
+    signature: Tuple[int, ...] = ()
+    hits: int = 0
+
+
+class ResponseCache:
+    """Shared cache of replies to repeated generic prompts
+
+    Lookups first try the normalized prompt exactly, then near-duplicates
+    through MinHash locality-sensitive hashing: signatures are split into
+    bands and only entries sharing a band are compared. Entries expire after
+    their TTL (shorter for replies grounded on web search) and never outlive
+    the local day, since the system prompt carries today's date. The least
+    recently used entry is dropped once ``max_entries`` is reached.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl: float = 6 * 3600,
+        search_ttl: float = 1800,
+        similarity_threshold: float = 0.8,
+        bands: int = 16,
+        timer: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialize response cache
+
+        Args:
+            max_entries: Maximum number of cached replies
+            ttl: Lifetime of a reply in seconds
+            search_ttl: Lifetime of a reply that used web search
+            similarity_threshold: Minimum estimated similarity for a near-duplicate hit
+            bands: LSH bands (must divide the signature length)
+            timer: Wall clock used for expiry
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.search_ttl = search_ttl
+        self.similarity_threshold = similarity_threshold
+        self._hasher = MinHasher()
+        if self._hasher.num_perm % bands:
+            raise ValueError("bands must divide the signature length")
+        self._bands = bands
+        self._rows = self._hasher.num_perm // bands
+        self._timer = timer
+
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = defaultdict(set)
+
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.saved_prompt_tokens = 0
+        self.saved_response_tokens = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, prompt: str) -> Optional[CachedResponse]:
+        """Find a live reply for a prompt or a near-duplicate of it
+
+        Args:
+            prompt: Raw user prompt
+
+        Returns:
+            Optional[CachedResponse]: Cached reply, or None on a miss
+        """
+        key = normalize_prompt(prompt)
+        now = self._timer()
+        entry = self._live(key, now)
+        if entry is not None:
+            self.exact_hits += 1
+        else:
+            entry = self._similar(key, now)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.similar_hits += 1
+
+        entry.hits += 1
+        self.saved_prompt_tokens += entry.prompt_tokens
+        self.saved_response_tokens += entry.response_tokens
+        self._entries.move_to_end(normalize_prompt(entry.prompt))
+        return entry
+
+    def put(
+        self,
+        prompt: str,
+        response: str,
+        sources: Optional[str] = None,
+        thinking: Optional[str] = None,
+        prompt_tokens: int = 0,
+        response_tokens: int = 0,
+        used_search: bool = False,
+        raw_response: Optional[str] = None,
+    ) -> None:
+        """Store the processed reply to a prompt
+
+        Args:
+            prompt: Raw user prompt
+            response: Processed reply text
+            sources: Formatted sources, if any
+            thinking: Formatted thinking, if any
+            prompt_tokens: Input tokens the reply cost
+            response_tokens: Output tokens the reply cost
+            used_search: Whether the reply was grounded on web search
+            raw_response: Text the model produced, before links and references
+                were added (defaults to ``response``)
+        """
+        key = normalize_prompt(prompt)
+        if not key:
+            return
+        now = self._timer()
+        tomorrow = (datetime.fromtimestamp(now) + timedelta(days=1)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        expires_at = min(now + (self.search_ttl if used_search else self.ttl), tomorrow.timestamp())
+
+        self._remove(key)
+        entry = CachedResponse(
+            prompt=prompt,
+            response=response,
+            raw_response=response if raw_response is None else raw_response,
+            sources=sources,
+            thinking=thinking,
+            prompt_tokens=prompt_tokens,
+            response_tokens=response_tokens,
+            expires_at=expires_at,
+            signature=self._hasher.signature(key),
+        )
+        self._entries[key] = entry
+        for band in self._band_keys(entry.signature):
+            self._buckets[band].add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        """Remove every cached reply"""
+        self._entries.clear()
+        self._buckets.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Get cache statistics
+
+        Returns:
+            Dict[str, float]: Entry count, hit/miss counters and saved tokens
+        """
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": (self.exact_hits + self.similar_hits) / lookups * 100 if lookups else 0.0,
+            "saved_prompt_tokens": self.saved_prompt_tokens,
+            "saved_response_tokens": self.saved_response_tokens,
+        }
+
+    def _live(self, key: str, now: float) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= now:
+            self._remove(key)
+            return None
+        return entry
+
+    def _similar(self, key: str, now: float) -> Optional[CachedResponse]:
+        """Find the most similar live entry above the threshold"""
+        signature = self._hasher.signature(key)
+        candidates: Set[str] = set()
+        for band in self._band_keys(signature):
+            candidates.update(self._buckets.get(band, ()))
+
+        best: Optional[CachedResponse] = None
+        best_score = self.similarity_threshold
+        for candidate in candidates:
+            entry = self._live(candidate, now)
+            if entry is None:
+                continue
+            score = MinHasher.similarity(signature, entry.signature)
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        rows = self._rows
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(self._bands)]
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band in self._band_keys(entry.signature):
+            keys = self._buckets.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._buckets[band]
@@ -1,20 +1,27 @@
 import asyncio
 import logging
-from typing import Dict, Optional, List, Tuple, Any
+import os
+from typing import Dict, Optional, List, Tuple, Any, Awaitable, Callable
 import discord
 
 from src.services.api.exchange import ExchangeAPI
 from src.services.api.population import PopulationAPI
 from src.services.api.steam import SteamAPI
 from src.services.api.claude import ClaudeAPI
+from src.services.api.chat_backend import ChatBackend, ChatRouter
 from src.services.api.base import BaseAPI
 from src.services.api.dnf import DNFAPI
+from src.services.api.request_scheduler import AIRequestScheduler
+from src.services.api.batch_jobs import BatchJobQueue
+from src.services.api.metrics import APIMetrics, render_prometheus, write_prometheus
 
 logger = logging.getLogger(__name__)
 
 class APIService:
     """Service for managing various API clients"""
 
+    METRICS_DUMP_INTERVAL = 60  # Seconds between Prometheus metrics file refreshes
+
     def __init__(
         self, 
         config: Dict[str, str], 
@@ -38,7 +45,14 @@ class APIService:
         self._population_api: Optional[PopulationAPI] = None
         self._exchange_api: Optional[ExchangeAPI] = None
         self._claude_api: Optional[ClaudeAPI] = None
+        self._gemini_api: Optional[ChatBackend] = None
         self._dnf_api: Optional[DNFAPI] = None
+        self._chat_router: Optional[ChatRouter] = None
+        self._batch_jobs: Optional[BatchJobQueue] = None
+        self._metrics_task: Optional[asyncio.Task] = None
+        
+        # Shared scheduler for AI chat requests (runs fewer at once while every backend is slowed down)
+        self._ai_scheduler = AIRequestScheduler(degraded=self._is_ai_degraded)
         
         # Track initialization state
         self._initialized = False
@@ -47,6 +61,7 @@ class APIService:
             "population": False,
             "exchange": False,
             "claude": False,
+            "gemini": False,
             "dnf": False
         }
         logger.info("API service instance created with initial states: %s", self._api_states)
@@ -60,6 +75,58 @@ class APIService:
         """
         return self._api_states.copy()
 
+    @property
+    def circuit_states(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Get circuit breaker state of each initialized API
+
+        api_states only says whether a client exists; this reports whether
+        its endpoints are currently failing fast.
+
+        Returns:
+            Dict[str, Dict[str, Dict[str, Any]]]: API name to endpoint breaker snapshots
+        """
+        return {name: client.circuit_states for name, client in self._clients().items()}
+
+    @property
+    def request_metrics(self) -> Dict[str, APIMetrics]:
+        """Get outbound request metrics of each initialized API
+        
+        Returns:
+            Dict[str, APIMetrics]: API name to latency, outcome and payload metrics
+        """
+        return {name: client.request_metrics for name, client in self._clients().items()}
+
+    def _clients(self) -> Dict[str, BaseAPI]:
+        """Get the initialized API clients by name"""
+        clients = {
+            "steam": self._steam_api,
+            "population": self._population_api,
+            "exchange": self._exchange_api,
+            "claude": self._claude_api,
+            "gemini": self._gemini_api,
+            "dnf": self._dnf_api,
+        }
+        return {name: client for name, client in clients.items() if client is not None}
+
+    def write_metrics(self, path: str) -> None:
+        """Write request metrics of all APIs as a Prometheus text file
+        
+        Args:
+            path: Destination file, e.g. for node_exporter's textfile collector
+        """
+        write_prometheus(path, render_prometheus(self.request_metrics))
+
+    async def _metrics_dump_loop(self, path: str) -> None:
+        """Periodically refresh the Prometheus metrics file"""
+        while True:
+            await asyncio.sleep(self.METRICS_DUMP_INTERVAL)
+            try:
+                # Render on the loop, which owns the live metrics; only the file write is offloaded
+                text = render_prometheus(self.request_metrics)
+                await asyncio.to_thread(write_prometheus, path, text)
+            except Exception as e:
+                logger.warning(f"Failed to write metrics file {path}: {e}")
+
     @property
     def initialized(self) -> bool:
         """Check if API service is initialized
@@ -167,6 +234,90 @@ class APIService:
             raise ValueError("Claude API is not available - API key not provided")
         return self._claude_api
 
+    @property
+    def ai_scheduler(self) -> AIRequestScheduler:
+        """Get the scheduler that bounds concurrent AI chat requests
+        
+        Returns:
+            AIRequestScheduler: Shared AI request scheduler
+        """
+        return self._ai_scheduler
+
+    @property
+    def ai(self) -> ChatRouter:
+        """Get the router that sends chat requests to the best AI backend
+        
+        Returns:
+            ChatRouter: AI chat router
+            
+        Raises:
+            ValueError: If no AI backend is available
+        """
+        self._ensure_initialized()
+        if not self._chat_router:
+            raise ValueError("AI 기능이 비활성화되어 있어. 관리자에게 문의해줘!")
+        return self._chat_router
+
+    @property
+    def ai_available(self) -> bool:
+        """Check whether any AI chat backend is initialized"""
+        return self._chat_router is not None
+
+    @property
+    def batch_jobs(self) -> BatchJobQueue:
+        """Get the queue for non-urgent AI jobs run through message batches
+        
+        Returns:
+            BatchJobQueue: Batch job queue
+            
+        Raises:
+            ValueError: If Claude API is not initialized
+        """
+        self._ensure_initialized()
+        if not self._batch_jobs:
+            raise ValueError("Claude API is not available - API key not provided")
+        return self._batch_jobs
+
+    def set_channel_resolver(self, resolver: Callable[[int], Awaitable[Any]]) -> None:
+        """Set how batch job results find their Discord channels
+        
+        Args:
+            resolver: Coroutine function returning the channel for an ID, or None
+        """
+        if self._batch_jobs:
+            self._batch_jobs.set_channel_resolver(resolver)
+
+    def start_batch_jobs(self) -> None:
+        """Start the batch job worker (once the bot is connected, so restored results can be delivered)"""
+        if self._batch_jobs:
+            self._batch_jobs.start()
+
+    def _is_ai_degraded(self) -> bool:
+        """Check whether no AI backend can serve at full speed"""
+        return bool(self._chat_router and self._chat_router.is_degraded())
+
+    async def _initialize_gemini(self, api_key: str) -> None:
+        """Initialize the Gemini fallback backend if its SDK is installed
+        
+        Args:
+            api_key: Google API key
+        """
+        try:
+            from src.services.api.gemini import GeminiAPI
+        except ImportError as e:
+            logger.warning(f"Gemini SDK not installed - Gemini fallback disabled: {e}")
+            return
+        gemini_api = GeminiAPI(api_key, self._notification_channel)
+        try:
+            await gemini_api.initialize()
+        except Exception as e:
+            logger.error(f"Failed to initialize Gemini API - continuing without fallback: {e}")
+            await gemini_api.close()
+            return
+        self._gemini_api = gemini_api
+        self._api_states["gemini"] = True
+        logger.info("Initialized Gemini API")
+
     def dnf(self) -> DNFAPI:
         """Get DNF API client
 
@@ -185,7 +336,10 @@ class APIService:
         try:
             # Initialize Steam API
             steam_key = self._get_required_key(credentials, "STEAM_API_KEY")
-            self._steam_api = SteamAPI(steam_key)
+            self._steam_api = SteamAPI(
+                steam_key,
+                watchlist=SteamAPI.parse_watchlist(credentials.get("STEAM_WATCHLIST"))
+            )
             await self._steam_api.initialize()
             self._api_states["steam"] = True
             logger.info("Initialized Steam API")
@@ -212,6 +366,23 @@ class APIService:
                 self._api_states["claude"] = True
                 logger.info("Initialized Claude API")
 
+                # Bulk AI work goes through message batches, outside the chat rate limits.
+                # The worker starts with start_batch_jobs once Discord channels resolve
+                self._batch_jobs = BatchJobQueue(
+                    lambda: self._claude_api.client if self._claude_api else None,
+                    on_usage=self._claude_api.record_batch_usage,
+                )
+
+            # Initialize Gemini as a chat fallback if credentials provided
+            if credentials.get("GEMINI_API_KEY"):
+                await self._initialize_gemini(credentials["GEMINI_API_KEY"])
+
+            # Route chat across the available AI backends, Claude preferred
+            chat_backends = [api for api in (self._claude_api, self._gemini_api) if api is not None]
+            if chat_backends:
+                self._chat_router = ChatRouter(chat_backends)
+                logger.info(f"AI chat router backends: {[api.backend_name for api in chat_backends]}")
+
             # Initialize DNF API with Neople API key
             if "NEOPLE_API_KEY" in credentials:
                 self._dnf_api = DNFAPI(credentials["NEOPLE_API_KEY"])
@@ -222,6 +393,12 @@ class APIService:
                 logger.warning("Neople API key not provided - DNF API will not be available")
                 self._api_states["dnf"] = False
 
+            # Optional Prometheus text dump of request metrics
+            metrics_file = os.getenv("MUMU_METRICS_FILE")
+            if metrics_file:
+                self._metrics_task = asyncio.create_task(self._metrics_dump_loop(metrics_file))
+                logger.info(f"Writing request metrics to {metrics_file}")
+
             self._initialized = True
             logger.info("API service initialization complete")
 
@@ -291,13 +468,27 @@ class APIService:
     async def close(self) -> None:
         """Clean up all API clients"""
         try:
+            # Stop in-flight AI requests before their clients go away
+            self._ai_scheduler.cancel_all()
+            
+            if self._metrics_task:
+                self._metrics_task.cancel()
+                self._metrics_task = None
+            
+            # Unfinished batch jobs stay stored and are collected after a restart
+            if self._batch_jobs:
+                await self._batch_jobs.stop()
+                self._batch_jobs.close()
+                self._batch_jobs = None
+            
             # Create a list of API clients to clean up
             apis_to_cleanup = [
                 ("Steam", self._steam_api),
                 ("Population", self._population_api),
                 ("Exchange", self._exchange_api),
                 ("DNF", self._dnf_api),
-                ("Claude", self._claude_api)
+                ("Claude", self._claude_api),
+                ("Gemini", self._gemini_api)
             ]
             await self._cleanup_apis(apis_to_cleanup)
             
@@ -311,6 +502,8 @@ class APIService:
             self._exchange_api = None
             self._dnf_api = None
             self._claude_api = None
+            self._gemini_api = None
+            self._chat_router = None
             
             logger.info("All API clients cleaned up")
             
@@ -0,0 +1,377 @@
+import asyncio
+import hashlib
+import heapq
+import json
+import logging
+import os
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, MutableMapping, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize SDK content blocks (pydantic models) to plain dicts"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def serialize_messages(messages: List[Message]) -> bytes:
+    """Serialize a message history to compact JSON bytes"""
+    return json.dumps(
+        messages, default=_json_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def message_digest(message: Message) -> bytes:
+    """Content hash of a message that survives spilling and rehydration
+
+    Rehydrated histories hold new (plain dict) objects, so identity checks
+    no longer match; the serialized form is identical either way.
+    """
+    return hashlib.blake2b(serialize_messages([message]), digest_size=16).digest()
+
+
+class ChatSessionStore(MutableMapping[int, List[Message]]):
+    """Memory-budgeted chat history store with LRU eviction
+
+    Each history is sized by its serialized form when it is stored (call
+    ``resize`` after editing a stored history in place). When the total
+    exceeds ``max_bytes``, the least recently used sessions are evicted; with
+    a ``spill_dir`` they are written there zlib-compressed and rehydrated by
+    ``load``, otherwise they are dropped. Inside an event loop the compression
+    and file I/O run in a worker thread. Indexing never touches the disk: a
+    spilled session counts as contained but raises ``KeyError`` until it is
+    loaded. Rehydrated content blocks come back as plain
+    dicts, which the API accepts as-is.
+
+    The store only deletes spill files it wrote itself; leftovers of an
+    earlier process are removed by an explicit ``purge_stale_spills`` call.
+
+    Attributes:
+        max_bytes (int): Budget for resident histories
+        spill_dir (Optional[str]): Directory for evicted histories
+    """
+
+    def __init__(self, max_bytes: int, spill_dir: Optional[str] = None) -> None:
+        """Initialize session store
+
+        Args:
+            max_bytes: Budget for resident histories in serialized bytes
+            spill_dir: Directory for evicted histories (None drops them instead)
+        """
+        if max_bytes <= 0:
+            raise ValueError("Invalid session store budget")
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._sessions: "OrderedDict[int, List[Message]]" = OrderedDict()
+        self._sizes: Dict[int, int] = {}
+        self._spilled: Dict[int, Tuple[str, int]] = {}  # session -> (file, compressed bytes)
+        self._spilling: Dict[int, List[Message]] = {}  # Evicted sessions still being written
+        self._spill_tasks: Set[asyncio.Task] = set()
+        self._spill_seq = 0
+        self._total_bytes = 0
+        self.evictions = 0
+        self.rehydrations = 0
+
+    @property
+    def total_bytes(self) -> int:
+        """Serialized size of all resident histories"""
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._sessions) + len(self._spilling) + len(self._spilled)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(list(self._sessions) + list(self._spilling) + list(self._spilled))
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._sessions or key in self._spilling or key in self._spilled
+
+    def __getitem__(self, key: int) -> List[Message]:
+        if key in self._sessions:
+            self._sessions.move_to_end(key)
+            return self._sessions[key]
+        if key in self._spilling:
+            # Still being written; the finished file is discarded
+            messages = self._spilling.pop(key)
+            self[key] = messages
+            return messages
+        # Spilled sessions are only read back through load, off the event loop
+        raise KeyError(key)
+
+    def __setitem__(self, key: int, messages: List[Message]) -> None:
+        self._discard_spill(key)
+        self._sessions[key] = messages
+        self._sessions.move_to_end(key)
+        self._measure(key)
+
+    def __delitem__(self, key: int) -> None:
+        found = key in self
+        if key in self._sessions:
+            del self._sessions[key]
+            self._total_bytes -= self._sizes.pop(key, 0)
+        self._discard_spill(key)
+        if not found:
+            raise KeyError(key)
+
+    async def load(self, key: int) -> Optional[List[Message]]:
+        """Get a session, rehydrating it in a worker thread if it was spilled
+
+        Args:
+            key: Session key
+
+        Returns:
+            Optional[List[Message]]: The history, or None if there is none
+        """
+        if key in self._sessions or key in self._spilling:
+            return self[key]
+        entry = self._spilled.pop(key, None)
+        if entry is None:
+            return None
+        try:
+            messages = await asyncio.to_thread(self._read_spill, entry[0])
+        except Exception as e:
+            logger.warning(f"Failed to rehydrate chat session {key}: {e}")
+            return None
+        if key in self._sessions:
+            # Replaced while it was being read
+            return self[key]
+        self.rehydrations += 1
+        self[key] = messages
+        return messages
+
+    async def flush(self) -> None:
+        """Wait for spills that are still being written"""
+        if self._spill_tasks:
+            await asyncio.gather(*list(self._spill_tasks), return_exceptions=True)
+
+    def resize(self, key: int) -> None:
+        """Re-measure a resident session whose history was edited in place"""
+        if key in self._sessions:
+            self._measure(key)
+
+    def purge_stale_spills(self) -> int:
+        """Delete spill files in the spill directory that this store did not write
+
+        Spilled histories do not outlive the process that owned their expiry
+        state, so this is called once at startup.
+
+        Returns:
+            int: Number of files removed
+        """
+        if not self.spill_dir or not os.path.isdir(self.spill_dir):
+            return 0
+        own = {os.path.basename(path) for path, _ in self._spilled.values()}
+        removed = 0
+        for name in os.listdir(self.spill_dir):
+            if name.endswith(".json.z") and name not in own:
+                self._remove_file(os.path.join(self.spill_dir, name))
+                removed += 1
+        if removed:
+            logger.info(f"Removed {removed} stale spilled chat sessions")
+        return removed
+
+    def resident_items(self) -> List[Tuple[int, List[Message]]]:
+        """Get in-memory sessions without rehydrating spilled ones"""
+        return list(self._sessions.items())
+
+    def session_bytes(self) -> Dict[int, int]:
+        """Get serialized bytes per resident session"""
+        return dict(self._sizes)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get store statistics"""
+        return {
+            "resident_sessions": len(self._sessions),
+            "spilled_sessions": len(self._spilled) + len(self._spilling),
+            "resident_bytes": self._total_bytes,
+            "spilled_bytes": sum(size for _, size in self._spilled.values()),
+            "max_bytes": self.max_bytes,
+            "largest_session_bytes": max(self._sizes.values(), default=0),
+            "evictions": self.evictions,
+            "rehydrations": self.rehydrations,
+        }
+
+    def _measure(self, key: int) -> None:
+        """Size a resident session and evict others if over budget"""
+        try:
+            size = len(serialize_messages(self._sessions[key]))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Could not size chat session {key}: {e}")
+            size = self._sizes.get(key, 0)
+
+        self._total_bytes += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+        self._enforce_budget(protect=key)
+
+    def _enforce_budget(self, protect: Optional[int] = None) -> None:
+        """Evict least recently used sessions until the budget is met
+
+        Args:
+            protect: Session that must stay resident (the one just written)
+        """
+        while self._total_bytes > self.max_bytes:
+            victim = next((key for key in self._sessions if key != protect), None)
+            if victim is None:
+                break
+            self._evict(victim)
+
+    def _evict(self, key: int) -> None:
+        """Move a session out of memory, spilling it if configured"""
+        messages = self._sessions.pop(key)
+        size = self._sizes.pop(key, 0)
+        self._total_bytes -= size
+        self.evictions += 1
+
+        if not self.spill_dir:
+            logger.info(f"Evicted chat session {key} ({size:,} bytes)")
+            return
+
+        try:
+            # Serialized here, since the history may be edited once control returns to the loop
+            data = serialize_messages(messages)
+        except Exception as e:
+            logger.warning(f"Failed to spill chat session {key}, dropping it: {e}")
+            return
+
+        self._spill_seq += 1
+        path = os.path.join(self.spill_dir, f"{key}-{self._spill_seq}.json.z")
+        self._spilling[key] = messages
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._finish_spill(key, messages, path, self._write_spill(path, data))
+            return
+
+        task = loop.create_task(asyncio.to_thread(self._write_spill, path, data))
+        self._spill_tasks.add(task)
+
+        def done(task: asyncio.Task) -> None:
+            self._spill_tasks.discard(task)
+            written = None if task.cancelled() else task.result()
+            self._finish_spill(key, messages, path, written)
+
+        task.add_done_callback(done)
+
+    def _write_spill(self, path: str, data: bytes) -> Optional[int]:
+        """Compress and write a serialized history
+
+        Returns:
+            Optional[int]: Compressed size, or None if writing failed
+        """
+        try:
+            payload = zlib.compress(data, 6)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(payload)
+            return len(payload)
+        except Exception as e:
+            logger.warning(f"Failed to write spilled chat session {path}: {e}")
+            return None
+
+    def _finish_spill(self, key: int, messages: List[Message], path: str, written: Optional[int]) -> None:
+        """Track a written spill file, unless the session came back meanwhile"""
+        if self._spilling.get(key) is not messages:
+            # Read back, replaced or deleted while being written
+            if written is not None:
+                self._remove_file(path)
+            return
+        del self._spilling[key]
+        if written is None:
+            logger.warning(f"Dropped chat session {key} after a failed spill")
+            return
+        self._spilled[key] = (path, written)
+        logger.info(f"Spilled chat session {key} ({written:,} bytes compressed)")
+
+    def _read_spill(self, path: str) -> List[Message]:
+        """Read, decompress and delete a spill file"""
+        try:
+            with open(path, "rb") as f:
+                return json.loads(zlib.decompress(f.read()).decode("utf-8"))
+        finally:
+            self._remove_file(path)
+
+    def _discard_spill(self, key: int) -> None:
+        self._spilling.pop(key, None)
+        entry = self._spilled.pop(key, None)
+        if entry is not None:
+            self._remove_file(entry[0])
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to remove spilled session file {path}: {e}")
+
+
+class SessionExpiryQueue:
+    """Min-heap of session deadlines ordered by last touch
+
+    Touching a session pushes a fresh deadline in O(log n); superseded heap
+    entries are skipped lazily when popped, and the heap is rebuilt once
+    stale entries outnumber live ones.
+
+    Attributes:
+        ttl (float): Seconds of inactivity before a session expires
+    """
+
+    def __init__(self, ttl: float, timer: Callable[[], float] = time.monotonic) -> None:
+        """Initialize expiry queue
+
+        Args:
+            ttl: Seconds of inactivity before a session expires
+            timer: Clock used for deadlines
+        """
+        self.ttl = ttl
+        self._timer = timer
+        self._deadlines: Dict[int, float] = {}
+        self._heap: List[Tuple[float, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._deadlines
+
+    def touch(self, key: int) -> None:
+        """Push a session's deadline back by the TTL"""
+        deadline = self._timer() + self.ttl
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, key))
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [(deadline, key) for key, deadline in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    def discard(self, key: int) -> None:
+        """Stop tracking a session; its heap entries are skipped when popped"""
+        self._deadlines.pop(key, None)
+
+    def is_expired(self, key: int) -> bool:
+        """Check whether a tracked session is past its deadline"""
+        deadline = self._deadlines.get(key)
+        return deadline is None or deadline <= self._timer()
+
+    def pop_expired(self) -> List[int]:
+        """Remove and return every session past its deadline"""
+        now = self._timer()
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, key = heapq.heappop(self._heap)
+            if self._deadlines.get(key) == deadline:
+                del self._deadlines[key]
+                expired.append(key)
+        return expired
+
+    def clear(self) -> None:
+        """Forget all sessions"""
+        self._deadlines.clear()
+        self._heap.clear()
@@ -1,11 +1,14 @@
+import asyncio
 import logging
-from typing import Optional, Tuple, List, Dict, Any, cast
+from typing import Optional, Tuple, List, Dict, Any, Iterable, Set, cast
 import time
-import re
 
 import aiohttp
 from src.services.api.base import BaseAPI, RateLimitConfig
+from src.services.api.steam_store import StoreMetadata, StorePageParser
+from src.services.player_history import PlayerHistoryStore
 from src.utils.api_types import GameInfo
+from src.utils.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -16,11 +19,26 @@ class SteamAPI(BaseAPI[GameInfo]):
     PLAYER_COUNT_URL = "https://api.steampowered.com/ISteamUserStats/GetNumberOfCurrentPlayers/v1/"
     STORE_PAGE_URL = "https://store.steampowered.com/app/{}"
 
-    def __init__(self, api_key: str) -> None:
+    COLLECT_INTERVAL = 300  # Seconds between watch-list samples
+    COMPACT_INTERVAL = 3600  # Seconds between history store compactions
+    STORE_PAGE_CHUNK_SIZE = 16 * 1024
+    STORE_PAGE_MAX_BYTES = 1024 * 1024  # Give up on pages without the expected markup
+    STORE_METADATA_TTL = 6 * 3600  # Reviews, tags and the peak change slowly
+
+    def __init__(
+        self,
+        api_key: str,
+        watchlist: Optional[Iterable[int]] = None,
+        history_store: Optional[PlayerHistoryStore] = None,
+        collect_interval: int = COLLECT_INTERVAL,
+    ) -> None:
         """Initialize Steam API client
         
         Args:
             api_key: Steam Web API key
+            watchlist: App IDs whose player counts are sampled in the background
+            history_store: Store for collected samples (created lazily if omitted)
+            collect_interval: Seconds between watch-list samples
         """
         super().__init__(api_key)
         self._rate_limits = {
@@ -28,6 +46,108 @@ class SteamAPI(BaseAPI[GameInfo]):
             "player_count": RateLimitConfig(60, 60),  # 60 requests per minute
             "details": RateLimitConfig(150, 300),  # 150 requests per 5 minutes
         }
+        self._watchlist: Set[int] = set(watchlist or [])
+        self._history_store = history_store
+        self._collect_interval = collect_interval
+        self._collector_task: Optional[asyncio.Task] = None
+        self._last_compaction = 0.0
+        self._store_metadata: TTLCache[StoreMetadata] = TTLCache(256, self.STORE_METADATA_TTL)
+        self._request_metrics.register_cache("store_metadata", self._store_metadata)
+
+    @staticmethod
+    def parse_watchlist(value: Optional[str]) -> List[int]:
+        """Parse a comma separated list of app IDs
+
+        Args:
+            value: String such as "730,570,578080"
+
+        Returns:
+            List[int]: Parsed app IDs (invalid entries are skipped)
+        """
+        app_ids = []
+        for part in (value or "").split(","):
+            part = part.strip()
+            if part.isdigit():
+                app_ids.append(int(part))
+            elif part:
+                logger.warning(f"Ignoring invalid Steam app id in watch-list: {part}")
+        return app_ids
+
+    @property
+    def history_store(self) -> PlayerHistoryStore:
+        """Get player history store, creating it on first use"""
+        if self._history_store is None:
+            self._history_store = PlayerHistoryStore()
+        return self._history_store
+
+    @property
+    def watchlist(self) -> Set[int]:
+        """Get app IDs currently sampled by the collector"""
+        return self._watchlist.copy()
+
+    async def initialize(self) -> None:
+        """Initialize session and start the player count collector"""
+        await super().initialize()
+        self._watchlist |= self.history_store.get_watchlist()
+        if self._collector_task is None or self._collector_task.done():
+            self._collector_task = asyncio.create_task(self._collect_loop())
+
+    def track_app(self, app_id: int) -> None:
+        """Add an app to the persisted watch-list
+
+        Args:
+            app_id: Steam app ID
+        """
+        self._watchlist.add(app_id)
+        self.history_store.add_to_watchlist(app_id)
+
+    def untrack_app(self, app_id: int) -> None:
+        """Remove an app from the persisted watch-list
+
+        Args:
+            app_id: Steam app ID
+        """
+        self._watchlist.discard(app_id)
+        self.history_store.remove_from_watchlist(app_id)
+
+    async def _collect_loop(self) -> None:
+        """Sample watch-list player counts until cancelled"""
+        while True:
+            try:
+                await self.collect_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error collecting Steam player counts: {e}")
+            await asyncio.sleep(self._collect_interval)
+
+    async def collect_once(self) -> int:
+        """Sample every watch-list app once and store the results
+
+        Returns:
+            int: Number of samples recorded
+        """
+        if not self._watchlist:
+            return 0
+
+        samples = []
+        for app_id in sorted(self._watchlist):
+            try:
+                samples.append((app_id, await self._fetch_player_count(app_id)))
+            except Exception as e:
+                # Skip failed samples rather than recording a fake zero
+                logger.warning(f"Skipping player count sample for app {app_id}: {e}")
+
+        store = self.history_store
+        await asyncio.to_thread(store.record_many, samples)
+
+        now = time.time()
+        if now - self._last_compaction >= self.COMPACT_INTERVAL:
+            await asyncio.to_thread(store.compact, now)
+            self._last_compaction = now
+
+        logger.debug(f"Recorded {len(samples)} Steam player count samples")
+        return len(samples)
 
     def _calculate_similarity(self, query: str, game_name: str) -> float:
         """Calculate similarity between query and game name
@@ -210,36 +330,55 @@ class SteamAPI(BaseAPI[GameInfo]):
             ValueError: If request fails
         """
         try:
-            params = {
-                "appid": app_id,
-                "key": self.api_key
-            }
+            return await self._fetch_player_count(app_id)
+        except Exception as e:
+            logger.error(f"Error getting player count for app {app_id}: {e}")
+            return 0  # Return 0 for failed requests
 
-            data = await self._make_request(
-                self.PLAYER_COUNT_URL,
-                params=params,
-                endpoint="player_count"
-            )
+    async def _fetch_player_count(self, app_id: int) -> int:
+        """Fetch current player count, raising on failure
+
+        Args:
+            app_id: Steam app ID
+
+        Returns:
+            int: Current player count
 
-            if not data or "response" not in data:
-                raise ValueError("Invalid response format")
+        Raises:
+            ValueError: If request fails or response is malformed
+        """
+        params = {
+            "appid": app_id,
+            "key": self.api_key
+        }
 
-            player_count = data["response"].get("player_count")
-            if player_count is None:
-                raise ValueError("Player count not found in response")
+        data = await self._make_request(
+            self.PLAYER_COUNT_URL,
+            params=params,
+            endpoint="player_count"
+        )
 
-            return cast(int, player_count)
+        if not data or "response" not in data:
+            raise ValueError("Invalid response format")
 
-        except Exception as e:
-            logger.error(f"Error getting player count for app {app_id}: {e}")
-            return 0  # Return 0 for failed requests
+        player_count = data["response"].get("player_count")
+        if player_count is None:
+            raise ValueError("Player count not found in response")
+
+        return cast(int, player_count)
 
-    async def get_player_history(self, app_id: int, include_history: bool = False) -> Dict[str, Any]:
+    async def get_player_history(
+        self, app_id: int, include_history: bool = False, hours: int = 24
+    ) -> Dict[str, Any]:
         """Get historical player count data for game
+
+        Tracked apps are served from locally collected samples; other apps fall
+        back to scraping the 24-hour peak from the store page.
         
         Args:
             app_id: Steam app ID
             include_history: Whether to include full history data
+            hours: History window in hours (local data only)
 
         Returns:
             Dict containing:
@@ -250,45 +389,20 @@ class SteamAPI(BaseAPI[GameInfo]):
             ValueError: If request fails
         """
         try:
-            url = self.STORE_PAGE_URL.format(app_id)
-            
-            # Add special headers to avoid age check redirects
-            headers = {
-                "Cookie": "birthtime=0; mature_content=1",
-                "User-Agent": "Mozilla/5.0"
-            }
-            
-            # Use direct aiohttp request instead of _make_request to get raw HTML
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status != 200:
-                        logger.error(f"Failed to get store page: {response.status}")
-                        return {
-                            "peak_24h": 0,
-                            "history": [] if include_history else None
-                        }
-                    
-                    data = await response.text()
-
-            if not data:
-                return {
-                    "peak_24h": 0,
-                    "history": [] if include_history else None
-                }
-
-            # Extract peak players from the store page HTML
-            peak_match = re.search(r'24-hour peak:\s*([0-9,]+)', data)
-            peak_24h = 0
-            if peak_match:
-                try:
-                    peak_str = peak_match.group(1).replace(',', '')
-                    peak_24h = int(peak_str)
-                    logger.info(f"Found 24h peak for app {app_id}: {peak_24h}")
-                except (ValueError, IndexError) as e:
-                    logger.error(f"Error parsing peak count: {e}")
+            store = self.history_store
+            if await asyncio.to_thread(store.has_data, app_id, 24):
+                peak_24h = await asyncio.to_thread(store.get_peak, app_id, 24)
+                history = None
+                if include_history:
+                    history = await asyncio.to_thread(store.get_history, app_id, hours)
+                return {"peak_24h": peak_24h, "history": history}
+        except Exception as e:
+            logger.error(f"Error reading local player history for app {app_id}: {e}")
 
+        try:
+            metadata = await self.get_store_metadata(app_id)
             return {
-                "peak_24h": peak_24h,
+                "peak_24h": metadata["peak_24h"] if metadata else 0,
                 "history": [] if include_history else None
             }
 
@@ -299,6 +413,77 @@ class SteamAPI(BaseAPI[GameInfo]):
                 "history": [] if include_history else None
             }
 
+    async def get_store_metadata(self, app_id: int) -> Optional[StoreMetadata]:
+        """Extract peak, review and tag metadata from the store page
+
+        The page is streamed in chunks and the download is abandoned as soon
+        as every field is found, so most of the page is never transferred.
+
+        Args:
+            app_id: Steam app ID
+
+        Returns:
+            Optional[StoreMetadata]: Extracted metadata, or None if the page is unavailable
+        """
+        cached = self._store_metadata.get(app_id)
+        if cached is not None:
+            return cached
+        url = self.STORE_PAGE_URL.format(app_id)
+
+        # Add special headers to avoid age check redirects
+        headers = {
+            "Cookie": "birthtime=0; mature_content=1",
+            "User-Agent": "Mozilla/5.0"
+        }
+
+        parser = StorePageParser()
+        bytes_read = 0
+
+        async def fetch_page() -> bool:
+            nonlocal bytes_read
+            # Read raw HTML directly since _make_request decodes JSON
+            own_session = self._session is None or self._session.closed
+            session = aiohttp.ClientSession() if own_session else self._session
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status >= 500 or response.status == 429:
+                        raise ValueError(f"Store page unavailable: {response.status}")
+                    if response.status != 200:
+                        logger.error(f"Failed to get store page: {response.status}")
+                        return False
+
+                    async for chunk in response.content.iter_chunked(self.STORE_PAGE_CHUNK_SIZE):
+                        bytes_read += len(chunk)
+                        if parser.feed(chunk) or bytes_read >= self.STORE_PAGE_MAX_BYTES:
+                            break
+                    return True
+            finally:
+                if own_session:
+                    await session.close()
+
+        try:
+            # Routed through _make_request for the details rate limit and circuit breaker
+            if not await self._make_request(url, endpoint="details", custom_request=fetch_page):
+                return None
+        except ValueError as e:
+            logger.error(f"Error getting store page for app {app_id}: {e}")
+            return None
+
+        metadata = parser.close()
+        logger.debug(f"Parsed store page for app {app_id} after {bytes_read} bytes: {metadata}")
+        self._store_metadata.set(app_id, metadata)
+        return metadata
+
     async def close(self) -> None:
         """Cleanup resources"""
+        if self._collector_task and not self._collector_task.done():
+            self._collector_task.cancel()
+            try:
+                await self._collector_task
+            except asyncio.CancelledError:
+                pass
+        self._collector_task = None
+        if self._history_store is not None:
+            self._history_store.close()
+            self._history_store = None
         await super().close()
@@ -0,0 +1,143 @@
+import codecs
+import html
+import re
+from typing import List, Optional, TypedDict
+
+
+class StoreMetadata(TypedDict):
+    """Metadata extracted from a Steam store page"""
+    peak_24h: int
+    review_summary: Optional[str]
+    review_count: int
+    review_score: Optional[int]
+    tags: List[str]
+
+
+class StorePageParser:
+    """Incremental extractor for Steam store page metadata
+
+    Chunks are decoded incrementally and scanned inside a bounded window, so
+    the full page is never held in memory. Only ``OVERLAP`` characters are
+    carried between chunks to catch matches that straddle a chunk boundary.
+    Everything we need lives in the page header, so parsing is complete once
+    all fields are found or the purchase area is reached.
+    """
+
+    OVERLAP = 1024  # Characters carried between chunks
+    TAG_GAP = 4096  # Characters past the last tag before the tag list is closed
+    MAX_TAGS = 20
+
+    _PEAK_RE = re.compile(r"24-hour peak:\s*([0-9,]+)")
+    _REVIEW_SUMMARY_RE = re.compile(
+        r'class="game_review_summary[^"]*"[^>]*>([^<]+)<'
+    )
+    _REVIEW_COUNT_RE = re.compile(r'itemprop="reviewCount"\s+content="(\d+)"')
+    _REVIEW_SCORE_RE = re.compile(r'itemprop="ratingValue"\s+content="(\d+)"')
+    _TAG_RE = re.compile(r'class="app_tag"[^>]*>\s*([^<]+?)\s*</a>')
+    _END_MARKER = 'id="game_area_purchase"'
+
+    def __init__(self) -> None:
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer = ""
+        self._offset = 0  # Absolute position of the start of the buffer
+        self._last_tag_end = -1
+        self._ended = False
+        self.metadata: StoreMetadata = {
+            "peak_24h": 0,
+            "review_summary": None,
+            "review_count": 0,
+            "review_score": None,
+            "tags": [],
+        }
+        self._found = {"peak": False, "summary": False, "count": False, "tags": False}
+
+    @property
+    def done(self) -> bool:
+        """Whether no further input is needed"""
+        return self._ended or all(self._found.values())
+
+    def feed(self, chunk: bytes) -> bool:
+        """Scan the next chunk of the page
+
+        Args:
+            chunk: Raw response bytes
+
+        Returns:
+            bool: True once parsing is complete and the response can be dropped
+        """
+        if self.done:
+            return True
+
+        self._buffer += self._decoder.decode(chunk)
+        self._scan()
+
+        # Keep only the tail so matches spanning chunks are still seen
+        if len(self._buffer) > self.OVERLAP:
+            cut = len(self._buffer) - self.OVERLAP
+            self._buffer = self._buffer[cut:]
+            self._offset += cut
+
+        return self.done
+
+    def close(self) -> StoreMetadata:
+        """Flush the decoder and return the extracted metadata"""
+        if not self.done:
+            self._buffer += self._decoder.decode(b"", final=True)
+            self._scan(final=True)
+        return self.metadata
+
+    def _scan(self, final: bool = False) -> None:
+        """Search the current window for every field not found yet
+
+        Args:
+            final: Whether no more input follows, so matches may touch the end of the window
+        """
+        buf = self._buffer
+
+        if not self._found["peak"]:
+            match = self._PEAK_RE.search(buf)
+            # A number touching the end of the window may continue in the next chunk
+            if match and (final or match.end() < len(buf)):
+                self.metadata["peak_24h"] = int(match.group(1).replace(",", ""))
+                self._found["peak"] = True
+
+        if not self._found["summary"]:
+            match = self._REVIEW_SUMMARY_RE.search(buf)
+            if match:
+                self.metadata["review_summary"] = html.unescape(match.group(1).strip())
+                self._found["summary"] = True
+
+        if not self._found["count"]:
+            match = self._REVIEW_COUNT_RE.search(buf)
+            if match:
+                self.metadata["review_count"] = int(match.group(1))
+                self._found["count"] = True
+
+        if self.metadata["review_score"] is None:
+            # Optional: not every page carries a rating, so it never gates completion
+            match = self._REVIEW_SCORE_RE.search(buf)
+            if match:
+                self.metadata["review_score"] = int(match.group(1))
+
+        if not self._found["tags"]:
+            self._scan_tags(buf)
+
+        if self._END_MARKER in buf:
+            self._ended = True
+
+    def _scan_tags(self, buf: str) -> None:
+        """Collect tags not seen in a previous window"""
+        tags = self.metadata["tags"]
+        for match in self._TAG_RE.finditer(buf):
+            end = self._offset + match.end()
+            if end <= self._last_tag_end:
+                continue  # Already collected from the overlap
+            tags.append(html.unescape(match.group(1)))
+            self._last_tag_end = end
+
+        window_end = self._offset + len(buf)
+        if len(tags) >= self.MAX_TAGS or (
+            tags and window_end - self._last_tag_end > self.TAG_GAP
+        ):
+            del tags[self.MAX_TAGS:]
+            self._found["tags"] = True
@@ -0,0 +1,263 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+FENCE = "```"
+_CITATION = re.compile(r"\[(\d+)\]")
+_HTML_SCRIPT = re.compile(r"<(sub|sup)>(.*?)</\1>")
+_SOURCES_HEADING = re.compile(r"(?:Sources|출처):")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT = re.compile(r"(?<=\.) ")
+
+# Line prefixes that get an emoji when decorating (checked in order)
+_DECORATIONS: Tuple[Tuple[Tuple[str, ...], str], ...] = (
+    (("Note:", "Warning:", "주의:", "참고:"), "📝 "),
+    (("Error:", "오류:", "에러:"), "⚠️ "),
+    (("Example:", "예시:", "예:"), "💡 "),
+    (("Step", "단계"), "✅ "),
+)
+
+EMPTY_RESPONSE = "미안해, 응답을 생성하지 못했어."
+
+
+class ResponseFormatter:
+    """Single-pass line formatter for AI replies
+
+    Text is consumed line by line through a small state machine that tracks
+    code fences, so every transform (fence labels, citation links, HTML
+    sub/superscripts, emoji decoration, paragraph spacing) happens in one
+    pass. Text inside code blocks is passed through untouched. Text can be
+    fed as it streams in: ``feed`` returns the formatted text of the lines
+    completed so far, and the concatenation of every ``feed`` result and
+    ``flush`` equals ``format`` of the whole text.
+
+    Attributes:
+        minimal (bool): Only label fences and tidy blank lines (for search-grounded replies)
+        decorate (bool): Prefix notes, errors, examples, steps and questions with emojis
+        spaced (bool): Put every text line in its own paragraph instead of Korean paragraph rules
+        mark_sources (bool): Append a sources heading when bare citation markers are left
+    """
+
+    def __init__(
+        self,
+        minimal: bool = False,
+        citation_links: Optional[Dict[int, str]] = None,
+        decorate: bool = False,
+        spaced: bool = False,
+        mark_sources: bool = False,
+    ) -> None:
+        """Initialize formatter
+
+        Args:
+            minimal: Only label fences and tidy blank lines
+            citation_links: Markdown replacing each ``[n]`` citation marker
+            decorate: Prefix special lines with emojis and normalize bullets
+            spaced: Separate every text line with a blank line
+            mark_sources: Append "**Sources:**" after unresolved citations
+        """
+        self.minimal = minimal
+        self.decorate = decorate
+        self.spaced = spaced
+        self.mark_sources = mark_sources
+        self._citation_links = citation_links or {}
+        self._buffer = ""
+        self._in_code = False
+        self._started = False  # Whether any line was emitted yet
+        self._blank_pending = False
+        self._previous = ""  # Last emitted text line, for paragraph rules
+        self._cited = False  # Citation markers seen without a sources heading after them
+
+    @property
+    def pending(self) -> str:
+        """Unfinished last line, unformatted (useful for streaming previews)"""
+        return self._buffer
+
+    def feed(self, text: str) -> str:
+        """Consume text and return the formatted output of completed lines
+
+        Args:
+            text: Newly received text
+
+        Returns:
+            str: Formatted text to append to the previous output
+        """
+        self._buffer += text
+        if "\n" not in self._buffer:
+            return ""
+        *lines, self._buffer = self._buffer.split("\n")
+        return "".join(self._line(line) for line in lines)
+
+    def flush(self) -> str:
+        """Format the remaining text and finish the reply
+
+        Returns:
+            str: Formatted text to append to the previous output
+        """
+        output = self._line(self._buffer) if self._buffer else ""
+        self._buffer = ""
+        if self.mark_sources and self._cited:
+            output += self._emit("**Sources:**", blank_before=True)
+            self._cited = False
+        return output
+
+    def format(self, text: str) -> str:
+        """Format a complete reply in one call"""
+        return self.feed(text) + self.flush()
+
+    def _emit(self, line: str, blank_before: bool = False) -> str:
+        """Render a line with the separator it needs after earlier output"""
+        if not self._started:
+            self._started = True
+            self._blank_pending = False
+            return line
+        separator = "\n\n" if blank_before or self._blank_pending else "\n"
+        self._blank_pending = False
+        return separator + line
+
+    def _line(self, line: str) -> str:
+        """Run one line through the state machine"""
+        line = line.rstrip()
+        if FENCE in line:
+            self._in_code = not self._in_code
+            if self._in_code and line.strip() == FENCE:
+                line = FENCE + "text"
+            self._previous = line
+            return self._emit(line)
+
+        if self._in_code:
+            return self._emit(line)
+
+        if not self.minimal:
+            line = line.strip()
+        if not line:
+            # Blank runs collapse into one, emitted only before the next line
+            self._blank_pending = self._started
+            return ""
+
+        if self._citation_links:
+            line = _CITATION.sub(self._link_citation, line)
+        if self.mark_sources:
+            if _CITATION.search(line):
+                self._cited = True
+            elif self._cited and _SOURCES_HEADING.search(line):
+                self._cited = False
+
+        if self.minimal:
+            return self._emit(line)
+
+        if "<su" in line:
+            line = _HTML_SCRIPT.sub(self._replace_script, line)
+        if self.decorate:
+            line = self._decorate(line)
+
+        blank_before = self.spaced or (
+            bool(self._previous) and (
+                line.startswith(("**", "#")) or self._previous.endswith(":")
+            )
+        )
+        self._previous = line
+        return self._emit(line, blank_before=blank_before)
+
+    def _link_citation(self, match: "re.Match[str]") -> str:
+        return self._citation_links.get(int(match.group(1)), match.group(0))
+
+    @staticmethod
+    def _replace_script(match: "re.Match[str]") -> str:
+        if match.group(1) == "sub":
+            return f"_{match.group(2)}_"
+        return f"^{match.group(2)}"
+
+    @staticmethod
+    def _decorate(line: str) -> str:
+        if line.endswith("?"):
+            line = "❓ " + line
+        else:
+            for prefixes, emoji in _DECORATIONS:
+                if line.startswith(prefixes):
+                    line = emoji + line
+                    break
+        if line.startswith(("- ", "* ")):
+            line = "• " + line[2:]
+        return line
+
+
+def format_sources(source_links: List[Tuple[str, str, str]], limit: Optional[int] = 5) -> str:
+    """Format source links for the sources display
+
+    Args:
+        source_links: (title, url, domain) tuples; duplicate URLs are dropped
+        limit: Maximum number of sources shown, or None for all
+
+    Returns:
+        str: Formatted source list
+    """
+    seen_urls = set()
+    lines = []
+    for title, url, domain in source_links:
+        if url in seen_urls:
+            continue
+        seen_urls.add(url)
+        if limit is not None and len(lines) >= limit:
+            break
+        display_title = title if len(title) <= 60 else title[:57] + "..."
+        lines.append(f"{len(lines) + 1}. **[{display_title}]({url})**\n   {domain}\n\n")
+
+    if not lines:
+        return "No sources available"
+    return "**Sources:**\n\n" + "".join(lines)
+
+
+def format_thinking(thinking_content: str, max_length: int = 1800) -> str:
+    """Format a thinking summary as code blocks of readable size
+
+    Paragraphs become code blocks; paragraphs over 500 characters are
+    split at sentence ends into blocks of about 400 characters.
+
+    Args:
+        thinking_content: Raw thinking text
+        max_length: Length above which later blocks are dropped
+
+    Returns:
+        str: Formatted thinking content
+    """
+    cleaned = thinking_content.strip() if thinking_content else ""
+    if not cleaned:
+        return "No thinking content available"
+
+    blocks: List[str] = []
+    for paragraph in _PARAGRAPH_BREAK.split(cleaned):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= 500:
+            blocks.append(paragraph)
+            continue
+        current = ""
+        for sentence in _SENTENCE_SPLIT.split(paragraph):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            if current and len(current) + len(sentence) + 2 > 400:
+                blocks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            blocks.append(current)
+
+    header = "**추론 과정**\n\n"
+    rendered = [f"```\n{block}\n```\n\n" for block in blocks]
+    footer = f"*추론 과정 요약 ({len(thinking_content)} 자)*"
+    if len(header) + sum(map(len, rendered)) + len(footer) <= max_length:
+        return header + "".join(rendered) + footer
+
+    # Too long: keep whole blocks up to a cut-off, leaving room for the note
+    cutoff = max_length - 200
+    kept, length = [], len(header)
+    for block in rendered:
+        if length + len(block) > cutoff:
+            break
+        kept.append(block)
+        length += len(block)
+    if not kept:
+        return (header + "".join(rendered))[:cutoff] + "...\n\n*[추론 과정이 길어서 잘렸어]*"
+    return header + "".join(kept) + "\n\n*[추론 과정이 길어서 일부만 표시할거야]*"
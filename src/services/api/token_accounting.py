@@ -0,0 +1,167 @@
+import logging
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+
+
+class TokenAccountant:
+    """Incremental prompt token accounting for chat sessions
+
+    Every message's token count is cached once it is known, so estimating
+    the next prompt only costs a local estimate for the new turn. Counts are
+    seeded from the ``usage`` block of each response: the input total pins
+    down the newest user message and the output total gives the assistant
+    message.
+
+    The fixed system/tool overhead is learned per prompt layout (e.g. tool
+    set and session summary), since a changed system prompt shifts every
+    later total. Each response updates its layout's overhead as a moving
+    average, so a single misestimated user turn only nudges it.
+
+    Cached entries are keyed by message identity and keep a reference to the
+    message, so history trimming or copying never returns a stale count for
+    a different message.
+    """
+
+    OVERHEAD_SMOOTHING = 0.2  # Weight of the newest overhead sample
+    MAX_LAYOUTS = 64  # Learned layouts kept before the oldest is forgotten
+
+    def __init__(self, estimator: Callable[[List[Message]], int]) -> None:
+        """Initialize token accountant
+
+        Args:
+            estimator: Local token estimate for a list of messages
+        """
+        self._estimator = estimator
+        # System prompt + tools per layout, learned from usage
+        self._overheads: Dict[Hashable, float] = {}
+        self._sessions: Dict[int, Dict[int, Tuple[Message, int]]] = {}
+
+    def overhead(self, layout: Hashable = None) -> Optional[int]:
+        """Learned token overhead of a prompt layout
+
+        Args:
+            layout: Key of the system prompt and tool layout
+
+        Returns:
+            Optional[int]: Overhead in tokens, or None if not learned yet
+        """
+        overhead = self._overheads.get(layout)
+        return None if overhead is None else round(overhead)
+
+    def estimate(self, session_id: int, messages: List[Message], layout: Hashable = None) -> int:
+        """Estimate prompt tokens for a conversation
+
+        Args:
+            session_id: Chat session key (user ID)
+            messages: Messages that would be sent
+            layout: Key of the system prompt and tool layout
+
+        Returns:
+            int: Cached counts plus local estimates for unseen messages
+        """
+        total, _ = self._sum(session_id, messages)
+        return total + (self.overhead(layout) or 0)
+
+    def observe_usage(
+        self,
+        session_id: int,
+        sent_messages: List[Message],
+        assistant_message: Optional[Message],
+        usage: Any,
+        layout: Hashable = None,
+    ) -> None:
+        """Seed counts from a response's usage block
+
+        Args:
+            session_id: Chat session key (user ID)
+            sent_messages: Messages that were sent, newest user turn last
+            assistant_message: Message stored for the response, if any
+            usage: Response usage with input/output token fields
+            layout: Key of the system prompt and tool layout that was sent
+        """
+        if not sent_messages or usage is None:
+            return
+
+        prompt_total = (
+            int(getattr(usage, "input_tokens", 0) or 0)
+            + int(getattr(usage, "cache_creation_input_tokens", 0) or 0)
+            + int(getattr(usage, "cache_read_input_tokens", 0) or 0)
+        )
+        if prompt_total <= 0:
+            return
+
+        history, newest = sent_messages[:-1], sent_messages[-1]
+        known, _ = self._sum(session_id, history)
+
+        overhead = self._learn_overhead(layout, prompt_total - known - self._estimator([newest]))
+
+        counts = self._sessions.setdefault(session_id, {})
+        # The newest turn absorbs the remainder, so cached sums match the real total
+        counts[id(newest)] = (newest, max(prompt_total - overhead - known, 1))
+
+        if assistant_message is not None:
+            output_tokens = int(getattr(usage, "output_tokens", 0) or 0)
+            counts[id(assistant_message)] = (
+                assistant_message,
+                output_tokens or self._estimator([assistant_message]),
+            )
+
+        # Forget messages that are no longer part of the conversation
+        live = {id(message) for message in sent_messages}
+        if assistant_message is not None:
+            live.add(id(assistant_message))
+        for key in [key for key in counts if key not in live]:
+            del counts[key]
+
+    def _learn_overhead(self, layout: Hashable, sample: int) -> int:
+        """Fold an overhead sample into the layout's moving average
+
+        Returns:
+            int: Updated overhead of the layout
+        """
+        sample = max(sample, 0)
+        previous = self._overheads.get(layout)
+        if previous is None:
+            if len(self._overheads) >= self.MAX_LAYOUTS:
+                del self._overheads[next(iter(self._overheads))]
+            overhead = float(sample)
+        else:
+            overhead = previous + self.OVERHEAD_SMOOTHING * (sample - previous)
+        self._overheads[layout] = overhead
+        logger.debug(f"Prompt overhead sample {sample}, average {overhead:.0f} tokens")
+        return round(overhead)
+
+    def forget_message(self, session_id: int, message: Message) -> None:
+        """Forget the cached count of a message whose content was changed"""
+        counts = self._sessions.get(session_id)
+        if counts is not None:
+            counts.pop(id(message), None)
+
+    def drop(self, session_id: int) -> None:
+        """Forget cached counts for a session"""
+        self._sessions.pop(session_id, None)
+
+    def cached_messages(self, session_id: int) -> int:
+        """Number of messages with a cached count in a session"""
+        return len(self._sessions.get(session_id, {}))
+
+    def _sum(self, session_id: int, messages: List[Message]) -> Tuple[int, int]:
+        """Sum cached counts, estimating messages without one
+
+        Returns:
+            Tuple[int, int]: (token total, number of estimated messages)
+        """
+        counts = self._sessions.get(session_id, {})
+        total = 0
+        estimated = 0
+        for message in messages:
+            entry = counts.get(id(message))
+            if entry is not None and entry[0] is message:
+                total += entry[1]
+            else:
+                total += self._estimator([message])
+                estimated += 1
+        return total, estimated
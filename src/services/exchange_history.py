@@ -0,0 +1,119 @@
+import logging
+import os
+import sqlite3
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (ISO date, KRW per unit)
+RatePoint = Tuple[str, float]
+
+
+class ExchangeHistoryStore:
+    """SQLite store of daily exchange rates against KRW
+
+    Each currency keeps one row per day holding the latest rate seen that
+    day, so history stays a few kilobytes per year however often rates are
+    refreshed. Days older than ``retention_days`` are dropped on compaction.
+    """
+
+    RETENTION_DAYS = 400
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS daily_rates (
+            currency TEXT NOT NULL,
+            day TEXT NOT NULL,
+            krw_per_unit REAL NOT NULL,
+            PRIMARY KEY (currency, day)
+        ) WITHOUT ROWID
+    """
+
+    def __init__(self, db_file: Optional[str] = None, retention_days: int = RETENTION_DAYS) -> None:
+        """Initialize exchange history store
+
+        Args:
+            db_file: Path to SQLite database (defaults to $MUMU_DATA_DIR/exchange_rates.db)
+            retention_days: Days of history to keep
+        """
+        base_dir = os.getenv("MUMU_DATA_DIR", "data")
+        self.db_file = db_file or str(Path(base_dir) / "exchange_rates.db")
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+
+        if self.db_file != ":memory:":
+            Path(self.db_file).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(self._SCHEMA)
+
+    def record(self, rates: Mapping[str, float], day: Optional[date] = None) -> None:
+        """Store the rates of a day, replacing earlier rates of the same day
+
+        Args:
+            rates: Currency code -> KRW per unit
+            day: Day of the rates (defaults to today)
+        """
+        key = (day or date.today()).isoformat()
+        rows = [(currency, key, float(rate)) for currency, rate in rates.items()]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO daily_rates (currency, day, krw_per_unit) VALUES (?, ?, ?)",
+                rows,
+            )
+
+    def get_history(self, currency: str, days: int = 30, today: Optional[date] = None) -> List[RatePoint]:
+        """Get a currency's daily rates within a window
+
+        Args:
+            currency: Currency code
+            days: Size of the window in days, including today
+            today: Reference day (defaults to today)
+
+        Returns:
+            List[RatePoint]: (ISO date, KRW per unit) pairs in ascending order
+        """
+        since = ((today or date.today()) - timedelta(days=days - 1)).isoformat()
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT day, krw_per_unit FROM daily_rates WHERE currency = ? AND day >= ? ORDER BY day",
+                (currency, since),
+            )
+            return [(day, rate) for day, rate in cursor.fetchall()]
+
+    def get_change(self, currency: str, days: int = 7, today: Optional[date] = None) -> Optional[float]:
+        """Get a currency's rate change over a window
+
+        Args:
+            currency: Currency code
+            days: Size of the window in days, including today
+            today: Reference day (defaults to today)
+
+        Returns:
+            Optional[float]: Percent change from the oldest to the newest rate,
+                or None with fewer than two days of data
+        """
+        history = self.get_history(currency, days, today)
+        if len(history) < 2:
+            return None
+        first, last = history[0][1], history[-1][1]
+        return (last - first) / first * 100
+
+    def compact(self, today: Optional[date] = None) -> None:
+        """Drop days that fell out of retention
+
+        Args:
+            today: Reference day (defaults to today)
+        """
+        cutoff = ((today or date.today()) - timedelta(days=self.retention_days)).isoformat()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM daily_rates WHERE day < ?", (cutoff,))
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,283 @@
+import io
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (unix timestamp, player count)
+HistoryPoint = Tuple[int, int]
+
+
+class PlayerHistoryStore:
+    """SQLite time-series store for Steam concurrent player counts
+
+    Raw samples are kept for ``raw_retention`` seconds and are rolled up into
+    hourly min/max/avg buckets as they are written, so long-range queries never
+    scan raw rows. Hourly rollups are kept for ``rollup_retention`` seconds.
+    """
+
+    BUCKET_SECONDS = 3600
+    RAW_RETENTION = 48 * 3600  # 2 days of raw samples
+    ROLLUP_RETENTION = 90 * 24 * 3600  # 90 days of hourly rollups
+
+    _SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS samples (
+            app_id INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            players INTEGER NOT NULL,
+            PRIMARY KEY (app_id, ts)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS hourly (
+            app_id INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            min_players INTEGER NOT NULL,
+            max_players INTEGER NOT NULL,
+            sum_players INTEGER NOT NULL,
+            samples INTEGER NOT NULL,
+            PRIMARY KEY (app_id, bucket)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS watchlist (
+            app_id INTEGER PRIMARY KEY
+        )
+        """,
+    )
+
+    def __init__(
+        self,
+        db_file: Optional[str] = None,
+        raw_retention: int = RAW_RETENTION,
+        rollup_retention: int = ROLLUP_RETENTION,
+    ) -> None:
+        """Initialize player history store
+
+        Args:
+            db_file: Path to SQLite database (defaults to $MUMU_DATA_DIR/steam_players.db)
+            raw_retention: Seconds to keep raw samples
+            rollup_retention: Seconds to keep hourly rollups
+        """
+        base_dir = os.getenv("MUMU_DATA_DIR", "data")
+        self.db_file = db_file or str(Path(base_dir) / "steam_players.db")
+        self.raw_retention = raw_retention
+        self.rollup_retention = rollup_retention
+        self._lock = threading.Lock()
+
+        if self.db_file != ":memory:":
+            Path(self.db_file).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        with self._lock, self._conn:
+            for statement in self._SCHEMA:
+                self._conn.execute(statement)
+
+    def record(self, app_id: int, players: int, ts: Optional[float] = None) -> None:
+        """Record a player count sample and update its hourly rollup
+
+        Args:
+            app_id: Steam app ID
+            players: Concurrent player count
+            ts: Sample timestamp (defaults to now)
+        """
+        self.record_many([(app_id, players)], ts)
+
+    def record_many(self, samples: Iterable[Tuple[int, int]], ts: Optional[float] = None) -> None:
+        """Record several samples taken at the same time in one transaction
+
+        Args:
+            samples: Iterable of (app_id, players) pairs
+            ts: Sample timestamp (defaults to now)
+        """
+        now = int(ts if ts is not None else time.time())
+        bucket = now - now % self.BUCKET_SECONDS
+        rows = [(int(app_id), int(players)) for app_id, players in samples]
+        if not rows:
+            return
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO samples (app_id, ts, players) VALUES (?, ?, ?)",
+                [(app_id, now, players) for app_id, players in rows],
+            )
+            self._conn.executemany(
+                """
+                INSERT INTO hourly (app_id, bucket, min_players, max_players, sum_players, samples)
+                VALUES (?, ?, ?, ?, ?, 1)
+                ON CONFLICT (app_id, bucket) DO UPDATE SET
+                    min_players = MIN(min_players, excluded.min_players),
+                    max_players = MAX(max_players, excluded.max_players),
+                    sum_players = sum_players + excluded.sum_players,
+                    samples = samples + 1
+                """,
+                [(app_id, bucket, players, players, players) for app_id, players in rows],
+            )
+
+    def get_history(
+        self, app_id: int, hours: int = 24, now: Optional[float] = None
+    ) -> List[HistoryPoint]:
+        """Get player count history for an app
+
+        Windows that fit inside the raw retention are served from raw samples;
+        longer windows are served from hourly averages.
+
+        Args:
+            app_id: Steam app ID
+            hours: Size of the window in hours
+            now: Reference time (defaults to now)
+
+        Returns:
+            List[HistoryPoint]: (timestamp, player_count) pairs in ascending order
+        """
+        now = int(now if now is not None else time.time())
+        since = now - hours * 3600
+
+        with self._lock:
+            if hours * 3600 <= self.raw_retention:
+                cursor = self._conn.execute(
+                    "SELECT ts, players FROM samples WHERE app_id = ? AND ts >= ? ORDER BY ts",
+                    (app_id, since),
+                )
+            else:
+                cursor = self._conn.execute(
+                    """
+                    SELECT bucket, sum_players / samples FROM hourly
+                    WHERE app_id = ? AND bucket >= ? ORDER BY bucket
+                    """,
+                    (app_id, since - since % self.BUCKET_SECONDS),
+                )
+            return [(int(ts), int(players)) for ts, players in cursor.fetchall()]
+
+    def get_peak(self, app_id: int, hours: int = 24, now: Optional[float] = None) -> int:
+        """Get peak player count within a window
+
+        Args:
+            app_id: Steam app ID
+            hours: Size of the window in hours
+            now: Reference time (defaults to now)
+
+        Returns:
+            int: Peak player count, or 0 if there is no data
+        """
+        now = int(now if now is not None else time.time())
+        since = now - hours * 3600
+
+        with self._lock:
+            if hours * 3600 <= self.raw_retention:
+                row = self._conn.execute(
+                    "SELECT MAX(players) FROM samples WHERE app_id = ? AND ts >= ?",
+                    (app_id, since),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT MAX(max_players) FROM hourly WHERE app_id = ? AND bucket >= ?",
+                    (app_id, since - since % self.BUCKET_SECONDS),
+                ).fetchone()
+        return int(row[0]) if row and row[0] is not None else 0
+
+    def has_data(self, app_id: int, hours: int = 24, now: Optional[float] = None) -> bool:
+        """Check whether an app has data in the window get_peak reads
+
+        Args:
+            app_id: Steam app ID
+            hours: Size of the window in hours
+            now: Reference time (defaults to now)
+        """
+        now = int(now if now is not None else time.time())
+        since = now - hours * 3600
+        with self._lock:
+            if hours * 3600 <= self.raw_retention:
+                row = self._conn.execute(
+                    "SELECT 1 FROM samples WHERE app_id = ? AND ts >= ? LIMIT 1",
+                    (app_id, since),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT 1 FROM hourly WHERE app_id = ? AND bucket >= ? LIMIT 1",
+                    (app_id, since - since % self.BUCKET_SECONDS),
+                ).fetchone()
+        return row is not None
+
+    def compact(self, now: Optional[float] = None) -> None:
+        """Drop raw samples and rollups that fell out of retention
+
+        Args:
+            now: Reference time (defaults to now)
+        """
+        now = int(now if now is not None else time.time())
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM samples WHERE ts < ?", (now - self.raw_retention,))
+            self._conn.execute(
+                "DELETE FROM hourly WHERE bucket < ?", (now - self.rollup_retention,)
+            )
+
+    def get_watchlist(self) -> Set[int]:
+        """Get persisted watch-list app IDs"""
+        with self._lock:
+            rows = self._conn.execute("SELECT app_id FROM watchlist").fetchall()
+        return {int(row[0]) for row in rows}
+
+    def add_to_watchlist(self, app_id: int) -> None:
+        """Persist an app ID in the watch-list"""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO watchlist (app_id) VALUES (?)", (app_id,))
+
+    def remove_from_watchlist(self, app_id: int) -> None:
+        """Remove an app ID from the persisted watch-list"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM watchlist WHERE app_id = ?", (app_id,))
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+def render_history_chart(history: List[HistoryPoint], title: str) -> io.BytesIO:
+    """Render a player count history as a PNG line chart
+
+    Args:
+        history: (timestamp, player_count) pairs
+        title: Chart title
+
+    Returns:
+        io.BytesIO: PNG image buffer positioned at the start
+
+    Raises:
+        ValueError: If there is no history to plot
+    """
+    if not history:
+        raise ValueError("플레이어 기록이 아직 없어요")
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.dates as mdates
+    import matplotlib.pyplot as plt
+    from datetime import datetime
+
+    times = [datetime.fromtimestamp(ts) for ts, _ in history]
+    counts = [players for _, players in history]
+
+    fig, ax = plt.subplots(figsize=(8, 3.5), dpi=100)
+    try:
+        ax.plot(times, counts, color="#66c0f4", linewidth=1.5)
+        ax.fill_between(times, counts, color="#66c0f4", alpha=0.2)
+        ax.set_title(title)
+        ax.set_ylabel("Players")
+        ax.grid(True, alpha=0.3)
+        ax.xaxis.set_major_formatter(mdates.DateFormatter("%m-%d %H:%M"))
+        fig.autofmt_xdate()
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", bbox_inches="tight")
+        buffer.seek(0)
+        return buffer
+    finally:
+        plt.close(fig)
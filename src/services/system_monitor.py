@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+HealthListener = Callable[["HealthSnapshot"], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class HealthSnapshot:
+    """Immutable view of system resource usage at one point in time"""
+
+    cpu_percent: float = 0.0
+    memory_percent: float = 0.0
+    memory_available: int = 0
+    memory_total: int = 0
+    sampled_at: float = 0.0  # Unix timestamp, 0 if never sampled
+
+
+class SystemMonitor:
+    """Shared background sampler of CPU and memory usage
+
+    A single periodic task samples with non-blocking psutil calls
+    (``cpu_percent(interval=None)`` reports usage since the previous call)
+    and publishes an immutable ``HealthSnapshot``. Readers just take the
+    current reference, so nothing on a request path waits on sampling.
+    Subscribers are awaited after every sample to update their own state.
+
+    Attributes:
+        interval (float): Seconds between samples
+    """
+
+    def __init__(self, interval: float = 30.0) -> None:
+        """Initialize system monitor
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self._snapshot = HealthSnapshot()
+        self._listeners: List[HealthListener] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def snapshot(self) -> HealthSnapshot:
+        """Latest published sample"""
+        return self._snapshot
+
+    def sample(self) -> HealthSnapshot:
+        """Take a sample now and publish it
+
+        Returns:
+            HealthSnapshot: The new snapshot
+        """
+        try:
+            memory = psutil.virtual_memory()
+            snapshot = HealthSnapshot(
+                cpu_percent=float(psutil.cpu_percent(interval=None)),
+                memory_percent=float(memory.percent),
+                memory_available=int(getattr(memory, "available", 0) or 0),
+                memory_total=int(getattr(memory, "total", 0) or 0),
+                sampled_at=time.time(),
+            )
+        except Exception as e:
+            logger.error(f"Failed to sample system resources: {e}")
+            return self._snapshot
+        self._snapshot = snapshot
+        return snapshot
+
+    def subscribe(self, listener: HealthListener) -> None:
+        """Register a coroutine called with every new snapshot and start sampling
+
+        Args:
+            listener: Async callback receiving the snapshot
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+        if self._task is None or self._task.done():
+            # Prime cpu_percent so the first periodic sample covers a real interval
+            self.sample()
+            self._task = asyncio.create_task(self._run())
+
+    async def unsubscribe(self, listener: HealthListener) -> None:
+        """Remove a listener, stopping the sampler once nobody listens"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+        if not self._listeners and self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Sample and notify listeners until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            snapshot = self.sample()
+            for listener in list(self._listeners):
+                try:
+                    await listener(snapshot)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"System health listener failed: {e}")
+
+
+_shared_monitor: Optional[SystemMonitor] = None
+
+
+def get_system_monitor() -> SystemMonitor:
+    """Get the process-wide system monitor"""
+    global _shared_monitor
+    if _shared_monitor is None:
+        _shared_monitor = SystemMonitor()
+    return _shared_monitor
@@ -0,0 +1,281 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRIC_FIELDS = ("requests", "prompt_tokens", "response_tokens", "thinking_tokens")
+
+# resolution -> (bucket seconds, buckets kept)
+RESOLUTIONS: Dict[str, Tuple[int, int]] = {
+    "minute": (60, 120),  # 2 hours
+    "hour": (3600, 72),  # 3 days
+    "day": (86400, 90),  # 90 days
+}
+
+
+class _BucketRing:
+    """Fixed-size ring of aggregate buckets for one resolution"""
+
+    def __init__(self, seconds: int, size: int) -> None:
+        self.seconds = seconds
+        self.size = size
+        self.ids: List[Optional[int]] = [None] * size
+        self.values: List[List[int]] = [[0] * len(METRIC_FIELDS) for _ in range(size)]
+
+    def slot(self, bucket: int) -> List[int]:
+        """Get the counters of a bucket, recycling the slot if it held an older one"""
+        index = bucket % self.size
+        if self.ids[index] != bucket:
+            self.ids[index] = bucket
+            self.values[index] = [0] * len(METRIC_FIELDS)
+        return self.values[index]
+
+    def get(self, bucket: int) -> Optional[List[int]]:
+        index = bucket % self.size
+        return self.values[index] if self.ids[index] == bucket else None
+
+
+class UsageMetricsStore:
+    """Time-bucketed usage aggregates with incremental SQLite persistence
+
+    Every request updates one bucket per resolution (minute, hour, local day)
+    in fixed-size in-memory rings, so recording and querying recent windows
+    are O(1) in the number of requests. Lifetime counters live next to the
+    buckets. ``flush`` writes only the buckets and counters that changed
+    since the previous flush, as upserts, and drops buckets past retention.
+    """
+
+    _SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS usage_buckets (
+            resolution TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            requests INTEGER NOT NULL,
+            prompt_tokens INTEGER NOT NULL,
+            response_tokens INTEGER NOT NULL,
+            thinking_tokens INTEGER NOT NULL,
+            PRIMARY KEY (resolution, bucket)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS usage_counters (
+            name TEXT PRIMARY KEY,
+            value REAL NOT NULL
+        )
+        """,
+    )
+
+    def __init__(
+        self,
+        db_file: Optional[str] = None,
+        timer: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialize usage metrics store
+
+        Args:
+            db_file: Path to SQLite database (defaults to $MUMU_DATA_DIR/claude_usage.db)
+            timer: Clock used for bucketing
+        """
+        base_dir = os.getenv("MUMU_DATA_DIR", "data")
+        self.db_file = db_file or str(Path(base_dir) / "claude_usage.db")
+        self._timer = timer
+        # Align day buckets to local midnight
+        self._utc_offset = int(datetime.now().astimezone().utcoffset().total_seconds())
+        self._lock = threading.Lock()
+        self._rings = {name: _BucketRing(seconds, size) for name, (seconds, size) in RESOLUTIONS.items()}
+        self._counters: Dict[str, float] = {}
+        self._dirty_buckets: Set[Tuple[str, int]] = set()
+        self._dirty_counters: Set[str] = set()
+
+        if self.db_file != ":memory:":
+            Path(self.db_file).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        with self._lock, self._conn:
+            for statement in self._SCHEMA:
+                self._conn.execute(statement)
+        self._load()
+
+    def _bucket(self, resolution: str, ts: float) -> int:
+        return int(ts + self._utc_offset) // self._rings[resolution].seconds
+
+    def bucket_start(self, resolution: str, ts: Optional[float] = None) -> float:
+        """Get the start timestamp of the bucket containing ``ts``"""
+        ts = self._timer() if ts is None else ts
+        return self._bucket(resolution, ts) * self._rings[resolution].seconds - self._utc_offset
+
+    def _load(self) -> None:
+        """Load retained buckets and counters from disk"""
+        now = self._timer()
+        with self._lock:
+            for resolution, ring in self._rings.items():
+                oldest = self._bucket(resolution, now) - ring.size + 1
+                rows = self._conn.execute(
+                    f"SELECT bucket, {', '.join(METRIC_FIELDS)} FROM usage_buckets "
+                    "WHERE resolution = ? AND bucket >= ?",
+                    (resolution, oldest),
+                ).fetchall()
+                for bucket, *values in rows:
+                    ring.slot(bucket)[:] = values
+            self._counters = dict(self._conn.execute("SELECT name, value FROM usage_counters"))
+
+    def record(
+        self,
+        prompt_tokens: int,
+        response_tokens: int,
+        thinking_tokens: int = 0,
+        ts: Optional[float] = None,
+    ) -> None:
+        """Record one request in every resolution
+
+        Args:
+            prompt_tokens: Input tokens of the request
+            response_tokens: Output tokens of the request
+            thinking_tokens: Thinking tokens of the request
+            ts: Request timestamp (defaults to now)
+        """
+        ts = self._timer() if ts is None else ts
+        deltas = (1, int(prompt_tokens), int(response_tokens), int(thinking_tokens))
+        with self._lock:
+            for resolution in self._rings:
+                bucket = self._bucket(resolution, ts)
+                values = self._rings[resolution].slot(bucket)
+                for i, delta in enumerate(deltas):
+                    values[i] += delta
+                self._dirty_buckets.add((resolution, bucket))
+
+    def totals(self, resolution: str, span: int = 1) -> Dict[str, int]:
+        """Sum the latest ``span`` buckets of a resolution, including the current one
+
+        Args:
+            resolution: "minute", "hour" or "day"
+            span: Number of buckets (e.g. 60 minutes, 1 day)
+
+        Returns:
+            Dict[str, int]: Aggregated counters plus "total_tokens"
+        """
+        ring = self._rings[resolution]
+        current = self._bucket(resolution, self._timer())
+        sums = [0] * len(METRIC_FIELDS)
+        with self._lock:
+            for bucket in range(current - min(span, ring.size) + 1, current + 1):
+                values = ring.get(bucket)
+                if values:
+                    for i, value in enumerate(values):
+                        sums[i] += value
+        result = dict(zip(METRIC_FIELDS, sums))
+        result["total_tokens"] = result["prompt_tokens"] + result["response_tokens"]
+        return result
+
+    def series(self, resolution: str, span: int) -> List[Tuple[float, Dict[str, int]]]:
+        """Get per-bucket counters for the latest ``span`` buckets, oldest first
+
+        Returns:
+            List[Tuple[float, Dict[str, int]]]: (bucket start timestamp, counters) pairs
+        """
+        ring = self._rings[resolution]
+        current = self._bucket(resolution, self._timer())
+        points = []
+        with self._lock:
+            for bucket in range(current - min(span, ring.size) + 1, current + 1):
+                values = ring.get(bucket) or [0] * len(METRIC_FIELDS)
+                start = bucket * ring.seconds - self._utc_offset
+                points.append((start, dict(zip(METRIC_FIELDS, values))))
+        return points
+
+    @property
+    def counters(self) -> Dict[str, float]:
+        """Lifetime counters (integral values are returned as int)"""
+        return {
+            name: int(value) if float(value).is_integer() else value
+            for name, value in self._counters.items()
+        }
+
+    def update_counters(self, values: Mapping[str, float]) -> None:
+        """Set lifetime counters, marking only changed ones for the next flush"""
+        with self._lock:
+            for name, value in values.items():
+                if self._counters.get(name) != value:
+                    self._counters[name] = value
+                    self._dirty_counters.add(name)
+
+    def import_legacy_json(self, path: str, counter_names: Mapping[str, str]) -> bool:
+        """Seed counters from a legacy JSON usage file if the store is empty
+
+        Args:
+            path: Legacy JSON file
+            counter_names: JSON key -> counter name for numeric values to import
+
+        Returns:
+            bool: True if anything was imported
+        """
+        if self._counters or not os.path.exists(path):
+            return False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read legacy usage file {path}: {e}")
+            return False
+
+        values: Dict[str, float] = {}
+        for key, name in counter_names.items():
+            value = legacy.get(key)
+            if isinstance(value, (int, float)):
+                values[name] = value
+        for reason, count in (legacy.get("stop_reason_counts") or {}).items():
+            if isinstance(count, (int, float)):
+                values[f"stop_reason.{reason}"] = count
+        self.update_counters(values)
+        logger.info(f"Imported {len(values)} counters from legacy usage file {path}")
+        return bool(values)
+
+    def flush(self) -> int:
+        """Persist buckets and counters changed since the last flush
+
+        Returns:
+            int: Number of rows written
+        """
+        with self._lock:
+            bucket_rows = []
+            for resolution, bucket in self._dirty_buckets:
+                values = self._rings[resolution].get(bucket)
+                if values is not None:
+                    bucket_rows.append((resolution, bucket, *values))
+            counter_rows = [(name, self._counters[name]) for name in self._dirty_counters]
+            self._dirty_buckets.clear()
+            self._dirty_counters.clear()
+            if not bucket_rows and not counter_rows:
+                return 0
+
+            now = self._timer()
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO usage_buckets (resolution, bucket, {', '.join(METRIC_FIELDS)}) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    bucket_rows,
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO usage_counters (name, value) VALUES (?, ?)",
+                    counter_rows,
+                )
+                for resolution, ring in self._rings.items():
+                    self._conn.execute(
+                        "DELETE FROM usage_buckets WHERE resolution = ? AND bucket < ?",
+                        (resolution, self._bucket(resolution, now) - ring.size + 1),
+                    )
+        return len(bucket_rows) + len(counter_rows)
+
+    def close(self) -> None:
+        """Flush pending changes and close the database"""
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._conn.close()
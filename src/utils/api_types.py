@@ -8,11 +8,14 @@ class GameInfo(TypedDict):
     app_id: Optional[int]  # Steam app ID for store link
 
 class CountryInfo(TypedDict):
-    name: Dict[str, str]
+    name: Dict[str, str]  # common, official and (when known) korean
     population: int
     capital: List[str]
     region: str
+    area: float
     flags: Dict[str, str]
+    cca2: str
+    cca3: str
 
 class ExchangeRates(TypedDict):
     rates: Dict[str, float]
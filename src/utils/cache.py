@@ -0,0 +1,228 @@
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Size-bounded LRU cache whose entries expire after a fixed TTL
+
+    Attributes:
+        maxsize (int): Maximum number of entries kept
+        ttl (float): Seconds an entry stays valid
+        hits (int): Number of lookups served from the cache
+        misses (int): Number of lookups not served from the cache
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if maxsize <= 0 or ttl <= 0:
+            raise ValueError("Invalid cache configuration")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._timer = timer
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Get a live entry and mark it as recently used
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[V]: Cached value, or None if missing or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self._timer():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        """Store a value, evicting the least recently used entry if full
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        self._entries[key] = (self._timer() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        """Remove an entry and return its value if it was present"""
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._entries.clear()
+
+
+class PayloadStore:
+    """Text store bounded by TTL and a byte budget, with LRU eviction
+
+    Expired entries are dropped lazily when they are looked up or reach the
+    least recently used end. Values at or above ``compress_threshold``
+    bytes are kept zlib-compressed, so memory use is accounted in the bytes
+    actually held rather than in entries.
+
+    Attributes:
+        max_bytes (int): Byte budget for the stored payloads
+        ttl (float): Seconds an entry stays valid
+        compress_threshold (Optional[int]): Encoded size from which values are compressed
+        evictions (int): Number of entries evicted to fit the budget
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        compress_threshold: Optional[int] = None,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_bytes <= 0 or ttl <= 0:
+            raise ValueError("Invalid cache configuration")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.compress_threshold = compress_threshold
+        self.evictions = 0
+        self._timer = timer
+        # key -> (expires_at, payload, uncompressed size); payloads smaller than
+        # their uncompressed size are compressed
+        self._entries: "OrderedDict[str, Tuple[float, bytes, int]]" = OrderedDict()
+        self._bytes = 0
+        self._raw_bytes = 0  # Uncompressed size of what is held, for the compression ratio
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._live_entry(key) is not None
+
+    def __getitem__(self, key: str) -> str:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __delitem__(self, key: str) -> None:
+        if not self._remove(key):
+            raise KeyError(key)
+
+    @property
+    def total_bytes(self) -> int:
+        """Bytes currently held"""
+        return self._bytes
+
+    def add(self, key: str, value: str) -> None:
+        """Store a value, evicting least recently used entries to fit the budget
+
+        Args:
+            key: Entry key
+            value: Text to store
+        """
+        self._remove(key)
+        payload = value.encode("utf-8")
+        raw_size = len(payload)
+        if self.compress_threshold is not None and raw_size >= self.compress_threshold:
+            packed = zlib.compress(payload, 6)
+            if len(packed) < raw_size:
+                payload = packed
+        if len(payload) > self.max_bytes:
+            return  # Would evict everything and still not fit
+
+        self._entries[key] = (self._timer() + self.ttl, payload, raw_size)
+        self._bytes += len(payload)
+        self._raw_bytes += raw_size
+
+        now = self._timer()
+        while self._entries:
+            oldest_key, oldest = next(iter(self._entries.items()))
+            expires_at = oldest[0]
+            if self._bytes <= self.max_bytes and expires_at > now:
+                break
+            if expires_at > now:
+                self.evictions += 1
+            self._remove(oldest_key)
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a live value and mark it as recently used
+
+        Args:
+            key: Entry key
+
+        Returns:
+            Optional[str]: Stored text, or None if missing or expired
+        """
+        entry = self._live_entry(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        _, payload, raw_size = entry
+        if len(payload) < raw_size:
+            payload = zlib.decompress(payload)
+        return payload.decode("utf-8")
+
+    def pop(self, key: str) -> bool:
+        """Remove an entry, returning True if it was present"""
+        return self._remove(key)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._entries.clear()
+        self._bytes = 0
+        self._raw_bytes = 0
+
+    def get_entry_count(self) -> int:
+        """Get current number of entries, expired ones included until dropped"""
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get size and eviction statistics"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "raw_bytes": self._raw_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+    def _live_entry(self, key: str) -> Optional[Tuple[float, bytes, int]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self._timer():
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        _, payload, raw_size = entry
+        self._bytes -= len(payload)
+        self._raw_bytes -= raw_size
+        return True
@@ -0,0 +1,136 @@
+import re
+from typing import List, Optional, Tuple
+
+FENCE = "```"
+_CLOSE_FENCE = "\n" + FENCE
+_SENTENCE_END = re.compile(r"[.!?。…][\"')\]]*(?=\s)")
+_MARKDOWN_LINK = re.compile(r"\[[^\]\n]*\]\([^)\s]*\)")
+_PARTIAL_LINK = re.compile(r"\[[^\]\n]*(?:\]\([^)\s]*)?$")  # Link cut off by the end of the text
+
+
+class MarkdownChunker:
+    """Incremental splitter of Markdown text into Discord-sized chunks
+
+    Text can be fed as it arrives; a chunk is emitted only once enough text
+    follows it that its boundary is final. Cuts prefer paragraph breaks,
+    then line breaks, sentence ends and spaces, and never land inside a
+    Markdown link. A code fence left open at a cut is closed at the end of
+    the chunk and re-opened, with its language, at the start of the next.
+
+    Attributes:
+        limit (int): Maximum characters per chunk
+    """
+
+    def __init__(self, limit: int = 4000) -> None:
+        """Initialize chunker
+
+        Args:
+            limit: Maximum characters per chunk (embed descriptions allow 4096)
+        """
+        if limit < 100:
+            raise ValueError("Chunk limit is too small")
+        self.limit = limit
+        self._buffer = ""
+        self._fence: Optional[str] = None  # Opening line of a fence continued from the last chunk
+
+    def feed(self, text: str) -> List[str]:
+        """Append text and return the chunks that are now complete
+
+        Args:
+            text: Newly received text
+
+        Returns:
+            List[str]: Completed chunks, possibly empty
+        """
+        self._buffer += text
+        chunks = []
+        while len(self._prefix()) + len(self._buffer) > self.limit:
+            chunks.append(self._take())
+        return chunks
+
+    def flush(self) -> List[str]:
+        """Return the remaining text as final chunks"""
+        chunks = self.feed("")
+        if self._buffer.strip():
+            chunks.append(self._prefix() + self._buffer)
+        self._buffer = ""
+        self._fence = None
+        return chunks
+
+    def _prefix(self) -> str:
+        return f"{self._fence}\n" if self._fence else ""
+
+    def _take(self) -> str:
+        """Cut one chunk off the front of the buffer"""
+        prefix = self._prefix()
+        budget = self.limit - len(prefix) - len(_CLOSE_FENCE)
+        cut, skip = self._find_cut(self._buffer[:budget])
+        piece = self._buffer[:cut]
+        self._buffer = self._buffer[cut + skip:]
+
+        fence = self._fence
+        for line in piece.split("\n"):
+            stripped = line.strip()
+            if stripped.startswith(FENCE):
+                fence = None if fence else stripped
+        self._fence = fence
+        return prefix + piece.rstrip() + (_CLOSE_FENCE if fence else "")
+
+    @staticmethod
+    def _find_cut(window: str) -> Tuple[int, int]:
+        """Choose where to cut a window
+
+        Returns:
+            Tuple[int, int]: (cut index, separator characters to drop after it)
+        """
+        minimum = len(window) // 2  # Don't produce tiny chunks for a nicer boundary
+        links = [match.span() for match in _MARKDOWN_LINK.finditer(window)]
+        # A link running past the end of the window must not be cut either
+        partial = _PARTIAL_LINK.search(window)
+        if partial:
+            links.append((partial.start(), len(window) + 1))
+
+        def outside_links(index: int) -> bool:
+            return not any(start < index < end for start, end in links)
+
+        for separator in ("\n\n", "\n"):
+            index = window.rfind(separator)
+            while index >= minimum:
+                if outside_links(index):
+                    return index, len(separator)
+                index = window.rfind(separator, 0, index)
+
+        sentence_ends = [match.end() for match in _SENTENCE_END.finditer(window)]
+        for index in reversed(sentence_ends):
+            if index < minimum:
+                break
+            if outside_links(index):
+                return index, 1
+
+        index = window.rfind(" ")
+        while index >= minimum:
+            if outside_links(index):
+                return index, 1
+            index = window.rfind(" ", 0, index)
+
+        # No natural boundary: hard cut, but still keep links whole
+        for start, end in links:
+            if start < len(window) < end and start > 0:
+                return start, 0
+        return len(window), 0
+
+
+def split_message(text: str, limit: int = 4000) -> List[str]:
+    """Split a complete message into Discord-sized Markdown chunks
+
+    Args:
+        text: Message text
+        limit: Maximum characters per chunk
+
+    Returns:
+        List[str]: Chunks in order (a single empty-safe chunk for short text)
+    """
+    if len(text) <= limit:
+        return [text]
+    chunker = MarkdownChunker(limit)
+    return chunker.feed(text) + chunker.flush()
@@ -84,7 +84,8 @@ def mock_api_service(mock_anthropic_fixture) -> MagicMock:
             )
             
             # Initialize tracking state
-            claude._chat_sessions = {}
+            from src.services.api.session_store import ChatSessionStore
+            claude._chat_sessions = ChatSessionStore(16 * 1024 * 1024)
             claude._last_interaction = {}
             claude._saved_usage = {}
             claude._daily_requests = 0
@@ -346,4 +347,19 @@ def mock_context() -> commands.Context:
     ctx.command = MagicMock(spec=commands.Command)
     ctx.command.name = "test_command"
     
-    return ctx 
\ No newline at end of file
+    return ctx 
+
+class FakeClock:
+    """Manually advanced clock for code that takes a ``timer``"""
+
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """Fake clock starting at 0; advance it by setting ``clock.now``"""
+    return FakeClock()
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from src.services.api.metrics import APIMetrics, Histogram, render_prometheus
+from src.utils.cache import TTLCache
+
+
+def test_histogram_percentiles_within_precision():
+    histogram = Histogram(precision=0.02)
+    for ms in range(1, 1001):
+        histogram.record(ms / 1000)
+
+    for percent in (50, 95, 99):
+        expected = percent / 100
+        assert abs(histogram.percentile(percent) - expected) <= expected * 0.02
+    assert histogram.percentile(100) == 1.0
+    assert Histogram().percentile(50) is None
+
+
+@pytest.mark.asyncio
+async def test_measure_records_outcomes_and_exports_prometheus():
+    """Errors and timeouts are counted apart and every family is typed once"""
+    metrics = APIMetrics()
+    async with metrics.measure("messages"):
+        pass
+    with pytest.raises(asyncio.TimeoutError):
+        async with metrics.measure("messages"):
+            raise asyncio.TimeoutError()
+    with pytest.raises(ValueError):
+        async with metrics.measure("messages"):
+            raise ValueError("boom")
+    metrics.observe("messages", "payload_bytes", 2048)
+    cache = TTLCache(4, 60)
+    cache.get("missing")
+    metrics.register_cache("stale", cache)
+
+    snapshot = metrics.snapshot()
+    endpoint = snapshot["endpoints"]["messages"]
+    assert (endpoint["ok"], endpoint["timeout"], endpoint["error"]) == (1, 1, 1)
+    assert endpoint["latency"]["count"] == 3
+    assert snapshot["caches"]["stale"]["hit_ratio"] == 0.0
+
+    text = render_prometheus({"claude": metrics})
+    assert 'mumu_api_requests_total{api="claude",endpoint="messages",outcome="timeout"} 1' in text
+    assert 'mumu_api_request_duration_seconds_count{api="claude",endpoint="messages"} 3' in text
+    assert text.count("# TYPE mumu_api_request_duration_seconds summary") == 1
+    assert 'mumu_api_payload_bytes{api="claude",endpoint="messages",quantile="0.99"}' in text
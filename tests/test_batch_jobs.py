@@ -0,0 +1,156 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.api.batch_jobs import BatchJobQueue
+
+
+class _Results:
+    def __init__(self, entries) -> None:
+        self._entries = list(entries)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._entries:
+            raise StopAsyncIteration
+        return self._entries.pop(0)
+
+
+class _FakeBatches:
+    def __init__(self) -> None:
+        self.submitted = []
+        self.status = "in_progress"
+
+    async def create(self, requests):
+        self.submitted.append(requests)
+        return SimpleNamespace(id=f"batch_{len(self.submitted)}")
+
+    async def retrieve(self, batch_id):
+        return SimpleNamespace(id=batch_id, processing_status=self.status)
+
+    async def results(self, batch_id):
+        entries = []
+        for request in self.submitted[int(batch_id.split("_")[1]) - 1]:
+            prompt = request["params"]["messages"][0]["content"]
+            if prompt == "실패":
+                result = SimpleNamespace(type="errored")
+            else:
+                message = SimpleNamespace(
+                    content=[SimpleNamespace(type="text", text=f"답: {prompt}")],
+                    usage=SimpleNamespace(input_tokens=100, output_tokens=20),
+                )
+                result = SimpleNamespace(type="succeeded", message=message)
+            entries.append(SimpleNamespace(custom_id=request["custom_id"], result=result))
+        return _Results(entries)
+
+
+class _Channel:
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def send(self, content):
+        self.sent.append(content)
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_batched_polled_and_delivered(tmp_path):
+    batches = _FakeBatches()
+    client = SimpleNamespace(messages=SimpleNamespace(batches=batches))
+    queue = BatchJobQueue(lambda: client, db_file=":memory:", max_batch_size=2, flush_interval=3600)
+    channel = _Channel()
+
+    async def resolve(channel_id):
+        return channel if channel_id == 42 else None
+
+    queue.set_channel_resolver(resolve)
+
+    first = queue.enqueue("드래프트 요약", label="오늘의 드래프트", channel_id=42)
+    await queue.run_once()
+    assert batches.submitted == []  # Waits for a fuller batch
+
+    failed = queue.enqueue("실패", label="실패 작업", file_path=str(tmp_path / "failed.md"))
+    await queue.run_once()
+    assert len(batches.submitted) == 1 and queue.stats()["submitted"] == 2
+
+    batches.status = "ended"
+    await queue.run_once()
+    assert queue.get(first.job_id).result == "답: 드래프트 요약"
+    assert channel.sent == ["**오늘의 드래프트**\n답: 드래프트 요약"]
+    assert "실패" in (tmp_path / "failed.md").read_text(encoding="utf-8")
+    assert queue.get(failed.job_id).status == "failed"
+    assert queue.stats()["queued"] == 0 and queue.stats()["submitted"] == 0
+
+
+@pytest.mark.asyncio
+async def test_unfinished_jobs_survive_restart(tmp_path):
+    db_file = str(tmp_path / "batch.db")
+    batches = _FakeBatches()
+    client = SimpleNamespace(messages=SimpleNamespace(batches=batches))
+    queue = BatchJobQueue(lambda: client, db_file=db_file, flush_interval=0)
+    job = queue.enqueue("서번트 팁", label="팁", file_path=str(tmp_path / "tip.md"))
+    await queue.run_once()
+    queue.close()
+
+    restored = BatchJobQueue(lambda: client, db_file=db_file)
+    assert restored.get(job.job_id).batch_id == "batch_1"
+    batches.status = "ended"
+    await restored.run_once()
+    assert (tmp_path / "tip.md").read_text(encoding="utf-8") == "# 팁\n\n답: 서번트 팁\n"
+
+
+@pytest.mark.asyncio
+async def test_failed_delivery_is_retried_and_usage_is_reported(tmp_path):
+    """A result whose channel can't be resolved yet stays stored until it is delivered"""
+    db_file = str(tmp_path / "batch.db")
+    batches = _FakeBatches()
+    batches.status = "ended"
+    client = SimpleNamespace(messages=SimpleNamespace(batches=batches))
+    usage = []
+    queue = BatchJobQueue(lambda: client, db_file=db_file, flush_interval=0, on_usage=usage.append)
+    channels = {}
+
+    async def resolve(channel_id):
+        return channels.get(channel_id)
+
+    queue.set_channel_resolver(resolve)
+    job = queue.enqueue("서번트 팁", label="팁", channel_id=7)
+    await queue.run_once()
+    assert queue.stats()["undelivered"] == 1 and queue.stats()["delivery_errors"] == 1
+    assert [u.input_tokens for u in usage] == [100]
+
+    # Still there after a restart, and delivered once the channel resolves
+    queue.close()
+    restored = BatchJobQueue(lambda: client, db_file=db_file, on_usage=usage.append)
+    restored.set_channel_resolver(resolve)
+    channels[7] = _Channel()
+    await restored.run_once()
+    assert channels[7].sent == ["**팁**\n답: 서번트 팁"]
+    assert restored.get(job.job_id).status == "succeeded"
+    assert restored.stats()["undelivered"] == 0
+    assert len(usage) == 1  # Redelivery doesn't count the tokens again
+
+
+@pytest.mark.asyncio
+async def test_undeliverable_results_are_dropped_after_the_last_attempt():
+    batches = _FakeBatches()
+    batches.status = "ended"
+    client = SimpleNamespace(messages=SimpleNamespace(batches=batches))
+    queue = BatchJobQueue(lambda: client, db_file=":memory:", flush_interval=0)
+
+    async def resolve(channel_id):
+        return None
+
+    queue.set_channel_resolver(resolve)
+    queue.enqueue("요약", label="요약", channel_id=7)
+    for _ in range(BatchJobQueue.MAX_DELIVERY_ATTEMPTS):
+        await queue.run_once()
+    assert queue.stats()["undelivered"] == 0
+    assert queue.stats()["delivery_errors"] == BatchJobQueue.MAX_DELIVERY_ATTEMPTS
+
+
+def test_jobs_need_a_destination():
+    queue = BatchJobQueue(lambda: None, db_file=":memory:")
+    with pytest.raises(ValueError):
+        queue.enqueue("요약해줘", label="요약")
@@ -6,6 +6,7 @@ from typing import cast
 from unittest.mock import MagicMock, AsyncMock, PropertyMock
 from unittest.mock import patch
 from datetime import datetime
+from src.services.api.session_store import ChatSessionStore
 
 @pytest.mark.asyncio
 class TestBotBasic:
@@ -250,7 +251,7 @@ class TestClaudeInitialization:
         assert claude_api._client.default_headers == {"anthropic-version": "2023-06-01"}
         
         # 2. Verify initialization of tracking state
-        assert isinstance(claude_api._chat_sessions, dict)
+        assert isinstance(claude_api._chat_sessions, ChatSessionStore)
         assert isinstance(claude_api._last_interaction, dict)
         assert isinstance(claude_api._saved_usage, dict)
         assert claude_api._daily_requests == 0
@@ -0,0 +1,128 @@
+from typing import Any, Dict
+
+import pytest
+
+from src.services.api.chat_backend import ChatBackend, ChatRouter
+
+
+class _FakeBackend(ChatBackend):
+    def __init__(self, name: str, error: Exception = None, slowed: bool = False) -> None:
+        self.backend_name = name
+        self.error = error
+        self.slowed = slowed
+        self.enabled = True
+        self.calls = 0
+        self.ended = []
+        self.expiry_listeners = []
+
+    async def chat(self, prompt, user_id, on_text=None):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return (f"{self.backend_name}: {prompt}", None, None)
+
+    def end_chat_session(self, user_id: int) -> bool:
+        self.ended.append(user_id)
+        return True
+
+    @property
+    def health_status(self) -> Dict[str, Any]:
+        return {"is_enabled": self.enabled, "is_slowed_down": self.slowed}
+
+    def add_session_expiry_listener(self, callback) -> None:
+        self.expiry_listeners.append(callback)
+
+    def expire(self, user_id: int) -> None:
+        for callback in self.expiry_listeners:
+            callback(user_id)
+
+
+def _provider_error() -> ValueError:
+    try:
+        raise ValueError("API 요청에 실패했어") from ConnectionError("boom")
+    except ValueError as e:
+        return e
+
+
+@pytest.mark.asyncio
+async def test_fails_over_on_provider_errors_only():
+    """Provider failures move to the next backend, request errors don't"""
+    claude = _FakeBackend("claude", error=_provider_error())
+    gemini = _FakeBackend("gemini")
+    router = ChatRouter([claude, gemini])
+
+    response, _, _ = await router.chat("안녕", 1)
+    assert response == "gemini: 안녕"
+    assert router.stats()["failovers"] == 1
+
+    claude.error = ValueError("너무 빠르게 요청하고 있어")
+    with pytest.raises(ValueError, match="너무 빠르게"):
+        await router.chat("안녕", 2)
+    assert gemini.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_skips_disabled_and_prefers_healthy_backends():
+    """Disabled backends are skipped and slowed-down ones rank last"""
+    claude = _FakeBackend("claude", slowed=True)
+    gemini = _FakeBackend("gemini")
+    router = ChatRouter([claude, gemini])
+    assert [backend.backend_name for backend in router.rank()] == ["gemini", "claude"]
+
+    gemini.enabled = False
+    assert [backend.backend_name for backend in router.rank()] == ["claude"]
+    assert router.is_degraded()
+
+    claude.enabled = False
+    with pytest.raises(ValueError):
+        await router.chat("안녕", 1)
+
+
+@pytest.mark.asyncio
+async def test_conversation_sticks_to_its_backend():
+    """A user's follow-ups stay on the backend holding their history"""
+    claude = _FakeBackend("claude", error=_provider_error())
+    gemini = _FakeBackend("gemini")
+    router = ChatRouter([claude, gemini])
+    await router.chat("첫 질문", 7)
+
+    claude.error = None
+    response, _, _ = await router.chat("다음 질문", 7)
+    assert response.startswith("gemini")
+
+    assert router.end_chat_session(7)
+    assert claude.ended == [7] and gemini.ended == [7]
+
+
+def _names(backends):
+    return [backend.backend_name for backend in backends]
+
+
+def test_preference_wins_until_latency_crosses_the_threshold():
+    """A preferred backend's real latency is not compared against an unmeasured one"""
+    claude = _FakeBackend("claude")
+    gemini = _FakeBackend("gemini")
+    router = ChatRouter([claude, gemini])
+    for _ in range(ChatRouter.MIN_LATENCY_SAMPLES):
+        router._latency["claude"].add(20.0)
+    assert _names(router.rank()) == ["claude", "gemini"]
+
+    for _ in range(ChatRouter.MIN_LATENCY_SAMPLES * 2):
+        router._latency["claude"].add(ChatRouter.SLOW_LATENCY + 5)
+    assert _names(router.rank()) == ["gemini", "claude"]
+
+
+@pytest.mark.asyncio
+async def test_expired_sessions_are_unpinned():
+    claude = _FakeBackend("claude", error=_provider_error())
+    gemini = _FakeBackend("gemini")
+    router = ChatRouter([claude, gemini])
+    await router.chat("질문", 7)
+    claude.error = None
+    assert _names(router.rank(7)) == ["gemini", "claude"]
+
+    claude.expire(7)  # Another backend's expiry keeps the pin
+    assert router.stats()["backends"]["gemini"]["sessions"] == 1
+    gemini.expire(7)
+    assert router.stats()["backends"]["gemini"]["sessions"] == 0
+    assert _names(router.rank(7)) == ["claude", "gemini"]
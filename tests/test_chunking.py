@@ -0,0 +1,36 @@
+from src.utils.chunking import MarkdownChunker, split_message
+
+
+def _sample() -> str:
+    prose = "로도스 아일랜드는 이동 도시야. " * 40
+    code = "```python\n" + "\n".join(f"value_{i} = {i}  # 설명" for i in range(60)) + "\n```"
+    links = "출처는 여기야 [라인 랩](https://example.com/rhine-lab) 참고해. " * 30
+    return f"{prose}\n\n{code}\n\n{links}"
+
+
+def test_chunks_fit_and_keep_fences_balanced():
+    """Chunks respect the limit, never split words or links, and re-open code fences"""
+    chunks = split_message(_sample(), 500)
+    assert len(chunks) > 3
+    for chunk in chunks:
+        assert len(chunk) <= 500
+        assert chunk.count("```") % 2 == 0
+        assert chunk.count("[라인 랩](") == chunk.count("(https://example.com/rhine-lab)")
+    # A chunk continuing the code block starts by re-opening it with its language
+    assert any(chunk.startswith("```python\nvalue_") for chunk in chunks)
+    assert all(not chunk.startswith(("랜드", "는")) for chunk in chunks)
+
+
+def test_streaming_feed_matches_whole_text():
+    """Feeding text incrementally yields exactly the chunks of a one-shot split"""
+    text = _sample()
+    chunker = MarkdownChunker(500)
+    streamed = []
+    for start in range(0, len(text), 37):
+        streamed += chunker.feed(text[start:start + 37])
+    streamed += chunker.flush()
+    assert streamed == split_message(text, 500)
+
+
+def test_short_text_is_a_single_chunk():
+    assert split_message("짧은 답변", 500) == ["짧은 답변"]
@@ -0,0 +1,147 @@
+import pytest
+
+from src.services.api.base import BaseAPI
+from src.services.api.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def _breaker(clock) -> CircuitBreaker:
+    return CircuitBreaker("test", backoff_factor=2.0, base_backoff=5.0, max_backoff=30.0, min_calls=4, timer=clock)
+
+
+def _trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.min_calls):
+        breaker.record_failure()
+
+
+def test_full_state_cycle(clock):
+    """closed -> open -> half_open -> closed"""
+    breaker = _breaker(clock)
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED  # Below min_calls
+
+    breaker.record_failure()  # 3 of 4 calls failed
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_in() == pytest.approx(5.0)
+
+    clock.now += 5.0
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()  # Only one probe at a time
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.current_backoff == pytest.approx(5.0)
+    assert breaker.allow_request()
+
+
+def test_failed_probes_grow_the_backoff_up_to_the_cap(clock):
+    breaker = _breaker(clock)
+    _trip(breaker)
+    backoffs = []
+    for _ in range(4):
+        backoffs.append(breaker.open_until - clock.now)
+        clock.now = breaker.open_until
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+    assert backoffs == [5.0, 10.0, 20.0, 30.0]
+
+
+def test_old_outcomes_leave_the_window(clock):
+    breaker = _breaker(clock)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += breaker.window + 1
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_release_probe_allows_another_probe(clock):
+    breaker = _breaker(clock)
+    _trip(breaker)
+    clock.now = breaker.open_until
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.release_probe()  # e.g. the probe was cancelled
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+class FakeResponse:
+    def __init__(self, status: int, data=None) -> None:
+        self.status = status
+        self._data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self):
+        return self._data
+
+    async def read(self):
+        return b"{}"
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.responses = []
+        self.calls = 0
+
+    def request(self, method, url, params=None, headers=None):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+class DummyAPI(BaseAPI[dict]):
+    async def validate_credentials(self) -> bool:
+        return True
+
+
+async def test_open_circuit_serves_stale_responses(clock):
+    """While open, cached responses are served and uncached requests fail fast"""
+    api = DummyAPI()
+    session = api._session = FakeSession()
+    breaker = api.get_circuit_breaker("data")
+    breaker._timer = clock
+    url = "https://example.com/data"
+
+    session.responses.append(FakeResponse(200, {"value": 1}))
+    assert await api._make_request(url, endpoint="data") == {"value": 1}
+
+    # One success and three server errors reach the failure rate
+    session.responses += [FakeResponse(503) for _ in range(3)]
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            await api._make_request(url, endpoint="data")
+    assert breaker.state == CircuitBreaker.OPEN
+
+    calls = session.calls
+    assert await api._make_request(url, endpoint="data") == {"value": 1}
+    with pytest.raises(CircuitOpenError):
+        await api._make_request(url, params={"other": 1}, endpoint="data")
+    assert session.calls == calls  # Nothing was sent while open
+    endpoint = api.request_metrics.snapshot()["endpoints"]["data"]
+    assert (endpoint["served_stale"], endpoint["short_circuited"]) == (1, 1)
+    assert "stale_responses" not in api.request_metrics.snapshot()["caches"]
+
+    # After the backoff a successful probe closes the circuit again
+    clock.now = breaker.open_until
+    session.responses.append(FakeResponse(200, {"value": 2}))
+    assert await api._make_request(url, endpoint="data") == {"value": 2}
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_client_errors_do_not_open_the_circuit():
+    api = DummyAPI()
+    session = api._session = FakeSession()
+    session.responses += [FakeResponse(404) for _ in range(6)]
+    for _ in range(6):
+        with pytest.raises(ValueError):
+            await api._make_request("https://example.com/missing", endpoint="data")
+    assert api.get_circuit_breaker("data").state == CircuitBreaker.CLOSED
@@ -0,0 +1,214 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import anthropic
+import pytest
+
+from src.services.api.claude import ClaudeAPI
+from src.services.api.session_store import SessionExpiryQueue
+
+
+@pytest.fixture
+def claude(tmp_path, monkeypatch, clock):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MUMU_DATA_DIR", str(tmp_path))
+    api = ClaudeAPI("test_key")
+    api._session_expiry = SessionExpiryQueue(api._session_expiry.ttl, timer=clock)
+    return api
+
+
+async def test_unswept_expired_session_runs_expiry_handling(claude, clock):
+    """A session found expired on access is released like a swept one"""
+    expired = []
+    claude.add_session_expiry_listener(expired.append)
+    history = await claude._get_or_create_chat_session(1)
+    history.append({"role": "user", "content": "안녕"})
+    claude._session_summaries[1] = "이전 대화"
+    claude._token_accountant.observe_usage(1, list(history), None, SimpleNamespace(input_tokens=50))
+    assert claude._token_accountant.cached_messages(1) == 1
+
+    clock.now += claude._session_expiry.ttl + 1
+    fresh = await claude._get_or_create_chat_session(1)
+
+    assert fresh == [] and fresh is not history
+    assert expired == [1]
+    assert claude._token_accountant.cached_messages(1) == 0
+    assert 1 not in claude._session_summaries
+    # The new session has its own deadline and is not swept with the old one
+    claude._cleanup_expired_sessions()
+    assert expired == [1] and 1 in claude._chat_sessions
+
+
+async def test_live_session_is_reused(claude, clock):
+    history = await claude._get_or_create_chat_session(1)
+    clock.now += claude._session_expiry.ttl / 2
+    assert await claude._get_or_create_chat_session(1) is history
+
+    # Reuse pushes the deadline back before the reply arrives
+    clock.now += claude._session_expiry.ttl * 3 / 4
+    claude._cleanup_expired_sessions()
+    assert claude._chat_sessions[1] is history
+
+
+def _turns(count):
+    messages = []
+    for i in range(count):
+        messages.append({"role": "user", "content": f"질문 {i}"})
+        messages.append({"role": "assistant", "content": f"답변 {i}"})
+    return messages
+
+
+def _text_response(text, input_tokens=100, output_tokens=20):
+    return SimpleNamespace(
+        content=[SimpleNamespace(type="text", text=text, citations=None)],
+        usage=SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens),
+        stop_reason="end_turn",
+    )
+
+
+def _prepare_chat(claude):
+    """Plain text chat against a mocked client"""
+    claude._client = MagicMock()
+    claude._client.messages.count_tokens = AsyncMock(return_value=SimpleNamespace(input_tokens=100))
+    claude.WEB_SEARCH_ENABLED = False
+    claude.PROMPT_CACHING_ENABLED = False
+    claude.COMPACTION_ENABLED = False
+    claude._check_user_rate_limit = lambda user_id: None
+
+
+async def test_compaction_waits_for_a_turn_in_progress(claude):
+    """A summary finishing mid-turn is applied after the turn, without duplicating history"""
+    _prepare_chat(claude)
+    history = await claude._get_or_create_chat_session(1)
+    history.extend(_turns(4))
+
+    release = asyncio.Event()
+
+    async def create(**params):
+        if params["model"] == claude.COMPACTION_MODEL:
+            return _text_response("요약", 300, 50)
+        await release.wait()
+        return _text_response("새 답변")
+
+    claude._client.messages.create = AsyncMock(side_effect=create)
+    chat = asyncio.create_task(claude.chat("새 질문", 1))
+    await asyncio.sleep(0.01)
+    compaction = asyncio.create_task(claude._compact_session(1, history))
+    await asyncio.sleep(0.01)
+    assert not compaction.done()  # Waiting for the turn to finish
+
+    release.set()
+    await chat
+    await compaction
+
+    session = claude._chat_sessions[1]
+    assert claude._session_summaries[1] == "요약"
+    assert [m["content"] for m in session] == ["질문 2", "답변 2", "질문 3", "답변 3", "새 질문", "새 답변"]
+    assert claude.usage_stats["compaction_tokens"] == 350
+    assert claude.usage_stats["compaction_cost"] == pytest.approx((300 * 0.8 + 50 * 4.0) / 1_000_000)
+
+
+async def test_sweep_skips_a_session_with_a_turn_in_progress(claude, clock):
+    """A deadline passing mid-turn leaves the session, its summary and token counts alone"""
+    _prepare_chat(claude)
+    expired = []
+    claude.add_session_expiry_listener(expired.append)
+    history = await claude._get_or_create_chat_session(1)
+    history.extend(_turns(1))
+    claude._session_summaries[1] = "이전 대화"
+    release = asyncio.Event()
+
+    async def create(**params):
+        await release.wait()
+        return _text_response("새 답변")
+
+    claude._client.messages.create = AsyncMock(side_effect=create)
+    chat = asyncio.create_task(claude.chat("새 질문", 1))
+    await asyncio.sleep(0.01)
+    clock.now += claude._session_expiry.ttl + 1
+    claude._cleanup_expired_sessions()
+    assert expired == [] and claude._session_summaries[1] == "이전 대화"
+
+    release.set()
+    await chat
+    assert [m["content"] for m in claude._chat_sessions[1]][-2:] == ["새 질문", "새 답변"]
+    assert claude._session_summaries[1] == "이전 대화"
+
+
+async def test_rehydrated_session_is_compacted(claude):
+    claude._client = MagicMock()
+    claude._client.messages.create = AsyncMock(return_value=_text_response("요약"))
+    snapshot = _turns(4)
+    # Spilled and read back while summarizing: equal messages, new objects
+    claude._chat_sessions[1] = json.loads(json.dumps(snapshot))
+    await claude._compact_session(1, snapshot)
+    assert claude._session_summaries[1] == "요약"
+    assert [m["content"] for m in claude._chat_sessions[1]] == ["질문 2", "답변 2", "질문 3", "답변 3"]
+
+
+async def test_compaction_of_a_replaced_session_is_discarded(claude):
+    claude._client = MagicMock()
+    claude._client.messages.create = AsyncMock(return_value=_text_response("요약"))
+    snapshot = _turns(4)
+    claude._chat_sessions[1] = _turns(1)
+    await claude._compact_session(1, snapshot)
+    assert 1 not in claude._session_summaries
+    assert len(claude._chat_sessions[1]) == 2
+
+
+async def test_turn_is_appended_in_place_and_rolled_back_on_failure(claude, monkeypatch):
+    _prepare_chat(claude)
+    # The SDK is mocked out, so give the handled error types real classes
+    monkeypatch.setattr(anthropic, "RateLimitError", type("RateLimitError", (Exception,), {}))
+    monkeypatch.setattr(anthropic, "APIError", type("APIError", (Exception,), {}))
+    history = await claude._get_or_create_chat_session(1)
+    history.extend(_turns(2))
+
+    claude._client.messages.create = AsyncMock(return_value=_text_response("새 답변"))
+    await claude.chat("새 질문", 1)
+    assert claude._chat_sessions[1] is history
+    assert [m["content"] for m in history[-2:]] == ["새 질문", "새 답변"]
+
+    claude._client.messages.create = AsyncMock(side_effect=RuntimeError("overloaded"))
+    with pytest.raises(ValueError):
+        await claude.chat("실패할 질문", 1)
+    assert claude._chat_sessions[1] is history
+    assert len(history) == 6 and history[-1]["content"] == "새 답변"
+
+
+def test_search_only_messages_are_dropped_in_one_pass(claude):
+    search = [{"type": "server_tool_use", "id": "s"}, {"type": "web_search_tool_result", "content": []}]
+    messages = []
+    for i in range(4):
+        messages.append({"role": "user", "content": f"질문 {i}"})
+        messages.append({"role": "assistant", "content": list(search) + ([] if i < 2 else [{"type": "text", "text": "답"}])})
+    claude._chat_sessions[1] = messages
+    before = claude._chat_sessions.total_bytes
+
+    result = claude._optimize_conversation_history(messages, 1)
+    assert result is messages
+    assert [m["content"] for m in messages[:3]] == ["질문 0", "질문 1", "질문 2"]
+    assert len(messages) == 6
+    assert claude._chat_sessions.total_bytes < before
+
+
+def test_batch_usage_is_counted_apart_from_chat(claude):
+    claude.record_batch_usage(SimpleNamespace(input_tokens=1000, output_tokens=200))
+    stats = claude.usage_stats
+    assert stats["batch_tokens"] == 1200
+    assert stats["batch_cost"] == pytest.approx((1000 * 1.5 + 200 * 7.5) / 1_000_000)
+    assert stats["total_prompt_tokens"] == 0
+    assert "📦 배치 작업: 1,200토큰" in claude.get_formatted_report()
+
+
+def test_cached_answer_seeds_history_with_the_model_text(claude):
+    """Follow-ups see the reply the model wrote, not the display text with links"""
+    claude._response_cache.put(
+        "오리지늄이 뭐야", "광석이야 [1](https://example.com)\n\n참고: example.com", raw_response="광석이야"
+    )
+    cached = claude._response_cache.get("오리지늄이 뭐야")
+    response, _, _ = claude._answer_from_cache("오리지늄이 뭐야", 1, cached)
+    assert response.startswith("광석이야 [1]")
+    assert claude._chat_sessions[1][-1] == {"role": "assistant", "content": "광석이야"}
@@ -0,0 +1,28 @@
+from src.services.api.compaction import extractive_summary, find_compaction_split, render_transcript
+
+
+def _conversation(turns: int):
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"질문 {i}"})
+        messages.append({"role": "assistant", "content": [
+            {"type": "thinking", "thinking": "hidden", "signature": "sig"},
+            {"type": "text", "text": f"답변 {i}"},
+        ]})
+    return messages
+
+
+def test_split_keeps_tail_starting_with_user_turn():
+    messages = _conversation(4)
+    split = find_compaction_split(messages, keep_messages=3)
+    assert split == 4 and messages[split]["role"] == "user"
+    assert find_compaction_split(_conversation(1), keep_messages=4) == 0
+
+
+def test_summaries_skip_thinking_and_respect_budget():
+    messages = _conversation(3)
+    transcript = render_transcript(messages, previous_summary="예전 이야기")
+    assert "hidden" not in transcript and "답변 2" in transcript and "예전 이야기" in transcript
+
+    summary = extractive_summary(messages, max_chars=40)
+    assert len(summary) <= 40 and "답변 2" in summary and "질문 0" not in summary
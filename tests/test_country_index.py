@@ -0,0 +1,99 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.services.api.country_index import CountryIndex
+from src.services.api.population import PopulationAPI
+
+COUNTRIES = [
+    {
+        "name": {
+            "common": "South Korea",
+            "official": "Republic of Korea",
+            "nativeName": {"kor": {"common": "한국", "official": "대한민국"}},
+        },
+        "translations": {"kor": {"common": "대한민국", "official": "대한민국"}},
+        "altSpellings": ["KR", "Korea, Republic of"],
+        "cca2": "KR",
+        "cca3": "KOR",
+        "population": 51780579,
+        "capital": ["Seoul"],
+        "region": "Asia",
+        "area": 100210.0,
+        "flags": {"png": "https://flagcdn.com/w320/kr.png"},
+    },
+    {
+        "name": {"common": "Japan", "official": "Japan", "nativeName": {"jpn": {"common": "日本", "official": "日本"}}},
+        "translations": {"kor": {"common": "일본", "official": "일본국"}},
+        "altSpellings": ["JP", "Nippon"],
+        "cca2": "JP",
+        "cca3": "JPN",
+        "population": 125836021,
+        "capital": ["Tokyo"],
+        "region": "Asia",
+        "area": 377930.0,
+        "flags": {},
+    },
+    {
+        "name": {"common": "Jamaica", "official": "Jamaica"},
+        "translations": {"kor": {"common": "자메이카", "official": "자메이카"}},
+        "cca2": "JM",
+        "cca3": "JAM",
+        "population": 2961161,
+        "capital": [],
+        "region": "Americas",
+        "area": 10991.0,
+        "flags": {},
+    },
+    {
+        "name": {"common": "Côte d'Ivoire", "official": "Republic of Côte d'Ivoire"},
+        "cca2": "CI",
+        "cca3": "CIV",
+        "population": 26378275,
+        "region": "Africa",
+        "area": 322463.0,
+    },
+]
+
+
+@pytest.mark.parametrize("query, code", [
+    ("대한민국", "KOR"),
+    ("한국", "KOR"),
+    ("republic of korea", "KOR"),
+    ("kor", "KOR"),
+    ("日本", "JPN"),
+    ("일본국", "JPN"),
+    ("ja", "JPN"),  # Prefix shared with Jamaica; the more populous wins
+    ("자메", "JAM"),
+    ("cote divoire", "CIV"),
+    ("Jamiaca", "JAM"),  # Typo
+])
+def test_lookup_by_any_name(query, code):
+    country = CountryIndex(COUNTRIES).lookup(query)
+    assert country is not None and country["cca3"] == code
+
+
+def test_unknown_names_do_not_match():
+    index = CountryIndex(COUNTRIES)
+    assert index.lookup("Atlantis") is None
+    assert index.lookup("!!") is None
+    assert len(index) == 4
+    assert index.lookup("Japan")["name"]["korean"] == "일본"
+
+
+async def test_population_api_loads_once_and_falls_back_to_snapshot(tmp_path):
+    """Lookups are served locally, and a saved snapshot covers a failed startup fetch"""
+    snapshot = str(tmp_path / "countries.json")
+    api = PopulationAPI(snapshot_file=snapshot)
+    api._make_request = AsyncMock(return_value=COUNTRIES)
+    await api.refresh()
+    assert (await api.get_country_info("일본"))["population"] == 125836021
+    await api.get_country_info("KR")
+    assert api._make_request.await_count == 1
+
+    offline = PopulationAPI(snapshot_file=snapshot)
+    await offline._load_snapshot()
+    assert await offline.validate_credentials()
+    assert (await offline.get_country_info("한국"))["cca2"] == "KR"
+    with pytest.raises(ValueError):
+        await offline.get_country_info("Atlantis")
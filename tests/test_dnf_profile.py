@@ -0,0 +1,44 @@
+import asyncio
+
+from src.services.api.dnf import DNFAPI
+
+BASIC = {"serverId": "cain", "characterId": "abc", "characterName": "테스트", "level": 115, "jobGrowName": "眞 웨펀마스터"}
+
+
+async def test_search_fetches_profile_sections_concurrently():
+    """A search resolves the server and fetches every section at once"""
+    api = DNFAPI("test_key")
+    in_flight = 0
+    peak = 0
+    paths = []
+
+    async def fake_request(path, description, params=None):
+        nonlocal in_flight, peak
+        paths.append(path)
+        if path == "/servers/all/characters":
+            assert params == {"characterName": "테스트"}
+            return {"rows": [{"serverId": "cain", "characterId": "abc"}]}
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return BASIC if path.endswith("/abc") else {"path": path}
+
+    api._request = fake_request
+    profile = await api.search_character("테스트")
+
+    assert profile["server"] == "cain"
+    assert profile["basic"] == BASIC
+    assert profile["creature"] == {"path": "/servers/cain/characters/abc/creature"}
+    assert peak == len(DNFAPI.PROFILE_SECTIONS)
+    assert len(paths) == 1 + len(DNFAPI.PROFILE_SECTIONS)
+
+
+async def test_search_without_match_returns_none():
+    api = DNFAPI("test_key")
+
+    async def fake_request(path, description, params=None):
+        return {"rows": []}
+
+    api._request = fake_request
+    assert await api.search_character("없는캐릭터", "카인") is None
@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.services.api.exchange import ExchangeAPI, RateMatrix
+from src.services.exchange_history import ExchangeHistoryStore
+
+
+def test_matrix_converts_between_any_pair():
+    """Cross rates go through KRW in both directions"""
+    matrix = RateMatrix({"USD": 1400.0, "JPY": 9.5}, fetched_at=0)
+    assert matrix.convert(1, "USD", "KRW") == pytest.approx(1400.0)
+    assert matrix.convert(14000, "KRW", "usd") == pytest.approx(10.0)
+    assert matrix.convert(1, "USD", "JPY") == pytest.approx(1400.0 / 9.5)
+    assert matrix.rate("JPY", "JPY") == pytest.approx(1.0)
+    assert matrix.krw_rates() == {"JPY": pytest.approx(9.5), "USD": pytest.approx(1400.0)}
+    with pytest.raises(ValueError):
+        matrix.convert(1, "USD", "XYZ")
+
+
+def test_history_keeps_one_rate_per_day():
+    """Later rates of a day replace earlier ones, and changes span the window"""
+    store = ExchangeHistoryStore(":memory:", retention_days=30)
+    today = date(2026, 10, 18)
+    store.record({"USD": 1300.0}, day=today - timedelta(days=6))
+    store.record({"USD": 1350.0}, day=today)
+    store.record({"USD": 1430.0}, day=today)
+
+    assert store.get_history("USD", days=7, today=today) == [
+        ((today - timedelta(days=6)).isoformat(), 1300.0),
+        (today.isoformat(), 1430.0),
+    ]
+    assert store.get_change("USD", days=7, today=today) == pytest.approx(10.0)
+    assert store.get_change("USD", days=1, today=today) is None
+
+    store.compact(today=today + timedelta(days=27))
+    assert store.get_history("USD", days=60, today=today) == [(today.isoformat(), 1430.0)]
+
+
+async def test_rates_are_served_without_refetching():
+    """Commands read the refreshed matrix instead of calling the API"""
+    api = ExchangeAPI(history_store=ExchangeHistoryStore(":memory:"))
+    api._make_request = AsyncMock(return_value={"rates": {"KRW": 1.0, "USD": 0.0008, "EUR": 0.0005}})
+
+    rates = await api.get_exchange_rates()
+    assert rates == {"EUR": pytest.approx(2000.0), "USD": pytest.approx(1250.0)}
+    assert await api.convert(1, "EUR", "USD") == pytest.approx(1.6)
+    await api.get_exchange_rates()
+    assert api._make_request.await_count == 1
+    assert [rate for _, rate in await api.get_rate_history("usd")] == [pytest.approx(1250.0)]
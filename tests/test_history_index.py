@@ -0,0 +1,25 @@
+from src.services.api.history_index import SearchRetentionIndex
+
+
+def _turn(search: bool):
+    content = [{"type": "text", "text": "답변"}]
+    if search:
+        content.insert(0, {"type": "web_search_tool_result", "content": []})
+    return [{"role": "user", "content": "질문"}, {"role": "assistant", "content": content}]
+
+
+def test_index_scans_incrementally_and_rebuilds_on_replacement():
+    index = SearchRetentionIndex()
+    messages = _turn(True) + _turn(False)
+    index.sync(messages)
+    assert index.pending == 1 and index.pop_expired(retention_turns=2) == []
+
+    messages += _turn(True)
+    index.sync(messages)
+    expired = index.pop_expired(retention_turns=2)
+    assert expired == [messages[1]] and index.pending == 1
+
+    # A copied history (e.g. rehydrated from disk) is indexed from scratch
+    copied = [dict(message) for message in messages]
+    index.sync(copied)
+    assert index.pop_expired(retention_turns=1) == [copied[1]]
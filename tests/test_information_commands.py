@@ -121,6 +121,7 @@ class TestInformationCommands:
             'JPY': 11.0,
         }
         bot._api_service.exchange.get_exchange_rates = AsyncMock(return_value=mock_rates)
+        bot._api_service.exchange.get_rate_change = AsyncMock(return_value=1.5)
 
         test_cases = [
             ("!!환율", "환율", None),
@@ -168,6 +169,80 @@ class TestInformationCommands:
             assert isinstance(last_embed, discord.Embed), "Last call should have an embed"
             assert "💱" in last_embed.title, "Exchange rate embed should have currency symbol in title"
 
+    async def test_game_embed_shows_store_metadata(self, bot):
+        """Untracked games take the peak, reviews and tags from the store page"""
+        steam = bot._api_service.steam
+        steam.watchlist = set()
+        steam.get_store_metadata = AsyncMock(return_value={
+            'peak_24h': 1234,
+            'review_summary': '매우 긍정적',
+            'review_count': 5000,
+            'review_score': 9,
+            'tags': ['FPS', 'Shooter'],
+        })
+        cog = bot.get_cog("InformationCommands")
+        embed = await cog._create_game_embed({'name': 'Test Game', 'player_count': 10, 'app_id': 730})
+        fields = {field.name: field.value for field in embed.fields}
+        assert fields["24시간 최고"] == "1,234명"
+        assert fields["평가"] == "매우 긍정적 (5,000개, 9/10)"
+        assert fields["태그"] == "FPS, Shooter"
+
+    async def test_tracked_game_embed_skips_the_store_page(self, bot):
+        """A peak from local history needs no store page request"""
+        steam = bot._api_service.steam
+        steam.watchlist = {730}
+        steam.get_player_history = AsyncMock(return_value={'peak_24h': 4321, 'history': None})
+        steam.get_store_metadata = AsyncMock()
+        cog = bot.get_cog("InformationCommands")
+        embed = await cog._create_game_embed({'name': 'Test Game', 'player_count': 10, 'app_id': 730})
+        fields = {field.name: field.value for field in embed.fields}
+        assert fields["24시간 최고"] == "4,321명"
+        steam.get_store_metadata.assert_not_called()
+
+    async def test_steam_chart_command(self, bot, mock_context):
+        """Tracked games get a chart attachment; untracked games get a hint"""
+        game = {'name': 'Test Game', 'player_count': 10, 'image_url': None, 'app_id': 730}
+        steam = bot._api_service.steam
+        steam.find_game = AsyncMock(return_value=(game, 1.0, []))
+        steam.get_player_history = AsyncMock(return_value={
+            'peak_24h': 300,
+            'history': [(1_700_000_000, 100), (1_700_003_600, 300)],
+        })
+        command = bot.get_command("스팀기록")
+        assert command is not None
+
+        steam.watchlist = set()
+        mock_context.reset_mock()
+        await command(mock_context, game_name="Test Game")
+        assert "file" not in mock_context.send.call_args.kwargs
+        steam.get_player_history.assert_not_called()
+
+        steam.watchlist = {730}
+        mock_context.reset_mock()
+        await command(mock_context, game_name="Test Game")
+        kwargs = mock_context.send.call_args.kwargs
+        assert isinstance(kwargs["file"], discord.File)
+        assert kwargs["embed"].image.url == "attachment://players.png"
+
+    async def test_dnf_command_sends_character_card(self, bot, mock_context):
+        """The DNF command renders the concurrently fetched profile"""
+        bot._api_service.api_states['dnf'] = True
+        bot._api_service.dnf.search_character = AsyncMock(return_value={
+            'server': 'cain',
+            'basic': {'characterId': 'abc', 'characterName': '테스트', 'level': 115, 'fame': 50000},
+            'equipment': {'equipment': [{'slotName': '무기', 'itemName': '검', 'reinforce': 12}]},
+            'creature': {'creature': {'itemName': '크리쳐'}},
+        })
+        command = bot.get_command("던파")
+        await command(mock_context, "테스트")
+
+        embed = mock_context.send.call_args.kwargs["embed"]
+        fields = {field.name: field.value for field in embed.fields}
+        assert embed.title == "⚔️ 테스트"
+        assert fields["명성"] == "50,000"
+        assert fields["장비"] == "**무기** +12 검"
+        bot._api_service.dnf.search_character.assert_awaited_once_with("테스트", "all")
+
     async def test_weather_command_removed(self, bot, mock_context):
         """Test that weather command is properly removed"""
         test_cases = [
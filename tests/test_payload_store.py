@@ -0,0 +1,40 @@
+from src.utils.cache import PayloadStore
+
+
+def test_evicts_least_recently_used_by_bytes():
+    """The byte budget, not the entry count, bounds the store"""
+    store = PayloadStore(max_bytes=300, ttl=60)
+    store.add("a", "가" * 40)  # 120 bytes in UTF-8
+    store.add("b", "b" * 120)
+    assert store.get("a") is not None  # "b" becomes least recently used
+    store.add("c", "c" * 100)
+
+    assert "b" not in store and "a" in store and "c" in store
+    assert store.total_bytes == 220
+    assert store.stats()["evictions"] == 1
+
+
+def test_entries_expire_lazily_after_the_ttl(clock):
+    """Entries stay readable for the whole TTL and are dropped once touched after it"""
+    store = PayloadStore(max_bytes=1000, ttl=24 * 60 * 60, timer=clock)
+    store.add("a", "첫 번째")
+    store.add("b", "두 번째")
+
+    clock.now = 60 * 60  # Well past a 30-minute chat session
+    assert store.get("a") == "첫 번째"
+
+    clock.now = 24 * 60 * 60 + 1
+    assert store.get_entry_count() == 2  # Still held until touched
+    assert "a" not in store and store.get("b") is None
+    assert store.total_bytes == 0
+
+
+def test_large_values_are_compressed():
+    """Compressed payloads count their compressed size and read back intact"""
+    thinking = "오리지늄 감염 경로를 먼저 정리해 보자. " * 400
+    store = PayloadStore(max_bytes=20000, ttl=60, compress_threshold=4096)
+    store.add("t", thinking)
+
+    assert store.total_bytes < len(thinking.encode("utf-8")) // 10
+    assert store["t"] == thinking
+    assert store.stats()["raw_bytes"] == len(thinking.encode("utf-8"))
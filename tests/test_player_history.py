@@ -0,0 +1,46 @@
+from src.services.player_history import PlayerHistoryStore
+
+
+def test_recent_history_uses_raw_samples():
+    """Short windows return raw samples in order"""
+    store = PlayerHistoryStore(":memory:")
+    base = 1_700_000_000
+    for i, players in enumerate([100, 300, 200]):
+        store.record(730, players, ts=base + i * 300)
+
+    history = store.get_history(730, hours=1, now=base + 900)
+    assert history == [(base, 100), (base + 300, 300), (base + 600, 200)]
+    assert store.get_peak(730, hours=1, now=base + 900) == 300
+    assert store.get_peak(570, hours=1, now=base + 900) == 0
+    assert store.has_data(730, hours=1, now=base + 900)
+
+    # A sample in the window's first hour bucket but before its start is not data
+    assert store.get_peak(730, hours=1, now=base + 4201) == 0
+    assert not store.has_data(730, hours=1, now=base + 4201)
+
+
+def test_rollups_survive_compaction():
+    """Old raw samples are dropped while hourly rollups remain"""
+    store = PlayerHistoryStore(":memory:", raw_retention=3600)
+    base = 1_700_000_000 - 1_700_000_000 % 3600
+    store.record_many([(730, 100), (570, 50)], ts=base)
+    store.record_many([(730, 300), (570, 70)], ts=base + 600)
+
+    store.compact(now=base + 7200)
+
+    assert store.get_history(730, hours=1, now=base + 7200) == []
+    assert store.get_history(730, hours=3, now=base + 7200) == [(base, 200)]
+    assert store.get_peak(730, hours=3, now=base + 7200) == 300
+    assert store.has_data(570, hours=3, now=base + 7200)
+    # Apps no longer sampled have no data in recent windows
+    assert not store.has_data(570, hours=24, now=base + 48 * 3600)
+
+
+def test_watchlist_persistence():
+    """Watch-list entries can be added and removed"""
+    store = PlayerHistoryStore(":memory:")
+    store.add_to_watchlist(730)
+    store.add_to_watchlist(730)
+    store.add_to_watchlist(570)
+    store.remove_from_watchlist(570)
+    assert store.get_watchlist() == {730}
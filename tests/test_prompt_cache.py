@@ -0,0 +1,67 @@
+import json
+from types import SimpleNamespace
+
+from src.services.api.prompt_cache import CacheBreakpointPlanner
+
+
+def _breakpoints(messages):
+    return [
+        i for i, message in enumerate(messages)
+        if isinstance(message["content"], list) and "cache_control" in message["content"][-1]
+    ]
+
+
+def test_date_stays_out_of_cached_system_blocks():
+    blocks = CacheBreakpointPlanner().system_blocks("persona", "summary", "Today's date is May 01 2025.")
+    assert [block.get("cache_control") is not None for block in blocks] == [True, True, False]
+    assert blocks[-1]["text"].startswith("Today's date")
+
+
+def test_reads_previous_boundary_and_writes_new_one():
+    """Each turn reads the prefix the previous turn wrote, without touching stored history"""
+    planner = CacheBreakpointPlanner(min_tokens=100)
+    history = [{"role": "user", "content": "첫 질문"}]
+    sent = planner.plan_messages(1, history, prompt_tokens=500, system_breakpoints=1)
+    assert _breakpoints(sent) == [0]
+    assert history[0]["content"] == "첫 질문"
+
+    history += [{"role": "assistant", "content": [{"type": "text", "text": "답"}]},
+                {"role": "user", "content": "다음 질문"}]
+    sent = planner.plan_messages(1, history, prompt_tokens=600, system_breakpoints=2)
+    assert _breakpoints(sent) == [0, 2]
+
+    # Trimmed history no longer matches the old boundary
+    sent = planner.plan_messages(1, history[1:], prompt_tokens=600, system_breakpoints=1)
+    assert _breakpoints(sent) == [1]
+
+
+def test_rehydrated_history_still_reads_the_boundary():
+    """A history reloaded from a spill file holds new objects but the same content"""
+    planner = CacheBreakpointPlanner(min_tokens=100)
+    history = [{"role": "user", "content": "첫 질문"},
+               {"role": "assistant", "content": [{"type": "text", "text": "답"}]}]
+    planner.plan_messages(1, history, prompt_tokens=500, system_breakpoints=1)
+
+    rehydrated = json.loads(json.dumps(history)) + [{"role": "user", "content": "다음 질문"}]
+    edited = json.loads(json.dumps(rehydrated))
+    edited[1]["content"][0]["text"] = "바뀐 답"
+    assert _breakpoints(planner.plan_messages(2, history, 500, 1)) == [1]
+    assert _breakpoints(planner.plan_messages(2, edited, 600, 1)) == [2]  # Same position, new content
+
+    sent = planner.plan_messages(1, rehydrated, prompt_tokens=600, system_breakpoints=1)
+    assert _breakpoints(sent) == [1, 2]
+
+
+def test_small_prompts_and_slow_sessions_skip_writes(clock):
+    planner = CacheBreakpointPlanner(min_tokens=1000, cache_ttl=300, timer=clock)
+    history = [{"role": "user", "content": "안녕"}]
+    assert _breakpoints(planner.plan_messages(1, history, 200, 1)) == []
+
+    for _ in range(3):
+        clock.now += 900  # Replies arrive after the cache has expired
+        sent = planner.plan_messages(1, history, 2000, 1)
+    assert _breakpoints(sent) == []
+    assert planner.stats()["skipped_writes"] >= 1
+
+    planner.record(1, SimpleNamespace(cache_read_input_tokens=300, cache_creation_input_tokens=0, input_tokens=100))
+    assert planner.session_stats(1).read_ratio == 0.75
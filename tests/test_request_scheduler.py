@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from src.services.api.request_scheduler import AIRequestScheduler, RequestRejectedError
+
+
+@pytest.mark.asyncio
+async def test_fair_order_across_guilds_and_users():
+    """Queued requests alternate between guilds, then between users of a guild"""
+    scheduler = AIRequestScheduler(max_concurrent=1, max_pending_per_user=5)
+    gate = asyncio.Event()
+    order = []
+
+    async def blocker():
+        await gate.wait()
+
+    def work(name):
+        async def run():
+            order.append(name)
+        return run
+
+    first = asyncio.create_task(scheduler.submit(0, blocker, guild_id=1))
+    await asyncio.sleep(0)
+    waiting = [
+        asyncio.create_task(scheduler.submit(user, work(name), guild_id=guild))
+        for user, guild, name in [(1, 1, "a1"), (1, 1, "a2"), (2, 1, "b1"), (3, 2, "c1")]
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.stats()["queued"] == 4
+    assert scheduler.position(3) == 2
+
+    gate.set()
+    await asyncio.gather(first, *waiting)
+    assert order == ["a1", "c1", "b1", "a2"]
+    assert scheduler.stats()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_positions_and_cancellation():
+    """Waiting requests see their position and end_chat cancels running and queued work"""
+    scheduler = AIRequestScheduler(max_concurrent=1)
+    positions = []
+
+    async def forever():
+        await asyncio.Event().wait()
+
+    async def on_position(position):
+        positions.append(position)
+
+    running = asyncio.create_task(scheduler.submit(1, forever))
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(scheduler.submit(1, forever, on_position=on_position))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert positions == [1]
+
+    with pytest.raises(RequestRejectedError):
+        await scheduler.submit(1, forever)
+
+    assert scheduler.cancel_user(1) == 2
+    for task in (running, queued):
+        with pytest.raises(RequestRejectedError):
+            await task
+    stats = scheduler.stats()
+    assert stats["running"] == 0 and stats["queued"] == 0 and stats["cancelled"] == 2
+
+
+@pytest.mark.asyncio
+async def test_degraded_limit():
+    """Only the degraded number of requests run while the backend is slowed down"""
+    degraded = True
+    scheduler = AIRequestScheduler(max_concurrent=3, degraded_concurrent=1, degraded=lambda: degraded)
+    gate = asyncio.Event()
+
+    async def blocker():
+        await gate.wait()
+
+    tasks = [asyncio.create_task(scheduler.submit(user, blocker)) for user in range(3)]
+    await asyncio.sleep(0)
+    assert scheduler.stats()["running"] == 1 and scheduler.stats()["queued"] == 2
+
+    degraded = False
+    gate.set()
+    await asyncio.gather(*tasks)
+    assert scheduler.stats()["completed"] == 3
+
+
+@pytest.mark.asyncio
+async def test_rejected_users_leave_no_state():
+    """A full queue rejects new users without tracking them"""
+    scheduler = AIRequestScheduler(max_concurrent=1, max_queue=1)
+    gate = asyncio.Event()
+
+    async def blocker():
+        await gate.wait()
+
+    tasks = [asyncio.create_task(scheduler.submit(user, blocker)) for user in (1, 2)]
+    await asyncio.sleep(0)
+    for user in range(3, 13):
+        with pytest.raises(RequestRejectedError):
+            await scheduler.submit(user, blocker)
+    assert set(scheduler._active) == {1, 2}
+
+    gate.set()
+    await asyncio.gather(*tasks)
+    assert not scheduler._active
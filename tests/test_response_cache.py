@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from src.services.api.response_cache import ResponseCache, is_cacheable_prompt, normalize_prompt
+
+
+def test_normalized_exact_and_similar_hits():
+    """Punctuation/spacing variants hit exactly, near-duplicates hit through MinHash"""
+    cache = ResponseCache(similarity_threshold=0.6)
+    cache.put("명일방주 로도스 아일랜드에 대해 설명해줘", "로도스는...", prompt_tokens=100, response_tokens=50)
+
+    assert normalize_prompt("명일방주  로도스 아일랜드에 대해 설명해줘!!") == normalize_prompt(
+        "명일방주 로도스 아일랜드에 대해 설명해줘"
+    )
+    assert cache.get("명일방주  로도스 아일랜드에 대해 설명해줘!!").response == "로도스는..."
+    assert cache.get("명일방주 로도스아일랜드에 대해서 설명해줘").response == "로도스는..."
+    assert cache.get("오리지늄이 뭐야") is None
+
+    stats = cache.stats()
+    assert stats["exact_hits"] == 1 and stats["similar_hits"] == 1 and stats["misses"] == 1
+    assert stats["saved_prompt_tokens"] == 200 and stats["saved_response_tokens"] == 100
+
+
+def test_search_replies_expire_sooner(clock):
+    """Web-search grounded replies use the shorter TTL"""
+    clock.now = datetime(2025, 1, 1, 12).timestamp()  # Local noon, far from the midnight cutoff
+    cache = ResponseCache(ttl=3 * 86400, search_ttl=60, timer=clock)
+    cache.put("오늘 환율 알려줘", "1달러는...", used_search=True)
+    cache.put("오리지늄이 뭐야", "광석이야")
+
+    clock.now += 120
+    assert cache.get("오늘 환율 알려줘") is None
+    assert cache.get("오리지늄이 뭐야") is not None
+
+    clock.now = datetime(2025, 1, 2, 0, 1).timestamp()
+    assert cache.get("오리지늄이 뭐야") is None  # Replies never outlive the local day
+
+
+def test_personal_prompts_are_not_cacheable():
+    assert is_cacheable_prompt("오늘 날짜 알려줘")
+    assert not is_cacheable_prompt("내 이름 기억해?")
+    assert not is_cacheable_prompt("아까 말한 거 다시 설명해줘")
+    assert not is_cacheable_prompt("이 링크 요약해줘 https://example.com")
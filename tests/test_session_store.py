@@ -0,0 +1,114 @@
+import pytest
+
+from src.services.api.session_store import ChatSessionStore, SessionExpiryQueue
+
+
+def _history(text: str):
+    return [{"role": "user", "content": text}, {"role": "assistant", "content": [{"type": "text", "text": text}]}]
+
+
+async def test_lru_spill_and_rehydrate(tmp_path):
+    """Idle sessions spill to disk over budget and come back through load"""
+    store = ChatSessionStore(max_bytes=600, spill_dir=str(tmp_path / "sessions"))
+    store[1] = _history("a" * 100)
+    store[2] = _history("b" * 100)
+    store[1]  # Touch 1 so 2 becomes least recently used
+    store[3] = _history("c" * 100)
+
+    stats = store.stats()
+    assert stats["spilled_sessions"] == 1 and 2 in store and len(store) == 3
+    assert set(store.session_bytes()) == {1, 3}
+    assert store.total_bytes <= 600
+    await store.flush()
+
+    with pytest.raises(KeyError):
+        store[2]  # Indexing never reads the spill file
+    assert store.get(2) is None and 2 in store
+    assert await store.load(2) == _history("b" * 100)
+    assert store.rehydrations == 1
+    assert 2 in store.session_bytes()
+
+    del store[2]
+    assert 2 not in store
+    assert not any((tmp_path / "sessions").glob("2-*.json.z"))
+
+
+def test_expiry_queue_uses_latest_touch():
+    """Only sessions idle past the TTL since their last touch expire"""
+    now = [0.0]
+    queue = SessionExpiryQueue(ttl=10, timer=lambda: now[0])
+    queue.touch(1)
+    queue.touch(2)
+    now[0] = 8
+    queue.touch(1)
+    queue.touch(3)
+    queue.discard(3)
+
+    now[0] = 12
+    assert queue.pop_expired() == [2]
+    assert not queue.is_expired(1) and 1 in queue
+    now[0] = 20
+    assert queue.pop_expired() == [1]
+    assert len(queue) == 0
+
+
+def test_resize_after_in_place_edit(tmp_path):
+    store = ChatSessionStore(max_bytes=10_000)
+    history = _history("a" * 500)
+    store[1] = history
+    before = store.total_bytes
+    history[1]["content"] = []
+    assert store.total_bytes == before
+    store.resize(1)
+    assert store.total_bytes < before - 400
+    assert store.session_bytes()[1] == store.total_bytes
+
+
+async def test_spill_io_runs_off_the_loop(tmp_path):
+    """Inside a loop sessions are written in the background and loaded with load()"""
+    spill_dir = tmp_path / "sessions"
+    store = ChatSessionStore(max_bytes=600, spill_dir=str(spill_dir))
+    store[1] = _history("a" * 100)
+    store[2] = _history("b" * 100)
+    store[3] = _history("c" * 100)
+    assert 1 in store and store.stats()["spilled_sessions"] == 1
+    assert not any(spill_dir.glob("*.json.z"))  # Not written yet
+
+    await store.flush()
+    assert len(list(spill_dir.glob("1-*.json.z"))) == 1
+
+    assert await store.load(1) == _history("a" * 100)
+    assert store.rehydrations == 1
+    assert await store.load(4) is None
+    await store.flush()
+    assert len(store) == 3
+
+
+async def test_session_read_back_while_spilling(tmp_path):
+    spill_dir = tmp_path / "sessions"
+    store = ChatSessionStore(max_bytes=600, spill_dir=str(spill_dir))
+    first = store[1] = _history("a" * 100)
+    store[2] = _history("b" * 100)
+    store[3] = _history("c" * 100)
+    assert store[1] is first  # Back before the write finished
+    await store.flush()
+    assert not any(spill_dir.glob("1-*.json.z"))
+    assert store.stats()["spilled_sessions"] == 1
+
+
+async def test_only_own_spill_files_are_deleted(tmp_path):
+    spill_dir = tmp_path / "sessions"
+    spill_dir.mkdir()
+    (spill_dir / "notes.txt").write_text("keep")
+    (spill_dir / "9-1.json.z").write_bytes(b"stale")
+
+    store = ChatSessionStore(max_bytes=600, spill_dir=str(spill_dir))
+    assert (spill_dir / "9-1.json.z").exists()  # Creating a store deletes nothing
+    store[1] = _history("a" * 100)
+    store[2] = _history("b" * 100)
+    store[3] = _history("c" * 100)
+    await store.flush()
+
+    assert store.purge_stale_spills() == 1
+    assert sorted(path.name for path in spill_dir.iterdir()) == ["1-1.json.z", "notes.txt"]
+    assert await store.load(1) == _history("a" * 100)
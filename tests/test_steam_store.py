@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from src.services.api.steam_store import StorePageParser
+
+PAGE = (Path(__file__).parent / "fixtures" / "steam_store_page.html").read_bytes()
+
+
+def _parse(data: bytes, chunk_size: int) -> StorePageParser:
+    parser = StorePageParser()
+    for start in range(0, len(data), chunk_size):
+        if parser.feed(data[start:start + chunk_size]):
+            break
+    return parser
+
+
+def test_extracts_every_field_in_small_chunks():
+    """Fields split across chunks (including multibyte characters) are still found"""
+    for chunk_size in (7, 64, 1024, len(PAGE)):
+        metadata = _parse(PAGE, chunk_size).close()
+        assert metadata == {
+            "peak_24h": 1234567,
+            "review_summary": "매우 긍정적",
+            "review_count": 8123456,
+            "review_score": 9,
+            "tags": ["FPS", "슈팅", "Multiplayer", "Tactical & Strategy"],
+        }, chunk_size
+
+
+def test_stops_at_the_purchase_area():
+    """Parsing completes at the purchase area without reading the rest of the page"""
+    marker = PAGE.index(b'id="game_area_purchase"')
+    parser = StorePageParser()
+    assert parser.feed(PAGE[:marker + 64])
+    assert parser.done
+    assert parser.feed(b"<p>24-hour peak: 5</p>")  # Ignored once done
+    assert parser.close()["peak_24h"] == 1234567
+
+
+def test_close_flushes_a_match_at_the_end_of_the_input():
+    """A peak touching the end of the last chunk is emitted by close()"""
+    parser = StorePageParser()
+    assert not parser.feed("<div>24-hour peak: 98,765".encode())
+    assert parser.metadata["peak_24h"] == 0
+    assert parser.close()["peak_24h"] == 98765
+
+
+def test_missing_fields_keep_defaults():
+    metadata = _parse(b"<html><body>Not a store page</body></html>", 16).close()
+    assert metadata["peak_24h"] == 0
+    assert metadata["review_summary"] is None
+    assert metadata["tags"] == []
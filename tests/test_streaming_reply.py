@@ -0,0 +1,166 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import discord
+import pytest
+
+from src.commands.ai import AICommands, ProgressiveReply
+from src.services.api.claude import ClaudeAPI
+
+
+class FakeMessage:
+    def __init__(self) -> None:
+        self.edits = []
+        self.edit = AsyncMock(side_effect=lambda **kwargs: self.edits.append(kwargs))
+        self.delete = AsyncMock()
+
+
+@pytest.fixture
+def message():
+    return FakeMessage()
+
+
+@pytest.fixture
+def reply(message, monkeypatch):
+    monkeypatch.setattr(ProgressiveReply, "EDIT_INTERVAL", 0.05)
+    return ProgressiveReply(AsyncMock(return_value=message))
+
+
+async def test_updates_are_coalesced_between_edits(reply, message):
+    """A burst of tokens results in one send and no edits until the interval passes"""
+    await reply.update("가")
+    await asyncio.sleep(0)
+    for i in range(2, 50):
+        await reply.update("가" * i)
+        await asyncio.sleep(0)
+    reply._send.assert_awaited_once()
+    assert reply._send.await_args.kwargs["embed"].description == "가" + ProgressiveReply.CURSOR
+    assert message.edits == []
+
+    await asyncio.sleep(ProgressiveReply.EDIT_INTERVAL * 1.5)
+    assert len(message.edits) == 1
+    assert message.edits[0]["embed"].description == "가" * 49 + ProgressiveReply.CURSOR
+
+    # Nothing new to show, so the loop does not edit again
+    await asyncio.sleep(ProgressiveReply.EDIT_INTERVAL * 2)
+    assert len(message.edits) == 1
+    await reply.abort()
+
+
+async def test_finish_replaces_the_preview(reply, message):
+    await reply.update("미리보기")
+    await asyncio.sleep(0)
+    final = discord.Embed(description="완성")
+    assert await reply.finish(final)
+    assert message.edits[-1]["embed"] is final
+    assert reply._task.done()
+
+    # Updates after finishing never restart the loop
+    await reply.update("늦은 토큰")
+    await asyncio.sleep(ProgressiveReply.EDIT_INTERVAL * 2)
+    assert message.edits[-1]["embed"] is final
+
+
+async def test_finish_without_preview_leaves_sending_to_the_caller(reply):
+    assert not await reply.finish(discord.Embed(description="완성"))
+    reply._send.assert_not_awaited()
+
+
+async def test_failed_final_edit_reports_fallback(reply, message):
+    await reply.update("미리보기")
+    await asyncio.sleep(0)
+    message.edit.side_effect = discord.HTTPException(MagicMock(status=500), "error")
+    assert not await reply.finish(discord.Embed(description="완성"))
+
+
+async def test_failed_preview_edits_do_not_stop_the_loop(reply, message):
+    await reply.update("하나")
+    await asyncio.sleep(0)
+    message.edit.side_effect = [RuntimeError("edit failed"), None]
+    await reply.update("하나 둘")
+    await asyncio.sleep(ProgressiveReply.EDIT_INTERVAL * 1.5)
+    await reply.update("하나 둘 셋")
+    await asyncio.sleep(ProgressiveReply.EDIT_INTERVAL * 1.5)
+    assert message.edit.await_count == 2
+    assert not reply._task.done()
+    await reply.abort()
+
+
+async def test_abort_deletes_the_preview(reply, message):
+    await reply.update("미리보기")
+    await asyncio.sleep(0)
+    await reply.abort()
+    message.delete.assert_awaited_once()
+    assert reply._task.done()
+
+
+class FakeStream:
+    def __init__(self, texts, final) -> None:
+        self._events = [SimpleNamespace(type="text", text=text) for text in texts]
+        self._final = final
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for event in self._events:
+            yield event
+
+    async def get_final_message(self):
+        return self._final
+
+
+@pytest.fixture
+def claude(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MUMU_DATA_DIR", str(tmp_path))
+    return ClaudeAPI("test_key")
+
+
+async def test_stream_message_reports_accumulated_text(claude):
+    final = object()
+    claude._client = MagicMock()
+    claude._client.messages.stream = MagicMock(return_value=FakeStream(["안녕", "하세요\n", "반가워"], final))
+    snapshots = []
+
+    async def on_text(text):
+        snapshots.append(text)
+
+    assert await claude._stream_message({"model": "test"}, on_text) is final
+    assert len(snapshots) == 3
+    assert snapshots[-1].replace("\n", "").startswith("안녕하세요")
+    assert "반가워" in snapshots[-1]
+    assert claude.request_metrics.snapshot()["endpoints"]["messages.first_token"]["latency"]["count"] == 1
+
+
+async def test_stream_message_survives_callback_errors(claude):
+    final = object()
+    claude._client = MagicMock()
+    claude._client.messages.stream = MagicMock(return_value=FakeStream(["a", "b"], final))
+    on_text = AsyncMock(side_effect=RuntimeError("discord down"))
+
+    assert await claude._stream_message({"model": "test"}, on_text) is final
+    assert on_text.await_count == 2
+
+
+async def test_chunked_reply_finalizes_the_preview_before_the_rest(reply, message):
+    """If the final edit fails, the fallback first chunk still comes first"""
+    await reply.update("미리보기")
+    await asyncio.sleep(0)
+    message.edit.side_effect = discord.HTTPException(MagicMock(status=500), "error")
+    sent = []
+
+    async def send(embed, view=None):
+        sent.append(embed.description)
+
+    response = "\n\n".join(f"문단 {i} " + "가" * 3000 for i in range(3))
+    await AICommands()._send_chunked_reply(send, response, reply=reply)
+    assert len(sent) == 3
+    assert [chunk.split()[1] for chunk in sent] == ["0", "1", "2"]
@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from src.services.system_monitor import HealthSnapshot, SystemMonitor
+
+
+def test_sample_publishes_snapshot():
+    """Sampling replaces the shared snapshot without blocking"""
+    monitor = SystemMonitor(interval=30)
+    assert monitor.snapshot == HealthSnapshot()
+
+    snapshot = monitor.sample()
+    assert monitor.snapshot is snapshot
+    assert snapshot.cpu_percent == 50.0
+    assert snapshot.memory_percent == 60.0
+    assert snapshot.sampled_at > 0
+
+
+@pytest.mark.asyncio
+async def test_listeners_receive_samples_until_unsubscribed():
+    """Subscribers are called from the background task, which stops with the last one"""
+    monitor = SystemMonitor(interval=0.01)
+    received = []
+
+    async def listener(snapshot: HealthSnapshot) -> None:
+        received.append(snapshot)
+
+    monitor.subscribe(listener)
+    await asyncio.sleep(0.05)
+    assert received and received[-1] is monitor.snapshot
+
+    await monitor.unsubscribe(listener)
+    assert monitor._task is None
+    count = len(received)
+    await asyncio.sleep(0.03)
+    assert len(received) == count
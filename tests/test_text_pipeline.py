@@ -0,0 +1,57 @@
+from src.services.api.text_pipeline import ResponseFormatter, format_sources, format_thinking
+
+REPLY = """
+
+오리지늄은 광석이야.
+설명은 다음과 같아:
+- 감염 위험이 있어 [1]
+
+
+**주의할 점**
+```
+x  =  1
+
+y = 2
+```
+H<sub>2</sub>O 같은 거야 [2]
+"""
+
+
+def test_formats_in_one_pass_and_keeps_code_untouched():
+    """Citations, paragraph rules and scripts apply outside code blocks only"""
+    links = {1: "[**[1]**](https://example.com)"}
+    formatted = ResponseFormatter(citation_links=links).format(REPLY)
+
+    assert formatted == (
+        "오리지늄은 광석이야.\n"
+        "설명은 다음과 같아:\n\n"
+        "- 감염 위험이 있어 [**[1]**](https://example.com)\n\n"
+        "**주의할 점**\n"
+        "```text\n"
+        "x  =  1\n"
+        "\n"
+        "y = 2\n"
+        "```\n"
+        "H_2_O 같은 거야 [2]"
+    )
+
+
+def test_incremental_feed_matches_whole_text():
+    formatter = ResponseFormatter(decorate=True, spaced=True, mark_sources=True)
+    streamed = "".join(formatter.feed(REPLY[i:i + 7]) for i in range(0, len(REPLY), 7))
+    streamed += formatter.flush()
+
+    expected = ResponseFormatter(decorate=True, spaced=True, mark_sources=True).format(REPLY)
+    assert streamed == expected
+    assert "• 감염 위험이 있어 [1]" in expected
+    assert expected.endswith("\n\n**Sources:**")
+
+
+def test_sources_and_thinking_formatting():
+    links = [("로도스", "https://a.example", "a.example")] * 2 + [("라인 랩", "https://b.example", "b.example")]
+    sources = format_sources(links)
+    assert sources.count("https://a.example") == 1 and sources.startswith("**Sources:**")
+
+    thinking = format_thinking("첫 번째 생각이야. " * 200)
+    assert thinking.startswith("**추론 과정**") and len(thinking) <= 1800
+    assert thinking.count("```") % 2 == 0
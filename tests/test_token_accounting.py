@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+from src.services.api.token_accounting import TokenAccountant
+
+
+def _estimator(messages):
+    return sum(len(str(message["content"])) for message in messages)
+
+
+def _turn(accountant, history, text, prompt_total, layout=None):
+    """Send a user turn and record the response usage"""
+    history.append({"role": "user", "content": text})
+    reply = {"role": "assistant", "content": "ok"}
+    usage = SimpleNamespace(input_tokens=prompt_total, output_tokens=5)
+    accountant.observe_usage(1, list(history), reply, usage, layout)
+    history.append(reply)
+
+
+def test_cached_counts_match_the_real_prompt_total():
+    accountant = TokenAccountant(_estimator)
+    history = []
+    assert accountant.overhead() is None
+    _turn(accountant, history, "a" * 10, 110)
+    assert accountant.overhead() == 100
+
+    # Earlier turns use exact counts and only the new turn is estimated
+    history.append({"role": "user", "content": "b" * 20})
+    assert accountant.estimate(1, history) == 100 + 10 + 5 + 20
+    assert accountant.cached_messages(1) == 2
+
+
+def test_overhead_is_relearned_from_every_response():
+    """Misestimated turns move the average a little at a time"""
+    accountant = TokenAccountant(_estimator)
+    history = []
+    _turn(accountant, history, "a" * 10, 110)
+    # The new turn costs 50 tokens more than its local estimate
+    _turn(accountant, history, "b" * 10, 100 + 15 + 10 + 50)
+    assert accountant.overhead() == 110
+
+    # The rest is attributed to the message, so the cached total stays exact
+    assert accountant.estimate(1, history) == 175 + 5
+
+    for _ in range(30):
+        known = accountant.estimate(1, history) - accountant.overhead()
+        _turn(accountant, history, "c" * 10, 100 + known + 10)
+    assert accountant.overhead() == 100
+
+
+def test_overhead_is_learned_per_layout():
+    """A session summary in the system prompt does not skew other sessions"""
+    accountant = TokenAccountant(_estimator)
+    _turn(accountant, [], "a" * 10, 110)
+    _turn(accountant, [], "a" * 10, 410, layout="summary")
+    assert accountant.overhead() == 100
+    assert accountant.overhead("summary") == 400
+    assert accountant.overhead("unknown") is None
+    message = [{"role": "user", "content": "b" * 10}]
+    assert accountant.estimate(2, message, "summary") == 410
+
+
+def test_oldest_layout_is_forgotten():
+    accountant = TokenAccountant(_estimator)
+    for layout in range(TokenAccountant.MAX_LAYOUTS + 1):
+        _turn(accountant, [], "a", 10, layout)
+    assert accountant.overhead(0) is None
+    assert accountant.overhead(TokenAccountant.MAX_LAYOUTS) == 9
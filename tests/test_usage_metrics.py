@@ -0,0 +1,26 @@
+from src.services.usage_metrics import UsageMetricsStore
+
+
+def test_buckets_roll_and_flush_incrementally(tmp_path):
+    now = [1_700_000_000.0]
+    db_file = str(tmp_path / "usage.db")
+    store = UsageMetricsStore(db_file, timer=lambda: now[0])
+
+    store.record(100, 20)
+    now[0] += 30 * 60
+    store.record(50, 10, thinking_tokens=5)
+    store.update_counters({"total_prompt_tokens": 150})
+
+    assert store.totals("minute", 60)["requests"] == 2
+    assert store.totals("minute", 10)["total_tokens"] == 60
+    assert store.flush() > 0
+    assert store.flush() == 0  # Nothing changed since the last flush
+
+    now[0] += 2 * 3600
+    assert store.totals("minute", 60)["requests"] == 0
+    store.close()
+
+    reloaded = UsageMetricsStore(db_file, timer=lambda: now[0])
+    assert reloaded.totals("hour", 24)["prompt_tokens"] == 150
+    assert reloaded.counters == {"total_prompt_tokens": 150}
+    reloaded.close()